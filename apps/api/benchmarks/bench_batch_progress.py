@@ -0,0 +1,167 @@
+"""
+Benchmark: batch progress accounting with concurrent workers.
+
+Creates a throwaway batch of ``--files`` documents in PostgreSQL and marks
+every document completed (``--fail-every`` of them failed) from ``--workers``
+threads, each with its own event loop and connection pool, in three modes:
+
+- ``recount``: the previous scheme, UPDATE document + COUNT(*) FILTER over the
+  whole batch + UPDATE batch, per document (O(n) per update, O(n^2) per batch)
+- ``single``: ``BatchManager.update_progress`` (one statement, atomic deltas)
+- ``many``: ``BatchManager.update_progress_many`` in groups of ``--group``
+
+Each mode checks that the final batch counters match the documents. The batch
+is deleted afterwards.
+
+Usage:
+    docker compose -f infra/docker/docker-compose.dev.yml up -d postgres
+    python benchmarks/bench_batch_progress.py --files 10000 --workers 8 --group 32
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database import async_postgres
+from database.batch_manager import BatchManager
+
+RECOUNT_STATEMENTS = (
+    """
+    UPDATE batch_documents
+    SET status = $1, chunk_count = $2, error_message = $3, processed_at = NOW()
+    WHERE id = $4
+    """,
+    """
+    SELECT COUNT(*) FILTER (WHERE status = 'completed'),
+           COUNT(*) FILTER (WHERE status = 'failed'),
+           COUNT(*)
+    FROM batch_documents WHERE batch_id = $1
+    """,
+    """
+    UPDATE ingestion_batches
+    SET processed_files = $1, failed_files = $2, status = $3
+    WHERE id = $4
+    """,
+)
+
+
+async def create_batch(files: int) -> tuple:
+    batch_id = uuid.uuid4()
+    doc_ids = [uuid.uuid4() for _ in range(files)]
+    try:
+        async with async_postgres.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    """
+                    INSERT INTO ingestion_batches (id, user_id, name, status, qdrant_collection, total_files)
+                    VALUES ($1, $2, 'bench-progress', 'processing', 'bench', $3)
+                    """,
+                    batch_id, uuid.uuid4(), files,
+                )
+                await conn.executemany(
+                    """
+                    INSERT INTO batch_documents (id, batch_id, filename, source_type, file_size, status)
+                    VALUES ($1, $2, $3, 'file_upload', 1024, 'pending')
+                    """,
+                    [(doc_id, batch_id, f"doc-{index}.txt") for index, doc_id in enumerate(doc_ids)],
+                )
+    finally:
+        await async_postgres.close_pool()
+    return batch_id, doc_ids
+
+
+async def delete_batch(batch_id: uuid.UUID) -> None:
+    try:
+        await async_postgres.execute("DELETE FROM ingestion_batches WHERE id = $1", batch_id)
+    finally:
+        await async_postgres.close_pool()
+
+
+def update(doc_id: uuid.UUID, index: int, fail_every: int) -> dict:
+    if fail_every and index % fail_every == 0:
+        return {"doc_id": doc_id, "status": "failed", "error": "bench"}
+    return {"doc_id": doc_id, "status": "completed", "chunks_count": 10}
+
+
+async def run_worker(mode: str, batch_id: uuid.UUID, updates: list, group: int) -> None:
+    manager = BatchManager()
+    try:
+        if mode == "many":
+            for start in range(0, len(updates), group):
+                await manager.update_progress_many(batch_id, updates[start:start + group])
+        elif mode == "single":
+            for item in updates:
+                await manager.update_progress(
+                    batch_id, item["doc_id"], item["status"], item.get("chunks_count"), item.get("error")
+                )
+        else:
+            doc_query, count_query, batch_query = RECOUNT_STATEMENTS
+            for item in updates:
+                async with async_postgres.acquire() as conn:
+                    async with conn.transaction():
+                        await conn.execute(
+                            doc_query, item["status"], item.get("chunks_count"), item.get("error"), item["doc_id"]
+                        )
+                        completed, failed, total = await conn.fetchrow(count_query, batch_id)
+                        status = "processing" if completed + failed < total else "partial"
+                        await conn.execute(batch_query, completed, failed, status, batch_id)
+    finally:
+        await async_postgres.close_pool()
+
+
+async def fetch_batch(batch_id: uuid.UUID) -> dict:
+    try:
+        return await BatchManager().get_batch(batch_id)
+    finally:
+        await async_postgres.close_pool()
+
+
+def run_mode(mode: str, args: argparse.Namespace) -> None:
+    batch_id, doc_ids = asyncio.run(create_batch(args.files))
+    try:
+        updates = [update(doc_id, index, args.fail_every) for index, doc_id in enumerate(doc_ids)]
+        shards = [updates[worker::args.workers] for worker in range(args.workers)]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(asyncio.run, run_worker(mode, batch_id, shard, args.group)) for shard in shards]
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - started
+
+        batch = asyncio.run(fetch_batch(batch_id))
+        expected_failed = sum(1 for item in updates if item["status"] == "failed")
+        consistent = (
+            batch["processed_files"] == args.files - expected_failed
+            and batch["failed_files"] == expected_failed
+        )
+        print(
+            f"{mode:>8}: {elapsed:7.2f}s  {args.files / elapsed:8.0f} docs/s  "
+            f"status={batch['status']:<10} counters={'ok' if consistent else 'MISMATCH'}"
+        )
+    finally:
+        asyncio.run(delete_batch(batch_id))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--group", type=int, default=32, help="Documents per update_progress_many call")
+    parser.add_argument("--fail-every", type=int, default=50, help="Mark every Nth document failed (0: none)")
+    parser.add_argument("--modes", nargs="+", default=["recount", "single", "many"],
+                        choices=["recount", "single", "many"])
+    args = parser.parse_args()
+
+    print(f"{args.files} files, {args.workers} concurrent workers")
+    for mode in args.modes:
+        run_mode(mode, args)
+
+
+if __name__ == "__main__":
+    main()
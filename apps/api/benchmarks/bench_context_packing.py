@@ -0,0 +1,113 @@
+"""
+Benchmark: prompt size and latency with and without context packing.
+
+Splits a synthetic document with the same splitter settings as the pipeline
+(512 tokens, 80 overlap), simulates a top_k retrieval that favours neighbouring
+chunks (the common case when one document dominates) and compares the context
+sent to the LLM before and after ``pack_context``.
+
+Usage:
+    python benchmarks/bench_context_packing.py --top-k 5 --budget 2048 --runs 200
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from llama_index.core import Document
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.schema import MetadataMode, NodeWithScore
+from llama_index.core.utils import get_tokenizer
+
+from rag.context import pack_context
+
+WORDS = (
+    "anclora retrieval vector chunk embedding qdrant context prompt latency budget "
+    "document query answer source index overlap token score model pipeline"
+).split()
+
+
+def build_nodes(num_chunks: int, seed: int):
+    rng = random.Random(seed)
+    sentences = []
+    while len(sentences) < num_chunks * 40:
+        length = rng.randint(8, 24)
+        sentences.append(" ".join(rng.choice(WORDS) for _ in range(length)).capitalize() + ".")
+
+    document = Document(text=" ".join(sentences), metadata={"document_id": "bench-doc"})
+    nodes = SentenceSplitter(chunk_size=512, chunk_overlap=80).get_nodes_from_documents([document])
+    for idx, node in enumerate(nodes):
+        node.metadata.update(
+            {
+                "document_id": "bench-doc",
+                "uploaded_at": "2025-01-01T00:00:00+00:00",
+                "chunk_index": idx,
+                "content_hash": "0" * 64,
+            }
+        )
+    return nodes
+
+
+def retrieve(nodes, top_k: int, rng: random.Random):
+    """Pick a run of neighbouring chunks plus one random chunk, with descending scores."""
+    start = rng.randint(0, len(nodes) - top_k)
+    picked = nodes[start:start + top_k - 1] + [rng.choice(nodes)]
+    scores = sorted((rng.uniform(0.5, 0.9) for _ in picked), reverse=True)
+    return [NodeWithScore(node=node.model_copy(deep=True), score=score) for node, score in zip(picked, scores)]
+
+
+def naive_context(retrieved) -> str:
+    return "\n\n".join(item.node.get_content(metadata_mode=MetadataMode.LLM) for item in retrieved)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--budget", type=int, default=2048)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=60, help="Chunks in the synthetic document")
+    parser.add_argument(
+        "--prefill-tps",
+        type=float,
+        default=4000.0,
+        help="LLM prompt processing speed (tokens/s) used to estimate latency saved",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    tokenizer = get_tokenizer()
+    nodes = build_nodes(args.chunks, args.seed)
+    rng = random.Random(args.seed)
+
+    naive_tokens, packed_tokens, pack_ms = [], [], []
+    for _ in range(args.runs):
+        retrieved = retrieve(nodes, args.top_k, rng)
+        naive_tokens.append(len(tokenizer(naive_context(retrieved))))
+
+        start = time.perf_counter()
+        _, tokens = pack_context(retrieved, args.budget, tokenizer=tokenizer)
+        pack_ms.append((time.perf_counter() - start) * 1000)
+        packed_tokens.append(tokens)
+
+    avg_naive = statistics.mean(naive_tokens)
+    avg_packed = statistics.mean(packed_tokens)
+    saved = avg_naive - avg_packed
+    saved_ms = saved / args.prefill_tps * 1000
+    overhead_ms = statistics.mean(pack_ms)
+
+    print("=" * 60)
+    print(f"Context packing benchmark ({args.runs} runs, top_k={args.top_k}, budget={args.budget})")
+    print("=" * 60)
+    print(f"Context tokens (naive):   {avg_naive:8.1f}")
+    print(f"Context tokens (packed):  {avg_packed:8.1f}  ({saved / avg_naive * 100:.1f}% smaller)")
+    print(f"Packing overhead:         {overhead_ms:8.3f} ms (p95 {sorted(pack_ms)[int(len(pack_ms) * 0.95)]:.3f} ms)")
+    print(f"Est. prefill saved:       {saved_ms:8.1f} ms @ {args.prefill_tps:.0f} tok/s")
+    print(f"Est. net latency change:  {overhead_ms - saved_ms:+8.1f} ms per query")
+
+
+if __name__ == "__main__":
+    main()
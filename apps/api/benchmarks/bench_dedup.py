@@ -0,0 +1,86 @@
+"""
+Benchmark: near-duplicate lookup latency against a populated Redis LSH index.
+
+Registers ``--documents`` synthetic MinHash signatures (plus chunk SimHashes)
+under a throwaway key prefix, then times ``find_near_duplicate`` and
+``find_boilerplate_chunks`` for fresh documents. Signature computation is
+reported separately since it runs on the worker's CPU, not against Redis.
+
+Usage:
+    docker compose -f infra/docker/docker-compose.dev.yml up -d redis
+    python benchmarks/bench_dedup.py --documents 50000 --runs 1000
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rag import dedup
+
+WORDS = "contrato cláusula arrendamiento pago plazo garantía notificación resolución parte obligación".split()
+
+
+def report(label: str, timings: list) -> None:
+    timings.sort()
+    print(f"{label:<26} mean {statistics.mean(timings):.3f} ms | p50 {timings[len(timings) // 2]:.3f} ms | "
+          f"p99 {timings[int(len(timings) * 0.99)]:.3f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=50_000)
+    parser.add_argument("--chunks-per-document", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=1000)
+    args = parser.parse_args()
+
+    dedup.KEY_PREFIX = "bench_dedup"
+    conn = dedup._redis()
+    dedup.clear_index()
+
+    rng = np.random.default_rng(42)
+    started = time.perf_counter()
+    for document in range(args.documents):
+        signature = rng.integers(0, 1 << 61, size=dedup.NUM_PERM, dtype=np.uint64)
+        simhashes = rng.integers(0, 1 << 63, size=args.chunks_per_document, dtype=np.uint64).tolist()
+        dedup.register_document(f"doc-{document}", signature)
+        dedup.register_chunks(f"doc-{document}", simhashes)
+    print(f"Registered {args.documents} documents in {time.perf_counter() - started:.1f}s "
+          f"({conn.info('memory')['used_memory_human']} used)")
+
+    text = " ".join(random.Random(7).choice(WORDS) + str(i % 50) for i in range(6000))
+    signature_ms = []
+    for _ in range(20):
+        start = time.perf_counter()
+        dedup.minhash_signature(text)
+        signature_ms.append((time.perf_counter() - start) * 1000)
+
+    lookup_ms, chunk_ms = [], []
+    for _ in range(args.runs):
+        signature = rng.integers(0, 1 << 61, size=dedup.NUM_PERM, dtype=np.uint64)
+        start = time.perf_counter()
+        dedup.find_near_duplicate(signature)
+        lookup_ms.append((time.perf_counter() - start) * 1000)
+
+        simhashes = rng.integers(0, 1 << 63, size=args.chunks_per_document, dtype=np.uint64).tolist()
+        start = time.perf_counter()
+        dedup.find_boilerplate_chunks("new-doc", simhashes)
+        chunk_ms.append((time.perf_counter() - start) * 1000)
+
+    print("=" * 60)
+    print(f"Near-duplicate index: {args.documents} documents, {args.runs} lookups")
+    print("=" * 60)
+    report("minhash signature (6k w)", signature_ms)
+    report("find_near_duplicate", lookup_ms)
+    report(f"boilerplate ({args.chunks_per_document} chunks)", chunk_ms)
+
+    dedup.clear_index()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Load test: query latency during a login storm.
+
+Runs an in-process FastAPI app with a cheap ``/query`` endpoint (stands in for
+the real query route, which awaits Qdrant/LLM I/O) and a ``/sign-in`` endpoint
+that verifies a real bcrypt hash the way ``AuthService.authenticate`` does.
+``--query-clients`` clients call ``/query`` back to back while
+``--login-clients`` clients hammer ``/sign-in``; the query p50/p99 is compared
+to a baseline without logins, in two modes:
+
+- ``inline``: ``verify_password`` on the event loop (previous behaviour)
+- ``executor``: ``verify_password_async`` on the bounded bcrypt pool, with
+  saturation answered as 503
+
+Requires no external services; traffic goes through httpx's ASGI transport on
+the same event loop as the app, so any loop stall shows up in query latency.
+
+Usage:
+    python benchmarks/bench_login_storm.py --seconds 10 --login-clients 50 --query-clients 10
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.security import PasswordHasherBusy, hash_password, verify_password, verify_password_async
+
+PASSWORD = "Anclora-bench-1"
+
+
+def build_app(mode: str, hashed: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/query")
+    async def query():
+        await asyncio.sleep(0.002)
+        return {"answer": "ok"}
+
+    @app.post("/sign-in")
+    async def sign_in():
+        if mode == "inline":
+            return {"ok": verify_password(PASSWORD, hashed)}
+        try:
+            return {"ok": await verify_password_async(PASSWORD, hashed)}
+        except PasswordHasherBusy:
+            raise HTTPException(status_code=503, headers={"Retry-After": "1"})
+
+    return app
+
+
+async def client_loop(client: httpx.AsyncClient, method: str, path: str, deadline: float, samples: list) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.request(method, path)
+        samples.append((time.perf_counter() - started, response.status_code))
+        if response.status_code == 503:
+            # Well-behaved clients back off as told
+            await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] * 1000 if ordered else 0.0
+
+
+async def run(mode: str, args: argparse.Namespace, hashed: str, logins: bool) -> None:
+    transport = httpx.ASGITransport(app=build_app(mode, hashed))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        deadline = time.perf_counter() + args.seconds
+        queries: list = []
+        sign_ins: list = []
+        tasks = [client_loop(client, "GET", "/query", deadline, queries) for _ in range(args.query_clients)]
+        if logins:
+            tasks += [client_loop(client, "POST", "/sign-in", deadline, sign_ins) for _ in range(args.login_clients)]
+        await asyncio.gather(*tasks)
+
+    latencies = [elapsed for elapsed, _ in queries]
+    accepted = sum(1 for _, code in sign_ins if code == 200)
+    rejected = sum(1 for _, code in sign_ins if code == 503)
+    label = f"{mode} + logins" if logins else "baseline"
+    print(
+        f"{label:>18}: query p50={percentile(latencies, 0.5):7.1f}ms p99={percentile(latencies, 0.99):7.1f}ms "
+        f"max={max(latencies) * 1000 if latencies else 0:7.1f}ms  queries={len(queries):6d}  "
+        f"sign-ins ok={accepted / args.seconds:6.1f}/s 503={rejected / args.seconds:6.1f}/s"
+    )
+    if sign_ins and accepted:
+        login_latencies = [elapsed for elapsed, code in sign_ins if code == 200]
+        print(f"{'':>18}  sign-in p50={statistics.median(login_latencies) * 1000:7.1f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--login-clients", type=int, default=50)
+    parser.add_argument("--query-clients", type=int, default=10)
+    parser.add_argument("--modes", nargs="+", default=["inline", "executor"], choices=["inline", "executor"])
+    args = parser.parse_args()
+
+    hashed = hash_password(PASSWORD)
+    asyncio.run(run("executor", args, hashed, logins=False))
+    for mode in args.modes:
+        asyncio.run(run(mode, args, hashed, logins=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Benchmark: latency of the vectorized MMR selection.
+
+Usage:
+    python benchmarks/bench_mmr.py --candidates 100 --top-k 10 --dim 768
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rag.retrieval import mmr_select
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--lambda-mult", type=float, default=0.5)
+    parser.add_argument("--runs", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    query = rng.normal(size=args.dim).astype(np.float32)
+    candidates = rng.normal(size=(args.candidates, args.dim)).astype(np.float32)
+
+    timings = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        mmr_select(query, candidates, args.top_k, args.lambda_mult)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    print("=" * 60)
+    print(f"MMR selection: {args.candidates} candidates x {args.dim} dims -> top {args.top_k}")
+    print("=" * 60)
+    print(f"mean {statistics.mean(timings):.3f} ms | p50 {timings[len(timings) // 2]:.3f} ms | "
+          f"p99 {timings[int(len(timings) * 0.99)]:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
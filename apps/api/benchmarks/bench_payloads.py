@@ -0,0 +1,90 @@
+"""
+Benchmark: size and decode cost of compact chunk payloads vs LlamaIndex ``_node_content``.
+
+Builds realistic chunks (512-token text, ingestion metadata, document
+relationships), serializes them in both layouts and measures the JSON size
+(what Qdrant stores and returns on the wire) and the time to turn search
+results back into nodes.
+
+Usage:
+    python benchmarks/bench_payloads.py --chunks 5000
+"""
+import argparse
+import json
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from llama_index.core.schema import NodeRelationship, RelatedNodeInfo, TextNode
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
+from qdrant_client import QdrantClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rag.vector_store import CompactQdrantVectorStore, build_chunk_payload
+
+WORDS = "contrato cláusula arrendamiento pago plazo garantía notificación resolución parte obligación".split()
+
+
+def make_node(index: int) -> TextNode:
+    text = " ".join(WORDS[(index + i) % len(WORDS)] for i in range(380))
+    node = TextNode(
+        id_=str(uuid.uuid4()),
+        text=text,
+        metadata={
+            "document_id": f"contrato-{index // 40}-{uuid.uuid4().hex}",
+            "uploaded_at": "2025-01-15T10:30:00+00:00",
+            "chunk_index": index % 40,
+            "content_hash": uuid.uuid4().hex * 2,
+            "content_type": "application/pdf",
+            "tags": ["legal", "contratos"],
+        },
+    )
+    node.relationships[NodeRelationship.SOURCE] = RelatedNodeInfo(node_id=node.metadata["document_id"])
+    node.relationships[NodeRelationship.PREVIOUS] = RelatedNodeInfo(node_id=str(uuid.uuid4()))
+    node.relationships[NodeRelationship.NEXT] = RelatedNodeInfo(node_id=str(uuid.uuid4()))
+    return node
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=5000)
+    args = parser.parse_args()
+
+    nodes = [make_node(i) for i in range(args.chunks)]
+    legacy = [node_to_metadata_dict(node) for node in nodes]
+    compact = [build_chunk_payload(node.get_content(), node.metadata) for node in nodes]
+
+    legacy_bytes = sum(len(json.dumps(payload)) for payload in legacy)
+    compact_bytes = sum(len(json.dumps(payload)) for payload in compact)
+
+    store = CompactQdrantVectorStore(client=QdrantClient(location=":memory:"), collection_name="bench")
+
+    class Point:
+        def __init__(self, point_id, payload):
+            self.id, self.payload, self.vector, self.score = point_id, payload, None, 0.5
+
+    legacy_points = [Point(i, payload) for i, payload in enumerate(legacy)]
+    compact_points = [Point(i, payload) for i, payload in enumerate(compact)]
+
+    started = time.perf_counter()
+    store.parse_to_query_result(legacy_points)
+    legacy_parse = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    store.parse_to_query_result(compact_points)
+    compact_parse = (time.perf_counter() - started) * 1000
+
+    print("=" * 60)
+    print(f"Chunk payloads: {args.chunks} chunks")
+    print("=" * 60)
+    print(f"{'':<22}{'legacy':>12}{'compact':>12}{'change':>10}")
+    print(f"{'payload size (KB)':<22}{legacy_bytes / 1024:>12.0f}{compact_bytes / 1024:>12.0f}"
+          f"{(compact_bytes / legacy_bytes - 1) * 100:>9.0f}%")
+    print(f"{'parse to nodes (ms)':<22}{legacy_parse:>12.1f}{compact_parse:>12.1f}"
+          f"{(compact_parse / legacy_parse - 1) * 100:>9.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: end-to-end latency of the /search handler on a warmed collection.
+
+Runs against a local Qdrant stand-in (the dev docker-compose service by
+default) in a throwaway collection. The query embedding is served as from the
+warmed cache, so the numbers cover the async search call and result shaping.
+``--in-process`` uses qdrant-client local mode instead of a server; it does a
+brute-force scan and is only useful as a smoke test, not for latency targets.
+
+Usage:
+    docker compose -f infra/docker/docker-compose.dev.yml up -d qdrant
+    python benchmarks/bench_search.py --points 100000 --top-k 10 --runs 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.models import Distance, PointStruct, VectorParams
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import routes.search as search_route
+from rag.pipeline import EMBED_DIMENSION
+
+BENCH_COLLECTION = "bench_search"
+
+
+async def populate(client: AsyncQdrantClient, points: int, dim: int, batch_size: int = 1000) -> None:
+    if await client.collection_exists(BENCH_COLLECTION):
+        await client.delete_collection(BENCH_COLLECTION)
+    await client.create_collection(
+        collection_name=BENCH_COLLECTION,
+        vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
+    )
+    rng = np.random.default_rng(42)
+    for start in range(0, points, batch_size):
+        vectors = rng.normal(size=(min(batch_size, points - start), dim)).astype(np.float32)
+        await client.upsert(
+            collection_name=BENCH_COLLECTION,
+            wait=True,
+            points=[
+                PointStruct(
+                    id=start + offset,
+                    vector=vector.tolist(),
+                    payload={
+                        "document_id": f"doc-{(start + offset) // 50}.pdf",
+                        "chunk_index": (start + offset) % 50,
+                        "_node_content": json.dumps({"text": f"chunk {start + offset} " * 40}),
+                    },
+                )
+                for offset, vector in enumerate(vectors)
+            ],
+        )
+
+
+async def run(args: argparse.Namespace) -> None:
+    if args.in_process:
+        client = AsyncQdrantClient(location=":memory:")
+    else:
+        client = AsyncQdrantClient(url=args.qdrant_url, prefer_grpc=False, timeout=60)
+    started = time.perf_counter()
+    await populate(client, args.points, args.dim)
+    print(f"Loaded {args.points} points in {time.perf_counter() - started:.1f}s")
+
+    rng = np.random.default_rng(7)
+    query_vectors = rng.normal(size=(args.runs, args.dim)).astype(np.float32).tolist()
+    vector_iter = iter(query_vectors * 2)
+
+    search_route.COLLECTION_NAME = BENCH_COLLECTION
+    search_route.get_async_qdrant_client = lambda: client
+    search_route.embed_query = lambda query: next(vector_iter)  # Warm cache: no model call
+
+    request = search_route.SearchRequest(query="benchmark", top_k=args.top_k)
+    for _ in range(min(20, args.runs)):
+        await search_route.search_chunks(request)
+
+    timings = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        await search_route.search_chunks(request)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    print("=" * 60)
+    print(f"/search: {args.points} chunks x {args.dim} dims, top_k={args.top_k}, {args.runs} runs")
+    print("=" * 60)
+    print(f"mean {statistics.mean(timings):.2f} ms | p50 {timings[len(timings) // 2]:.2f} ms | "
+          f"p99 {timings[int(len(timings) * 0.99)]:.2f} ms")
+
+    await client.delete_collection(BENCH_COLLECTION)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=EMBED_DIMENSION)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=500)
+    parser.add_argument("--qdrant-url", default=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--in-process", action="store_true", help="Use qdrant-client local mode (no server)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark: /search latency with inline chunk texts vs the external chunk text store.
+
+Loads the same chunks twice into a local Qdrant stand-in (the dev
+docker-compose service by default): once with the text in the payload and
+once with only ``text_hash``, the texts going to a SQLite chunk text store in
+a temporary directory. Each run goes through the /search handler, so the
+external mode includes the batched hydrate of the returned page.
+``--in-process`` uses qdrant-client local mode; it does a brute-force scan
+and is only useful as a smoke test, not for latency targets.
+
+Usage:
+    docker compose -f infra/docker/docker-compose.dev.yml up -d qdrant
+    python benchmarks/bench_text_store.py --points 100000 --top-k 10 --runs 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.models import Distance, PointStruct, VectorParams
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import rag.text_store as text_store
+import routes.search as search_route
+from rag.pipeline import EMBED_DIMENSION
+from rag.vector_store import build_chunk_payload
+
+WORDS = "contrato cláusula arrendamiento pago plazo garantía notificación resolución parte obligación".split()
+COLLECTIONS = {"inline": "bench_text_inline", "external": "bench_text_external"}
+
+
+def chunk_text(index: int) -> str:
+    return f"fragmento {index} " + " ".join(WORDS[(index * 7 + i) % len(WORDS)] for i in range(380))
+
+
+async def populate(client: AsyncQdrantClient, store, args: argparse.Namespace, batch_size: int = 1000) -> int:
+    for name in COLLECTIONS.values():
+        if await client.collection_exists(name):
+            await client.delete_collection(name)
+        await client.create_collection(name, vectors_config=VectorParams(size=args.dim, distance=Distance.COSINE))
+
+    inline_bytes = external_bytes = 0
+    rng = np.random.default_rng(42)
+    for start in range(0, args.points, batch_size):
+        count = min(batch_size, args.points - start)
+        vectors = rng.normal(size=(count, args.dim)).astype(np.float32).tolist()
+        texts = [chunk_text(start + offset) for offset in range(count)]
+        metadata = [
+            {"document_id": f"doc-{(start + offset) // 50}.pdf", "chunk_index": (start + offset) % 50}
+            for offset in range(count)
+        ]
+        hashes = store.put_many(texts)
+
+        inline = [build_chunk_payload(text, meta) for text, meta in zip(texts, metadata)]
+        external = [build_chunk_payload(text, meta, text_hash=h) for text, meta, h in zip(texts, metadata, hashes)]
+        inline_bytes += sum(len(json.dumps(payload)) for payload in inline)
+        external_bytes += sum(len(json.dumps(payload)) for payload in external)
+
+        for mode, payloads in (("inline", inline), ("external", external)):
+            await client.upsert(
+                collection_name=COLLECTIONS[mode],
+                wait=True,
+                points=[
+                    PointStruct(id=start + offset, vector=vector, payload=payload)
+                    for offset, (vector, payload) in enumerate(zip(vectors, payloads))
+                ],
+            )
+    return inline_bytes, external_bytes
+
+
+async def measure(request, runs: int) -> list:
+    for _ in range(min(20, runs)):
+        await search_route.search_chunks(request)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await search_route.search_chunks(request)
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)
+
+
+async def run(args: argparse.Namespace) -> None:
+    if args.in_process:
+        client = AsyncQdrantClient(location=":memory:")
+    else:
+        client = AsyncQdrantClient(url=args.qdrant_url, prefer_grpc=False, timeout=60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = os.path.join(tmp, "chunk_texts.sqlite3")
+        store = text_store.ChunkTextStore(store_path)
+        text_store._store = store
+
+        started = time.perf_counter()
+        inline_bytes, external_bytes = await populate(client, store, args)
+        print(f"Loaded {args.points} points per mode in {time.perf_counter() - started:.1f}s")
+
+        rng = np.random.default_rng(7)
+        query_vectors = rng.normal(size=(args.runs, args.dim)).astype(np.float32).tolist()
+        search_route.get_async_qdrant_client = lambda: client
+        request = search_route.SearchRequest(query="benchmark", top_k=args.top_k)
+
+        results = {}
+        for mode, collection in COLLECTIONS.items():
+            vector_iter = iter(query_vectors * 2)
+            search_route.COLLECTION_NAME = collection
+            search_route.embed_query = lambda query: next(vector_iter)  # Warm cache: no model call
+            results[mode] = await measure(request, args.runs)
+
+        store_bytes = os.path.getsize(store_path) + sum(
+            os.path.getsize(store_path + suffix) for suffix in ("-wal", "-shm") if os.path.exists(store_path + suffix)
+        )
+
+    print("=" * 60)
+    print(f"/search + hydrate: {args.points} chunks x {args.dim} dims, top_k={args.top_k}, {args.runs} runs")
+    print("=" * 60)
+    print(f"Qdrant payloads: inline {inline_bytes / 1e6:.1f} MB | external {external_bytes / 1e6:.1f} MB "
+          f"(+ text store {store_bytes / 1e6:.1f} MB on disk)")
+    for mode, timings in results.items():
+        print(f"{mode:<9} mean {statistics.mean(timings):.2f} ms | p50 {timings[len(timings) // 2]:.2f} ms | "
+              f"p99 {timings[int(len(timings) * 0.99)]:.2f} ms")
+
+    for name in COLLECTIONS.values():
+        await client.delete_collection(name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=EMBED_DIMENSION)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=500)
+    parser.add_argument("--qdrant-url", default=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--in-process", action="store_true", help="Use qdrant-client local mode (no server)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,13 @@
 
 import logging
 import os
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import redis
 from rq import Queue
+from rq.job import Job
+
+from utils.tracing import enqueue_span, job_meta
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +40,27 @@ def get_ingestion_queue() -> Queue:
     return _ingestion_queue
 
 
+def enqueue(func: Callable[..., Any], job_timeout: Any = None, **kwargs: Any) -> Job:
+    """Enqueue one ingestion job; ``job.meta`` carries the trace context and correlation ID."""
+    queue = get_ingestion_queue()
+    with enqueue_span(queue.name, func.__name__):
+        return queue.enqueue(func, job_timeout=job_timeout, meta=job_meta(), **kwargs)
+
+
+def enqueue_many(func: Callable[..., Any], kwargs_list: List[Dict[str, Any]], job_timeout: Any = None) -> List[Job]:
+    """Enqueue one ingestion job per kwargs dict through a single Redis pipeline."""
+    queue = get_ingestion_queue()
+    with enqueue_span(queue.name, func.__name__, count=len(kwargs_list)):
+        meta = job_meta()
+        job_datas = [
+            Queue.prepare_data(func, kwargs=kwargs, timeout=job_timeout, meta=dict(meta)) for kwargs in kwargs_list
+        ]
+        with queue.connection.pipeline() as pipe:
+            jobs = queue.enqueue_many(job_datas, pipeline=pipe)
+            pipe.execute()
+    return jobs
+
+
 def close_redis_connection() -> None:
     """Close Redis connection (for cleanup)."""
     global _redis_conn, _ingestion_queue
@@ -6,6 +6,8 @@ import logging
 from typing import Dict, Set
 from fastapi import WebSocket
 
+from utils.metrics import WEBSOCKET_CONNECTIONS
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,8 +28,8 @@ class ConnectionManager:
         redis_conn = get_redis_connection()
         self._pubsub = redis_conn.pubsub()
 
-        # Subscribe to all job channels
-        self._pubsub.psubscribe("job:*")
+        # Subscribe to all job and batch channels
+        self._pubsub.psubscribe("job:*", "batch:*")
 
         logger.info("Redis pub/sub listener started")
 
@@ -37,7 +39,11 @@ class ConnectionManager:
                 if message and message["type"] == "pmessage":
                     try:
                         data = json.loads(message["data"])
-                        job_id = data.get("job_id")
+                        channel = message["channel"]
+                        if isinstance(channel, bytes):
+                            channel = channel.decode()
+                        # Batch subscribers are keyed by their channel name ("batch:{id}")
+                        job_id = channel if channel.startswith("batch:") else data.get("job_id")
 
                         if job_id:
                             await self.send_job_update(job_id, data)
@@ -70,6 +76,7 @@ class ConnectionManager:
             self.active_connections[job_id] = set()
 
         self.active_connections[job_id].add(websocket)
+        WEBSOCKET_CONNECTIONS.inc()
         logger.info(f"WebSocket connected for job {job_id}. Total connections: {len(self.active_connections[job_id])}")
 
         # Ensure Redis listener is running
@@ -78,7 +85,9 @@ class ConnectionManager:
     def disconnect(self, websocket: WebSocket, job_id: str):
         """Remove a WebSocket connection."""
         if job_id in self.active_connections:
-            self.active_connections[job_id].discard(websocket)
+            if websocket in self.active_connections[job_id]:
+                self.active_connections[job_id].remove(websocket)
+                WEBSOCKET_CONNECTIONS.dec()
 
             # Clean up empty sets
             if not self.active_connections[job_id]:
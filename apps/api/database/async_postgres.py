@@ -0,0 +1,175 @@
+"""
+Async PostgreSQL access through a shared asyncpg connection pool.
+
+Request handlers await queries on pooled connections instead of opening a
+psycopg2 connection per call and blocking the event loop. Each connection
+keeps an LRU cache of prepared statements, so repeated queries skip
+parsing and planning. Acquiring a connection waits at most
+``PG_POOL_ACQUIRE_TIMEOUT`` seconds and then raises :class:`PoolTimeoutError`.
+
+asyncpg pools are bound to the event loop that created them. One pool is
+created lazily per loop: the API's loop, or the loop a worker job runs its
+database calls on. :func:`pool_stats` reports size, in-use connections,
+waiters and acquisition latency across all of them.
+
+Set ``PG_STATEMENT_CACHE_SIZE=0`` behind PgBouncer in transaction mode.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import asyncpg
+
+from .postgres_client import get_connection_params
+
+logger = logging.getLogger(__name__)
+
+PG_POOL_MIN_SIZE = int(os.getenv("PG_POOL_MIN_SIZE", "2"))
+PG_POOL_MAX_SIZE = int(os.getenv("PG_POOL_MAX_SIZE", "10"))
+# Seconds to wait for a free connection before failing the query
+PG_POOL_ACQUIRE_TIMEOUT = float(os.getenv("PG_POOL_ACQUIRE_TIMEOUT", "5"))
+# Prepared statements cached per connection
+PG_STATEMENT_CACHE_SIZE = int(os.getenv("PG_STATEMENT_CACHE_SIZE", "200"))
+PG_COMMAND_TIMEOUT = float(os.getenv("PG_COMMAND_TIMEOUT", "30"))
+# Idle connections above min size are closed after this many seconds
+PG_POOL_MAX_IDLE = float(os.getenv("PG_POOL_MAX_IDLE", "300"))
+
+
+class PoolTimeoutError(RuntimeError):
+    """No pooled connection became available within ``PG_POOL_ACQUIRE_TIMEOUT``."""
+
+
+class _PoolMetrics:
+    def __init__(self) -> None:
+        self.acquisitions = 0
+        self.timeouts = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+
+_metrics = _PoolMetrics()
+# event loop -> task creating (then holding) that loop's pool
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Task]" = weakref.WeakKeyDictionary()
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    # Decode json/jsonb columns to Python objects (asyncpg returns str by default)
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(type_name, encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+
+async def _create_pool() -> asyncpg.Pool:
+    params = get_connection_params()
+    pool = await asyncpg.create_pool(
+        host=params["host"],
+        port=params["port"],
+        database=params["database"],
+        user=params["user"],
+        password=params["password"] or None,
+        min_size=PG_POOL_MIN_SIZE,
+        max_size=PG_POOL_MAX_SIZE,
+        statement_cache_size=PG_STATEMENT_CACHE_SIZE,
+        command_timeout=PG_COMMAND_TIMEOUT,
+        max_inactive_connection_lifetime=PG_POOL_MAX_IDLE,
+        init=_init_connection,
+    )
+    logger.info("Postgres pool ready (min=%d, max=%d)", PG_POOL_MIN_SIZE, PG_POOL_MAX_SIZE)
+    return pool
+
+
+async def get_pool() -> asyncpg.Pool:
+    """Return the pool of the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    task = _pools.get(loop)
+    if task is None or (task.done() and task.exception() is not None):
+        task = loop.create_task(_create_pool())
+        _pools[loop] = task
+    return await asyncio.shield(task)
+
+
+async def close_pool() -> None:
+    """Close the running loop's pool (application shutdown, end of a worker job)."""
+    task = _pools.pop(asyncio.get_running_loop(), None)
+    if task is not None and task.done() and task.exception() is None:
+        await task.result().close()
+
+
+@asynccontextmanager
+async def acquire() -> AsyncIterator[asyncpg.Connection]:
+    """Acquire a pooled connection, waiting at most ``PG_POOL_ACQUIRE_TIMEOUT`` seconds."""
+    pool = await get_pool()
+    _metrics.waiting += 1
+    _metrics.max_waiting = max(_metrics.max_waiting, _metrics.waiting)
+    started = time.perf_counter()
+    try:
+        conn = await pool.acquire(timeout=PG_POOL_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError as exc:
+        _metrics.timeouts += 1
+        raise PoolTimeoutError(
+            f"No database connection available after {PG_POOL_ACQUIRE_TIMEOUT:.1f}s "
+            f"(pool max size {PG_POOL_MAX_SIZE})"
+        ) from exc
+    finally:
+        _metrics.waiting -= 1
+    waited = time.perf_counter() - started
+    _metrics.acquisitions += 1
+    _metrics.wait_seconds += waited
+    _metrics.max_wait_seconds = max(_metrics.max_wait_seconds, waited)
+    try:
+        yield conn
+    finally:
+        await pool.release(conn)
+
+
+async def fetch(query: str, *args: Any) -> List[Dict[str, Any]]:
+    async with acquire() as conn:
+        return [dict(row) for row in await conn.fetch(query, *args)]
+
+
+async def fetchrow(query: str, *args: Any) -> Optional[Dict[str, Any]]:
+    async with acquire() as conn:
+        row = await conn.fetchrow(query, *args)
+    return dict(row) if row is not None else None
+
+
+async def fetchval(query: str, *args: Any) -> Any:
+    async with acquire() as conn:
+        return await conn.fetchval(query, *args)
+
+
+async def execute(query: str, *args: Any) -> str:
+    """Run a statement and return its status tag (e.g. ``"UPDATE 3"``)."""
+    async with acquire() as conn:
+        return await conn.execute(query, *args)
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Pool size and saturation across every live pool of this process."""
+    pools = [task.result() for task in list(_pools.values()) if task.done() and task.exception() is None]
+    size = sum(pool.get_size() for pool in pools)
+    idle = sum(pool.get_idle_size() for pool in pools)
+    max_size = PG_POOL_MAX_SIZE * len(pools)
+    return {
+        "pools": len(pools),
+        "size": size,
+        "idle": idle,
+        "in_use": size - idle,
+        "min_size": PG_POOL_MIN_SIZE,
+        "max_size": PG_POOL_MAX_SIZE,
+        "saturation": round((size - idle) / max_size, 3) if max_size else 0.0,
+        "waiting": _metrics.waiting,
+        "max_waiting": _metrics.max_waiting,
+        "acquisitions": _metrics.acquisitions,
+        "acquire_timeouts": _metrics.timeouts,
+        "avg_acquire_ms": round(_metrics.wait_seconds / _metrics.acquisitions * 1000, 3)
+        if _metrics.acquisitions else 0.0,
+        "max_acquire_ms": round(_metrics.max_wait_seconds * 1000, 3),
+    }
@@ -1,27 +1,87 @@
-from datetime import datetime
 from uuid import UUID
-from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import text
+from typing import List, Optional, Dict, Any, Tuple
 
+from database import async_postgres
+from database.document_catalog import decode_cursor, encode_cursor
 from models.batch import IngestionBatch, BatchStatus
 from models.document import BatchDocument, DocumentStatus
 
 
+# Progreso de documentos + contadores del lote en una sola sentencia.
+# ``old`` es la fila antes del UPDATE: el delta de cada contador es
+# (nuevo estado == X) - (estado anterior == X), sin recontar el lote.
+# Parámetros: $1 lote, $2-$5 arrays por documento, $6-$11 valores de estado.
+PROGRESS_UPDATE_QUERY = """
+    WITH input AS (
+        SELECT *
+        FROM unnest($2::uuid[], $3::text[], $4::integer[], $5::text[])
+            AS t(id, status, chunk_count, error)
+    ),
+    changed AS (
+        UPDATE batch_documents AS doc
+        SET status = input.status,
+            chunk_count = input.chunk_count,
+            error_message = input.error,
+            processed_at = NOW()
+        FROM input, batch_documents AS old
+        WHERE doc.id = input.id
+          AND old.id = doc.id
+          AND doc.batch_id = $1
+        RETURNING old.status AS old_status, doc.status AS new_status
+    ),
+    delta AS (
+        SELECT
+            COALESCE(SUM((new_status = $6::text)::int - (old_status = $6::text)::int), 0) AS completed,
+            COALESCE(SUM((new_status = $7::text)::int - (old_status = $7::text)::int), 0) AS failed
+        FROM changed
+    )
+    UPDATE ingestion_batches AS batch
+    SET processed_files = batch.processed_files + delta.completed,
+        failed_files = batch.failed_files + delta.failed,
+        status = CASE
+            WHEN batch.processed_files + delta.completed + batch.failed_files + delta.failed < batch.total_files
+                THEN $8::text
+            WHEN batch.failed_files + delta.failed = 0 THEN $9::text
+            WHEN batch.processed_files + delta.completed = 0 THEN $10::text
+            ELSE $11::text
+        END,
+        completed_at = CASE
+            WHEN batch.processed_files + delta.completed + batch.failed_files + delta.failed < batch.total_files
+                THEN NULL
+            ELSE COALESCE(batch.completed_at, NOW())
+        END
+    FROM delta
+    WHERE batch.id = $1
+    RETURNING batch.status, batch.processed_files, batch.failed_files, batch.total_files
+"""
+
+# Alta de documentos + totales del lote en una sola sentencia.
+# Parámetros: $1 lote, $2 estado inicial, $3-$7 arrays por documento.
+REGISTER_FILES_QUERY = """
+    WITH inserted AS (
+        INSERT INTO batch_documents
+            (id, batch_id, filename, source_type, file_size, mime_type, status, created_at)
+        SELECT input.id, $1, input.filename, input.source_type, input.file_size,
+               input.mime_type, $2, NOW()
+        FROM unnest($3::uuid[], $4::text[], $5::text[], $6::bigint[], $7::text[])
+            AS input(id, filename, source_type, file_size, mime_type)
+        RETURNING file_size
+    )
+    UPDATE ingestion_batches
+    SET total_files = total_files + (SELECT COUNT(*) FROM inserted),
+        total_size_bytes = total_size_bytes + (SELECT COALESCE(SUM(file_size), 0) FROM inserted)
+    WHERE id = $1
+"""
+
+
 class BatchManager:
     """
     Gestor de lotes de ingesta de documentos.
     Maneja el ciclo de vida completo: creación, seguimiento y finalización.
-    """
     
-    def __init__(self, db_session: Session):
-        """
-        Inicializa el BatchManager.
-        
-        Args:
-            db_session: Sesión de SQLAlchemy para operaciones de BD
-        """
-        self.db = db_session
+    Las consultas usan el pool asíncrono compartido (``async_postgres``):
+    cada una toma una conexión del pool solo mientras se ejecuta.
+    """
     
     async def create_batch(
         self, 
@@ -51,26 +111,20 @@ class BatchManager:
         )
         
         # Insertar en base de datos
-        insert_query = text("""
+        await async_postgres.execute(
+            """
             INSERT INTO ingestion_batches 
             (id, user_id, name, description, status, qdrant_collection, created_at)
             VALUES 
-            (:id, :user_id, :name, :description, :status, :collection, NOW())
-            RETURNING id
-        """)
-        
-        result = self.db.execute(
-            insert_query,
-            {
-                "id": str(batch.id),
-                "user_id": str(batch.user_id),
-                "name": batch.name,
-                "description": batch.description,
-                "status": batch.status.value,
-                "collection": batch.qdrant_collection
-            }
+            ($1, $2, $3, $4, $5, $6, NOW())
+            """,
+            batch.id,
+            batch.user_id,
+            batch.name,
+            batch.description,
+            BatchStatus(batch.status).value,
+            batch.qdrant_collection
         )
-        self.db.commit()
         
         return batch.id
     
@@ -95,51 +149,59 @@ class BatchManager:
         Returns:
             UUID del documento creado
         """
-        document = BatchDocument(
-            batch_id=batch_id,
-            filename=filename,
-            source_type=source_type,
-            file_size=file_size,
-            mime_type=mime_type
-        )
+        doc_ids = await self.add_files_to_batch(batch_id, [{
+            "filename": filename,
+            "source_type": source_type,
+            "file_size": file_size,
+            "mime_type": mime_type
+        }])
+        return doc_ids[0]
+    
+    async def add_files_to_batch(
+        self,
+        batch_id: UUID,
+        files: List[Dict[str, Any]]
+    ) -> List[UUID]:
+        """
+        Registra varios archivos en el lote con una sola sentencia.
         
-        # Insertar documento
-        insert_doc_query = text("""
-            INSERT INTO batch_documents 
-            (id, batch_id, filename, source_type, file_size, mime_type, status, created_at)
-            VALUES 
-            (:id, :batch_id, :filename, :source_type, :file_size, :mime_type, :status, NOW())
-            RETURNING id
-        """)
+        Todas las filas de ``batch_documents`` se insertan con un INSERT
+        multi-fila (arrays + ``unnest``) y los totales del lote se actualizan
+        en la misma sentencia: un único round trip sea cual sea el número de
+        archivos.
         
-        self.db.execute(
-            insert_doc_query,
-            {
-                "id": str(document.id),
-                "batch_id": str(batch_id),
-                "filename": filename,
-                "source_type": source_type,
-                "file_size": file_size,
-                "mime_type": mime_type,
-                "status": document.status.value
-            }
-        )
+        Args:
+            batch_id: UUID del lote
+            files: Lista de ``{"filename", "source_type", "file_size", "mime_type"}``
+            
+        Returns:
+            UUIDs de los documentos creados, en el orden de ``files``
+        """
+        if not files:
+            return []
         
-        # Actualizar contador del batch
-        update_batch_query = text("""
-            UPDATE ingestion_batches 
-            SET total_files = total_files + 1,
-                total_size_bytes = total_size_bytes + :file_size
-            WHERE id = :batch_id
-        """)
+        documents = [
+            BatchDocument(
+                batch_id=batch_id,
+                filename=item["filename"],
+                source_type=item["source_type"],
+                file_size=item["file_size"],
+                mime_type=item.get("mime_type")
+            )
+            for item in files
+        ]
         
-        self.db.execute(
-            update_batch_query,
-            {"batch_id": str(batch_id), "file_size": file_size}
+        await async_postgres.execute(
+            REGISTER_FILES_QUERY,
+            batch_id,
+            DocumentStatus.PENDING.value,
+            [doc.id for doc in documents],
+            [doc.filename for doc in documents],
+            [doc.source_type for doc in documents],
+            [doc.file_size for doc in documents],
+            [doc.mime_type for doc in documents]
         )
-        
-        self.db.commit()
-        return document.id
+        return [doc.id for doc in documents]
     
     async def update_progress(
         self,
@@ -148,7 +210,7 @@ class BatchManager:
         status: str,
         chunks_count: Optional[int] = None,
         error: Optional[str] = None
-    ):
+    ) -> Optional[Dict[str, Any]]:
         """
         Actualiza el progreso de procesamiento de un documento.
         
@@ -158,78 +220,101 @@ class BatchManager:
             status: Nuevo estado del documento
             chunks_count: Número de chunks generados (opcional)
             error: Mensaje de error si falló (opcional)
+            
+        Returns:
+            Estado y contadores resultantes del lote
         """
-        # Actualizar documento
-        update_doc_query = text("""
-            UPDATE batch_documents 
-            SET status = :status,
-                chunks_count = :chunks_count,
-                error_message = :error,
-                processed_at = NOW()
-            WHERE id = :doc_id
-        """)
-        
-        self.db.execute(
-            update_doc_query,
-            {
-                "status": status,
-                "chunks_count": chunks_count,
-                "error": error,
-                "doc_id": str(doc_id)
-            }
+        return await self.update_progress_many(
+            batch_id,
+            [{"doc_id": doc_id, "status": status, "chunks_count": chunks_count, "error": error}]
         )
+    
+    async def update_progress_many(
+        self,
+        batch_id: UUID,
+        updates: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Actualiza varios documentos de un lote en una sola sentencia.
         
-        # Obtener contadores actuales
-        count_query = text("""
-            SELECT 
-                COUNT(*) FILTER (WHERE status = 'completed') as completed,
-                COUNT(*) FILTER (WHERE status = 'failed') as failed,
-                COUNT(*) as total
-            FROM batch_documents 
-            WHERE batch_id = :batch_id
-        """)
-        
-        result = self.db.execute(count_query, {"batch_id": str(batch_id)}).fetchone()
-        completed = result[0]
-        failed = result[1]
-        total = result[2]
+        Los contadores del lote se mantienen con incrementos atómicos: cada
+        documento aporta la diferencia entre su estado anterior y el nuevo, así
+        que no se recuentan los documentos del lote (el coste no crece con su
+        tamaño) y repetir una actualización no cuenta dos veces. El lote pasa
+        a estado final cuando completados + fallidos alcanzan ``total_files``.
         
-        # Determinar estado del batch
-        new_status = BatchStatus.PROCESSING
-        completed_at = None
+        Args:
+            batch_id: UUID del lote
+            updates: Lista de ``{"doc_id", "status", "chunks_count", "error"}``
+            
+        Returns:
+            ``{"status", "processed_files", "failed_files", "total_files"}``
+            del lote tras la actualización (None si no existe)
+        """
+        # Un único valor por documento (gana la última actualización)
+        latest = {str(update["doc_id"]): update for update in updates}
+        if not latest:
+            return None
         
-        if completed + failed == total:
-            if failed == 0:
-                new_status = BatchStatus.COMPLETED
-            elif completed == 0:
-                new_status = BatchStatus.FAILED
-            else:
-                new_status = BatchStatus.PARTIAL
-            completed_at = datetime.utcnow()
+        return await async_postgres.fetchrow(
+            PROGRESS_UPDATE_QUERY,
+            batch_id,
+            [UUID(doc_id) for doc_id in latest],
+            [str(update["status"]) for update in latest.values()],
+            [update.get("chunks_count") for update in latest.values()],
+            [update.get("error") for update in latest.values()],
+            DocumentStatus.COMPLETED.value,
+            DocumentStatus.FAILED.value,
+            BatchStatus.PROCESSING.value,
+            BatchStatus.COMPLETED.value,
+            BatchStatus.FAILED.value,
+            BatchStatus.PARTIAL.value
+        )
+    
+    async def start_batch(self, batch_id: UUID):
+        """
+        Marca un lote pendiente como en procesamiento.
+
+        Args:
+            batch_id: UUID del lote
+        """
+        await async_postgres.execute(
+            """
+            UPDATE ingestion_batches
+            SET status = $1
+            WHERE id = $2 AND status = $3
+            """,
+            BatchStatus.PROCESSING.value,
+            batch_id,
+            BatchStatus.PENDING.value
+        )
+
+    async def record_throughput(self, batch_id: UUID, stats: Dict[str, Any]):
+        """
+        Guarda las estadísticas de rendimiento de un job del lote.
         
-        # Actualizar batch
-        update_batch_query = text("""
-            UPDATE ingestion_batches 
-            SET processed_files = :processed,
-                failed_files = :failed,
-                status = :status,
-                completed_at = :completed_at
-            WHERE id = :batch_id
-        """)
+        Un lote grande se reparte en varios jobs; cada uno añade sus
+        estadísticas a ``metadata.throughput_jobs`` y :meth:`get_batch`
+        las agrega.
         
-        self.db.execute(
-            update_batch_query,
-            {
-                "processed": completed,
-                "failed": failed,
-                "status": new_status.value,
-                "completed_at": completed_at,
-                "batch_id": str(batch_id)
-            }
+        Args:
+            batch_id: UUID del lote
+            stats: Estadísticas devueltas por el worker de lotes
+        """
+        await async_postgres.execute(
+            """
+            UPDATE ingestion_batches
+            SET metadata = jsonb_set(
+                COALESCE(metadata, '{}'::jsonb),
+                '{throughput_jobs}',
+                COALESCE(metadata -> 'throughput_jobs', '[]'::jsonb) || $1::jsonb
+            )
+            WHERE id = $2
+            """,
+            [stats],
+            batch_id
         )
-        
-        self.db.commit()
-    
+
     async def get_batch(self, batch_id: UUID) -> Optional[Dict[str, Any]]:
         """
         Obtiene la información de un lote.
@@ -240,70 +325,149 @@ class BatchManager:
         Returns:
             Diccionario con la información del lote o None si no existe
         """
-        query = text("""
+        batch = await async_postgres.fetchrow(
+            """
             SELECT id, user_id, name, description, status, 
                    total_files, processed_files, failed_files, 
                    total_size_bytes, qdrant_collection, 
-                   created_at, completed_at, error_summary
+                   created_at, completed_at, error_summary, metadata
             FROM ingestion_batches 
-            WHERE id = :batch_id
-        """)
-        
-        result = self.db.execute(query, {"batch_id": str(batch_id)}).fetchone()
+            WHERE id = $1
+            """,
+            batch_id
+        )
         
-        if not result:
+        if not batch:
             return None
         
-        return {
-            "id": result[0],
-            "user_id": result[1],
-            "name": result[2],
-            "description": result[3],
-            "status": result[4],
-            "total_files": result[5],
-            "processed_files": result[6],
-            "failed_files": result[7],
-            "total_size_bytes": result[8],
-            "qdrant_collection": result[9],
-            "created_at": result[10],
-            "completed_at": result[11],
-            "error_summary": result[12]
-        }
+        metadata = batch.pop("metadata") or {}
+        batch["throughput"] = _aggregate_throughput(metadata.get("throughput_jobs") or [])
+        return batch
+    
+    async def list_batches(self, limit: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Lista los lotes, del más reciente al más antiguo.
+        
+        Args:
+            limit: Número máximo de lotes
+            offset: Número de lotes a saltar
+            
+        Returns:
+            Lista de lotes con sus contadores
+        """
+        return await async_postgres.fetch(
+            """
+            SELECT id, user_id, name, description, status, 
+                   total_files, processed_files, failed_files,
+                   created_at, completed_at
+            FROM ingestion_batches
+            ORDER BY created_at DESC
+            LIMIT $1 OFFSET $2
+            """,
+            limit,
+            offset
+        )
+    
+    async def get_batch_statistics(self, batch_id: UUID) -> Dict[str, int]:
+        """
+        Cuenta los documentos del lote por estado con un único ``GROUP BY``.
+        
+        Args:
+            batch_id: UUID del lote
+            
+        Returns:
+            ``{"total": n, <estado>: n, ...}`` con todos los estados (0 si no hay)
+        """
+        rows = await async_postgres.fetch(
+            """
+            SELECT status, COUNT(*) AS count
+            FROM batch_documents
+            WHERE batch_id = $1
+            GROUP BY status
+            """,
+            batch_id
+        )
+        
+        stats = {status.value: 0 for status in DocumentStatus}
+        for row in rows:
+            stats[row["status"]] = row["count"]
+        stats["total"] = sum(stats.values())
+        return stats
     
-    async def get_batch_documents(self, batch_id: UUID) -> List[Dict[str, Any]]:
+    async def get_batch_documents(
+        self,
+        batch_id: UUID,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
         """
-        Obtiene todos los documentos de un lote.
+        Obtiene una página de documentos del lote en orden de alta.
+        
+        Usa paginación por keyset sobre ``(created_at, id)``: el índice
+        ``(batch_id, created_at, id)`` sirve orden y cursor, así que el coste
+        de cada página no depende de su posición en el lote.
         
         Args:
             batch_id: UUID del lote
+            limit: Tamaño de página (None: todos los documentos)
+            cursor: Cursor devuelto con la página anterior
+            status: Filtro opcional por estado
             
         Returns:
-            Lista de diccionarios con información de documentos
+            Tupla (documentos, cursor de la página siguiente o None)
+            
+        Raises:
+            ValueError: Si el cursor no es válido
         """
-        query = text("""
+        params: List[Any] = [batch_id]
+        conditions = ["batch_id = $1"]
+        if cursor:
+            created_at, doc_id = decode_cursor(cursor)
+            params.extend([created_at, UUID(doc_id)])
+            conditions.append(f"(created_at, id) > (${len(params) - 1}, ${len(params)})")
+        if status:
+            params.append(status)
+            conditions.append(f"status = ${len(params)}")
+        limit_clause = ""
+        if limit is not None:
+            # Una fila extra indica si hay página siguiente
+            params.append(limit + 1)
+            limit_clause = f"LIMIT ${len(params)}"
+        
+        documents = await async_postgres.fetch(
+            f"""
             SELECT id, batch_id, filename, source_type, file_size, 
-                   mime_type, status, chunks_count, processed_at, 
+                   mime_type, status, chunk_count AS chunks_count, processed_at, 
                    error_message, created_at
             FROM batch_documents 
-            WHERE batch_id = :batch_id
-            ORDER BY created_at ASC
-        """)
-        
-        results = self.db.execute(query, {"batch_id": str(batch_id)}).fetchall()
+            WHERE {' AND '.join(conditions)}
+            ORDER BY created_at ASC, id ASC
+            {limit_clause}
+            """,
+            *params
+        )
+        next_cursor = None
+        if limit is not None and len(documents) > limit:
+            documents = documents[:limit]
+            next_cursor = encode_cursor(documents[-1]["created_at"], str(documents[-1]["id"]))
         
-        return [
-            {
-                "id": row[0],
-                "batch_id": row[1],
-                "filename": row[2],
-                "source_type": row[3],
-                "file_size": row[4],
-                "mime_type": row[5],
-                "status": row[6],
-                "chunks_count": row[7],
-                "processed_at": row[8],
-                "error_message": row[9],
-                "created_at": row[10]
-            }
-            for row in results
-        ]
+        return documents, next_cursor
+
+
+def _aggregate_throughput(jobs: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Combina las estadísticas de los jobs de un lote (docs/min sobre el intervalo total)."""
+    if not jobs:
+        return None
+    completed = sum(job.get("completed", 0) for job in jobs)
+    started = min(job.get("started_at", 0) for job in jobs)
+    finished = max(job.get("finished_at", 0) for job in jobs)
+    elapsed = finished - started
+    return {
+        "jobs": len(jobs),
+        "completed": completed,
+        "failed": sum(job.get("failed", 0) for job in jobs),
+        "chunks": sum(job.get("chunks", 0) for job in jobs),
+        "seconds": round(elapsed, 1),
+        "docs_per_minute": round(completed / elapsed * 60, 1) if elapsed > 0 else 0.0
+    }
@@ -0,0 +1,184 @@
+"""
+Catalog of indexed documents (one row per document, independent of chunk count).
+
+The ingestion worker writes each state transition with a single statement, so
+history reads are plain indexed SQL instead of scans over Qdrant payloads.
+"""
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from psycopg2.extras import RealDictCursor
+
+from .postgres_client import execute_query, fetch_one, get_db_connection
+
+STATUS_PROCESSING = "processing"
+STATUS_INDEXED = "indexed"
+STATUS_FAILED = "failed"
+
+# Below this many rows an exact COUNT(*) is cheap; above it the planner estimate is used
+EXACT_COUNT_THRESHOLD = 10_000
+
+
+def encode_cursor(uploaded_at: datetime, document_id: str) -> str:
+    """Build an opaque keyset cursor from the last row of a page."""
+    raw = f"{uploaded_at.isoformat()}|{document_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a cursor produced by :func:`encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        uploaded_at, document_id = raw.split("|", 1)
+        return datetime.fromisoformat(uploaded_at), document_id
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def upsert_document(
+    *,
+    document_id: str,
+    filename: str,
+    content_hash: Optional[str],
+    content_type: Optional[str],
+    size_bytes: int,
+    status: str = STATUS_PROCESSING,
+    chunk_count: int = 0,
+) -> None:
+    query = """
+        INSERT INTO documents (document_id, filename, content_hash, content_type, size_bytes, status, chunk_count)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (document_id) DO UPDATE SET
+            filename = EXCLUDED.filename,
+            content_hash = EXCLUDED.content_hash,
+            content_type = EXCLUDED.content_type,
+            size_bytes = EXCLUDED.size_bytes,
+            status = EXCLUDED.status,
+            chunk_count = EXCLUDED.chunk_count,
+            updated_at = CURRENT_TIMESTAMP;
+    """
+    execute_query(query, (document_id, filename, content_hash, content_type, size_bytes, status, chunk_count))
+
+
+def mark_document_indexed(document_id: str, chunk_count: int) -> None:
+    query = """
+        UPDATE documents
+        SET status = %s, chunk_count = %s, error_message = NULL, updated_at = CURRENT_TIMESTAMP
+        WHERE document_id = %s
+    """
+    execute_query(query, (STATUS_INDEXED, chunk_count, document_id))
+
+
+def mark_document_failed(document_id: str, error_message: str) -> None:
+    query = """
+        UPDATE documents
+        SET status = %s, error_message = %s, updated_at = CURRENT_TIMESTAMP
+        WHERE document_id = %s
+    """
+    execute_query(query, (STATUS_FAILED, error_message[:1000], document_id))
+
+
+def delete_documents(document_ids: List[str]) -> int:
+    return execute_query("DELETE FROM documents WHERE document_id = ANY(%s)", (list(document_ids),))
+
+
+def delete_all_documents() -> int:
+    return execute_query("DELETE FROM documents")
+
+
+def get_document(document_id: str) -> Optional[dict]:
+    query = """
+        SELECT document_id, filename, content_hash, content_type, size_bytes, chunk_count,
+               status, error_message, uploaded_at, updated_at
+        FROM documents
+        WHERE document_id = %s
+    """
+    return fetch_one(query, (document_id,))
+
+
+def find_document_by_filename(filename: str) -> Optional[str]:
+    """Return the id of the most recent non-failed document uploaded as ``filename``, if any."""
+    query = """
+        SELECT document_id
+        FROM documents
+        WHERE filename = %s AND status <> %s
+        ORDER BY uploaded_at DESC
+        LIMIT 1
+    """
+    row = fetch_one(query, (filename, STATUS_FAILED))
+    return row["document_id"] if row else None
+
+
+def list_documents(
+    limit: int,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Return one page of documents, newest first, using keyset pagination.
+
+    The ``(uploaded_at, document_id)`` index serves both the ordering and the
+    cursor condition, so the cost depends on the page size only.
+
+    Args:
+        limit: Page size
+        cursor: Cursor returned with the previous page, or None for the first page
+        status: Optional status filter
+
+    Returns:
+        Tuple of (rows, next cursor or None when there are no more pages)
+    """
+    conditions = []
+    params: list = []
+    if cursor:
+        uploaded_at, document_id = decode_cursor(cursor)
+        conditions.append("(uploaded_at, document_id) < (%s, %s)")
+        params.extend([uploaded_at, document_id])
+    if status:
+        conditions.append("status = %s")
+        params.append(status)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"""
+        SELECT document_id, filename, content_hash, content_type, size_bytes, chunk_count,
+               status, uploaded_at
+        FROM documents
+        {where}
+        ORDER BY uploaded_at DESC, document_id DESC
+        LIMIT %s
+    """
+    params.append(limit + 1)
+
+    rows = execute_query(query, tuple(params), fetch=True)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(last["uploaded_at"], last["document_id"])
+    return rows, next_cursor
+
+
+def count_documents() -> int:
+    """
+    Return the number of catalogued documents.
+
+    Uses the planner's row estimate for large tables so the call stays cheap;
+    small tables are counted exactly.
+    """
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("SELECT reltuples::bigint AS estimate FROM pg_class WHERE oid = 'documents'::regclass")
+            row = cur.fetchone()
+            estimate = row["estimate"] if row else -1
+            if estimate >= EXACT_COUNT_THRESHOLD:
+                return estimate
+            cur.execute("SELECT COUNT(*) AS total FROM documents")
+            return cur.fetchone()["total"]
@@ -45,6 +45,30 @@ CREATE INDEX IF NOT EXISTS idx_batches_status ON ingestion_batches(status);
 CREATE INDEX IF NOT EXISTS idx_batches_user ON ingestion_batches(user_id);
 CREATE INDEX IF NOT EXISTS idx_documents_batch ON batch_documents(batch_id);
 CREATE INDEX IF NOT EXISTS idx_documents_status ON batch_documents(status);
+-- Páginas de /batch/{id}/status (keyset) y recuento por estado del lote
+CREATE INDEX IF NOT EXISTS idx_documents_batch_created ON batch_documents(batch_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_documents_batch_status ON batch_documents(batch_id, status);
+
+-- Catálogo de documentos indexados (una fila por documento)
+CREATE TABLE IF NOT EXISTS documents (
+    document_id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    content_hash TEXT,
+    content_type TEXT,
+    size_bytes BIGINT DEFAULT 0,
+    chunk_count INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'processing' CHECK (status IN ('processing','indexed','failed')),
+    error_message TEXT,
+    uploaded_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Paginación por keyset del historial (más recientes primero)
+CREATE INDEX IF NOT EXISTS idx_catalog_uploaded ON documents(uploaded_at DESC, document_id DESC);
+CREATE INDEX IF NOT EXISTS idx_catalog_content_hash ON documents(content_hash);
+CREATE INDEX IF NOT EXISTS idx_catalog_status ON documents(status, uploaded_at DESC);
+-- Resolución de la clave en ingestas con mode=replace
+CREATE INDEX IF NOT EXISTS idx_catalog_filename ON documents(filename, uploaded_at DESC);
 
 -- Tabla de usuarios de aplicación
 CREATE TABLE IF NOT EXISTS app_users (
@@ -40,7 +40,8 @@ def create_tables():
             qdrant_collection TEXT NOT NULL,
             created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
             completed_at TIMESTAMP WITH TIME ZONE,
-            error_summary JSONB
+            error_summary JSONB,
+            metadata JSONB
         );
         """)
         
@@ -54,7 +55,7 @@ def create_tables():
             file_size BIGINT NOT NULL,
             mime_type TEXT,
             status TEXT NOT NULL DEFAULT 'pending',
-            chunks_count INTEGER,
+            chunk_count INTEGER DEFAULT 0,
             processed_at TIMESTAMP WITH TIME ZONE,
             error_message TEXT,
             created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
@@ -67,6 +68,10 @@ def create_tables():
             ON batch_documents(batch_id);
         CREATE INDEX IF NOT EXISTS idx_batch_documents_status 
             ON batch_documents(status);
+        CREATE INDEX IF NOT EXISTS idx_batch_documents_batch_created
+            ON batch_documents(batch_id, created_at, id);
+        CREATE INDEX IF NOT EXISTS idx_batch_documents_batch_status
+            ON batch_documents(batch_id, status);
         CREATE INDEX IF NOT EXISTS idx_ingestion_batches_status 
             ON ingestion_batches(status);
         CREATE INDEX IF NOT EXISTS idx_ingestion_batches_user_id 
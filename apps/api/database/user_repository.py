@@ -1,59 +1,65 @@
-﻿from datetime import datetime
-from typing import Optional
+﻿from typing import Optional
 from uuid import UUID
 
-from psycopg2.extras import RealDictCursor
+from .async_postgres import execute, fetchrow, fetchval
 
-from .postgres_client import get_db_connection, fetch_one
 
-
-def create_user(*, email: str, password_hash: str, first_name: str, last_name: str, role: str) -> dict:
+async def create_user(*, email: str, password_hash: str, first_name: str, last_name: str, role: str) -> dict:
     query = """
         INSERT INTO app_users (email, password_hash, first_name, last_name, role)
-        VALUES (%s, %s, %s, %s, %s)
+        VALUES ($1, $2, $3, $4, $5)
         RETURNING id, email, first_name, last_name, role, is_active, created_at, updated_at;
     """
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(query, (email, password_hash, first_name, last_name, role))
-            return cur.fetchone()
+    return await fetchrow(query, email, password_hash, first_name, last_name, role)
 
 
-def get_user_by_email(email: str) -> Optional[dict]:
+async def get_user_by_email(email: str) -> Optional[dict]:
     query = """
         SELECT id, email, password_hash, first_name, last_name, role, is_active, created_at, updated_at
         FROM app_users
-        WHERE email = %s
+        WHERE email = $1
     """
-    return fetch_one(query, (email,))
+    return await fetchrow(query, email)
 
 
-def get_user_by_id(user_id: UUID) -> Optional[dict]:
+async def get_user_by_id(user_id: UUID) -> Optional[dict]:
     query = """
         SELECT id, email, first_name, last_name, role, is_active, created_at, updated_at
         FROM app_users
-        WHERE id = %s
+        WHERE id = $1
     """
-    return fetch_one(query, (str(user_id),))
+    return await fetchrow(query, user_id)
 
 
-def touch_user_login(user_id: UUID) -> None:
-    query = "UPDATE app_users SET updated_at = %s WHERE id = %s"
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(query, (datetime.utcnow(), str(user_id)))
+async def touch_user_login(user_id: UUID) -> None:
+    query = "UPDATE app_users SET updated_at = NOW() WHERE id = $1"
+    await execute(query, user_id)
 
 
-def record_social_account(*, user_id: UUID, provider: str, provider_account_id: str) -> None:
+async def record_social_account(*, user_id: UUID, provider: str, provider_account_id: str) -> None:
     query = """
         INSERT INTO user_social_accounts (user_id, provider, provider_account_id)
-        VALUES (%s, %s, %s)
+        VALUES ($1, $2, $3)
         ON CONFLICT (provider, provider_account_id) DO NOTHING;
     """
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(query, (str(user_id), provider, provider_account_id))
+    await execute(query, user_id, provider, provider_account_id)
+
+async def update_user(user_id: UUID, **fields) -> Optional[dict]:
+    """Update the given columns (first_name, last_name, role, is_active) and return the user."""
+    allowed = {"first_name", "last_name", "role", "is_active"}
+    changes = {column: value for column, value in fields.items() if column in allowed and value is not None}
+    if not changes:
+        return await get_user_by_id(user_id)
+    assignments = ", ".join(f"{column} = ${index}" for index, column in enumerate(changes, start=2))
+    query = f"""
+        UPDATE app_users
+        SET {assignments}, updated_at = NOW()
+        WHERE id = $1
+        RETURNING id, email, first_name, last_name, role, is_active, created_at, updated_at;
+    """
+    return await fetchrow(query, user_id, *changes.values())
+
 
-def has_admin_user() -> bool:
+async def has_admin_user() -> bool:
     query = "SELECT 1 FROM app_users WHERE role = 'admin' LIMIT 1"
-    return fetch_one(query) is not None
+    return await fetchval(query) is not None
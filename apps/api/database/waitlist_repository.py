@@ -1,24 +1,18 @@
 """
 Repository para operaciones de base de datos de waitlist (T002)
 """
-from datetime import datetime
 from typing import Optional
-from uuid import UUID
 
-from sqlalchemy import text
-from sqlalchemy.exc import IntegrityError
-
-from database.postgres_client import get_db_session
+from database import async_postgres
 from models.waitlist import WaitlistCreate, WaitlistEntry
 
+ENTRY_COLUMNS = "id, email, referral_source, created_at, invited, invited_at"
 
-class WaitlistRepository:
-    """Repository para gestionar la tabla waitlist"""
 
-    def __init__(self):
-        self.session = get_db_session()
+class WaitlistRepository:
+    """Repository para gestionar la tabla waitlist (pool asíncrono compartido)"""
 
-    def add_to_waitlist(self, waitlist_data: WaitlistCreate) -> WaitlistEntry:
+    async def add_to_waitlist(self, waitlist_data: WaitlistCreate) -> WaitlistEntry:
         """
         Añade un email a la waitlist.
 
@@ -29,39 +23,20 @@ class WaitlistRepository:
             WaitlistEntry creado
 
         Raises:
-            IntegrityError: Si el email ya existe
+            asyncpg.UniqueViolationError: Si el email ya existe
         """
-        query = text("""
+        row = await async_postgres.fetchrow(
+            f"""
             INSERT INTO waitlist (email, referral_source)
-            VALUES (:email, :referral_source)
-            RETURNING id, email, referral_source, created_at, invited, invited_at
-        """)
-
-        try:
-            result = self.session.execute(
-                query,
-                {
-                    "email": waitlist_data.email,
-                    "referral_source": waitlist_data.referral_source
-                }
-            )
-            self.session.commit()
-
-            row = result.fetchone()
-            return WaitlistEntry(
-                id=row[0],
-                email=row[1],
-                referral_source=row[2],
-                created_at=row[3],
-                invited=row[4],
-                invited_at=row[5]
-            )
-
-        except IntegrityError as e:
-            self.session.rollback()
-            raise e
-
-    def get_by_email(self, email: str) -> Optional[WaitlistEntry]:
+            VALUES ($1, $2)
+            RETURNING {ENTRY_COLUMNS}
+            """,
+            waitlist_data.email,
+            waitlist_data.referral_source
+        )
+        return WaitlistEntry(**row)
+
+    async def get_by_email(self, email: str) -> Optional[WaitlistEntry]:
         """
         Busca una entrada por email.
 
@@ -71,28 +46,13 @@ class WaitlistRepository:
         Returns:
             WaitlistEntry si existe, None si no
         """
-        query = text("""
-            SELECT id, email, referral_source, created_at, invited, invited_at
-            FROM waitlist
-            WHERE email = :email
-        """)
+        row = await async_postgres.fetchrow(
+            f"SELECT {ENTRY_COLUMNS} FROM waitlist WHERE email = $1",
+            email.lower()
+        )
+        return WaitlistEntry(**row) if row else None
 
-        result = self.session.execute(query, {"email": email.lower()})
-        row = result.fetchone()
-
-        if row:
-            return WaitlistEntry(
-                id=row[0],
-                email=row[1],
-                referral_source=row[2],
-                created_at=row[3],
-                invited=row[4],
-                invited_at=row[5]
-            )
-
-        return None
-
-    def email_exists(self, email: str) -> bool:
+    async def email_exists(self, email: str) -> bool:
         """
         Verifica si un email ya está en la waitlist.
 
@@ -102,16 +62,12 @@ class WaitlistRepository:
         Returns:
             True si existe, False si no
         """
-        query = text("""
-            SELECT COUNT(*) FROM waitlist WHERE email = :email
-        """)
-
-        result = self.session.execute(query, {"email": email.lower()})
-        count = result.scalar()
+        return await async_postgres.fetchval(
+            "SELECT EXISTS (SELECT 1 FROM waitlist WHERE email = $1)",
+            email.lower()
+        )
 
-        return count > 0
-
-    def get_position(self, email: str) -> Optional[int]:
+    async def get_position(self, email: str) -> Optional[int]:
         """
         Obtiene la posición de un email en la waitlist (ordenado por created_at).
 
@@ -121,35 +77,28 @@ class WaitlistRepository:
         Returns:
             Posición (1-indexed) o None si no existe
         """
-        query = text("""
+        return await async_postgres.fetchval(
+            """
             SELECT position FROM (
                 SELECT email, ROW_NUMBER() OVER (ORDER BY created_at) as position
                 FROM waitlist
                 WHERE invited = FALSE
             ) subquery
-            WHERE email = :email
-        """)
-
-        result = self.session.execute(query, {"email": email.lower()})
-        row = result.fetchone()
+            WHERE email = $1
+            """,
+            email.lower()
+        )
 
-        return row[0] if row else None
-
-    def get_waitlist_count(self) -> int:
+    async def get_waitlist_count(self) -> int:
         """
         Obtiene el total de emails en la waitlist no invitados.
 
         Returns:
             Número total de emails pending
         """
-        query = text("""
-            SELECT COUNT(*) FROM waitlist WHERE invited = FALSE
-        """)
-
-        result = self.session.execute(query)
-        return result.scalar()
+        return await async_postgres.fetchval("SELECT COUNT(*) FROM waitlist WHERE invited = FALSE")
 
-    def mark_as_invited(self, email: str) -> bool:
+    async def mark_as_invited(self, email: str) -> bool:
         """
         Marca un email como invitado.
 
@@ -159,18 +108,18 @@ class WaitlistRepository:
         Returns:
             True si se actualizó, False si no existe
         """
-        query = text("""
+        status = await async_postgres.execute(
+            """
             UPDATE waitlist
             SET invited = TRUE, invited_at = NOW()
-            WHERE email = :email AND invited = FALSE
-        """)
-
-        result = self.session.execute(query, {"email": email.lower()})
-        self.session.commit()
-
-        return result.rowcount > 0
-
-    def get_pending_invites(self, limit: int = 50) -> list[WaitlistEntry]:
+            WHERE email = $1 AND invited = FALSE
+            """,
+            email.lower()
+        )
+        # Etiqueta de estado de asyncpg: "UPDATE <filas>"
+        return status.split()[-1] != "0"
+
+    async def get_pending_invites(self, limit: int = 50) -> list[WaitlistEntry]:
         """
         Obtiene emails pendientes de invitación (ordenados por fecha de registro).
 
@@ -180,29 +129,14 @@ class WaitlistRepository:
         Returns:
             Lista de WaitlistEntry pendientes
         """
-        query = text("""
-            SELECT id, email, referral_source, created_at, invited, invited_at
+        rows = await async_postgres.fetch(
+            f"""
+            SELECT {ENTRY_COLUMNS}
             FROM waitlist
             WHERE invited = FALSE
             ORDER BY created_at ASC
-            LIMIT :limit
-        """)
-
-        result = self.session.execute(query, {"limit": limit})
-
-        entries = []
-        for row in result:
-            entries.append(WaitlistEntry(
-                id=row[0],
-                email=row[1],
-                referral_source=row[2],
-                created_at=row[3],
-                invited=row[4],
-                invited_at=row[5]
-            ))
-
-        return entries
-
-    def close(self):
-        """Cierra la sesión de base de datos"""
-        self.session.close()
+            LIMIT $1
+            """,
+            limit
+        )
+        return [WaitlistEntry(**row) for row in rows]
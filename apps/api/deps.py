@@ -7,7 +7,8 @@ from fastapi.security import OAuth2PasswordBearer
 
 from models.user import UserPublic, UserRole
 from services.auth_service import AuthService
-from services.security import decode_token, TokenDecodeError
+from services.auth_cache import decode_token_cached
+from services.security import TokenDecodeError
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/sign-in", auto_error=False)
 BYPASS_AUTH = os.getenv("AUTH_BYPASS", "true").lower() in {"1", "true", "yes"}
@@ -33,11 +34,11 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserPublic:
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
     try:
-        payload = decode_token(token)
+        payload = decode_token_cached(token)
         user_id = payload.get("sub")
         if not user_id:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        user = AuthService.get_user(UUID(user_id))
+        user = await AuthService.get_user(UUID(user_id))
         if not user:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
         return user
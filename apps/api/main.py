@@ -1,5 +1,6 @@
 import os
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -33,26 +34,32 @@ for path in [current_dir, parent_dir, project_root]:
         sys.path.insert(0, path)
 
 # Configure structured logging BEFORE importing other modules
-from utils.logging_config import get_logger, setup_logging
+from utils.logging_config import get_logger, setup_logging, shutdown_logging
+from utils.tracing import setup_tracing, shutdown_tracing
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 USE_JSON_LOGS = os.getenv("USE_JSON_LOGS", "false").lower() == "true"
 setup_logging(level=LOG_LEVEL, use_json=USE_JSON_LOGS)
+setup_tracing()
 
 logger = get_logger(__name__)
 
 try:
-    from middleware import CorrelationIdMiddleware, limiter
+    from database import async_postgres
+    from middleware import CorrelationIdMiddleware, RateLimitMiddleware, limiter
     from routes.auth import router as auth_router
+    from routes.collections import router as collections_router
     from routes.documents import router as documents_router
     from routes.health import router as health_router
     from routes.ingest import router as ingest_router
+    from routes.metrics import router as metrics_router
     from routes.query import router as query_router
+    from routes.search import router as search_router
     from routes.waitlist import router as waitlist_router
+    from utils import metrics
     from slowapi import _rate_limit_exceeded_handler
     from slowapi.errors import RateLimitExceeded
-
-    # from routes.batch import router as batch_router  # Temporarily disabled
+    from routes.batch import router as batch_router
 except ImportError as e:
     logger.error(f"Import error: {e}", exc_info=True)
     print(f"Import error: {e}")
@@ -62,17 +69,32 @@ except ImportError as e:
     print("Project root:", project_root)
     raise
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Close the shared Postgres pool on shutdown (it is opened on first query) and flush spans and logs."""
+    yield
+    await async_postgres.close_pool()
+    metrics.mark_process_dead()
+    shutdown_tracing()
+    shutdown_logging()
+
+
 # Create FastAPI application
 app = FastAPI(
     title="Anclora RAG API",
     description="RAG (Retrieval-Augmented Generation) API for document processing and querying",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add rate limiter state to app
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# Cost-weighted token bucket per user/IP (innermost: 429s still get correlation ID and CORS headers)
+app.add_middleware(RateLimitMiddleware)
+
 # Add correlation ID middleware (must be added FIRST for proper request tracking)
 app.add_middleware(CorrelationIdMiddleware)
 
@@ -89,13 +111,15 @@ logger.info(f"FastAPI application initialized - version=1.0.0 log_level={LOG_LEV
 
 # Include routers
 app.include_router(auth_router)
+app.include_router(collections_router)
 app.include_router(documents_router)
 app.include_router(health_router)
 app.include_router(ingest_router)
+app.include_router(metrics_router)
 app.include_router(query_router)
+app.include_router(search_router)
 app.include_router(waitlist_router)
-# Temporarily disabled batch router due to import errors
-# app.include_router(batch_router)
+app.include_router(batch_router)
 
 @app.get("/")
 async def root():
@@ -107,6 +131,7 @@ async def root():
             "health": "/health",
             "ingest": "/ingest",
             "query": "/query",
+            "search": "/search",
             "waitlist": "/api/waitlist",
             "batch": "/batch"
         }
@@ -1,6 +1,7 @@
 """Middleware for FastAPI application."""
 
 from .correlation_id import CorrelationIdMiddleware
-from .rate_limit import limiter
+from .latency import route_latency
+from .rate_limit import RateLimitMiddleware, limiter
 
-__all__ = ["CorrelationIdMiddleware", "limiter"]
+__all__ = ["CorrelationIdMiddleware", "RateLimitMiddleware", "limiter", "route_latency"]
@@ -1,76 +1,144 @@
-"""Middleware for correlation ID injection and request logging."""
+"""Middleware for correlation ID injection, request logging and route latency."""
 
 import logging
 import time
 import uuid
-from typing import Callable
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from opentelemetry import propagate
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from utils.logging_config import clear_correlation_id, set_correlation_id
+from utils.metrics import HTTP_REQUEST_SECONDS
+from utils.tracing import tracer
+
+from .latency import route_latency
 
 logger = logging.getLogger(__name__)
 
+CORRELATION_HEADER = b"x-correlation-id"
+REQUEST_ID_HEADER = b"x-request-id"
+# W3C trace context sent by an upstream proxy or client
+TRACE_HEADERS = (b"traceparent", b"tracestate")
+
+
+def _correlation_id(scope: Scope) -> str:
+    """Correlation ID from ``X-Correlation-ID`` / ``X-Request-ID``, or a new one."""
+    request_id = None
+    for name, value in scope["headers"]:
+        if name == CORRELATION_HEADER:
+            return value.decode("latin-1")
+        if name == REQUEST_ID_HEADER:
+            request_id = value.decode("latin-1")
+    return request_id or str(uuid.uuid4())
+
+
+def _trace_context(scope: Scope):
+    carrier = {
+        name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"] if name in TRACE_HEADERS
+    }
+    return propagate.extract(carrier) if carrier else None
+
 
-class CorrelationIdMiddleware(BaseHTTPMiddleware):
+def _route_template(scope: Scope) -> str:
+    # Set by the router once the request matched; templates keep histogram keys bounded
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class CorrelationIdMiddleware:
     """
-    Middleware that:
-    1. Extracts or generates a correlation ID for each request
+    Pure ASGI middleware that:
+    1. Extracts or generates a correlation ID for each request (HTTP and WebSocket)
     2. Injects it into the request context
     3. Adds it to the response headers
     4. Logs request/response with timing information
+    5. Opens the server span of the request's trace (continuing an incoming ``traceparent``)
+    6. Records the duration in the per-route latency histograms (``/health/latency``
+       and the Prometheus ``rag_http_request_duration_seconds``)
+
+    Unlike ``BaseHTTPMiddleware`` it does not run the endpoint in a separate
+    task or wrap the response body stream, so streaming responses and
+    WebSockets pass through untouched.
     """
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Process the request and add correlation ID."""
-        # Extract correlation ID from header or generate new one
-        correlation_id = request.headers.get("X-Correlation-ID") or request.headers.get(
-            "X-Request-ID"
-        ) or str(uuid.uuid4())
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
-        # Set correlation ID in context
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        correlation_id = _correlation_id(scope)
         set_correlation_id(correlation_id)
 
+        if scope["type"] == "websocket":
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                clear_correlation_id()
+            return
+
+        method = scope["method"]
+        path = scope["path"]
+        client = scope.get("client")
+
         # Log incoming request
-        start_time = time.time()
-        logger.info(
-            f"Incoming request: {request.method} {request.url.path} "
-            f"from {request.client.host if request.client else 'unknown'}"
-        )
-
-        try:
-            # Process request
-            response = await call_next(request)
-
-            # Calculate request duration
-            duration_ms = (time.time() - start_time) * 1000
-
-            # Add correlation ID to response headers
-            response.headers["X-Correlation-ID"] = correlation_id
-
-            # Log response
-            logger.info(
-                f"Request completed: {request.method} {request.url.path} "
-                f"status={response.status_code} duration={round(duration_ms, 2)}ms"
-            )
-
-            return response
-
-        except Exception as exc:
-            # Calculate request duration even on error
-            duration_ms = (time.time() - start_time) * 1000
-
-            # Log error
-            logger.error(
-                f"Request failed: {request.method} {request.url.path} "
-                f"duration={round(duration_ms, 2)}ms error={str(exc)}",
-                exc_info=True,
-            )
-
-            # Re-raise exception to be handled by FastAPI error handlers
-            raise
-
-        finally:
-            # Clean up correlation ID from context
-            clear_correlation_id()
+        start_time = time.perf_counter()
+        logger.info(f"Incoming request: {method} {path} from {client[0] if client else 'unknown'}")
+
+        status_code = 500
+        header_value = correlation_id.encode("latin-1")
+
+        async def send_with_correlation_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", ()), (CORRELATION_HEADER, header_value)]
+            await send(message)
+
+        span_attributes = {"http.request.method": method, "url.path": path, "correlation_id": correlation_id}
+        with tracer.start_as_current_span(
+            method, context=_trace_context(scope), kind=SpanKind.SERVER, attributes=span_attributes
+        ) as span:
+            try:
+                await self.app(scope, receive, send_with_correlation_id)
+
+            except Exception as exc:
+                # Calculate request duration even on error
+                duration = time.perf_counter() - start_time
+                route = _route_template(scope)
+                route_latency.observe(method, route, duration)
+                HTTP_REQUEST_SECONDS.labels(method, route, "500").observe(duration)
+                span.update_name(f"{method} {route}")
+                span.set_attribute("http.route", route)
+
+                # Log error
+                logger.error(
+                    f"Request failed: {method} {path} duration={round(duration * 1000, 2)}ms error={str(exc)}",
+                    exc_info=True,
+                )
+
+                # Re-raise exception to be handled by FastAPI error handlers
+                raise
+
+            else:
+                duration = time.perf_counter() - start_time
+                route = _route_template(scope)
+                route_latency.observe(method, route, duration)
+                HTTP_REQUEST_SECONDS.labels(method, route, str(status_code)).observe(duration)
+                span.update_name(f"{method} {route}")
+                span.set_attribute("http.route", route)
+                span.set_attribute("http.response.status_code", status_code)
+                if status_code >= 500:
+                    span.set_status(Status(StatusCode.ERROR))
+
+                # Log response
+                logger.info(
+                    f"Request completed: {method} {path} status={status_code} duration={round(duration * 1000, 2)}ms"
+                )
+
+            finally:
+                # Clean up correlation ID from context
+                clear_correlation_id()
@@ -0,0 +1,86 @@
+"""Per-route request latency histograms with fixed buckets."""
+
+import math
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+# Upper bounds in seconds; one extra bucket counts everything slower
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+class LatencyHistogram:
+    """Per-bucket (non-cumulative) counts plus sum and count; ``observe`` allocates nothing."""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self) -> None:
+        self.counts: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (``inf`` past the last bound)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else float("inf")
+        return float("inf")
+
+
+def _milliseconds(seconds: float) -> Optional[float]:
+    # None: slower than the last bucket bound
+    return None if math.isinf(seconds) else round(seconds * 1000, 3)
+
+
+class RouteLatency:
+    """Histograms keyed by ``(method, route template)``; templates keep cardinality bounded."""
+
+    def __init__(self) -> None:
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, route: str, seconds: float) -> None:
+        histogram = self._histograms.get((method, route))
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault((method, route), LatencyHistogram())
+        histogram.observe(seconds)
+
+    def items(self) -> List[Tuple[Tuple[str, str], LatencyHistogram]]:
+        return list(self._histograms.items())
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        """Count, mean and bucket-resolution p50/p95/p99 (ms) per route."""
+        rows = []
+        for (method, route), histogram in sorted(self.items()):
+            if not histogram.count:
+                continue
+            rows.append({
+                "method": method,
+                "route": route,
+                "count": histogram.count,
+                "mean_ms": round(histogram.total / histogram.count * 1000, 3),
+                "p50_ms": _milliseconds(histogram.quantile(0.5)),
+                "p95_ms": _milliseconds(histogram.quantile(0.95)),
+                "p99_ms": _milliseconds(histogram.quantile(0.99)),
+            })
+        return rows
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+route_latency = RouteLatency()
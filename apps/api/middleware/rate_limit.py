@@ -1,22 +1,279 @@
 """
-Rate limiting middleware usando slowapi (T004)
+Rate limiting middleware (T004).
+
+Dos mecanismos:
+
+- :class:`RateLimitMiddleware`: token bucket distribuido en Redis para toda
+  la API. Cada cliente (usuario autenticado por el ``sub`` del JWT, o IP si
+  no hay token válido) tiene un cubo de ``RATE_LIMIT_BURST`` unidades que se
+  rellena a ``RATE_LIMIT_PER_SECOND`` unidades/s, y cada ruta consume según
+  su coste (una consulta al LLM cuesta más que una búsqueda). La comprobación
+  es un script Lua atómico: un único round trip por petición, con el reloj
+  de Redis para que todas las instancias compartan la misma ventana. Las
+  respuestas llevan las cabeceras ``RateLimit-*`` y ``Retry-After`` en 429.
+- ``limiter`` (slowapi): límites explícitos por endpoint (p. ej. la waitlist),
+  también almacenados en Redis.
+
+Si Redis no responde, el middleware usa un cubo en memoria del proceso
+(límites por instancia) en lugar de rechazar o dejar pasar todo.
 """
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in {"1", "true", "yes"}
+# "redis" (compartido entre instancias) o "memory" (por proceso)
+RATE_LIMIT_STORAGE = os.getenv("RATE_LIMIT_STORAGE", "redis").lower()
+# Capacidad del cubo (ráfaga máxima, en unidades de coste)
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "120"))
+# Unidades repuestas por segundo (2/s = 120 unidades por minuto)
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "2"))
+
+# Coste por prefijo de ruta (gana el prefijo más largo); 0 = sin límite
+DEFAULT_ROUTE_COSTS: Dict[str, float] = {
+    "/query/batch": 20,
+    "/query": 10,
+    "/ingest": 5,
+    "/batch": 5,
+    "/collections/reindex": 20,
+    "/search": 2,
+    "/health": 0,
+    "/metrics": 0,
+    "/docs": 0,
+    "/openapi.json": 0,
+}
+DEFAULT_COST = 1.0
+
+KEY_PREFIX = "ratelimit"
+
+# KEYS[1]: cubo. ARGV: capacidad, unidades/s, coste.
+# Devuelve {permitido, unidades restantes, ms hasta poder pagar el coste, ms hasta cubo lleno}.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+
+local allowed = 0
+local retry_ms = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_ms = math.ceil((cost - tokens) * 1000 / rate)
+end
+
+local full_ms = math.ceil((capacity - tokens) * 1000 / rate)
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.max(full_ms, 1000))
+return {allowed, tostring(tokens), retry_ms, full_ms}
+"""
+
+
+def _load_route_costs() -> List[Tuple[str, float]]:
+    """Costes por defecto + ``RATE_LIMIT_COSTS`` (``"/query=10,/search=2"``), del prefijo más largo al más corto."""
+    costs = dict(DEFAULT_ROUTE_COSTS)
+    for item in os.getenv("RATE_LIMIT_COSTS", "").split(","):
+        prefix, _, cost = item.strip().partition("=")
+        if prefix and cost:
+            costs[prefix.strip()] = float(cost)
+    return sorted(costs.items(), key=lambda entry: len(entry[0]), reverse=True)
+
+
+ROUTE_COSTS = _load_route_costs()
+
+
+def route_cost(path: str) -> float:
+    """Coste de una petición según el prefijo de su ruta."""
+    for prefix, cost in ROUTE_COSTS:
+        if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+            return cost
+    return DEFAULT_COST
+
+
+class LocalTokenBucket:
+    """Misma política que el script Lua, en memoria del proceso."""
+
+    def __init__(self, capacity: float, rate: float, max_keys: int = 100_000):
+        self.capacity = capacity
+        self.rate = rate
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, cost: float) -> Tuple[bool, float, int, int]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + max(0.0, now - ts) * self.rate)
+            allowed = tokens >= cost
+            retry_ms = 0
+            if allowed:
+                tokens -= cost
+            else:
+                retry_ms = math.ceil((cost - tokens) * 1000 / self.rate)
+            if len(self._buckets) >= self.max_keys and key not in self._buckets:
+                self._buckets.clear()
+            self._buckets[key] = (tokens, now)
+        return allowed, tokens, retry_ms, math.ceil((self.capacity - tokens) * 1000 / self.rate)
+
+
+class RedisTokenBucket:
+    """Token bucket en Redis: una llamada ``EVALSHA`` por comprobación."""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self._script = None
+
+    def _get_script(self):
+        if self._script is None:
+            from redis import asyncio as redis_asyncio
+
+            from clients.redis_queue import REDIS_URL
+
+            self._script = redis_asyncio.from_url(REDIS_URL).register_script(TOKEN_BUCKET_LUA)
+        return self._script
+
+    async def take(self, key: str, cost: float) -> Tuple[bool, float, int, int]:
+        allowed, tokens, retry_ms, full_ms = await self._get_script()(
+            keys=[f"{KEY_PREFIX}:{key}"], args=[self.capacity, self.rate, cost]
+        )
+        return bool(allowed), float(tokens), int(retry_ms), int(full_ms)
+
+
+def _client_identity(scope) -> str:
+    """``user:<sub>`` si la petición trae un JWT válido; si no, ``ip:<dirección>``."""
+    for name, value in scope.get("headers") or []:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                from services.auth_cache import decode_token_cached
+                from services.security import TokenDecodeError
+
+                try:
+                    subject = decode_token_cached(token).get("sub")
+                except TokenDecodeError:
+                    subject = None
+                if subject:
+                    return f"user:{subject}"
+            break
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """
+    Middleware ASGI de rate limiting por coste.
+
+    Las peticiones con coste 0 (health, metrics, docs) no consultan Redis.
+    """
+
+    def __init__(self, app, capacity: float = RATE_LIMIT_BURST, rate: float = RATE_LIMIT_PER_SECOND):
+        self.app = app
+        self.capacity = capacity
+        self.rate = rate
+        self.local = LocalTokenBucket(capacity, rate)
+        self.redis = RedisTokenBucket(capacity, rate) if RATE_LIMIT_STORAGE == "redis" else None
+        self._redis_down_until = 0.0
+
+    async def _take(self, key: str, cost: float) -> Tuple[bool, float, int, int]:
+        if self.redis is not None and time.monotonic() >= self._redis_down_until:
+            try:
+                return await self.redis.take(key, cost)
+            except Exception as exc:
+                # Reintentar Redis en 30 s; mientras tanto, límites por proceso
+                self._redis_down_until = time.monotonic() + 30
+                logger.warning(f"Rate limit: Redis no disponible, usando memoria local: {exc}")
+        return self.local.take(key, cost)
+
+    def _headers(self, remaining: float, full_ms: int) -> List[Tuple[bytes, bytes]]:
+        window = int(self.capacity / self.rate) if self.rate else 0
+        return [
+            (b"ratelimit-limit", str(int(self.capacity)).encode()),
+            (b"ratelimit-remaining", str(max(0, int(remaining))).encode()),
+            (b"ratelimit-reset", str(math.ceil(full_ms / 1000)).encode()),
+            (b"ratelimit-policy", f"{int(self.capacity)};w={window}".encode()),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        cost = route_cost(scope["path"])
+        if cost <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        allowed, remaining, retry_ms, full_ms = await self._take(_client_identity(scope), cost)
+        headers = self._headers(remaining, full_ms)
+
+        if not allowed:
+            retry_after = str(max(1, math.ceil(retry_ms / 1000))).encode()
+            body = json.dumps({
+                "detail": "Rate limit excedido",
+                "cost": cost,
+                "retry_after_seconds": int(retry_after)
+            }).encode("utf-8")
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", retry_after),
+                    *headers,
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), *headers]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
 
 def get_limiter() -> Limiter:
     """
-    Crea y retorna una instancia de Limiter para rate limiting.
+    Crea y retorna una instancia de Limiter para límites explícitos por endpoint.
 
     Returns:
-        Limiter configurado con storage en memoria
+        Limiter con ventana deslizante en Redis (``memory://`` si
+        ``RATE_LIMIT_STORAGE=memory``)
     """
+    storage_uri = "memory://"
+    if RATE_LIMIT_STORAGE == "redis":
+        from clients.redis_queue import REDIS_URL
+
+        storage_uri = REDIS_URL
     return Limiter(
         key_func=get_remote_address,
-        default_limits=["200 per day", "50 per hour"],
-        storage_uri="memory://",
-        strategy="fixed-window"
+        storage_uri=storage_uri,
+        strategy="moving-window",
+        in_memory_fallback_enabled=True,
+        enabled=RATE_LIMIT_ENABLED
     )
 
 
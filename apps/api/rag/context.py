@@ -0,0 +1,195 @@
+"""Context assembly for the LLM prompt: merge adjacent chunks and pack them into a token budget."""
+
+import logging
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+from llama_index.core.bridge.pydantic import Field
+from llama_index.core.postprocessor.types import BaseNodePostprocessor
+from llama_index.core.schema import MetadataMode, NodeWithScore, QueryBundle, TextNode
+from llama_index.core.utils import get_tokenizer
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of tokens of retrieved context sent to the LLM (<= 0 disables packing)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2048"))
+
+# The splitter overlaps chunks by 80 tokens; never search further back than this many characters
+MAX_OVERLAP_CHARS = 2048
+
+# Only this metadata is useful to the LLM; everything else is bookkeeping
+LLM_METADATA_KEYS = {"document_id"}
+
+
+def overlap_length(previous: str, following: str, max_chars: int = MAX_OVERLAP_CHARS) -> int:
+    """
+    Return the length of the longest suffix of ``previous`` that is a prefix of ``following``.
+
+    Args:
+        previous: Text of the earlier chunk
+        following: Text of the next chunk of the same document
+        max_chars: Upper bound for the overlap search window
+
+    Returns:
+        Number of characters of ``following`` already present at the end of ``previous``
+    """
+    window = min(len(previous), len(following), max_chars)
+    if window == 0:
+        return 0
+
+    tail = previous[-window:]
+    anchor = following[0]
+    start = tail.find(anchor)
+    while start != -1:
+        length = window - start
+        if following.startswith(tail[start:]):
+            return length
+        start = tail.find(anchor, start + 1)
+    return 0
+
+
+def _merge_group(group: List[NodeWithScore]) -> NodeWithScore:
+    """Merge consecutive chunks of one document into a single node without repeated text."""
+    first = group[0]
+    text = first.node.get_content()
+    for item in group[1:]:
+        following = item.node.get_content()
+        overlap = overlap_length(text, following)
+        text += following[overlap:] if overlap else "\n" + following
+
+    metadata = dict(first.node.metadata)
+    metadata["chunk_end_index"] = group[-1].node.metadata.get("chunk_index")
+    scores = [item.score for item in group if item.score is not None]
+
+    merged = TextNode(
+        id_=first.node.node_id,
+        text=text,
+        metadata=metadata,
+    )
+    return NodeWithScore(node=merged, score=max(scores) if scores else None)
+
+
+def merge_adjacent_chunks(nodes: List[NodeWithScore]) -> List[NodeWithScore]:
+    """
+    Merge retrieved chunks that are neighbours in the same document.
+
+    Chunks are grouped by ``document_id`` and ordered by ``chunk_index``; runs of
+    consecutive indexes are joined into one node and the text shared through the
+    splitter overlap is kept only once. Nodes without those fields are returned as-is.
+
+    Args:
+        nodes: Retrieved nodes with their similarity scores
+
+    Returns:
+        List of (possibly merged) nodes
+    """
+    by_document: Dict[str, List[NodeWithScore]] = {}
+    passthrough: List[NodeWithScore] = []
+
+    for item in nodes:
+        metadata = item.node.metadata or {}
+        if metadata.get("document_id") is None or metadata.get("chunk_index") is None:
+            passthrough.append(item)
+            continue
+        by_document.setdefault(metadata["document_id"], []).append(item)
+
+    merged: List[NodeWithScore] = []
+    for items in by_document.values():
+        items.sort(key=lambda item: item.node.metadata["chunk_index"])
+
+        group = [items[0]]
+        for item in items[1:]:
+            previous_index = group[-1].node.metadata["chunk_index"]
+            current_index = item.node.metadata["chunk_index"]
+            if current_index == previous_index:
+                continue  # Same chunk retrieved twice
+            if current_index == previous_index + 1:
+                group.append(item)
+                continue
+            merged.append(_merge_group(group) if len(group) > 1 else group[0])
+            group = [item]
+        merged.append(_merge_group(group) if len(group) > 1 else group[0])
+
+    return merged + passthrough
+
+
+def _llm_content(node: TextNode) -> str:
+    return node.get_content(metadata_mode=MetadataMode.LLM)
+
+
+def pack_context(
+    nodes: List[NodeWithScore],
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+    tokenizer: Optional[Callable[[str], List[int]]] = None,
+) -> Tuple[List[NodeWithScore], int]:
+    """
+    Merge adjacent chunks and greedily pack them by score into a token budget.
+
+    The highest scoring block is always kept (truncated if it alone exceeds the
+    budget) so the LLM never receives an empty context. The packed blocks are
+    copies: the caller's nodes, which may be returned as response sources, are
+    left untouched.
+
+    Args:
+        nodes: Retrieved nodes with their similarity scores
+        token_budget: Maximum number of context tokens (<= 0 disables the budget)
+        tokenizer: Callable returning token ids for a string (defaults to tiktoken)
+
+    Returns:
+        Tuple of (packed nodes ordered by score, total context tokens)
+    """
+    tokenizer = tokenizer or get_tokenizer()
+
+    # Shallow copies: only attributes are reassigned below, the metadata dicts stay shared
+    blocks = [
+        NodeWithScore(node=block.node.model_copy(), score=block.score) for block in merge_adjacent_chunks(nodes)
+    ]
+    for block in blocks:
+        block.node.excluded_llm_metadata_keys = [
+            key for key in block.node.metadata if key not in LLM_METADATA_KEYS
+        ]
+    blocks.sort(key=lambda block: block.score if block.score is not None else float("-inf"), reverse=True)
+
+    packed: List[NodeWithScore] = []
+    used_tokens = 0
+    for block in blocks:
+        block_tokens = len(tokenizer(_llm_content(block.node)))
+        if token_budget <= 0 or used_tokens + block_tokens <= token_budget:
+            packed.append(block)
+            used_tokens += block_tokens
+        elif not packed:
+            # Keep the best block, cut proportionally to fit the budget
+            text = block.node.get_content()
+            text_tokens = max(len(tokenizer(text)), 1)
+            available = max(token_budget - (block_tokens - text_tokens), 0)
+            keep_chars = int(len(text) * available / text_tokens)
+            block.node.set_content(text[:keep_chars])
+            packed.append(block)
+            used_tokens = len(tokenizer(_llm_content(block.node)))
+
+    logger.debug(
+        "Context packed: %d retrieved chunks -> %d blocks, %d tokens (budget=%d)",
+        len(nodes),
+        len(packed),
+        used_tokens,
+        token_budget,
+    )
+    return packed, used_tokens
+
+
+class ContextPacker(BaseNodePostprocessor):
+    """Node postprocessor that applies :func:`pack_context` before response synthesis."""
+
+    token_budget: int = Field(default=CONTEXT_TOKEN_BUDGET, description="Maximum context tokens")
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "ContextPacker"
+
+    def _postprocess_nodes(
+        self,
+        nodes: List[NodeWithScore],
+        query_bundle: Optional[QueryBundle] = None,
+    ) -> List[NodeWithScore]:
+        packed, _ = pack_context(nodes, self.token_budget)
+        return packed
@@ -0,0 +1,251 @@
+"""
+Near-duplicate detection on parsed text with locality-sensitive hashing kept in Redis.
+
+Documents get a MinHash signature over word shingles, split into bands; each
+band is a Redis set of document ids, so candidates for a new document come
+from one pipelined round trip and are confirmed with the estimated Jaccard
+similarity. Chunks get a 64-bit SimHash split into four 16-bit bands, which
+finds every stored chunk within ``SIMHASH_MAX_DISTANCE`` bits; chunks already
+present in several other documents are treated as boilerplate.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import zlib
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEDUP_NEAR_DUPLICATES = os.getenv("DEDUP_NEAR_DUPLICATES", "true").lower() in {"1", "true", "yes"}
+# Estimated Jaccard similarity of word shingles above which an upload is a near duplicate
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.9"))
+# What happens to a near duplicate: "warn" indexes it and reports the match, "reject" skips it
+NEAR_DUPLICATE_WARN = "warn"
+NEAR_DUPLICATE_REJECT = "reject"
+NEAR_DUPLICATE_ACTIONS = (NEAR_DUPLICATE_WARN, NEAR_DUPLICATE_REJECT)
+NEAR_DUPLICATE_ACTION = os.getenv("NEAR_DUPLICATE_ACTION", NEAR_DUPLICATE_WARN).lower()
+DEDUP_SKIP_BOILERPLATE_CHUNKS = os.getenv("DEDUP_SKIP_BOILERPLATE_CHUNKS", "false").lower() in {"1", "true", "yes"}
+# A chunk is boilerplate once near-identical copies exist in this many other documents
+DEDUP_BOILERPLATE_MIN_DOCUMENTS = int(os.getenv("DEDUP_BOILERPLATE_MIN_DOCUMENTS", "2"))
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+# 16 bands x 8 rows: pairs above ~0.7 similarity share a bucket with high probability
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+
+SIMHASH_BANDS = 4
+SIMHASH_BAND_BITS = 64 // SIMHASH_BANDS
+SIMHASH_MAX_DISTANCE = SIMHASH_BANDS - 1
+# Members sampled per chunk band bucket; keeps lookups bounded for very common boilerplate
+SIMHASH_BUCKET_SAMPLE = 32
+
+KEY_PREFIX = "dedup"
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(1)
+# a < 2^31 and shingle hashes < 2^32 keep a * x + b inside uint64 without wrapping
+_PERM_A = _rng.integers(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_SHINGLE_BLOCK = 8192
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _tokens(text: str) -> List[str]:
+    # Numbers (page numbers, dates, export timestamps) are collapsed so they do not break matches
+    return ["0" if token.isdigit() else token for token in _TOKEN_RE.findall(text.lower())]
+
+
+def _shingles(tokens: Sequence[str], size: int) -> Set[str]:
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """Return the MinHash signature (``NUM_PERM`` uint64 values) of the text's word shingles."""
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode("utf-8")) for shingle in _shingles(_tokens(text), SHINGLE_SIZE)),
+        dtype=np.uint64,
+    )
+    signature = np.full(NUM_PERM, _MERSENNE_PRIME, dtype=np.uint64)
+    for start in range(0, len(hashes), _SHINGLE_BLOCK):
+        block = hashes[start:start + _SHINGLE_BLOCK]
+        permuted = (_PERM_A[:, None] * block[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME
+        np.minimum(signature, permuted.min(axis=1), out=signature)
+    return signature
+
+
+def signature_similarity(left: np.ndarray, right: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return float(np.count_nonzero(left == right)) / NUM_PERM
+
+
+def simhash(text: str) -> int:
+    """Return the 64-bit SimHash of the text's word trigrams."""
+    features = _shingles(_tokens(text), 3)
+    if not features:
+        return 0
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "big") for f in features],
+        dtype=np.uint64,
+    )
+    bits = (hashes[:, None] >> np.arange(64, dtype=np.uint64)) & np.uint64(1)
+    votes = bits.sum(axis=0) * 2 > len(features)
+    return int(sum(1 << int(bit) for bit in np.flatnonzero(votes)))
+
+
+def hamming_distance(left: int, right: int) -> int:
+    return bin(left ^ right).count("1")
+
+
+def near_duplicate_action(requested: Optional[str] = None) -> str:
+    """Action for a near duplicate: the one requested for an upload, else ``NEAR_DUPLICATE_ACTION``."""
+    action = requested or NEAR_DUPLICATE_ACTION
+    return action if action in NEAR_DUPLICATE_ACTIONS else NEAR_DUPLICATE_WARN
+
+
+def _band_keys(signature: np.ndarray) -> List[str]:
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()
+        keys.append(f"{KEY_PREFIX}:lsh:{band}:{hashlib.blake2b(rows, digest_size=8).hexdigest()}")
+    return keys
+
+
+def _simhash_band_keys(value: int) -> List[str]:
+    mask = (1 << SIMHASH_BAND_BITS) - 1
+    return [
+        f"{KEY_PREFIX}:chunk:{band}:{(value >> (band * SIMHASH_BAND_BITS)) & mask:04x}"
+        for band in range(SIMHASH_BANDS)
+    ]
+
+
+def _redis():
+    from clients.redis_queue import get_redis_connection
+
+    return get_redis_connection()
+
+
+def find_near_duplicate(signature: np.ndarray, exclude: Optional[str] = None) -> Optional[Tuple[str, float]]:
+    """
+    Return ``(document_id, similarity)`` of the most similar indexed document above the threshold.
+
+    Two pipelined Redis round trips: band buckets, then candidate signatures.
+    """
+    conn = _redis()
+    pipe = conn.pipeline(transaction=False)
+    for key in _band_keys(signature):
+        pipe.smembers(key)
+    candidates = {member.decode() for members in pipe.execute() for member in members}
+    candidates.discard(exclude)
+    if not candidates:
+        return None
+
+    ordered = sorted(candidates)
+    stored = conn.mget([f"{KEY_PREFIX}:sig:{document_id}" for document_id in ordered])
+    best: Optional[Tuple[str, float]] = None
+    for document_id, raw in zip(ordered, stored):
+        if raw is None:
+            continue
+        similarity = signature_similarity(signature, np.frombuffer(raw, dtype=np.uint64))
+        if similarity >= NEAR_DUPLICATE_THRESHOLD and (best is None or similarity > best[1]):
+            best = (document_id, similarity)
+    return best
+
+
+def register_document(document_id: str, signature: np.ndarray) -> None:
+    """Add (or move) a document's signature in the LSH index."""
+    conn = _redis()
+    previous = conn.get(f"{KEY_PREFIX}:sig:{document_id}")
+    pipe = conn.pipeline(transaction=True)
+    if previous is not None:
+        for key in _band_keys(np.frombuffer(previous, dtype=np.uint64)):
+            pipe.srem(key, document_id)
+    for key in _band_keys(signature):
+        pipe.sadd(key, document_id)
+    pipe.set(f"{KEY_PREFIX}:sig:{document_id}", signature.tobytes())
+    pipe.execute()
+
+
+def find_boilerplate_chunks(document_id: str, simhashes: Sequence[int]) -> Set[int]:
+    """
+    Return the positions of chunks that ``DEDUP_BOILERPLATE_MIN_DOCUMENTS`` other documents already contain.
+
+    All band buckets are sampled in one pipelined round trip.
+    """
+    if not simhashes:
+        return set()
+    pipe = _redis().pipeline(transaction=False)
+    for value in simhashes:
+        for key in _simhash_band_keys(value):
+            pipe.srandmember(key, SIMHASH_BUCKET_SAMPLE)
+    replies = pipe.execute()
+
+    boilerplate = set()
+    for position, value in enumerate(simhashes):
+        owners = set()
+        for members in replies[position * SIMHASH_BANDS:(position + 1) * SIMHASH_BANDS]:
+            for member in members or []:
+                stored_hash, owner = member.decode().split(":", 1)
+                if owner != document_id and hamming_distance(value, int(stored_hash, 16)) <= SIMHASH_MAX_DISTANCE:
+                    owners.add(owner)
+        if len(owners) >= DEDUP_BOILERPLATE_MIN_DOCUMENTS:
+            boilerplate.add(position)
+    return boilerplate
+
+
+def register_chunks(document_id: str, simhashes: Iterable[int]) -> None:
+    """Replace the chunk SimHashes stored for a document."""
+    conn = _redis()
+    _remove_chunks(conn, [document_id])
+    values = list(dict.fromkeys(simhashes))
+    pipe = conn.pipeline(transaction=True)
+    for value in values:
+        for key in _simhash_band_keys(value):
+            pipe.sadd(key, f"{value:016x}:{document_id}")
+    pipe.set(f"{KEY_PREFIX}:chunks:{document_id}", np.array(values, dtype=np.uint64).tobytes())
+    pipe.execute()
+
+
+def _remove_chunks(conn, document_ids: Sequence[str]) -> None:
+    stored = conn.mget([f"{KEY_PREFIX}:chunks:{document_id}" for document_id in document_ids])
+    pipe = conn.pipeline(transaction=True)
+    for document_id, raw in zip(document_ids, stored):
+        if raw is None:
+            continue
+        for value in np.frombuffer(raw, dtype=np.uint64).tolist():
+            for key in _simhash_band_keys(value):
+                pipe.srem(key, f"{value:016x}:{document_id}")
+        pipe.delete(f"{KEY_PREFIX}:chunks:{document_id}")
+    pipe.execute()
+
+
+def remove_documents(document_ids: Sequence[str]) -> None:
+    """Drop documents (signature and chunk SimHashes) from the index."""
+    if not document_ids:
+        return
+    conn = _redis()
+    signatures = conn.mget([f"{KEY_PREFIX}:sig:{document_id}" for document_id in document_ids])
+    pipe = conn.pipeline(transaction=True)
+    for document_id, raw in zip(document_ids, signatures):
+        if raw is None:
+            continue
+        for key in _band_keys(np.frombuffer(raw, dtype=np.uint64)):
+            pipe.srem(key, document_id)
+        pipe.delete(f"{KEY_PREFIX}:sig:{document_id}")
+    pipe.execute()
+    _remove_chunks(conn, document_ids)
+
+
+def clear_index() -> None:
+    """Delete every dedup key (used when all documents are deleted)."""
+    conn = _redis()
+    keys = list(conn.scan_iter(match=f"{KEY_PREFIX}:*", count=1000))
+    for start in range(0, len(keys), 1000):
+        conn.delete(*keys[start:start + 1000])
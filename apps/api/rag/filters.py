@@ -0,0 +1,82 @@
+"""Metadata filters for queries, translated into Qdrant payload filters."""
+
+import json
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, model_validator
+from qdrant_client.http.models import DatetimeRange, FieldCondition, Filter, MatchAny
+
+
+class QueryFilters(BaseModel):
+    """Optional restrictions applied to the vector search before ranking."""
+
+    document_ids: Optional[List[str]] = Field(None, description="Only search these documents")
+    uploaded_after: Optional[datetime] = Field(None, description="Only documents uploaded at or after this instant")
+    uploaded_before: Optional[datetime] = Field(None, description="Only documents uploaded before this instant")
+    content_types: Optional[List[str]] = Field(None, description="Only documents with these MIME types")
+    tags: Optional[List[str]] = Field(None, description="Only documents having any of these tags")
+
+    @model_validator(mode="after")
+    def check_date_range(self):
+        if self.uploaded_after and self.uploaded_before and self.uploaded_after >= self.uploaded_before:
+            raise ValueError("'uploaded_after' must be earlier than 'uploaded_before'")
+        return self
+
+    def is_empty(self) -> bool:
+        return not any(
+            (self.document_ids, self.uploaded_after, self.uploaded_before, self.content_types, self.tags)
+        )
+
+    def cache_key(self) -> str:
+        """
+        Canonical string for these filters, for use as part of a cache key.
+
+        List order and duplicates do not change the key, so equivalent filters
+        share cache entries.
+        """
+        if self.is_empty():
+            return ""
+        canonical = {
+            "document_ids": sorted(set(self.document_ids or [])),
+            "uploaded_after": self.uploaded_after.isoformat() if self.uploaded_after else None,
+            "uploaded_before": self.uploaded_before.isoformat() if self.uploaded_before else None,
+            "content_types": sorted(set(self.content_types or [])),
+            "tags": sorted(set(self.tags or [])),
+        }
+        return json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+
+
+def build_qdrant_filter(filters: Optional[QueryFilters]) -> Optional[Filter]:
+    """
+    Translate query filters into a Qdrant payload filter.
+
+    Every condition targets a field with a payload index (see
+    ``rag.pipeline.PAYLOAD_INDEXES``) so Qdrant can narrow the search before
+    scoring vectors.
+
+    Args:
+        filters: Filters from the request, or None
+
+    Returns:
+        Qdrant Filter, or None when there is nothing to filter on
+    """
+    if filters is None or filters.is_empty():
+        return None
+
+    conditions = []
+    if filters.document_ids:
+        conditions.append(FieldCondition(key="document_id", match=MatchAny(any=filters.document_ids)))
+    if filters.content_types:
+        conditions.append(FieldCondition(key="content_type", match=MatchAny(any=filters.content_types)))
+    if filters.tags:
+        conditions.append(FieldCondition(key="tags", match=MatchAny(any=filters.tags)))
+    if filters.uploaded_after or filters.uploaded_before:
+        conditions.append(
+            FieldCondition(
+                key="uploaded_at",
+                range=DatetimeRange(gte=filters.uploaded_after, lt=filters.uploaded_before),
+            )
+        )
+
+    return Filter(must=conditions)
@@ -1,16 +1,39 @@
 import logging
 import os
+import threading
 import types
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
 
 from fastapi import HTTPException
 from llama_index.core import Document, Settings
 from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.schema import BaseNode
+from llama_index.core.utils import iter_batch
 from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-from llama_index.vector_stores.qdrant import QdrantVectorStore
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http.exceptions import UnexpectedResponse
-from qdrant_client.http.models import Distance, VectorParams, Filter, FieldCondition, MatchValue
+from qdrant_client.http.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Distance,
+    FieldCondition,
+    Filter,
+    MatchValue,
+    OverwritePayloadOperation,
+    PayloadSchemaType,
+    PointIdsList,
+    SetPayload,
+    VectorParams,
+)
+
+from rag import dedup
+from rag.text_store import TEXT_HASH_FIELD, chunk_text_hash
+from rag.vector_store import CompactQdrantVectorStore, get_payload_text
+from utils.metrics import DOCUMENT_CHUNKS, EMBEDDING_BATCH_SIZE, EMBEDDING_SECONDS, record_cache
+from utils.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
@@ -23,9 +46,81 @@ NODE_PARSER = SentenceSplitter(chunk_size=512, chunk_overlap=80)
 Settings.embed_model = EMBED_MODEL
 Settings.node_parser = NODE_PARSER
 
+# Alias every reader and writer uses; it points at a versioned physical collection
+# (documents_v1, documents_v2, ...) so a full reindex can switch atomically.
 COLLECTION_NAME = "documents"
+COLLECTION_VERSION_PREFIX = f"{COLLECTION_NAME}_v"
 EMBED_DIMENSION = 768  # Dimensión del modelo nomic-embed-text-v1.5
 
+# Payload fields used in filters; indexed so Qdrant can filter before scoring vectors
+PAYLOAD_INDEXES: Dict[str, PayloadSchemaType] = {
+    "document_id": PayloadSchemaType.KEYWORD,
+    "content_hash": PayloadSchemaType.KEYWORD,
+    "content_type": PayloadSchemaType.KEYWORD,
+    "tags": PayloadSchemaType.KEYWORD,
+    "chunk_index": PayloadSchemaType.INTEGER,
+    "uploaded_at": PayloadSchemaType.DATETIME,
+}
+
+# Metadata embedded with every chunk that changes what the chunk means; replace re-embeds when it differs
+REEMBED_METADATA_KEYS = ("content_type", "tags")
+
+
+# Query embeddings are cheap to keep and expensive to recompute
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048"))
+_query_embedding_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+_query_embedding_lock = threading.Lock()
+
+
+def embed_queries(queries: List[str]) -> List[List[float]]:
+    """
+    Embed several queries with a single model call, reusing cached vectors.
+
+    Args:
+        queries: Query strings (duplicates are embedded once)
+
+    Returns:
+        One embedding per query, in input order
+    """
+    with _query_embedding_lock:
+        cached = {query: _query_embedding_cache[query] for query in queries if query in _query_embedding_cache}
+        for query in cached:
+            _query_embedding_cache.move_to_end(query)
+
+    missing = list(dict.fromkeys(query for query in queries if query not in cached))
+    record_cache("query_embedding", len(cached), len(missing))
+    if missing:
+        EMBEDDING_BATCH_SIZE.labels("query").observe(len(missing))
+        span = tracer.start_as_current_span("embedding.embed_queries", attributes={"batch_size": len(missing)})
+        with span, EMBEDDING_SECONDS.labels("query").time():
+            if hasattr(EMBED_MODEL, "_embed"):
+                # HuggingFaceEmbedding: one forward pass over all queries with the query prompt
+                vectors = EMBED_MODEL._embed(missing, prompt_name="query")
+            else:
+                vectors = [EMBED_MODEL.get_query_embedding(query) for query in missing]
+
+        with _query_embedding_lock:
+            for query, vector in zip(missing, vectors):
+                cached[query] = vector
+                _query_embedding_cache[query] = vector
+            while len(_query_embedding_cache) > QUERY_EMBEDDING_CACHE_SIZE:
+                _query_embedding_cache.popitem(last=False)
+
+    return [cached[query] for query in queries]
+
+
+def embed_query(query: str) -> List[float]:
+    """Embed a single query through the shared query embedding cache."""
+    return embed_queries([query])[0]
+
+
+def embed_chunks(texts: List[str]) -> List[List[float]]:
+    """Embed chunk texts with one batched model call, recording batch size and duration."""
+    EMBEDDING_BATCH_SIZE.labels("document").observe(len(texts))
+    span = tracer.start_as_current_span("embedding.embed_documents", attributes={"batch_size": len(texts)})
+    with span, EMBEDDING_SECONDS.labels("document").time():
+        return EMBED_MODEL.get_text_embedding_batch(texts)
+
 
 def get_qdrant_client() -> QdrantClient:
     """Initialise Qdrant client with environment settings."""
@@ -45,6 +140,29 @@ def get_qdrant_client() -> QdrantClient:
     return client
 
 
+_async_qdrant_client: Optional[AsyncQdrantClient] = None
+
+
+def get_async_qdrant_client() -> AsyncQdrantClient:
+    """
+    Return the process-wide async Qdrant client, creating it on first use.
+
+    The client keeps its HTTP connection pool alive between requests, so
+    latency-sensitive endpoints avoid a new connection per call.
+    """
+    global _async_qdrant_client
+    if _async_qdrant_client is None:
+        qdrant_api_key = os.getenv("QDRANT_API_KEY")
+        _async_qdrant_client = AsyncQdrantClient(
+            url=os.getenv("QDRANT_URL", "http://qdrant:6333"),
+            api_key=qdrant_api_key if qdrant_api_key else None,
+            prefer_grpc=False,
+            timeout=30,
+            check_compatibility=False,
+        )
+    return _async_qdrant_client
+
+
 def _patch_collection_exists(client: QdrantClient) -> None:
     """Add backwards-compatible fallback for collection existence checks."""
     original_exists = client.collection_exists
@@ -71,22 +189,110 @@ def _patch_collection_exists(client: QdrantClient) -> None:
     client.collection_exists = types.MethodType(safe_collection_exists, client)
 
 
+def versioned_collection_name(version: int) -> str:
+    return f"{COLLECTION_VERSION_PREFIX}{version}"
+
+
+def collection_version(collection_name: str) -> Optional[int]:
+    """Return the version number of a versioned collection name, or None."""
+    if not collection_name.startswith(COLLECTION_VERSION_PREFIX):
+        return None
+    suffix = collection_name[len(COLLECTION_VERSION_PREFIX):]
+    return int(suffix) if suffix.isdigit() else None
+
+
+def resolve_collection_alias(client: QdrantClient, alias_name: str = COLLECTION_NAME) -> Optional[str]:
+    """Return the physical collection an alias points at, or None if it is not an alias."""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == alias_name:
+            return alias.collection_name
+    return None
+
+
+def switch_collection_alias(
+    client: QdrantClient,
+    collection_name: str,
+    alias_name: str = COLLECTION_NAME,
+) -> None:
+    """
+    Point ``alias_name`` at ``collection_name`` in a single atomic alias update.
+
+    Readers see either the old or the new collection, never neither.
+    """
+    operations = []
+    if resolve_collection_alias(client, alias_name) is not None:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias_name)))
+    operations.append(
+        CreateAliasOperation(create_alias=CreateAlias(collection_name=collection_name, alias_name=alias_name))
+    )
+    client.update_collection_aliases(change_aliases_operations=operations)
+    logger.info("Alias '%s' now points at collection '%s'", alias_name, collection_name)
+
+
+def create_collection(client: QdrantClient, collection_name: str, dimension: int = EMBED_DIMENSION) -> None:
+    """Create a physical collection with the standard vector config and payload indexes."""
+    logger.info("Creating Qdrant collection '%s' (dimension=%d)", collection_name, dimension)
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(
+            size=dimension,
+            distance=Distance.COSINE,
+        ),
+    )
+    ensure_payload_indexes(client, collection_name, existing={})
+
+
 def ensure_collection(client: QdrantClient, collection_name: str) -> None:
-    """Create the target collection in Qdrant if it does not exist yet."""
+    """
+    Create the target collection in Qdrant if it does not exist yet.
+
+    ``COLLECTION_NAME`` is created as an alias over ``documents_v1`` so later
+    reindexes can swap collections without downtime. Deployments that still
+    have a physical ``documents`` collection keep using it until their first
+    reindex.
+    """
     logger.info("Ensuring Qdrant collection '%s' exists", collection_name)
     collections = client.get_collections().collections or []
     if any(col.name == collection_name for col in collections):
         logger.info("Collection '%s' already present", collection_name)
+        ensure_payload_indexes(client, collection_name)
+        return
+
+    target = resolve_collection_alias(client, collection_name)
+    if target is not None:
+        logger.info("Collection alias '%s' already present (-> '%s')", collection_name, target)
+        ensure_payload_indexes(client, target)
+        return
+
+    if collection_name == COLLECTION_NAME:
+        physical_name = versioned_collection_name(1)
+        if not any(col.name == physical_name for col in collections):
+            create_collection(client, physical_name)
+        switch_collection_alias(client, physical_name, collection_name)
         return
 
     logger.info("Creating missing Qdrant collection '%s'", collection_name)
-    client.create_collection(
-        collection_name=collection_name,
-        vectors_config=VectorParams(
-            size=EMBED_DIMENSION,
-            distance=Distance.COSINE,
-        ),
-    )
+    create_collection(client, collection_name)
+
+
+def ensure_payload_indexes(
+    client: QdrantClient,
+    collection_name: str,
+    existing: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Create the payload indexes from PAYLOAD_INDEXES that the collection is missing."""
+    if existing is None:
+        existing = client.get_collection(collection_name=collection_name).payload_schema or {}
+
+    for field_name, schema in PAYLOAD_INDEXES.items():
+        if field_name in existing:
+            continue
+        logger.info("Creating payload index '%s' (%s) on '%s'", field_name, schema.value, collection_name)
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=schema,
+        )
 
 
 def check_duplicate_document(content_hash: str) -> Optional[Dict[str, Any]]:
@@ -162,56 +368,124 @@ def check_duplicate_document(content_hash: str) -> Optional[Dict[str, Any]]:
         return None
 
 
-def index_text(doc_id: str, text: str, content_hash: Optional[str] = None) -> int:
-    try:
-        from datetime import datetime, timezone
+def document_metadata(
+    doc_id: str,
+    timestamp: str,
+    content_hash: Optional[str],
+    content_type: Optional[str],
+    tags: Optional[List[str]],
+) -> Dict[str, Any]:
+    """Document-level metadata copied onto every chunk; optional fields are only set when given."""
+    metadata: Dict[str, Any] = {
+        "document_id": doc_id,
+        "uploaded_at": timestamp,
+    }
+
+    # Add optional filterable fields if provided
+    if content_hash:
+        metadata["content_hash"] = content_hash
+    if content_type:
+        metadata["content_type"] = content_type
+    if tags:
+        metadata["tags"] = tags
+    return metadata
+
+
+def split_document(
+    doc_id: str,
+    text: str,
+    metadata: Dict[str, Any],
+    node_parser: Optional[SentenceSplitter] = None,
+) -> Tuple[List[BaseNode], List[str]]:
+    """
+    Split a document into chunk nodes carrying the per-chunk metadata.
 
-        # Add timestamp metadata to document
-        timestamp = datetime.now(timezone.utc).isoformat()
+    Returns the nodes and the texts to embed for them. The embedding texts are
+    taken before ``chunk_index``/``chunk_hash`` are added, so they only
+    include the document-level metadata.
+    """
+    document = Document(
+        text=text,
+        id_=doc_id,
+        metadata=metadata
+    )
+    nodes = (node_parser or NODE_PARSER).get_nodes_from_documents([document])
+    embed_texts = [node.get_content(metadata_mode="all") for node in nodes]
 
-        # Build metadata
-        metadata = {
-            "document_id": doc_id,
-            "uploaded_at": timestamp,
-        }
+    for idx, node in enumerate(nodes):
+        # Preserve and enrich metadata
+        node.metadata.update(metadata)
+        node.metadata["chunk_index"] = idx
+        node.metadata["chunk_hash"] = chunk_text_hash(node.get_content())
 
-        # Add content hash if provided
-        if content_hash:
-            metadata["content_hash"] = content_hash
+    return nodes, embed_texts
+
+
+def drop_boilerplate(
+    doc_id: str,
+    nodes: List[BaseNode],
+    embed_texts: List[str],
+) -> Tuple[List[BaseNode], List[str]]:
+    """
+    Drop chunks that already appear in several other documents (``DEDUP_SKIP_BOILERPLATE_CHUNKS``).
+
+    The SimHashes of all chunks, skipped or not, are registered for later
+    uploads. Redis failures keep every chunk.
+    """
+    if not dedup.DEDUP_SKIP_BOILERPLATE_CHUNKS or not nodes:
+        return nodes, embed_texts
+    try:
+        simhashes = [dedup.simhash(node.get_content()) for node in nodes]
+        boilerplate = dedup.find_boilerplate_chunks(doc_id, simhashes)
+        dedup.register_chunks(doc_id, simhashes)
+    except Exception as exc:
+        logger.warning("Boilerplate chunk check failed for %s: %s", doc_id, exc)
+        return nodes, embed_texts
+
+    if boilerplate:
+        logger.info("Skipping %d boilerplate chunks of %s", len(boilerplate), doc_id)
+    kept = [position for position in range(len(nodes)) if position not in boilerplate]
+    return [nodes[position] for position in kept], [embed_texts[position] for position in kept]
+
+
+def index_text(
+    doc_id: str,
+    text: str,
+    content_hash: Optional[str] = None,
+    content_type: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    collection_name: str = COLLECTION_NAME,
+    uploaded_at: Optional[str] = None,
+    node_parser: Optional[SentenceSplitter] = None,
+) -> int:
+    try:
+        from datetime import datetime, timezone
+
+        # Add timestamp metadata to document (kept from the original upload when reindexing)
+        timestamp = uploaded_at or datetime.now(timezone.utc).isoformat()
+        metadata = document_metadata(doc_id, timestamp, content_hash, content_type, tags)
 
-        document = Document(
-            text=text,
-            id_=doc_id,
-            metadata=metadata
-        )
         qdrant_client = get_qdrant_client()
 
-        ensure_collection(qdrant_client, COLLECTION_NAME)
+        ensure_collection(qdrant_client, collection_name)
 
-        vector_store = QdrantVectorStore(
+        vector_store = CompactQdrantVectorStore(
             client=qdrant_client,
-            collection_name=COLLECTION_NAME,
+            collection_name=collection_name,
             force_disable_check_same_thread=True,
         )
 
-        nodes = NODE_PARSER.get_nodes_from_documents([document])
-        texts = [node.get_content(metadata_mode="all") for node in nodes]
-        embeddings = EMBED_MODEL.get_text_embedding_batch(texts)
-
-        # Add metadata to each node
-        for idx, (node, embedding) in enumerate(zip(nodes, embeddings)):
+        nodes, embed_texts = split_document(doc_id, text, metadata, node_parser)
+        nodes, embed_texts = drop_boilerplate(doc_id, nodes, embed_texts)
+        embeddings = embed_chunks(embed_texts)
+        for node, embedding in zip(nodes, embeddings):
             node.embedding = embedding
-            # Preserve and enrich metadata
-            node.metadata["document_id"] = doc_id
-            node.metadata["uploaded_at"] = timestamp
-            node.metadata["chunk_index"] = idx
-            if content_hash:
-                node.metadata["content_hash"] = content_hash
 
         vector_store.add(nodes)
 
         # Count chunks for this specific document
         chunk_count = len(nodes)
+        DOCUMENT_CHUNKS.observe(chunk_count)
 
         logger.info("Successfully indexed document %s with %s chunks at %s", doc_id, chunk_count, timestamp)
         return chunk_count
@@ -219,3 +493,141 @@ def index_text(doc_id: str, text: str, content_hash: Optional[str] = None) -> in
     except Exception as exc:
         logger.error("Error indexing document %s: %s", doc_id, exc)
         raise HTTPException(status_code=500, detail=f"Failed to index document: {exc}") from exc
+
+
+def _stored_chunk_hashes(
+    client: QdrantClient,
+    collection_name: str,
+    doc_id: str,
+    embedded_metadata: Optional[Dict[str, Any]] = None,
+) -> Dict[Optional[str], List[Any]]:
+    """
+    Map chunk hash -> point ids (in chunk_index order) for the stored chunks of a document.
+
+    Points written before ``chunk_hash`` existed are hashed from their text.
+    Points whose payload differs from ``embedded_metadata`` were embedded with
+    other metadata and are listed under ``None`` so they are never reused.
+    """
+    embedded_metadata = embedded_metadata or {}
+    document_filter = Filter(must=[FieldCondition(key="document_id", match=MatchValue(value=doc_id))])
+    stored: List[Tuple[int, Any, Optional[str]]] = []
+    unhashed: List[Any] = []
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            scroll_filter=document_filter,
+            limit=256,
+            offset=offset,
+            with_payload=["chunk_hash", "text_hash", "chunk_index", *embedded_metadata],
+            with_vectors=False,
+        )
+        for point in points:
+            payload = point.payload or {}
+            if any(payload.get(key) != value for key, value in embedded_metadata.items()):
+                stored.append((payload.get("chunk_index", 0), point.id, None))
+                continue
+            chunk_hash = payload.get("chunk_hash") or payload.get(TEXT_HASH_FIELD)
+            if chunk_hash is None:
+                unhashed.append(point.id)
+            stored.append((payload.get("chunk_index", 0), point.id, chunk_hash))
+        if offset is None:
+            break
+
+    if unhashed:
+        records = client.retrieve(collection_name=collection_name, ids=unhashed, with_payload=True)
+        computed = {record.id: chunk_text_hash(get_payload_text(record.payload or {})) for record in records}
+        stored = [(index, point_id, chunk_hash or computed.get(point_id)) for index, point_id, chunk_hash in stored]
+
+    by_hash: Dict[Optional[str], List[Any]] = {}
+    for _, point_id, chunk_hash in sorted(stored, key=lambda item: item[0]):
+        by_hash.setdefault(chunk_hash, []).append(point_id)
+    return by_hash
+
+
+def replace_document_text(
+    doc_id: str,
+    text: str,
+    content_hash: Optional[str] = None,
+    content_type: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    collection_name: str = COLLECTION_NAME,
+) -> Dict[str, int]:
+    """
+    Replace the stored chunks of ``doc_id`` with a new version of its text.
+
+    The new chunk list is diffed against the stored chunk hashes: unchanged
+    chunks keep their point and vector and only get their payload rewritten
+    (new chunk_index, content hash and upload time), new or edited chunks are
+    embedded and upserted, and chunks that no longer exist are deleted. Writes
+    go in that order, so a retry after a failure converges on the same state.
+
+    The embedded text includes the document metadata. Chunks are only reused
+    while the metadata that describes the document (content type and tags) is
+    unchanged; when it changes every chunk is embedded again. A reused chunk's
+    vector still reflects the upload time and content hash of the version
+    that embedded it, which only differ in bookkeeping values.
+
+    Returns:
+        Counts of chunks in the new version, reused, embedded and deleted
+    """
+    try:
+        from datetime import datetime, timezone
+
+        timestamp = datetime.now(timezone.utc).isoformat()
+        metadata = document_metadata(doc_id, timestamp, content_hash, content_type, tags)
+
+        qdrant_client = get_qdrant_client()
+        ensure_collection(qdrant_client, collection_name)
+        vector_store = CompactQdrantVectorStore(
+            client=qdrant_client,
+            collection_name=collection_name,
+            force_disable_check_same_thread=True,
+        )
+
+        nodes, embed_texts = split_document(doc_id, text, metadata)
+        nodes, embed_texts = drop_boilerplate(doc_id, nodes, embed_texts)
+        embedded_metadata = {key: metadata.get(key) for key in REEMBED_METADATA_KEYS}
+        stored = _stored_chunk_hashes(qdrant_client, collection_name, doc_id, embedded_metadata)
+
+        reused: List[Tuple[Any, BaseNode]] = []
+        changed: List[Tuple[BaseNode, str]] = []
+        for node, embed_text in zip(nodes, embed_texts):
+            candidates = stored.get(node.metadata["chunk_hash"])
+            if candidates:
+                reused.append((candidates.pop(0), node))
+            else:
+                changed.append((node, embed_text))
+        vanished = [point_id for point_ids in stored.values() for point_id in point_ids]
+
+        if changed:
+            embeddings = embed_chunks([embed_text for _, embed_text in changed])
+            for (node, _), embedding in zip(changed, embeddings):
+                node.embedding = embedding
+            vector_store.add([node for node, _ in changed])
+
+        if reused:
+            payloads = vector_store.build_payloads([node for _, node in reused])
+            operations = [
+                OverwritePayloadOperation(overwrite_payload=SetPayload(payload=payload, points=[point_id]))
+                for (point_id, _), payload in zip(reused, payloads)
+            ]
+            for batch in iter_batch(operations, vector_store.batch_size):
+                qdrant_client.batch_update_points(collection_name=collection_name, update_operations=batch)
+
+        if vanished:
+            qdrant_client.delete(collection_name=collection_name, points_selector=PointIdsList(points=vanished))
+
+        stats = {
+            "chunks": len(nodes),
+            "reused": len(reused),
+            "embedded": len(changed),
+            "deleted": len(vanished),
+        }
+        DOCUMENT_CHUNKS.observe(len(nodes))
+        logger.info("Replaced document %s: %s", doc_id, stats)
+        return stats
+
+    except Exception as exc:
+        logger.error("Error replacing document %s: %s", doc_id, exc)
+        raise HTTPException(status_code=500, detail=f"Failed to replace document: {exc}") from exc
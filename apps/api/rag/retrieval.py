@@ -0,0 +1,150 @@
+"""Custom retrieval strategies on top of the Qdrant collection."""
+
+import logging
+import os
+from typing import Any, List, Optional
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+from llama_index.vector_stores.qdrant import QdrantVectorStore
+
+from utils.metrics import QDRANT_SECONDS
+from utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Candidates fetched per requested result when diversifying with MMR
+MMR_FETCH_MULTIPLIER = int(os.getenv("MMR_FETCH_MULTIPLIER", "4"))
+MMR_MIN_FETCH_K = 20
+MMR_MAX_FETCH_K = 100
+DEFAULT_MMR_LAMBDA = 0.5
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def mmr_select(
+    query_vector: np.ndarray,
+    candidate_vectors: np.ndarray,
+    top_k: int,
+    lambda_mult: float = DEFAULT_MMR_LAMBDA,
+) -> List[int]:
+    """
+    Select ``top_k`` candidates with maximal marginal relevance.
+
+    Each step picks the candidate maximising
+    ``lambda * sim(query, c) - (1 - lambda) * max(sim(c, selected))``.
+    All similarities are computed once with two matrix products; the selection
+    loop only updates a running maximum, so 100 candidates take well under a
+    millisecond.
+
+    Args:
+        query_vector: Query embedding, shape (dim,)
+        candidate_vectors: Candidate embeddings, shape (n, dim)
+        top_k: Number of candidates to select
+        lambda_mult: Relevance/diversity trade-off (1.0 = pure relevance, 0.0 = pure diversity)
+
+    Returns:
+        Indexes of the selected candidates, in selection order
+    """
+    n_candidates = candidate_vectors.shape[0]
+    if n_candidates == 0 or top_k <= 0:
+        return []
+    top_k = min(top_k, n_candidates)
+
+    candidates = _normalize_rows(np.asarray(candidate_vectors, dtype=np.float32))
+    query = _normalize_rows(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))[0]
+
+    relevance = candidates @ query
+    pairwise = candidates @ candidates.T
+
+    selected = [int(np.argmax(relevance))]
+    max_similarity = pairwise[selected[0]].copy()
+    available = np.ones(n_candidates, dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < top_k:
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, pairwise[best], out=max_similarity)
+
+    return selected
+
+
+class MMRRetriever(BaseRetriever):
+    """
+    Retriever that over-fetches candidates with their vectors and diversifies them with MMR.
+
+    Avoids returning ``top_k`` neighbouring chunks of the same large document
+    when a broader set of sources is available.
+    """
+
+    def __init__(
+        self,
+        vector_store: QdrantVectorStore,
+        embed_model: BaseEmbedding,
+        similarity_top_k: int = 5,
+        lambda_mult: float = DEFAULT_MMR_LAMBDA,
+        fetch_k: Optional[int] = None,
+        qdrant_filter: Optional[Any] = None,
+    ) -> None:
+        self._vector_store = vector_store
+        self._embed_model = embed_model
+        self._similarity_top_k = similarity_top_k
+        self._lambda_mult = lambda_mult
+        self._fetch_k = fetch_k or min(
+            max(similarity_top_k * MMR_FETCH_MULTIPLIER, MMR_MIN_FETCH_K),
+            MMR_MAX_FETCH_K,
+        )
+        self._qdrant_filter = qdrant_filter
+        super().__init__()
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        query_embedding = query_bundle.embedding or self._embed_model.get_query_embedding(query_bundle.query_str)
+
+        span = tracer.start_as_current_span(
+            "qdrant.search",
+            attributes={"db.system": "qdrant", "db.collection.name": self._vector_store.collection_name},
+        )
+        with span, QDRANT_SECONDS.labels("search").time():
+            points = self._vector_store.client.query_points(
+                collection_name=self._vector_store.collection_name,
+                query=query_embedding,
+                query_filter=self._qdrant_filter,
+                limit=self._fetch_k,
+                with_payload=True,
+                with_vectors=True,
+            ).points
+        if not points:
+            return []
+
+        result = self._vector_store.parse_to_query_result(points)
+        candidate_vectors = np.asarray([node.embedding for node in result.nodes], dtype=np.float32)
+        selected = mmr_select(
+            np.asarray(query_embedding, dtype=np.float32),
+            candidate_vectors,
+            self._similarity_top_k,
+            self._lambda_mult,
+        )
+
+        logger.debug(
+            "MMR selected %d of %d candidates (lambda=%.2f)",
+            len(selected),
+            len(points),
+            self._lambda_mult,
+        )
+
+        nodes = []
+        for idx in selected:
+            node = result.nodes[idx]
+            node.embedding = None  # Vectors are only needed for the diversity pass
+            nodes.append(NodeWithScore(node=node, score=result.similarities[idx]))
+        return nodes
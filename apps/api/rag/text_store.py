@@ -0,0 +1,157 @@
+"""
+Content-addressed chunk text store kept outside Qdrant.
+
+With ``CHUNK_TEXT_STORE=sqlite`` the vector store writes each chunk's text
+here, keyed by its SHA-256, and Qdrant payloads carry only ``text_hash`` plus
+the filterable fields. Qdrant RAM and snapshots then hold vectors and ids
+only; readers fetch the texts of the final results in one batched lookup.
+
+Texts are zlib-compressed and identical chunks are stored once. The SQLite
+file must be shared by the API and the workers (the dev compose bind-mounts
+``apps/api``) and backed up together with the Qdrant snapshots.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# "inline" keeps the text in the Qdrant payload, "sqlite" moves it to this store
+CHUNK_TEXT_STORE = os.getenv("CHUNK_TEXT_STORE", "inline").lower()
+CHUNK_TEXT_STORE_PATH = os.getenv("CHUNK_TEXT_STORE_PATH", "data/chunk_texts.sqlite3")
+
+TEXT_HASH_FIELD = "text_hash"
+
+# SQLite's default host-parameter limit is 999 on older builds
+_MAX_PARAMS = 900
+# Memory-map the database file so hot pages are read without syscalls
+_MMAP_SIZE = 256 * 1024 * 1024
+
+
+def chunk_text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ChunkTextStore:
+    """SQLite table of zlib-compressed chunk texts keyed by content hash."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunk_texts (
+                    hash TEXT PRIMARY KEY,
+                    body BLOB NOT NULL,
+                    created_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+                ) WITHOUT ROWID
+                """
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shareable across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={_MMAP_SIZE}")
+            self._local.conn = conn
+        return conn
+
+    def put_many(self, texts: List[str]) -> List[str]:
+        """
+        Store texts and return their hashes in input order.
+
+        Known hashes keep their body and only get a fresh ``created_at``, so a
+        text reused by a new chunk is never pruned as unreferenced mid-write.
+        """
+        hashes = [chunk_text_hash(text) for text in texts]
+        rows = {digest: text for digest, text in zip(hashes, texts)}
+        with self._connection() as conn:
+            conn.executemany(
+                """
+                INSERT INTO chunk_texts (hash, body) VALUES (?, ?)
+                ON CONFLICT (hash) DO UPDATE SET created_at = excluded.created_at
+                """,
+                ((digest, zlib.compress(text.encode("utf-8"))) for digest, text in rows.items()),
+            )
+        return hashes
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, str]:
+        """Return the texts for the given hashes; unknown hashes are left out."""
+        unique = list(dict.fromkeys(hashes))
+        texts: Dict[str, str] = {}
+        conn = self._connection()
+        for start in range(0, len(unique), _MAX_PARAMS):
+            batch = unique[start:start + _MAX_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            for digest, body in conn.execute(
+                f"SELECT hash, body FROM chunk_texts WHERE hash IN ({placeholders})", batch
+            ):
+                texts[digest] = zlib.decompress(body).decode("utf-8")
+        return texts
+
+    def delete_except(self, live_hashes: Iterable[str], created_before: float) -> int:
+        """
+        Delete texts whose hash is not in ``live_hashes``; returns the number removed.
+
+        Only texts stored before ``created_before`` (a Unix timestamp) are
+        considered, so chunks written while the live set was being collected
+        are never removed.
+        """
+        with self._connection() as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS live_hashes (hash TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM live_hashes")
+            conn.executemany("INSERT OR IGNORE INTO live_hashes (hash) VALUES (?)", ((h,) for h in live_hashes))
+            removed = conn.execute(
+                "DELETE FROM chunk_texts WHERE created_at < ? AND hash NOT IN (SELECT hash FROM live_hashes)",
+                (int(created_before),),
+            ).rowcount
+            conn.execute("DELETE FROM live_hashes")
+        return removed
+
+
+_store: Optional[ChunkTextStore] = None
+_store_lock = threading.Lock()
+
+
+def get_chunk_text_store() -> ChunkTextStore:
+    """Return the process-wide chunk text store, opening it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ChunkTextStore(CHUNK_TEXT_STORE_PATH)
+                logger.info("Chunk text store opened at %s", CHUNK_TEXT_STORE_PATH)
+    return _store
+
+
+def external_text_enabled() -> bool:
+    return CHUNK_TEXT_STORE == "sqlite"
+
+
+def hydrate_payloads(payloads: Iterable[Dict[str, Any]]) -> None:
+    """
+    Fill in ``text`` for payloads that only carry a ``text_hash``, in one batched read.
+
+    Payloads that already have their text (inline mode or legacy points) are
+    left untouched, so this is a no-op for collections without external texts.
+    """
+    pending = [payload for payload in payloads if TEXT_HASH_FIELD in payload and "text" not in payload]
+    if not pending:
+        return
+    texts = get_chunk_text_store().get_many(payload[TEXT_HASH_FIELD] for payload in pending)
+    for payload in pending:
+        text = texts.get(payload[TEXT_HASH_FIELD])
+        if text is None:
+            logger.warning("Chunk text %s missing from the text store", payload[TEXT_HASH_FIELD])
+        payload["text"] = text or ""
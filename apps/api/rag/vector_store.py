@@ -0,0 +1,190 @@
+"""Compact chunk payloads for Qdrant and the vector store that reads and writes them."""
+
+import json
+from typing import Any, Dict, List, Optional
+
+from llama_index.core.schema import BaseNode, TextNode
+from llama_index.core.utils import iter_batch
+from llama_index.core.vector_stores.types import VectorStoreQuery, VectorStoreQueryResult
+from llama_index.vector_stores.qdrant import QdrantVectorStore
+from qdrant_client.http.models import PointStruct
+
+from rag.text_store import TEXT_HASH_FIELD, external_text_enabled, get_chunk_text_store, hydrate_payloads
+from utils.metrics import QDRANT_SECONDS
+from utils.tracing import tracer
+
+# Typed top-level payload fields (filterable, several of them indexed)
+CHUNK_FIELDS = (
+    "document_id",
+    "chunk_index",
+    "chunk_hash",
+    "uploaded_at",
+    "content_hash",
+    "content_type",
+    "tags",
+    "page",
+)
+
+# Legacy LlamaIndex bookkeeping that compact payloads drop
+LEGACY_FIELDS = ("_node_content", "_node_type", "doc_id", "ref_doc_id")
+
+
+def build_chunk_payload(text: str, metadata: Dict[str, Any], text_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build the compact payload stored for one chunk.
+
+    Layout: ``text``, the typed fields from ``CHUNK_FIELDS`` at the top level,
+    and any remaining metadata under ``meta``. Nothing is serialized twice.
+    When ``text_hash`` is given the text lives in the chunk text store and
+    only the hash is kept in the payload.
+    """
+    payload: Dict[str, Any] = {TEXT_HASH_FIELD: text_hash} if text_hash else {"text": text}
+    extra: Dict[str, Any] = {}
+    for key, value in metadata.items():
+        if value is None:
+            continue
+        if key in CHUNK_FIELDS:
+            payload[key] = value
+        elif key not in LEGACY_FIELDS:
+            extra[key] = value
+    if extra:
+        payload["meta"] = extra
+    return payload
+
+
+def is_legacy_payload(payload: Dict[str, Any]) -> bool:
+    return "_node_content" in payload
+
+
+def _legacy_node_content(payload: Dict[str, Any]) -> Dict[str, Any]:
+    node_content = payload.get("_node_content")
+    if isinstance(node_content, str):
+        return json.loads(node_content)
+    return node_content or {}
+
+
+def get_payload_text(payload: Dict[str, Any]) -> str:
+    """
+    Return the chunk text of a compact or legacy (``_node_content``) payload.
+
+    Payloads whose text lives in the chunk text store are looked up one by one
+    here; call :func:`rag.text_store.hydrate_payloads` first when reading many.
+    """
+    if "text" in payload:
+        return payload["text"] or ""
+    if TEXT_HASH_FIELD in payload:
+        hydrate_payloads([payload])
+        return payload["text"]
+    if not is_legacy_payload(payload):
+        return ""
+    try:
+        return _legacy_node_content(payload).get("text", "")
+    except (json.JSONDecodeError, AttributeError):
+        return str(payload.get("_node_content"))
+
+
+def compact_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a legacy LlamaIndex payload into the compact layout (compact payloads are returned as-is)."""
+    if not is_legacy_payload(payload):
+        return payload
+    node_metadata = _legacy_node_content(payload).get("metadata") or {}
+    top_level = {key: value for key, value in payload.items() if key not in LEGACY_FIELDS}
+    metadata = {**top_level, **node_metadata}
+    return build_chunk_payload(get_payload_text(payload), metadata)
+
+
+def payload_to_node(point_id: Any, payload: Dict[str, Any], embedding: Optional[List[float]] = None) -> TextNode:
+    """Build a TextNode from a compact (hydrated) payload."""
+    metadata = {key: payload[key] for key in CHUNK_FIELDS if key in payload}
+    metadata.update(payload.get("meta") or {})
+    return TextNode(id_=str(point_id), text=payload.get("text") or "", metadata=metadata, embedding=embedding)
+
+
+class CompactQdrantVectorStore(QdrantVectorStore):
+    """
+    QdrantVectorStore that writes compact payloads and reads both layouts.
+
+    The stock store serializes the whole node (text, metadata and
+    relationships) into a ``_node_content`` JSON string next to the flat
+    metadata. Here each point carries the text and metadata once, so payloads
+    are smaller and reading them back needs no JSON decoding. Points still in
+    the legacy layout are parsed by the parent class.
+
+    With ``CHUNK_TEXT_STORE=sqlite`` the texts go to the chunk text store and
+    each query result set is hydrated with a single batched read.
+    """
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CompactQdrantVectorStore"
+
+    def build_payloads(self, nodes: List[BaseNode]) -> List[Dict[str, Any]]:
+        """Build the compact payloads for ``nodes``, storing their texts externally when enabled."""
+        texts = [node.get_content() for node in nodes]
+        hashes: List[Optional[str]] = [None] * len(nodes)
+        if external_text_enabled():
+            # Texts are written before the points, so a visible point always has its text
+            hashes = get_chunk_text_store().put_many(texts)
+        return [
+            build_chunk_payload(text, node.metadata, text_hash=text_hash)
+            for node, text, text_hash in zip(nodes, texts, hashes)
+        ]
+
+    def _build_compact_points(self, nodes: List[BaseNode]) -> List[PointStruct]:
+        return [
+            PointStruct(id=node.node_id, vector=node.get_embedding(), payload=payload)
+            for node, payload in zip(nodes, self.build_payloads(nodes))
+        ]
+
+    def add(self, nodes: List[BaseNode], **add_kwargs: Any) -> List[str]:
+        points = self._build_compact_points(nodes)
+        for batch in iter_batch(points, self.batch_size):
+            span = tracer.start_as_current_span("qdrant.upsert", attributes=self._span_attributes(len(batch)))
+            with span, QDRANT_SECONDS.labels("upsert").time():
+                self._client.upsert(collection_name=self.collection_name, points=batch)
+        return [node.node_id for node in nodes]
+
+    async def async_add(self, nodes: List[BaseNode], **kwargs: Any) -> List[str]:
+        points = self._build_compact_points(nodes)
+        for batch in iter_batch(points, self.batch_size):
+            span = tracer.start_as_current_span("qdrant.upsert", attributes=self._span_attributes(len(batch)))
+            with span, QDRANT_SECONDS.labels("upsert").time():
+                await self._aclient.upsert(collection_name=self.collection_name, points=batch)
+        return [node.node_id for node in nodes]
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        span = tracer.start_as_current_span("qdrant.search", attributes=self._span_attributes(query.similarity_top_k))
+        with span, QDRANT_SECONDS.labels("search").time():
+            return super().query(query, **kwargs)
+
+    async def aquery(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        span = tracer.start_as_current_span("qdrant.search", attributes=self._span_attributes(query.similarity_top_k))
+        with span, QDRANT_SECONDS.labels("search").time():
+            return await super().aquery(query, **kwargs)
+
+    def _span_attributes(self, points: int) -> Dict[str, Any]:
+        return {"db.system": "qdrant", "db.collection.name": self.collection_name, "db.points": points}
+
+    def parse_to_query_result(self, response: List[Any]) -> VectorStoreQueryResult:
+        nodes = []
+        similarities = []
+        ids = []
+        hydrate_payloads(point.payload for point in response if point.payload)
+
+        for point in response:
+            payload = point.payload or {}
+            if is_legacy_payload(payload):
+                legacy = super().parse_to_query_result([point])
+                node = legacy.nodes[0]
+            else:
+                vector = point.vector
+                if isinstance(vector, dict):
+                    vector = vector.get(self.dense_vector_name, vector.get("", None))
+                node = payload_to_node(point.id, payload, embedding=vector)
+
+            nodes.append(node)
+            ids.append(str(point.id))
+            score = getattr(point, "score", None)
+            similarities.append(score if score is not None else 1.0)
+
+        return VectorStoreQueryResult(nodes=nodes, similarities=similarities, ids=ids)
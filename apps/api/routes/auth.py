@@ -1,11 +1,12 @@
 ﻿import os
 import re
 from typing import Optional
+from uuid import UUID
 
 from fastapi import APIRouter, HTTPException, Depends, status
 from pydantic import BaseModel, EmailStr, Field
 
-from deps import require_active_user
+from deps import require_active_user, require_admin
 from models.user import TokenResponse, UserPublic, UserRole
 from services.auth_service import AuthService
 
@@ -33,6 +34,13 @@ class MeResponse(UserPublic):
     pass
 
 
+class UpdateUserRequest(BaseModel):
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    role: Optional[UserRole] = None
+    is_active: Optional[bool] = None
+
+
 def _validate_password(password: str) -> None:
     if not PASSWORD_REGEX.match(password):
         raise HTTPException(
@@ -47,14 +55,14 @@ async def sign_up(payload: SignUpRequest):
     role = payload.role
 
     if role == UserRole.ADMIN:
-        admin_exists = AuthService.has_admin_user()
+        admin_exists = await AuthService.has_admin_user()
         if ADMIN_REGISTRATION_KEY:
             if payload.admin_key != ADMIN_REGISTRATION_KEY:
                 raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin registration key")
         elif admin_exists:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin registration key not configured")
 
-    user = AuthService.create_user(
+    user = await AuthService.create_user(
         email=payload.email,
         password=payload.password,
         first_name=payload.first_name,
@@ -67,7 +75,7 @@ async def sign_up(payload: SignUpRequest):
 
 @router.post("/sign-in", response_model=TokenResponse)
 async def sign_in(payload: SignInRequest):
-    user = AuthService.authenticate(payload.email, payload.password)
+    user = await AuthService.authenticate(payload.email, payload.password)
     token = AuthService.issue_token(user)
     return TokenResponse(access_token=token, user=user)
 
@@ -81,3 +89,15 @@ async def login(payload: SignInRequest):
 @router.get("/me", response_model=MeResponse)
 async def get_me(current_user: UserPublic = Depends(require_active_user)):
     return current_user
+
+
+@router.patch("/users/{user_id}", response_model=UserPublic)
+async def update_user(user_id: UUID, payload: UpdateUserRequest, _: UserPublic = Depends(require_admin)):
+    """Update or deactivate a user; the cached copy is invalidated so the change applies on the next request."""
+    return await AuthService.update_user(
+        user_id,
+        first_name=payload.first_name,
+        last_name=payload.last_name,
+        role=payload.role,
+        is_active=payload.is_active,
+    )
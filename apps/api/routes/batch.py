@@ -1,24 +1,35 @@
 """
 Endpoints para gestión de batches de ingesta.
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks
+from fastapi import (
+    APIRouter, UploadFile, File, Form, HTTPException, Depends, BackgroundTasks, Query, WebSocket, WebSocketDisconnect
+)
 from typing import List, Optional
 from uuid import UUID, uuid4
 from pydantic import BaseModel
+import asyncio
+import logging
 import os
+import shutil
 import tempfile
 from pathlib import Path
-from redis import Redis
-from rq import Queue
-from sqlalchemy.orm import Session
 
-from database.postgres_client import get_db
+from clients.redis_queue import enqueue_many
+from clients.websocket_manager import get_ws_manager
 from database.batch_manager import BatchManager
-from workers.ingestion_worker import process_document_task
+from deps import require_admin
+from models.document import DocumentStatus
+from models.user import UserPublic
+from routes.ingest import USE_ASYNC_INGESTION, _validate_near_duplicates
+from workers.batch_worker import process_batch_task
 
 
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/batch", tags=["batch"])
 
+# Archivos por job de lote: los lotes grandes se reparten entre varios workers
+BATCH_JOB_FILES = int(os.getenv("BATCH_JOB_FILES", "200"))
+
 
 # ============ MODELOS PYDANTIC ============
 
@@ -42,15 +53,7 @@ class BatchStatusResponse(BaseModel):
     documents: List[dict]
     statistics: dict
     progress_percentage: float
-
-
-# ============ REDIS/RQ CLIENT ============
-
-def get_redis_queue() -> Queue:
-    """Obtiene la cola de Redis para enqueue de tareas."""
-    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
-    redis_conn = Redis.from_url(redis_url)
-    return Queue("ingestion_queue", connection=redis_conn)
+    next_cursor: Optional[str] = None
 
 
 # ============ ENDPOINTS ============
@@ -58,26 +61,23 @@ def get_redis_queue() -> Queue:
 @router.post("/create", response_model=BatchResponse)
 async def create_batch(
     request: CreateBatchRequest,
-    db: Session = Depends(get_db)
+    current_user: UserPublic = Depends(require_admin)
 ):
     """
     Crea un nuevo batch de ingesta.
     
     Args:
         request: Datos del batch (nombre, colección, descripción)
-        db: Sesión de base de datos
+        current_user: Administrador que crea el batch
         
     Returns:
         Información del batch creado
     """
     try:
-        batch_manager = BatchManager(db)
-        
-        # Por ahora usamos un user_id fijo (TODO: integrar autenticación)
-        user_id = uuid4()
+        batch_manager = BatchManager()
         
         batch_id = await batch_manager.create_batch(
-            user_id=user_id,
+            user_id=current_user.id,
             name=request.name,
             collection_name=request.collection_name,
             description=request.description
@@ -99,23 +99,35 @@ async def create_batch(
 @router.post("/{batch_id}/upload", response_model=dict)
 async def upload_files_to_batch(
     batch_id: UUID,
+    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
-    db: Session = Depends(get_db)
+    near_duplicates: Optional[str] = Form(None, description="'warn' o 'reject' (por defecto, el del servidor)"),
+    _: UserPublic = Depends(require_admin)
 ):
     """
     Sube archivos a un batch existente y encola su procesamiento.
     
+    Los archivos se copian a disco por bloques (sin cargarlos enteros en
+    memoria), se registran en BD con una sola sentencia y se reparten en
+    jobs de lote (``process_batch_task``) de hasta ``BATCH_JOB_FILES``
+    archivos, encolados en un único pipeline de Redis. Cada job parsea sus
+    archivos en paralelo y agrupa sus chunks en lotes grandes de embeddings.
+    Con ``USE_ASYNC_INGESTION=false`` los jobs se ejecutan en segundo plano
+    en la propia API. En la colección principal los duplicados exactos se
+    omiten y los casi duplicados se indexan con aviso o se omiten según
+    ``near_duplicates``, igual que en ``/ingest``.
+    
     Args:
         batch_id: UUID del batch
         files: Lista de archivos a subir
-        db: Sesión de base de datos
+        near_duplicates: Tratamiento de casi duplicados (``warn`` o ``reject``)
         
     Returns:
-        Información de los archivos encolados
+        Información de los archivos encolados y del job de lote
     """
     try:
-        batch_manager = BatchManager(db)
-        queue = get_redis_queue()
+        near_duplicates = _validate_near_duplicates(near_duplicates)
+        batch_manager = BatchManager()
         
         # Verificar que el batch existe
         batch = await batch_manager.get_batch(batch_id)
@@ -126,48 +138,80 @@ async def upload_files_to_batch(
         temp_dir = Path(tempfile.gettempdir()) / "anclora_rag" / str(batch_id)
         temp_dir.mkdir(parents=True, exist_ok=True)
         
-        uploaded_files = []
-        
-        for file in files:
-            # Guardar archivo temporalmente
-            file_path = temp_dir / file.filename
-            
-            with open(file_path, "wb") as f:
-                content = await file.read()
-                f.write(content)
-            
-            # Registrar documento en BD
-            doc_id = await batch_manager.add_file_to_batch(
-                batch_id=batch_id,
-                filename=file.filename,
-                source_type="file_upload",
-                file_size=len(content),
-                mime_type=file.content_type
-            )
+        uploads = []
+        try:
+            for file in files:
+                # Solo el nombre base: evita escribir fuera del directorio temporal
+                filename = Path(file.filename or "").name or "upload"
+                # Prefijo único para nombres repetidos; se copia a disco por bloques, sin cargarlo en memoria
+                file_path = temp_dir / f"{uuid4().hex}_{filename}"
+                size = await asyncio.to_thread(_save_upload, file, file_path)
+                uploads.append((filename, file.content_type, file_path, size))
             
-            # Encolar tarea de procesamiento
-            job = queue.enqueue(
-                process_document_task,
-                doc_id=str(doc_id),
-                batch_id=str(batch_id),
-                file_path=str(file_path),
-                mime_type=file.content_type,
-                collection_name=batch["qdrant_collection"],
-                job_timeout="30m"
-            )
+            # Registrar todos los documentos en BD (una sentencia, un commit)
+            doc_ids = await batch_manager.add_files_to_batch(batch_id, [
+                {
+                    "filename": filename,
+                    "source_type": "file_upload",
+                    "file_size": size,
+                    "mime_type": content_type
+                }
+                for filename, content_type, _, size in uploads
+            ])
+        except Exception:
+            for _, _, file_path, _ in uploads:
+                _remove_temp_file(file_path)
+            raise
+        
+        file_paths = [file_path for _, _, file_path, _ in uploads]
+        try:
+            documents = []
+            for doc_id, (filename, content_type, file_path, _) in zip(doc_ids, uploads):
+                documents.append({
+                    "doc_id": str(doc_id),
+                    "filename": filename,
+                    "file_path": str(file_path),
+                    "mime_type": content_type,
+                })
             
-            uploaded_files.append({
-                "document_id": str(doc_id),
-                "filename": file.filename,
-                "job_id": job.id,
-                "status": "queued"
-            })
+            # Un job por cada BATCH_JOB_FILES archivos, para repartir el lote entre workers
+            job_kwargs = [
+                {
+                    "batch_id": str(batch_id),
+                    "documents": documents[start:start + BATCH_JOB_FILES],
+                    "collection_name": batch["qdrant_collection"],
+                    "near_duplicates": near_duplicates
+                }
+                for start in range(0, len(documents), BATCH_JOB_FILES)
+            ]
+            if USE_ASYNC_INGESTION:
+                # Todos los jobs en un único pipeline de Redis
+                job_ids = [job.id for job in enqueue_many(process_batch_task, job_kwargs, job_timeout="2h")]
+            else:
+                job_ids = []
+                for kwargs in job_kwargs:
+                    job_ids.append(uuid4().hex)
+                    background_tasks.add_task(process_batch_task, job_id=job_ids[-1], **kwargs)
+        except Exception as e:
+            # Sin job que los procese, los documentos quedarían pendientes para siempre
+            await _abandon_uploads(batch_manager, batch_id, doc_ids, file_paths, str(e))
+            raise
         
         return {
             "batch_id": str(batch_id),
+            "job_ids": job_ids,
             "uploaded_files": len(files),
-            "documents": uploaded_files,
-            "message": f"{len(files)} archivo(s) encolado(s) para procesamiento"
+            "documents": [
+                {
+                    "document_id": doc["doc_id"],
+                    "filename": doc["filename"],
+                    "job_id": job_ids[index // BATCH_JOB_FILES],
+                    "status": "queued"
+                }
+                for index, doc in enumerate(documents)
+            ],
+            "message": f"{len(files)} archivo(s) encolado(s) en {len(job_ids)} job(s). "
+                       f"Progreso en /batch/{batch_id}/ws"
         }
         
     except HTTPException:
@@ -179,54 +223,115 @@ async def upload_files_to_batch(
         )
 
 
+async def _abandon_uploads(
+    batch_manager: BatchManager,
+    batch_id: UUID,
+    doc_ids: List[UUID],
+    file_paths: List[Path],
+    error: str
+):
+    """
+    Marca como fallidos los documentos registrados que no llegaron a encolarse y borra sus temporales.
+    
+    Así cuentan como terminados en el lote, que puede llegar a estado final.
+    Los errores de esta limpieza solo se registran: se propaga el original.
+    """
+    for file_path in file_paths:
+        _remove_temp_file(file_path)
+    try:
+        await batch_manager.update_progress_many(batch_id, [
+            {
+                "doc_id": str(doc_id),
+                "status": DocumentStatus.FAILED.value,
+                "error": f"Upload could not be queued: {error}"
+            }
+            for doc_id in doc_ids
+        ])
+    except Exception as exc:
+        logger.error("No se pudieron marcar como fallidos los documentos del lote %s: %s", batch_id, exc)
+
+
+def _save_upload(file: UploadFile, file_path: Path) -> int:
+    """
+    Copia el archivo subido a ``file_path`` por bloques y devuelve los bytes escritos.
+    
+    Se ejecuta en un hilo (``asyncio.to_thread``): la escritura a disco no
+    bloquea el event loop. Si la copia falla, el archivo parcial se borra.
+    """
+    try:
+        with open(file_path, "wb") as target:
+            shutil.copyfileobj(file.file, target)
+            return target.tell()
+    except Exception:
+        _remove_temp_file(file_path)
+        raise
+
+
+def _remove_temp_file(file_path: Path):
+    """Borra un temporal de subida; los errores solo se registran."""
+    try:
+        file_path.unlink(missing_ok=True)
+    except OSError as exc:
+        logger.warning("No se pudo borrar el temporal %s: %s", file_path, exc)
+
+
 @router.get("/{batch_id}/status", response_model=BatchStatusResponse)
 async def get_batch_status(
     batch_id: UUID,
-    db: Session = Depends(get_db)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor devuelto como next_cursor en la página anterior"),
+    status: Optional[DocumentStatus] = Query(None, description="Solo documentos en este estado"),
+    _: UserPublic = Depends(require_admin)
 ):
     """
-    Obtiene el estado detallado de un batch.
+    Obtiene el estado de un batch y una página de sus documentos.
+    
+    Las estadísticas salen de un único ``GROUP BY status`` y los documentos
+    se paginan por keyset (``cursor``/``next_cursor``), así que el coste y el
+    tamaño de cada respuesta no crecen con el lote. Para seguir el progreso
+    sin sondear, usar el WebSocket ``/batch/{batch_id}/ws``.
     
     Args:
         batch_id: UUID del batch
-        db: Sesión de base de datos
+        limit: Tamaño de página de documentos
+        cursor: Cursor de la página anterior
+        status: Filtro opcional por estado de documento
         
     Returns:
-        Estado completo del batch con documentos y estadísticas
+        Estado del batch con estadísticas y una página de documentos
     """
     try:
-        batch_manager = BatchManager(db)
+        batch_manager = BatchManager()
         
         # Obtener información del batch
         batch = await batch_manager.get_batch(batch_id)
         if not batch:
             raise HTTPException(404, "Batch no encontrado")
         
-        # Obtener documentos
-        documents = await batch_manager.get_batch_documents(batch_id)
-        
-        # Calcular estadísticas
-        total = len(documents)
-        stats = {
-            "total": total,
-            "pending": sum(1 for d in documents if d['status'] == 'pending'),
-            "processing": sum(1 for d in documents if d['status'] == 'processing'),
-            "completed": sum(1 for d in documents if d['status'] == 'completed'),
-            "failed": sum(1 for d in documents if d['status'] == 'failed')
-        }
+        stats = await batch_manager.get_batch_statistics(batch_id)
+        documents, next_cursor = await batch_manager.get_batch_documents(
+            batch_id,
+            limit=limit,
+            cursor=cursor,
+            status=status.value if status else None
+        )
         
         # Calcular porcentaje de progreso
-        progress = (stats['completed'] / total * 100) if total > 0 else 0
+        total = stats["total"]
+        progress = (stats["completed"] / total * 100) if total > 0 else 0
         
         return BatchStatusResponse(
             batch=batch,
             documents=documents,
             statistics=stats,
-            progress_percentage=round(progress, 2)
+            progress_percentage=round(progress, 2),
+            next_cursor=next_cursor
         )
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -234,11 +339,48 @@ async def get_batch_status(
         )
 
 
+@router.websocket("/{batch_id}/ws")
+async def websocket_batch_status(websocket: WebSocket, batch_id: UUID):
+    """
+    WebSocket con el progreso de un batch.
+    
+    Envía las estadísticas actuales al conectar y después un mensaje
+    ``batch_update`` (estado y contadores) cada vez que los workers
+    registran documentos terminados.
+    """
+    manager = get_ws_manager()
+    channel = f"batch:{batch_id}"
+    await manager.connect(websocket, channel)
+    
+    try:
+        batch_manager = BatchManager()
+        batch = await batch_manager.get_batch(batch_id)
+        stats = await batch_manager.get_batch_statistics(batch_id) if batch else None
+        
+        await websocket.send_json({
+            "type": "connected",
+            "batch_id": str(batch_id),
+            "status": batch["status"] if batch else None,
+            "statistics": stats
+        })
+        
+        while True:
+            try:
+                data = await websocket.receive_text()
+                if data == "ping":
+                    await websocket.send_json({"type": "pong"})
+            except WebSocketDisconnect:
+                break
+    
+    finally:
+        manager.disconnect(websocket, channel)
+
+
 @router.get("/list", response_model=List[dict])
 async def list_batches(
     limit: int = 10,
     offset: int = 0,
-    db: Session = Depends(get_db)
+    _: UserPublic = Depends(require_admin)
 ):
     """
     Lista todos los batches.
@@ -246,37 +388,20 @@ async def list_batches(
     Args:
         limit: Número máximo de batches a retornar
         offset: Número de batches a saltar (paginación)
-        db: Sesión de base de datos
         
     Returns:
         Lista de batches
     """
     try:
-        from sqlalchemy import text
-        
-        query = text("""
-            SELECT id, user_id, name, description, status, 
-                   total_files, processed_files, failed_files,
-                   created_at, completed_at
-            FROM ingestion_batches
-            ORDER BY created_at DESC
-            LIMIT :limit OFFSET :offset
-        """)
-        
-        results = db.execute(query, {"limit": limit, "offset": offset}).fetchall()
+        results = await BatchManager().list_batches(limit=limit, offset=offset)
         
         batches = [
             {
-                "id": str(row[0]),
-                "user_id": str(row[1]),
-                "name": row[2],
-                "description": row[3],
-                "status": row[4],
-                "total_files": row[5],
-                "processed_files": row[6],
-                "failed_files": row[7],
-                "created_at": row[8].isoformat() if row[8] else None,
-                "completed_at": row[9].isoformat() if row[9] else None
+                **row,
+                "id": str(row["id"]),
+                "user_id": str(row["user_id"]),
+                "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+                "completed_at": row["completed_at"].isoformat() if row["completed_at"] else None
             }
             for row in results
         ]
@@ -0,0 +1,102 @@
+"""Collection management endpoints: versions, zero-downtime reindex and rollback."""
+import asyncio
+import logging
+import uuid
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from pydantic import BaseModel, Field
+
+from clients.redis_queue import get_ingestion_queue
+from deps import require_admin
+from rag.pipeline import COLLECTION_NAME, get_qdrant_client, resolve_collection_alias
+from routes.ingest import USE_ASYNC_INGESTION
+from workers.reindex_worker import (
+    REINDEX_MAX_CHUNKS_PER_SECOND,
+    list_collection_versions,
+    reindex_collection_task,
+    rollback_collection,
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/collections", tags=["collections"])
+
+
+class ReindexRequest(BaseModel):
+    chunk_size: Optional[int] = Field(None, ge=64, le=4096)
+    chunk_overlap: Optional[int] = Field(None, ge=0, le=1024)
+    max_chunks_per_second: float = Field(REINDEX_MAX_CHUNKS_PER_SECOND, ge=0)
+
+
+class RollbackRequest(BaseModel):
+    collection: Optional[str] = Field(None, description="Version to restore (defaults to the previous one)")
+
+
+@router.get("")
+async def get_collections(
+    _: None = Depends(require_admin),
+) -> Dict[str, Any]:
+    """Return the collection the alias points at and the versions kept for rollback."""
+    def read() -> Dict[str, Any]:
+        client = get_qdrant_client()
+        return {
+            "alias": COLLECTION_NAME,
+            "active": resolve_collection_alias(client),
+            "versions": list_collection_versions(client),
+        }
+
+    try:
+        return await asyncio.to_thread(read)
+    except Exception as exc:
+        logger.error(f"Error reading collections: {str(exc)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to read collections: {str(exc)}") from exc
+
+
+@router.post("/reindex", status_code=202)
+async def reindex_collection(
+    request: ReindexRequest,
+    background_tasks: BackgroundTasks,
+    _: None = Depends(require_admin),
+) -> Dict[str, Any]:
+    """
+    Rebuild every document into a new collection version in the background.
+
+    Search keeps using the current collection until the rebuild finishes and
+    the alias is switched. Progress is published on ``/ws/jobs/{job_id}``.
+    """
+    options = request.model_dump()
+    try:
+        if USE_ASYNC_INGESTION:
+            job = get_ingestion_queue().enqueue(reindex_collection_task, **options, job_timeout=24 * 3600)
+            job_id = job.id
+        else:
+            job_id = uuid.uuid4().hex
+            background_tasks.add_task(reindex_collection_task, **options, job_id=job_id)
+    except Exception as exc:
+        logger.error(f"Error starting reindex: {str(exc)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to start reindex: {str(exc)}") from exc
+
+    logger.info(f"Reindex job {job_id} started with {options}")
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "message": f"Reindex started. Follow progress on /ws/jobs/{job_id}",
+    }
+
+
+@router.post("/rollback")
+async def rollback(
+    request: RollbackRequest,
+    _: None = Depends(require_admin),
+) -> Dict[str, Any]:
+    """Switch the alias back to a previous collection version."""
+    try:
+        result = await asyncio.to_thread(rollback_collection, request.collection)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:
+        logger.error(f"Error rolling back collection: {str(exc)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to roll back: {str(exc)}") from exc
+
+    logger.warning(f"Collection alias rolled back: {result['previous']} -> {result['collection']}")
+    return {"success": True, **result}
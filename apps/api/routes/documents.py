@@ -1,37 +1,88 @@
 """Documents management endpoints (list, delete, get details)."""
+import asyncio
 import logging
-from typing import Any, Dict
+import uuid
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from qdrant_client.models import Filter, FieldCondition, MatchValue
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from qdrant_client.models import Direction, Filter, FieldCondition, MatchValue, OrderBy, Range
 
+from clients.redis_queue import get_ingestion_queue
+from database import document_catalog
 from deps import require_admin
+from routes.ingest import USE_ASYNC_INGESTION
+from workers.deletion_worker import delete_documents_task
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["documents"])
 
+DEFAULT_CHUNK_PAGE_SIZE = 100
+MAX_CHUNK_PAGE_SIZE = 500
 
-@router.delete("/documents/{document_id:path}")
+# Payload fields loaded when chunk text is not requested (skips the serialized node)
+CHUNK_POSITION_FIELDS = ["chunk_index", "page"]
+
+MAX_DELETE_DOCUMENTS = 1000
+
+
+class DeleteDocumentsRequest(BaseModel):
+    document_ids: List[str] = Field(..., min_length=1, max_length=MAX_DELETE_DOCUMENTS)
+
+
+def _start_deletion_job(document_ids: Optional[List[str]], background_tasks: BackgroundTasks) -> Dict[str, Any]:
+    """
+    Start a deletion job and return its tracking information.
+
+    With async ingestion the job is enqueued to RQ; otherwise it runs in the
+    API's thread pool after the response is sent. Either way progress is
+    published on ``/ws/jobs/{job_id}``.
+    """
+    if USE_ASYNC_INGESTION:
+        job = get_ingestion_queue().enqueue(
+            delete_documents_task,
+            document_ids=document_ids,
+            job_timeout=3600,
+        )
+        job_id = job.id
+    else:
+        job_id = uuid.uuid4().hex
+        background_tasks.add_task(delete_documents_task, document_ids=document_ids, job_id=job_id)
+
+    return {
+        "success": True,
+        "job_id": job_id,
+        "status": "queued",
+        "document_ids": document_ids,
+        "message": f"Deletion started. Follow progress on /ws/jobs/{job_id}",
+    }
+
+
+@router.delete("/documents/{document_id:path}", status_code=202)
 async def delete_document(
     document_id: str,
+    background_tasks: BackgroundTasks,
     _: None = Depends(require_admin),
 ) -> Dict[str, Any]:
     """
     Delete a document and all its associated chunks from the vector store.
 
+    The chunks are removed by a background job; the response carries the
+    job_id to follow on the WebSocket channel.
+
     Args:
         document_id: The document_id (filename) to delete
 
     Returns:
-        Success message with deletion count
+        Deletion job information
     """
     try:
-        from rag.pipeline import get_qdrant_client, COLLECTION_NAME
+        from rag.pipeline import get_async_qdrant_client, COLLECTION_NAME
 
-        client = get_qdrant_client()
+        client = get_async_qdrant_client()
 
         # Check if collection exists
-        if not client.collection_exists(COLLECTION_NAME):
+        if not await client.collection_exists(COLLECTION_NAME):
             raise HTTPException(
                 status_code=404,
                 detail="Document collection does not exist"
@@ -41,38 +92,22 @@ async def delete_document(
         from urllib.parse import unquote
         document_id = unquote(document_id)
 
-        logger.info(f"Attempting to delete document: {document_id}")
-
-        # Delete all points with matching document_id
-        delete_result = client.delete(
+        existing = await client.count(
             collection_name=COLLECTION_NAME,
-            points_selector=Filter(
-                must=[
-                    FieldCondition(
-                        key="document_id",
-                        match=MatchValue(value=document_id)
-                    )
-                ]
-            ),
+            count_filter=Filter(must=[FieldCondition(key="document_id", match=MatchValue(value=document_id))]),
+            exact=True,
         )
-
-        # Check if any points were deleted
-        if hasattr(delete_result, 'status') and delete_result.status == 'completed':
-            logger.info(f"Document deleted successfully: {document_id}")
-            return {
-                "success": True,
-                "document_id": document_id,
-                "filename": document_id,
-                "message": f"Document '{document_id}' and all its chunks have been deleted"
-            }
-        else:
-            # No points found with this document_id
+        if existing.count == 0:
             logger.warning(f"No document found with ID: {document_id}")
             raise HTTPException(
                 status_code=404,
                 detail=f"Document '{document_id}' not found"
             )
 
+        response = _start_deletion_job([document_id], background_tasks)
+        logger.info(f"Deletion job {response['job_id']} started for document: {document_id}")
+        return {**response, "document_id": document_id, "filename": document_id, "chunks": existing.count}
+
     except HTTPException:
         raise
     except Exception as exc:
@@ -83,54 +118,51 @@ async def delete_document(
         ) from exc
 
 
-@router.delete("/documents")
-async def delete_all_documents(
+@router.post("/documents/delete", status_code=202)
+async def delete_documents(
+    request: DeleteDocumentsRequest,
+    background_tasks: BackgroundTasks,
     _: None = Depends(require_admin),
 ) -> Dict[str, Any]:
     """
-    Delete ALL documents and chunks from the vector store.
-
-    WARNING: This operation cannot be undone. It will completely clear
-    the RAG knowledge base.
+    Delete several documents in one background job.
 
     Returns:
-        Success message with deletion count
+        Deletion job information
     """
+    document_ids = sorted(set(request.document_ids))
     try:
-        from rag.pipeline import get_qdrant_client, COLLECTION_NAME
-
-        client = get_qdrant_client()
-
-        # Check if collection exists
-        if not client.collection_exists(COLLECTION_NAME):
-            logger.warning("Collection does not exist, nothing to delete")
-            return {
-                "success": True,
-                "message": "No documents to delete (collection does not exist)",
-                "deleted_count": 0
-            }
-
-        # Count points before deletion
-        collection_info = client.get_collection(COLLECTION_NAME)
-        total_points = collection_info.points_count if hasattr(collection_info, 'points_count') else 0
+        response = _start_deletion_job(document_ids, background_tasks)
+    except Exception as exc:
+        logger.error(f"Error starting deletion of {len(document_ids)} documents: {str(exc)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to delete documents: {str(exc)}"
+        ) from exc
 
-        logger.warning(f"Deleting ALL documents from collection: {total_points} points")
+    logger.info(f"Deletion job {response['job_id']} started for {len(document_ids)} documents")
+    return response
 
-        # Delete the entire collection and recreate it
-        client.delete_collection(COLLECTION_NAME)
 
-        # Recreate empty collection
-        from rag.pipeline import ensure_collection
-        ensure_collection(client, COLLECTION_NAME)
+@router.delete("/documents", status_code=202)
+async def delete_all_documents(
+    background_tasks: BackgroundTasks,
+    _: None = Depends(require_admin),
+) -> Dict[str, Any]:
+    """
+    Delete ALL documents and chunks from the vector store.
 
-        logger.info(f"All documents deleted successfully: {total_points} chunks removed")
+    WARNING: This operation cannot be undone. It will completely clear
+    the RAG knowledge base.
 
-        return {
-            "success": True,
-            "message": f"All documents have been deleted ({total_points} chunks removed)",
-            "deleted_count": total_points
-        }
+    Points are deleted in batches by a background job instead of dropping
+    the collection, so queries keep working while it runs.
 
+    Returns:
+        Deletion job information
+    """
+    try:
+        response = _start_deletion_job(None, background_tasks)
     except Exception as exc:
         logger.error(f"Error deleting all documents: {str(exc)}", exc_info=True)
         raise HTTPException(
@@ -138,28 +170,49 @@ async def delete_all_documents(
             detail=f"Failed to delete all documents: {str(exc)}"
         ) from exc
 
+    logger.warning(f"Deletion job {response['job_id']} started for ALL documents")
+    return response
+
 
 @router.get("/documents/{document_id:path}")
 async def get_document_details(
     document_id: str,
+    after: Optional[int] = Query(None, ge=-1, description="Return chunks with chunk_index greater than this cursor"),
+    limit: int = Query(DEFAULT_CHUNK_PAGE_SIZE, ge=1, le=MAX_CHUNK_PAGE_SIZE),
+    from_index: Optional[int] = Query(None, ge=0, description="First chunk_index of the selected range"),
+    to_index: Optional[int] = Query(None, ge=0, description="Last chunk_index of the selected range"),
+    include_text: bool = Query(True, description="Include chunk text (skip to list chunk positions only)"),
     _: None = Depends(require_admin),
 ) -> Dict[str, Any]:
     """
-    Get detailed information about a specific document.
+    Get one page of a document's chunks, ordered by chunk_index.
+
+    Pages are selected with an indexed range filter on ``chunk_index`` rather
+    than an offset, so each request reads at most ``limit`` points. Pass the
+    returned ``next_cursor`` as ``after`` to fetch the following page.
 
     Args:
         document_id: The document_id (filename) to retrieve
+        after: Keyset cursor (last chunk_index of the previous page)
+        limit: Maximum chunks per page
+        from_index: Optional lower bound of the chunk range
+        to_index: Optional upper bound of the chunk range
+        include_text: Whether to load and return chunk text
 
     Returns:
-        Document details including all chunks
+        Document details with one page of chunks
     """
+    if from_index is not None and to_index is not None and from_index > to_index:
+        raise HTTPException(status_code=400, detail="'from_index' must not be greater than 'to_index'")
+
     try:
-        from rag.pipeline import get_qdrant_client, COLLECTION_NAME
+        from rag.pipeline import get_async_qdrant_client, get_payload_text, COLLECTION_NAME
+        from rag.text_store import hydrate_payloads
 
-        client = get_qdrant_client()
+        client = get_async_qdrant_client()
 
         # Check if collection exists
-        if not client.collection_exists(COLLECTION_NAME):
+        if not await client.collection_exists(COLLECTION_NAME):
             raise HTTPException(
                 status_code=404,
                 detail="Document collection does not exist"
@@ -169,62 +222,68 @@ async def get_document_details(
         from urllib.parse import unquote
         document_id = unquote(document_id)
 
-        # Search for all points with this document_id
-        result = client.scroll(
+        document_filter = FieldCondition(key="document_id", match=MatchValue(value=document_id))
+
+        lower_bound = from_index
+        if after is not None and (lower_bound is None or after + 1 > lower_bound):
+            lower_bound = after + 1
+        page_conditions = [document_filter]
+        if lower_bound is not None or to_index is not None:
+            page_conditions.append(
+                FieldCondition(key="chunk_index", range=Range(gte=lower_bound, lte=to_index))
+            )
+
+        points, _ = await client.scroll(
             collection_name=COLLECTION_NAME,
-            scroll_filter=Filter(
-                must=[
-                    FieldCondition(
-                        key="document_id",
-                        match=MatchValue(value=document_id)
-                    )
-                ]
-            ),
-            limit=1000,  # Max chunks per document
-            with_payload=True,
+            scroll_filter=Filter(must=page_conditions),
+            limit=limit,
+            order_by=OrderBy(key="chunk_index", direction=Direction.ASC),
+            with_payload=True if include_text else CHUNK_POSITION_FIELDS,
             with_vectors=False,
         )
 
-        points, _ = result
-
-        if not points:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Document '{document_id}' not found"
+        if not points and after is None:
+            total = await client.count(
+                collection_name=COLLECTION_NAME,
+                count_filter=Filter(must=[document_filter]),
+                exact=True,
             )
+            if total.count == 0:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Document '{document_id}' not found"
+                )
+
+        if include_text:
+            await asyncio.to_thread(hydrate_payloads, [point.payload for point in points if point.payload])
 
-        # Collect all chunks and extract text from node content
         chunks = []
         for point in points:
             payload = point.payload or {}
-
-            # The text is stored in the _node_content field by LlamaIndex
-            text = ""
-            if "_node_content" in payload:
-                # Parse the JSON content
-                import json
-                try:
-                    node_content = json.loads(payload["_node_content"]) if isinstance(payload["_node_content"], str) else payload["_node_content"]
-                    text = node_content.get("text", "")
-                except (json.JSONDecodeError, AttributeError):
-                    # Fallback: try to get text directly
-                    text = str(payload.get("_node_content", ""))
-
-            chunks.append({
+            chunk = {
                 "chunk_id": str(point.id),
-                "text": text,
                 "page": payload.get("page"),
                 "chunk_index": payload.get("chunk_index"),
-            })
+            }
+            if include_text:
+                chunk["text"] = get_payload_text(payload)
+            chunks.append(chunk)
 
-        # Sort chunks by chunk_index if available
-        chunks.sort(key=lambda x: x.get("chunk_index", 0) if x.get("chunk_index") is not None else 0)
+        # Total chunks come from the catalog; Qdrant count is the fallback for uncatalogued documents
+        chunk_count = await _get_chunk_count(client, COLLECTION_NAME, document_id, document_filter)
+
+        next_cursor = None
+        if len(points) == limit:
+            last_index = chunks[-1]["chunk_index"]
+            if to_index is None or last_index < to_index:
+                next_cursor = last_index
 
         return {
             "document_id": document_id,
             "filename": document_id,
-            "chunk_count": len(chunks),
+            "chunk_count": chunk_count,
             "chunks": chunks,
+            "next_cursor": next_cursor,
         }
 
     except HTTPException:
@@ -235,3 +294,19 @@ async def get_document_details(
             status_code=500,
             detail=f"Failed to retrieve document details: {str(exc)}"
         ) from exc
+
+
+async def _get_chunk_count(client: Any, collection_name: str, document_id: str, document_filter: FieldCondition) -> int:
+    try:
+        record = await asyncio.to_thread(document_catalog.get_document, document_id)
+        if record and record.get("status") == document_catalog.STATUS_INDEXED:
+            return record["chunk_count"]
+    except Exception as exc:
+        logger.warning(f"Document catalog unavailable, counting chunks in Qdrant: {str(exc)}")
+
+    result = await client.count(
+        collection_name=collection_name,
+        count_filter=Filter(must=[document_filter]),
+        exact=True,
+    )
+    return result.count
@@ -3,6 +3,10 @@ from datetime import datetime
 
 from fastapi import APIRouter
 
+from database.async_postgres import pool_stats
+from middleware.latency import route_latency
+from utils.logging_config import get_logging_stats
+
 router = APIRouter(tags=["health"])
 
 # Get version from environment variable or default
@@ -16,4 +20,35 @@ async def health_check():
         "status": "healthy",
         "version": API_VERSION,
         "timestamp": datetime.utcnow().isoformat() + "Z",
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/health/db")
+async def database_pool_health():
+    """Connection pool size, saturation, waiters and acquisition latency."""
+    stats = pool_stats()
+    return {
+        "status": "saturated" if stats["waiting"] or stats["saturation"] >= 1 else "healthy",
+        "pool": stats,
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+    }
+
+
+@router.get("/health/latency")
+async def route_latency_summary():
+    """Request count, mean and p50/p95/p99 latency per route since startup."""
+    return {
+        "routes": route_latency.snapshot(),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+    }
+
+
+@router.get("/health/logging")
+async def logging_health():
+    """Log records written per level, sampled out and dropped, and writer queue depth."""
+    stats = get_logging_stats()
+    return {
+        "status": "degraded" if stats["dropped"] else "healthy",
+        "logging": stats,
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+    }
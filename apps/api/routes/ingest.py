@@ -1,16 +1,19 @@
+import asyncio
 import logging
 import os
 import tempfile
 from pathlib import Path
-from typing import Any, Dict, Final
+from typing import Any, Dict, Final, List, Optional
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, WebSocket, WebSocketDisconnect
 from rq.job import Job
 
-from clients.redis_queue import get_ingestion_queue, get_redis_connection
+from clients.redis_queue import enqueue, get_redis_connection
 from clients.websocket_manager import get_ws_manager
+from database import document_catalog
 from deps import require_admin
-from workers.ingestion_worker import process_single_document
+from rag.dedup import NEAR_DUPLICATE_ACTIONS
+from workers.ingestion_worker import INGEST_MODES, process_single_document
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["ingest"])
@@ -34,9 +37,33 @@ def _validate_filename(filename: str | None) -> str:
     return filename
 
 
+def _validate_near_duplicates(near_duplicates: Optional[str]) -> Optional[str]:
+    if near_duplicates is not None and near_duplicates not in NEAR_DUPLICATE_ACTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid near_duplicates '{near_duplicates}'. Allowed: {', '.join(NEAR_DUPLICATE_ACTIONS)}",
+        )
+    return near_duplicates
+
+
+def _parse_tags(tags: Optional[str]) -> Optional[List[str]]:
+    if not tags:
+        return None
+    parsed = sorted({tag.strip().lower() for tag in tags.split(",") if tag.strip()})
+    return parsed or None
+
+
 @router.post("/ingest")
 async def ingest_document(
     file: UploadFile = File(...),
+    tags: Optional[str] = Form(None, description="Comma-separated tags used to filter queries"),
+    mode: str = Form("append", description="'append' adds a new document, 'replace' updates the document_key one"),
+    document_key: Optional[str] = Form(
+        None, description="Document id to replace (default: the previous upload of this filename, else its stem)"
+    ),
+    near_duplicates: Optional[str] = Form(
+        None, description="'warn' indexes near duplicates and reports them, 'reject' skips them (default: server)"
+    ),
     _: None = Depends(require_admin),
 ):
     """
@@ -44,8 +71,16 @@ async def ingest_document(
 
     - Async mode (default): Enqueues job to RQ and returns job_id for tracking
     - Sync mode (USE_ASYNC_INGESTION=false): Processes immediately and returns result
+
+    With ``mode=replace`` only the chunks that changed since the stored version
+    of ``document_key`` are embedded; the result reports the reused chunks.
+    Exact duplicates are always skipped; near duplicates follow ``near_duplicates``.
     """
+    if mode not in INGEST_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid mode '{mode}'. Allowed: {', '.join(INGEST_MODES)}")
+    near_duplicates = _validate_near_duplicates(near_duplicates)
     filename = _validate_filename(file.filename)
+    tag_list = _parse_tags(tags)
     payload = await file.read()
     file_size_kb = len(payload) / 1024
 
@@ -67,12 +102,15 @@ async def ingest_document(
     # ASYNC MODE: Enqueue job to RQ
     if USE_ASYNC_INGESTION:
         try:
-            queue = get_ingestion_queue()
-            job = queue.enqueue(
+            job = enqueue(
                 process_single_document,
                 file_path=str(temp_path),
                 filename=filename,
                 content_type=content_type,
+                tags=tag_list,
+                mode=mode,
+                document_key=document_key,
+                near_duplicates=near_duplicates,
                 job_timeout=600,  # 10 minutes max
             )
             logger.info(f"Enqueued ingestion job {job.id} for {filename}")
@@ -98,6 +136,10 @@ async def ingest_document(
             file_path=str(temp_path),
             filename=filename,
             content_type=content_type,
+            tags=tag_list,
+            mode=mode,
+            document_key=document_key,
+            near_duplicates=near_duplicates,
         )
 
         status = result.get("status", "completed")
@@ -118,6 +160,15 @@ async def ingest_document(
             response["duplicate_of"] = result.get("duplicate_of")
             response["message"] = result.get("message")
             response["uploaded_at"] = result.get("uploaded_at")
+            if "similarity" in result:
+                response["similarity"] = result["similarity"]
+
+        for key in (
+            "document_id", "mode", "reused_chunks", "embedded_chunks", "deleted_chunks",
+            "near_duplicate_of", "similarity", "message",
+        ):
+            if key in result:
+                response[key] = result[key]
 
         return response
 
@@ -188,6 +239,13 @@ async def get_ingestion_status(
                 "chunks": job.result.get("chunks"),
                 "status": job.result.get("status", "completed"),
             }
+            if "reused_chunks" in job.result:
+                response["result"].update({
+                    "document_id": job.result.get("document_id"),
+                    "reused_chunks": job.result["reused_chunks"],
+                    "embedded_chunks": job.result.get("embedded_chunks"),
+                    "deleted_chunks": job.result.get("deleted_chunks"),
+                })
 
         # Add error details if job failed
         if job.is_failed:
@@ -206,82 +264,22 @@ async def get_ingestion_status(
 
 @router.get("/ingest/history")
 async def get_ingestion_history(
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    status: Optional[str] = Query(None, description="Only documents in this status (processing, indexed, failed)"),
     _: None = Depends(require_admin),
 ) -> Dict[str, Any]:
     """
-    Get the history of ingested documents.
+    Get the history of ingested documents, newest first.
 
-    Returns a list of unique documents with their metadata from Qdrant.
+    Reads the Postgres document catalog with keyset pagination, so each page
+    costs the same regardless of how many documents have been indexed.
     """
     try:
-        from rag.pipeline import get_qdrant_client, COLLECTION_NAME
-
-        client = get_qdrant_client()
-
-        # Check if collection exists
-        if not client.collection_exists(COLLECTION_NAME):
-            return {"documents": [], "total": 0}
-
-        # Scroll through points to get unique documents
-        # We'll aggregate by filename from metadata
-        documents_map: Dict[str, Dict[str, Any]] = {}
-
-        offset = None
-        batch_size = 100
-        total_processed = 0
-
-        while True:
-            result = client.scroll(
-                collection_name=COLLECTION_NAME,
-                limit=batch_size,
-                offset=offset,
-                with_payload=True,
-                with_vectors=False,
-            )
-
-            points, next_offset = result
-
-            if not points:
-                break
-
-            for point in points:
-                payload = point.payload or {}
-                # Extract filename from document_id or use a default
-                doc_id = payload.get("document_id", payload.get("doc_id", f"unknown_{point.id}"))
-
-                # Store unique documents by document_id
-                if doc_id not in documents_map:
-                    documents_map[doc_id] = {
-                        "id": doc_id,
-                        "filename": doc_id,
-                        "chunks": 0,
-                        "uploaded_at": payload.get("uploaded_at"),
-                    }
-
-                documents_map[doc_id]["chunks"] += 1
-
-            total_processed += len(points)
-
-            if next_offset is None or total_processed >= limit * 10:
-                break
-
-            offset = next_offset
-
-        # Convert to list and sort by chunks (most chunks first)
-        documents = list(documents_map.values())
-        documents.sort(key=lambda x: x["chunks"], reverse=True)
-
-        # Limit results
-        documents = documents[:limit]
-
-        logger.info(f"Retrieved {len(documents)} unique documents from history")
-
-        return {
-            "documents": documents,
-            "total": len(documents_map),
-        }
-
+        rows, next_cursor = await asyncio.to_thread(document_catalog.list_documents, limit, cursor, status)
+        total = await asyncio.to_thread(document_catalog.count_documents)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:
         logger.error(f"Error retrieving ingestion history: {str(exc)}", exc_info=True)
         raise HTTPException(
@@ -289,6 +287,28 @@ async def get_ingestion_history(
             detail="Failed to retrieve ingestion history"
         ) from exc
 
+    documents = [
+        {
+            "id": row["document_id"],
+            "filename": row["filename"],
+            "chunks": row["chunk_count"],
+            "uploaded_at": row["uploaded_at"].isoformat() if row["uploaded_at"] else None,
+            "status": row["status"],
+            "content_type": row["content_type"],
+            "content_hash": row["content_hash"],
+            "size_bytes": row["size_bytes"],
+        }
+        for row in rows
+    ]
+
+    logger.info(f"Retrieved {len(documents)} documents from catalog")
+
+    return {
+        "documents": documents,
+        "total": total,
+        "next_cursor": next_cursor,
+    }
+
 
 @router.websocket("/ws/jobs/{job_id}")
 async def websocket_job_status(websocket: WebSocket, job_id: str):
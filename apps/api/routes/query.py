@@ -1,16 +1,29 @@
 import asyncio
+import json
 import logging
 import os
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from llama_index.core import Settings, VectorStoreIndex, PromptTemplate
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.response_synthesizers import get_response_synthesizer
+from llama_index.core.schema import NodeWithScore
 from llama_index.llms.google_genai import GoogleGenAI
-from llama_index.vector_stores.qdrant import QdrantVectorStore
 from pydantic import BaseModel, Field, field_validator
+from qdrant_client.http.models import Filter
+from qdrant_client.http.models import QueryRequest as QdrantQueryRequest
 
 from deps import require_viewer_or_admin
-from rag.pipeline import COLLECTION_NAME, EMBED_MODEL, get_qdrant_client
+from rag.context import CONTEXT_TOKEN_BUDGET, ContextPacker, pack_context
+from rag.filters import QueryFilters, build_qdrant_filter
+from rag.pipeline import COLLECTION_NAME, EMBED_MODEL, embed_queries, get_qdrant_client
+from rag.retrieval import DEFAULT_MMR_LAMBDA, MMRRetriever
+from rag.vector_store import CompactQdrantVectorStore
+from utils.metrics import QDRANT_SECONDS, QUERY_SECONDS, instrument_llm
+from utils.tracing import tracer
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["query"])
@@ -18,6 +31,14 @@ router = APIRouter(tags=["query"])
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "models/gemini-2.0-flash")
 
+# Batch query tuning
+MAX_BATCH_QUERIES = int(os.getenv("MAX_BATCH_QUERIES", "5000"))
+BATCH_SEARCH_GROUP_SIZE = int(os.getenv("BATCH_SEARCH_GROUP_SIZE", "64"))
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+
+# LLM latency and token counters are fed by LlamaIndex instrumentation events
+instrument_llm()
+
 
 def normalize_model_name(model: str) -> str:
     if not model:
@@ -32,6 +53,14 @@ class QueryRequest(BaseModel):
     question: Optional[str] = Field(None, description="Alias for 'query' field for compatibility")
     top_k: Optional[int] = 5
     language: Optional[str] = "es"
+    mmr: bool = Field(False, description="Diversify sources with maximal marginal relevance")
+    mmr_lambda: float = Field(
+        DEFAULT_MMR_LAMBDA,
+        ge=0.0,
+        le=1.0,
+        description="MMR relevance/diversity trade-off (1.0 = pure relevance)",
+    )
+    filters: Optional[QueryFilters] = Field(None, description="Restrict the search by document, date, type or tag")
 
     @field_validator("query", mode="before")
     @classmethod
@@ -47,6 +76,14 @@ class QueryRequest(BaseModel):
             raise ValueError("Either 'query' or 'question' field must be provided")
 
 
+class BatchQueryRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_QUERIES)
+    top_k: int = Field(5, ge=1, le=100)
+    language: Optional[str] = "es"
+    retrieval_only: bool = Field(False, description="Return ranked sources only, without calling the LLM")
+    filters: Optional[QueryFilters] = None
+
+
 class QueryResponse(BaseModel):
     query: str
     answer: str
@@ -68,58 +105,90 @@ def normalize_language(language: Optional[str]) -> str:
     return "es"
 
 
-def get_query_engine(top_k: int, language: str):
-    try:
-        if not GEMINI_API_KEY:
-            raise ValueError(
-                "GEMINI_API_KEY not configured. Please add it to your .env file.\n"
-                "Get your free API key at: https://aistudio.google.com/app/apikey"
-            )
+def build_qa_prompt(language: str) -> PromptTemplate:
+    """Return the language-specific QA prompt template."""
+    if language == "es":
+        qa_prompt_tmpl_str = (
+            "A continuación se proporciona información de contexto.\n"
+            "---------------------\n"
+            "{context_str}\n"
+            "---------------------\n"
+            "Dada la información de contexto y sin conocimiento previo, "
+            "responde a la consulta en ESPAÑOL de manera profesional y clara.\n"
+            "Si la información no está en el contexto, di que no puedes responder basándote en el contexto proporcionado.\n"
+            "Consulta: {query_str}\n"
+            "Respuesta en español: "
+        )
+    else:
+        qa_prompt_tmpl_str = (
+            "Context information is below.\n"
+            "---------------------\n"
+            "{context_str}\n"
+            "---------------------\n"
+            "Given the context information and no prior knowledge, "
+            "answer the query in ENGLISH in a professional and clear manner.\n"
+            "If the information is not in the context, say you cannot answer based on the provided context.\n"
+            "Query: {query_str}\n"
+            "Answer in English: "
+        )
 
-        # Prepare language-specific prompts
-        if language == "es":
-            qa_prompt_tmpl_str = (
-                "A continuación se proporciona información de contexto.\n"
-                "---------------------\n"
-                "{context_str}\n"
-                "---------------------\n"
-                "Dada la información de contexto y sin conocimiento previo, "
-                "responde a la consulta en ESPAÑOL de manera profesional y clara.\n"
-                "Si la información no está en el contexto, di que no puedes responder basándote en el contexto proporcionado.\n"
-                "Consulta: {query_str}\n"
-                "Respuesta en español: "
-            )
-        else:
-            qa_prompt_tmpl_str = (
-                "Context information is below.\n"
-                "---------------------\n"
-                "{context_str}\n"
-                "---------------------\n"
-                "Given the context information and no prior knowledge, "
-                "answer the query in ENGLISH in a professional and clear manner.\n"
-                "If the information is not in the context, say you cannot answer based on the provided context.\n"
-                "Query: {query_str}\n"
-                "Answer in English: "
-            )
+    return PromptTemplate(qa_prompt_tmpl_str)
 
-        qa_prompt = PromptTemplate(qa_prompt_tmpl_str)
 
-        llm = GoogleGenAI(
-            model=normalize_model_name(GEMINI_MODEL),
-            api_key=GEMINI_API_KEY,
-            temperature=0.7,
-            use_file_api=False,
+def get_llm() -> GoogleGenAI:
+    """Create the Gemini LLM client, failing early when no API key is configured."""
+    if not GEMINI_API_KEY:
+        raise ValueError(
+            "GEMINI_API_KEY not configured. Please add it to your .env file.\n"
+            "Get your free API key at: https://aistudio.google.com/app/apikey"
         )
+
+    return GoogleGenAI(
+        model=normalize_model_name(GEMINI_MODEL),
+        api_key=GEMINI_API_KEY,
+        temperature=0.7,
+        use_file_api=False,
+    )
+
+
+def get_query_engine(
+    top_k: int,
+    language: str,
+    mmr_lambda: Optional[float] = None,
+    qdrant_filter: Optional[Filter] = None,
+):
+    try:
+        qa_prompt = build_qa_prompt(language)
+
+        llm = get_llm()
         Settings.llm = llm
         Settings.embed_model = EMBED_MODEL
 
         client = get_qdrant_client()
-        vector_store = QdrantVectorStore(client=client, collection_name=COLLECTION_NAME)
+        vector_store = CompactQdrantVectorStore(client=client, collection_name=COLLECTION_NAME)
+        node_postprocessors = [ContextPacker(token_budget=CONTEXT_TOKEN_BUDGET)]
+
+        if mmr_lambda is not None:
+            retriever = MMRRetriever(
+                vector_store=vector_store,
+                embed_model=EMBED_MODEL,
+                similarity_top_k=top_k,
+                lambda_mult=mmr_lambda,
+                qdrant_filter=qdrant_filter,
+            )
+            return RetrieverQueryEngine.from_args(
+                retriever,
+                llm=llm,
+                text_qa_template=qa_prompt,
+                node_postprocessors=node_postprocessors,
+            )
 
         index = VectorStoreIndex.from_vector_store(vector_store)
         query_engine = index.as_query_engine(
             similarity_top_k=top_k,
             text_qa_template=qa_prompt,
+            node_postprocessors=node_postprocessors,
+            vector_store_kwargs={"qdrant_filters": qdrant_filter} if qdrant_filter else {},
         )
 
         return query_engine
@@ -146,40 +215,54 @@ async def query_post(
     return await query_documents(request)
 
 
+def format_source(node: Any) -> Dict[str, Any]:
+    """Build the public source entry for a retrieved node."""
+    score = getattr(node, "score", None)
+    node_metadata = getattr(node.node, "metadata", {})
+
+    source_entry = {
+        "text": node.node.text[:200],
+        "score": float(score) if score is not None else None,
+        "metadata": node_metadata,
+        "source": node_metadata.get("filename", node_metadata.get("file_name", "unknown")),
+    }
+
+    if "page" in node_metadata:
+        source_entry["page"] = node_metadata["page"]
+    if "chunk_id" in node_metadata:
+        source_entry["chunk_id"] = node_metadata["chunk_id"]
+
+    return source_entry
+
+
 async def query_documents(request: QueryRequest) -> QueryResponse:
+    started = time.perf_counter()
+    retrieval_mode = "mmr" if request.mmr else "similarity"
     try:
         language = normalize_language(request.language)
         top_k = request.top_k or 5
 
         logger.info(
-            "Processing query: %d chars, language=%s, top_k=%d",
+            "Processing query: %d chars, language=%s, top_k=%d, retrieval=%s",
             len(request.query or ""),
             language,
             top_k,
+            retrieval_mode,
         )
 
-        engine = get_query_engine(top_k, language)
+        engine_options: Dict[str, Any] = {}
+        if request.mmr:
+            engine_options["mmr_lambda"] = request.mmr_lambda
+        qdrant_filter = build_qdrant_filter(request.filters)
+        if qdrant_filter is not None:
+            engine_options["qdrant_filter"] = qdrant_filter
+
+        engine = get_query_engine(top_k, language, **engine_options)
         llama_response = await asyncio.to_thread(engine.query, request.query)
 
         sources: List[Dict[str, Any]] = []
         if hasattr(llama_response, "source_nodes"):
-            for node in llama_response.source_nodes:
-                score = getattr(node, "score", None)
-                node_metadata = getattr(node.node, "metadata", {})
-
-                source_entry = {
-                    "text": node.node.text[:200],
-                    "score": float(score) if score is not None else None,
-                    "metadata": node_metadata,
-                    "source": node_metadata.get("filename", node_metadata.get("file_name", "unknown")),
-                }
-
-                if "page" in node_metadata:
-                    source_entry["page"] = node_metadata["page"]
-                if "chunk_id" in node_metadata:
-                    source_entry["chunk_id"] = node_metadata["chunk_id"]
-
-                sources.append(source_entry)
+            sources = [format_source(node) for node in llama_response.source_nodes]
 
         answer_text = getattr(llama_response, "response", None)
         if not answer_text and hasattr(llama_response, "message"):
@@ -191,11 +274,14 @@ async def query_documents(request: QueryRequest) -> QueryResponse:
             "model": GEMINI_MODEL,
             "sources": len(sources),
             "language": language,
+            "retrieval_mode": retrieval_mode,
+            "filtered": qdrant_filter is not None,
         }
         llama_metadata = getattr(llama_response, "metadata", None)
         if isinstance(llama_metadata, dict):
             metadata.update(llama_metadata)
 
+        QUERY_SECONDS.labels(retrieval_mode, "ok").observe(time.perf_counter() - started)
         logger.info(
             "Query completed: %d chars, %d sources, language=%s",
             len(str(answer_text)),
@@ -211,6 +297,7 @@ async def query_documents(request: QueryRequest) -> QueryResponse:
         )
 
     except Exception as exc:
+        QUERY_SECONDS.labels(retrieval_mode, "error").observe(time.perf_counter() - started)
         logger.error(
             "Query processing failed: %s... - %s",
             (request.query or "")[:50],
@@ -218,3 +305,149 @@ async def query_documents(request: QueryRequest) -> QueryResponse:
             exc_info=True,
         )
         raise HTTPException(500, detail=str(exc))
+
+
+@router.post("/query/batch")
+async def query_batch(
+    request: BatchQueryRequest,
+    _: None = Depends(require_viewer_or_admin),
+) -> StreamingResponse:
+    """
+    Run many queries in one request, streaming one JSON result per line (NDJSON).
+
+    All questions are embedded in a single batched call, searched in groups with
+    Qdrant ``query_batch_points`` and answered with a bounded number of concurrent LLM
+    calls. With ``retrieval_only`` the LLM is skipped and only sources are
+    returned. Results are emitted as they complete and carry the ``index`` of
+    their question.
+    """
+    language = normalize_language(request.language)
+    qa_prompt = build_qa_prompt(language)
+    try:
+        llm = None if request.retrieval_only else get_llm()
+    except ValueError as exc:
+        raise HTTPException(500, detail=str(exc))
+
+    return StreamingResponse(
+        _run_query_batch(request, language, qa_prompt, llm),
+        media_type="application/x-ndjson",
+    )
+
+
+def _search_group(
+    vector_store: CompactQdrantVectorStore,
+    embeddings: List[List[float]],
+    top_k: int,
+    qdrant_filter: Optional[Filter],
+) -> List[List[NodeWithScore]]:
+    """Search a group of query vectors in one Qdrant round trip."""
+    span = tracer.start_as_current_span(
+        "qdrant.search_batch",
+        attributes={
+            "db.system": "qdrant",
+            "db.collection.name": vector_store.collection_name,
+            "db.queries": len(embeddings),
+        },
+    )
+    with span, QDRANT_SECONDS.labels("search_batch").time():
+        responses = vector_store.client.query_batch_points(
+            collection_name=vector_store.collection_name,
+            requests=[
+                QdrantQueryRequest(query=embedding, limit=top_k, filter=qdrant_filter, with_payload=True)
+                for embedding in embeddings
+            ],
+        )
+
+    results = []
+    for response in responses:
+        parsed = vector_store.parse_to_query_result(response.points)
+        results.append(
+            [NodeWithScore(node=node, score=score) for node, score in zip(parsed.nodes, parsed.similarities)]
+        )
+    return results
+
+
+async def _run_query_batch(
+    request: BatchQueryRequest,
+    language: str,
+    qa_prompt: PromptTemplate,
+    llm: Optional[GoogleGenAI],
+) -> AsyncIterator[str]:
+    started = time.perf_counter()
+    queries = request.queries
+    qdrant_filter = build_qdrant_filter(request.filters)
+
+    logger.info(
+        "Processing batch query: %d queries, top_k=%d, language=%s, retrieval_only=%s",
+        len(queries),
+        request.top_k,
+        language,
+        request.retrieval_only,
+    )
+
+    try:
+        embeddings = await asyncio.to_thread(embed_queries, queries)
+        vector_store = CompactQdrantVectorStore(client=get_qdrant_client(), collection_name=COLLECTION_NAME)
+    except Exception as exc:
+        logger.error("Batch query setup failed: %s", exc, exc_info=True)
+        yield json.dumps({"error": str(exc)}) + "\n"
+        return
+
+    synthesizer = None
+    if llm is not None:
+        synthesizer = get_response_synthesizer(llm=llm, text_qa_template=qa_prompt)
+    semaphore = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+
+    async def answer(index: int, nodes: List[NodeWithScore]) -> Dict[str, Any]:
+        packed, context_tokens = pack_context(nodes)
+        try:
+            async with semaphore:
+                response = await synthesizer.asynthesize(queries[index], packed)
+        except Exception as exc:
+            logger.error("Batch answer failed for query %d: %s", index, exc)
+            return {"index": index, "query": queries[index], "error": f"Answer failed: {exc}"}
+        return {
+            "index": index,
+            "query": queries[index],
+            "answer": str(response),
+            "sources": [format_source(node) for node in packed],
+            "metadata": {"model": GEMINI_MODEL, "language": language, "context_tokens": context_tokens},
+        }
+
+    failed = 0
+    for group_start in range(0, len(queries), BATCH_SEARCH_GROUP_SIZE):
+        group_embeddings = embeddings[group_start:group_start + BATCH_SEARCH_GROUP_SIZE]
+        try:
+            group_nodes = await asyncio.to_thread(
+                _search_group, vector_store, group_embeddings, request.top_k, qdrant_filter
+            )
+        except Exception as exc:
+            logger.error("Batch search failed for group starting at %d: %s", group_start, exc)
+            for offset in range(len(group_embeddings)):
+                failed += 1
+                index = group_start + offset
+                yield json.dumps({"index": index, "query": queries[index], "error": f"Search failed: {exc}"}) + "\n"
+            continue
+
+        if synthesizer is None:
+            for offset, nodes in enumerate(group_nodes):
+                index = group_start + offset
+                yield json.dumps(
+                    {"index": index, "query": queries[index], "sources": [format_source(node) for node in nodes]},
+                    default=str,
+                ) + "\n"
+            continue
+
+        tasks = [asyncio.create_task(answer(group_start + offset, nodes)) for offset, nodes in enumerate(group_nodes)]
+        for task in asyncio.as_completed(tasks):
+            result = await task
+            if "error" in result:
+                failed += 1
+            yield json.dumps(result, default=str) + "\n"
+
+    logger.info(
+        "Batch query completed: %d queries, %d failed, %.2fs",
+        len(queries),
+        failed,
+        time.perf_counter() - started,
+    )
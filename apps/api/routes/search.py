@@ -0,0 +1,124 @@
+"""Retrieval-only search endpoint: ranked chunks without LLM generation."""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from qdrant_client.http.models import PayloadSelectorExclude
+
+from deps import require_viewer_or_admin
+from rag.filters import QueryFilters, build_qdrant_filter
+from rag.pipeline import COLLECTION_NAME, embed_query, get_async_qdrant_client, get_payload_text
+from rag.text_store import TEXT_HASH_FIELD, hydrate_payloads
+from utils.metrics import QDRANT_SECONDS
+from utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["search"])
+
+# Payload selector for results without text: skips the largest fields
+TEXT_FREE_PAYLOAD = PayloadSelectorExclude(exclude=["text", "_node_content"])
+
+
+class SearchRequest(BaseModel):
+    query: str = Field(..., min_length=1)
+    top_k: int = Field(10, ge=1, le=100)
+    offset: int = Field(0, ge=0, le=10000)
+    include_text: bool = Field(True, description="Include the chunk text in each result")
+    filters: Optional[QueryFilters] = None
+
+
+class SearchResult(BaseModel):
+    id: str
+    score: float
+    document_id: Optional[str] = None
+    chunk_index: Optional[int] = None
+    page: Optional[int] = None
+    text: Optional[str] = None
+    metadata: Dict[str, Any] = {}
+
+
+class SearchResponse(BaseModel):
+    query: str
+    results: List[SearchResult]
+    offset: int
+    next_offset: Optional[int] = None
+    took_ms: float
+
+
+def _to_result(point: Any, include_text: bool) -> SearchResult:
+    payload = point.payload or {}
+    # Underscore-prefixed fields are legacy LlamaIndex bookkeeping (serialized node, node type, ...)
+    metadata = {
+        key: value
+        for key, value in payload.items()
+        if not key.startswith("_") and key not in ("text", "meta", TEXT_HASH_FIELD)
+    }
+    metadata.update(payload.get("meta") or {})
+    return SearchResult(
+        id=str(point.id),
+        score=point.score,
+        document_id=payload.get("document_id"),
+        chunk_index=payload.get("chunk_index"),
+        page=payload.get("page"),
+        text=get_payload_text(payload) if include_text else None,
+        metadata=metadata,
+    )
+
+
+@router.post("/search", response_model=SearchResponse)
+async def search_chunks(
+    request: SearchRequest,
+    _: None = Depends(require_viewer_or_admin),
+) -> SearchResponse:
+    """
+    Return the chunks most similar to the query, ranked by score.
+
+    Unlike ``/query`` this never calls the LLM. The query embedding goes
+    through the shared embedding cache and the search uses the cached async
+    Qdrant client. Use ``offset`` with ``next_offset`` to page through results.
+    """
+    started = time.perf_counter()
+    try:
+        query_vector = await asyncio.to_thread(embed_query, request.query)
+        client = get_async_qdrant_client()
+        span = tracer.start_as_current_span(
+            "qdrant.search", attributes={"db.system": "qdrant", "db.collection.name": COLLECTION_NAME}
+        )
+        with span, QDRANT_SECONDS.labels("search").time():
+            response = await client.query_points(
+                collection_name=COLLECTION_NAME,
+                query=query_vector,
+                query_filter=build_qdrant_filter(request.filters),
+                limit=request.top_k,
+                offset=request.offset,
+                with_payload=True if request.include_text else TEXT_FREE_PAYLOAD,
+                with_vectors=False,
+            )
+        points = response.points
+        if request.include_text:
+            # External chunk texts: one batched read for the returned page only
+            await asyncio.to_thread(hydrate_payloads, [point.payload for point in points if point.payload])
+    except Exception as exc:
+        logger.error("Search failed: %s", exc, exc_info=True)
+        raise HTTPException(500, detail=str(exc))
+
+    results = [_to_result(point, request.include_text) for point in points]
+    took_ms = (time.perf_counter() - started) * 1000
+
+    logger.info(
+        "Search completed: %d results, offset=%d, %.1f ms",
+        len(results),
+        request.offset,
+        took_ms,
+    )
+
+    return SearchResponse(
+        query=request.query,
+        results=results,
+        offset=request.offset,
+        next_offset=request.offset + len(results) if len(results) == request.top_k else None,
+        took_ms=round(took_ms, 2),
+    )
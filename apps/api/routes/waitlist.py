@@ -1,8 +1,8 @@
 """
 API endpoints para el sistema de waitlist (T003)
 """
+from asyncpg.exceptions import UniqueViolationError
 from fastapi import APIRouter, HTTPException, Request, status
-from sqlalchemy.exc import IntegrityError
 from pydantic import ValidationError
 
 from database.waitlist_repository import WaitlistRepository
@@ -55,7 +55,7 @@ async def add_to_waitlist(
 
     try:
         # Verificar si ya existe
-        if repo.email_exists(waitlist_data.email):
+        if await repo.email_exists(waitlist_data.email):
             logger.warning(
                 f"Email duplicado en waitlist: {waitlist_data.email}",
                 extra={
@@ -73,11 +73,11 @@ async def add_to_waitlist(
             )
 
         # Crear entrada
-        entry = repo.add_to_waitlist(waitlist_data)
+        entry = await repo.add_to_waitlist(waitlist_data)
 
         # Obtener posición y total
-        position = repo.get_position(entry.email)
-        total_pending = repo.get_waitlist_count()
+        position = await repo.get_position(entry.email)
+        total_pending = await repo.get_waitlist_count()
 
         logger.info(
             f"Email añadido a waitlist: {entry.email}",
@@ -127,7 +127,7 @@ async def add_to_waitlist(
             position=position
         )
 
-    except IntegrityError as e:
+    except UniqueViolationError as e:
         logger.error(
             f"Error de integridad en waitlist: {str(e)}",
             extra={"email": waitlist_data.email}
@@ -170,9 +170,6 @@ async def add_to_waitlist(
             }
         )
 
-    finally:
-        repo.close()
-
 
 @router.get(
     "/stats",
@@ -186,15 +183,9 @@ async def get_waitlist_stats() -> dict:
     Returns:
         Diccionario con estadísticas de waitlist
     """
-    repo = WaitlistRepository()
-
-    try:
-        count = repo.get_waitlist_count()
-
-        return {
-            "total_pending": count,
-            "message": f"{count} personas en lista de espera"
-        }
+    count = await WaitlistRepository().get_waitlist_count()
 
-    finally:
-        repo.close()
+    return {
+        "total_pending": count,
+        "message": f"{count} personas en lista de espera"
+    }
@@ -0,0 +1,54 @@
+"""
+Rellena el índice de near-duplicados (MinHash LSH en Redis) con los documentos ya indexados.
+
+Reconstruye el texto de cada documento a partir de sus chunks en Qdrant y
+registra su firma. Solo es necesario una vez para documentos anteriores al
+índice; después el worker de ingesta lo mantiene al día. Con
+``--chunks`` también registra los SimHash de los chunks para la detección de
+boilerplate.
+
+Uso:
+    python scripts/backfill_dedup_index.py [--chunks]
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rag import dedup
+from rag.pipeline import COLLECTION_NAME, NODE_PARSER, get_qdrant_client
+from workers.reindex_worker import _list_document_versions, _load_document
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", action="store_true", help="Registrar también los SimHash de los chunks")
+    args = parser.parse_args()
+
+    client = get_qdrant_client()
+    if not client.collection_exists(COLLECTION_NAME):
+        logger.info(f"La colección '{COLLECTION_NAME}' no existe, nada que registrar")
+        return
+
+    document_ids = sorted(_list_document_versions(client, COLLECTION_NAME))
+    for position, document_id in enumerate(document_ids, start=1):
+        document = _load_document(client, COLLECTION_NAME, document_id)
+        if document is None:
+            continue
+        dedup.register_document(document_id, dedup.minhash_signature(document["text"]))
+        if args.chunks:
+            chunks = NODE_PARSER.split_text(document["text"])
+            dedup.register_chunks(document_id, [dedup.simhash(chunk) for chunk in chunks])
+        if position % 100 == 0:
+            logger.info(f"{position}/{len(document_ids)} documentos registrados")
+
+    logger.info(f"Índice de near-duplicados actualizado: {len(document_ids)} documentos")
+
+
+if __name__ == "__main__":
+    main()
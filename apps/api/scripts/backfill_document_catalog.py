@@ -0,0 +1,89 @@
+"""
+Rellena el catálogo de documentos de Postgres a partir de los payloads de Qdrant.
+
+Solo es necesario una vez para colecciones indexadas antes de que existiera el
+catálogo; después el worker de ingesta lo mantiene al día.
+
+Uso:
+    python scripts/backfill_document_catalog.py [--batch-size 1000]
+"""
+import argparse
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database.postgres_client import get_db_connection
+from rag.pipeline import COLLECTION_NAME, get_qdrant_client
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+UPSERT_SQL = """
+    INSERT INTO documents (document_id, filename, content_hash, content_type, chunk_count, status, uploaded_at)
+    VALUES (%s, %s, %s, %s, %s, 'indexed', %s)
+    ON CONFLICT (document_id) DO UPDATE SET
+        chunk_count = EXCLUDED.chunk_count,
+        status = 'indexed',
+        updated_at = CURRENT_TIMESTAMP;
+"""
+
+
+def collect_documents(batch_size: int) -> Dict[str, Dict[str, Any]]:
+    client = get_qdrant_client()
+    if not client.collection_exists(COLLECTION_NAME):
+        return {}
+
+    documents: Dict[str, Dict[str, Any]] = {}
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=COLLECTION_NAME,
+            limit=batch_size,
+            offset=offset,
+            with_payload=["document_id", "content_hash", "content_type", "uploaded_at"],
+            with_vectors=False,
+        )
+        for point in points:
+            payload = point.payload or {}
+            document_id = payload.get("document_id")
+            if not document_id:
+                continue
+            entry = documents.setdefault(document_id, {**payload, "chunks": 0})
+            entry["chunks"] += 1
+        if offset is None:
+            break
+    return documents
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    documents = collect_documents(args.batch_size)
+    logger.info(f"Encontrados {len(documents)} documentos en Qdrant")
+
+    rows = [
+        (
+            document_id,
+            document_id,
+            info.get("content_hash"),
+            info.get("content_type"),
+            info["chunks"],
+            info.get("uploaded_at") or datetime.utcnow().isoformat(),
+        )
+        for document_id, info in documents.items()
+    ]
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.executemany(UPSERT_SQL, rows)
+
+    logger.info(f"✅ Catálogo actualizado con {len(rows)} documentos")
+
+
+if __name__ == "__main__":
+    main()
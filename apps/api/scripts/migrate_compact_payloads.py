@@ -0,0 +1,92 @@
+"""
+Reescribe los payloads heredados de LlamaIndex (``_node_content``) al formato compacto.
+
+Recorre la colección por páginas y sustituye el payload de cada punto heredado
+con una única petición ``batch_update_points`` por página. Los puntos ya
+compactos se omiten, así que el script se puede relanzar sin riesgo.
+
+Con ``CHUNK_TEXT_STORE=sqlite`` también mueve el texto de los puntos compactos
+al almacén de textos externo, dejando solo ``text_hash`` en Qdrant.
+
+Uso:
+    python scripts/migrate_compact_payloads.py [--batch-size 256] [--dry-run]
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from qdrant_client.http.models import OverwritePayloadOperation, SetPayload
+
+from rag.pipeline import COLLECTION_NAME, get_qdrant_client
+from rag.text_store import TEXT_HASH_FIELD, chunk_text_hash, external_text_enabled, get_chunk_text_store
+from rag.vector_store import compact_payload, is_legacy_payload
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--dry-run", action="store_true", help="Solo contar puntos y bytes, sin escribir")
+    args = parser.parse_args()
+
+    client = get_qdrant_client()
+    if not client.collection_exists(args.collection):
+        logger.info(f"La colección '{args.collection}' no existe, nada que migrar")
+        return
+
+    scanned = migrated = bytes_before = bytes_after = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=args.collection,
+            limit=args.batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False,
+        )
+        rewrites = []
+        for point in points:
+            payload = point.payload or {}
+            if is_legacy_payload(payload) or (external_text_enabled() and "text" in payload):
+                rewrites.append((point.id, payload, dict(compact_payload(payload))))
+
+        if external_text_enabled() and rewrites:
+            texts = [compact.pop("text") for _, _, compact in rewrites]
+            if args.dry_run:
+                hashes = [chunk_text_hash(text) for text in texts]
+            else:
+                hashes = get_chunk_text_store().put_many(texts)
+            for (_, _, compact), text_hash in zip(rewrites, hashes):
+                compact[TEXT_HASH_FIELD] = text_hash
+
+        operations = []
+        for point_id, payload, compact in rewrites:
+            bytes_before += len(json.dumps(payload))
+            bytes_after += len(json.dumps(compact))
+            operations.append(
+                OverwritePayloadOperation(overwrite_payload=SetPayload(payload=compact, points=[point_id]))
+            )
+
+        if operations and not args.dry_run:
+            client.batch_update_points(collection_name=args.collection, update_operations=operations, wait=True)
+
+        scanned += len(points)
+        migrated += len(operations)
+        if offset is None:
+            break
+
+    saved = (1 - bytes_after / bytes_before) * 100 if bytes_before else 0.0
+    action = "a migrar" if args.dry_run else "migrados"
+    logger.info(f"Puntos revisados: {scanned}, {action}: {migrated}")
+    logger.info(f"Payload: {bytes_before / 1024:.1f} KB -> {bytes_after / 1024:.1f} KB ({saved:.0f}% menos)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Elimina del almacén de textos externo los textos que ya no referencia ningún punto.
+
+Los textos se direccionan por contenido y pueden compartirse entre documentos,
+así que el borrado de documentos no los elimina. Este script recorre todas las
+colecciones de Qdrant (incluidas las versiones guardadas para rollback), reúne
+los ``text_hash`` vivos y borra el resto en una sola transacción. Los textos
+escritos después de empezar el recorrido se conservan siempre.
+
+Uso:
+    python scripts/prune_chunk_texts.py [--dry-run]
+"""
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rag.pipeline import get_qdrant_client
+from rag.text_store import CHUNK_TEXT_STORE_PATH, TEXT_HASH_FIELD, get_chunk_text_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def collect_live_hashes(batch_size: int) -> set:
+    client = get_qdrant_client()
+    live = set()
+    for collection in client.get_collections().collections or []:
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection.name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=[TEXT_HASH_FIELD],
+                with_vectors=False,
+            )
+            live.update(
+                point.payload[TEXT_HASH_FIELD] for point in points if (point.payload or {}).get(TEXT_HASH_FIELD)
+            )
+            if offset is None:
+                break
+        logger.info(f"Colección '{collection.name}' revisada: {len(live)} textos vivos acumulados")
+    return live
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="Solo contar textos vivos, sin borrar")
+    args = parser.parse_args()
+
+    started = time.time()
+    live = collect_live_hashes(args.batch_size)
+    if args.dry_run:
+        logger.info(f"{len(live)} textos referenciados en {CHUNK_TEXT_STORE_PATH}")
+        return
+
+    removed = get_chunk_text_store().delete_except(live, created_before=started)
+    logger.info(f"Textos eliminados: {removed} (se conservan {len(live)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Caches for request authentication: verified JWT payloads and resolved users.
+
+``get_current_user`` used to verify the token signature and read the user
+from Postgres on every protected request. Verified payloads are now memoized
+per token until the token's own ``exp``, and ``UserPublic`` objects are kept
+for ``AUTH_USER_CACHE_TTL`` seconds in a bounded in-process LRU.
+
+With ``AUTH_USER_CACHE_REDIS=true`` users are also stored in Redis
+(``auth:user:{id}``) so every API instance shares the entries and their
+invalidation; the in-process tier then only keeps an entry for
+``AUTH_USER_CACHE_LOCAL_TTL`` seconds, which bounds how long another
+instance can serve a user that was just updated or deactivated. Redis
+errors are logged and the lookup falls through to the database.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+from uuid import UUID
+
+from models.user import UserPublic
+from services.security import decode_token
+from utils.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+AUTH_USER_CACHE_REDIS = os.getenv("AUTH_USER_CACHE_REDIS", "false").lower() in {"1", "true", "yes"}
+# In-process TTL when Redis holds the shared copy
+AUTH_USER_CACHE_LOCAL_TTL = float(os.getenv("AUTH_USER_CACHE_LOCAL_TTL", "5"))
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+
+KEY_PREFIX = "auth:user"
+
+V = TypeVar("V")
+
+
+class _TTLCache(Generic[V]):
+    """Thread-safe LRU with a per-entry expiry (``time.time()`` seconds)."""
+
+    def __init__(self, maxsize: int, name: str) -> None:
+        self.maxsize = maxsize
+        self._hit_counter = CACHE_REQUESTS.labels(name, "hit")
+        self._miss_counter = CACHE_REQUESTS.labels(name, "miss")
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                entry = None
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if entry is None:
+            self._miss_counter.inc()
+            return None
+        self._hit_counter.inc()
+        return entry[1]
+
+    def set(self, key: Hashable, value: V, expires_at: float) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+_users: "_TTLCache[UserPublic]" = _TTLCache(AUTH_USER_CACHE_SIZE, "auth_user")
+_tokens: "_TTLCache[Dict[str, Any]]" = _TTLCache(AUTH_TOKEN_CACHE_SIZE, "auth_token")
+_redis_client = None
+
+
+def _redis():
+    global _redis_client
+    if _redis_client is None:
+        from redis import asyncio as redis_asyncio
+
+        from clients.redis_queue import REDIS_URL
+
+        _redis_client = redis_asyncio.from_url(REDIS_URL)
+    return _redis_client
+
+
+def _local_ttl() -> float:
+    return min(AUTH_USER_CACHE_TTL, AUTH_USER_CACHE_LOCAL_TTL) if AUTH_USER_CACHE_REDIS else AUTH_USER_CACHE_TTL
+
+
+def decode_token_cached(token: str) -> Dict[str, Any]:
+    """
+    :func:`decode_token` memoized until the token expires.
+
+    Only successfully verified payloads with an ``exp`` claim are cached, so
+    invalid tokens are re-checked (and rejected) every time.
+
+    Raises:
+        TokenDecodeError: If the token is invalid or expired
+    """
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = _tokens.get(key)
+    if payload is not None:
+        return payload
+    payload = decode_token(token)
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, (int, float)):
+        _tokens.set(key, payload, float(expires_at))
+    return payload
+
+
+async def get_cached_user(user_id: UUID) -> Optional[UserPublic]:
+    """Return the cached user, or None on a miss (including expired entries)."""
+    user = _users.get(user_id)
+    if user is not None or not AUTH_USER_CACHE_REDIS:
+        return user
+    try:
+        raw = await _redis().get(f"{KEY_PREFIX}:{user_id}")
+    except Exception as exc:
+        logger.warning("Auth user cache: Redis read failed: %s", exc)
+        return None
+    if raw is None:
+        return None
+    user = UserPublic.model_validate_json(raw)
+    _users.set(user_id, user, time.time() + _local_ttl())
+    return user
+
+
+async def cache_user(user: UserPublic) -> None:
+    """Store a user freshly read from the database."""
+    if AUTH_USER_CACHE_TTL <= 0:
+        return
+    _users.set(user.id, user, time.time() + _local_ttl())
+    if AUTH_USER_CACHE_REDIS:
+        try:
+            await _redis().set(f"{KEY_PREFIX}:{user.id}", user.model_dump_json(), ex=max(1, int(AUTH_USER_CACHE_TTL)))
+        except Exception as exc:
+            logger.warning("Auth user cache: Redis write failed: %s", exc)
+
+
+async def invalidate_user(user_id: UUID) -> None:
+    """Drop a user after it changes (profile, role, deactivation, login timestamp)."""
+    _users.pop(user_id)
+    if AUTH_USER_CACHE_REDIS:
+        try:
+            await _redis().delete(f"{KEY_PREFIX}:{user_id}")
+        except Exception as exc:
+            logger.warning("Auth user cache: Redis invalidation failed for %s: %s", user_id, exc)
+
+
+def cache_stats() -> Dict[str, Any]:
+    return {
+        "users": {**_users.stats(), "ttl_seconds": _local_ttl(), "redis": AUTH_USER_CACHE_REDIS},
+        "tokens": _tokens.stats(),
+    }
+
+
+def clear() -> None:
+    """Empty both in-process caches (tests, key rotation)."""
+    _users.clear()
+    _tokens.clear()
@@ -5,8 +5,28 @@ from fastapi import HTTPException, status
 from pydantic import EmailStr
 
 from database import user_repository
+from services import auth_cache
 from models.user import UserPublic, UserRole
-from services.security import hash_password, verify_password, create_access_token
+from services.security import (
+    PasswordHasherBusy,
+    create_access_token,
+    hash_password_async,
+    verify_password_async,
+)
+
+# Seconds clients should wait when the bcrypt pool is saturated
+PASSWORD_BUSY_RETRY_AFTER = "1"
+
+
+async def _hashing(call):
+    try:
+        return await call
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent sign-ins, retry shortly",
+            headers={"Retry-After": PASSWORD_BUSY_RETRY_AFTER},
+        )
 
 
 def _to_public(record: dict) -> UserPublic:
@@ -25,16 +45,18 @@ def _to_public(record: dict) -> UserPublic:
 
 class AuthService:
     @staticmethod
-    def has_admin_user() -> bool:
-        return user_repository.has_admin_user()
+    async def has_admin_user() -> bool:
+        return await user_repository.has_admin_user()
 
     @staticmethod
-    def create_user(*, email: EmailStr, password: str, first_name: str, last_name: str, role: UserRole) -> UserPublic:
-        existing = user_repository.get_user_by_email(email.lower())
+    async def create_user(
+        *, email: EmailStr, password: str, first_name: str, last_name: str, role: UserRole
+    ) -> UserPublic:
+        existing = await user_repository.get_user_by_email(email.lower())
         if existing:
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already registered")
-        hashed = hash_password(password)
-        record = user_repository.create_user(
+        hashed = await _hashing(hash_password_async(password))
+        record = await user_repository.create_user(
             email=email.lower(),
             password_hash=hashed,
             first_name=first_name.strip(),
@@ -44,14 +66,19 @@ class AuthService:
         return _to_public(record)
 
     @staticmethod
-    def authenticate(email: EmailStr, password: str) -> UserPublic:
-        record = user_repository.get_user_by_email(email.lower())
-        if not record or "password_hash" not in record or not verify_password(password, record["password_hash"]):
+    async def authenticate(email: EmailStr, password: str) -> UserPublic:
+        record = await user_repository.get_user_by_email(email.lower())
+        if (
+            not record
+            or "password_hash" not in record
+            or not await _hashing(verify_password_async(password, record["password_hash"]))
+        ):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
         if not record.get("is_active", True):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive account")
         user = _to_public(record)
-        user_repository.touch_user_login(user.id)
+        await user_repository.touch_user_login(user.id)
+        await auth_cache.invalidate_user(user.id)
         return user
 
     @staticmethod
@@ -60,8 +87,34 @@ class AuthService:
         return create_access_token(payload)
 
     @staticmethod
-    def get_user(user_id: UUID) -> Optional[UserPublic]:
-        record = user_repository.get_user_by_id(user_id)
+    async def get_user(user_id: UUID) -> Optional[UserPublic]:
+        user = await auth_cache.get_cached_user(user_id)
+        if user is not None:
+            return user
+        record = await user_repository.get_user_by_id(user_id)
         if not record:
             return None
+        user = _to_public(record)
+        await auth_cache.cache_user(user)
+        return user
+
+    @staticmethod
+    async def update_user(
+        user_id: UUID,
+        *,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        role: Optional[UserRole] = None,
+        is_active: Optional[bool] = None,
+    ) -> UserPublic:
+        record = await user_repository.update_user(
+            user_id,
+            first_name=first_name.strip() if first_name else None,
+            last_name=last_name.strip() if last_name else None,
+            role=role.value if role else None,
+            is_active=is_active,
+        )
+        await auth_cache.invalidate_user(user_id)
+        if not record:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         return _to_public(record)
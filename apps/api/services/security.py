@@ -1,6 +1,9 @@
-﻿import os
+﻿import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional, TypeVar
 
 import bcrypt
 from jose import JWTError, jwt
@@ -8,12 +11,29 @@ from jose import JWTError, jwt
 JWT_SECRET = os.getenv("JWT_SECRET", "change-me")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRES_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES_MINUTES", "60"))
+# bcrypt runs on a dedicated pool (it releases the GIL) so logins never stall the event loop;
+# by default one core is left to the event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, min(4, (os.cpu_count() or 2) - 1)))))
+# Hash/verify calls running or queued before new ones are rejected with PasswordHasherBusy;
+# the default keeps the queueing delay around four bcrypt rounds
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 4)))
+
+T = TypeVar("T")
 
 
 class TokenDecodeError(Exception):
     pass
 
 
+class PasswordHasherBusy(Exception):
+    """The password hashing pool already has ``PASSWORD_HASH_MAX_PENDING`` calls in flight."""
+
+
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_hash_executor_lock = threading.Lock()
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
+
+
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
 
@@ -22,6 +42,47 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
 
 
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            _hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+    return _hash_executor
+
+
+async def _run_bounded(func: Callable[..., T], *args: Any) -> T:
+    # Reject instead of queueing without bound: a login storm fails fast rather than piling up
+    if not _hash_slots.acquire(blocking=False):
+        raise PasswordHasherBusy("Password hashing pool is saturated")
+    try:
+        future = _get_hash_executor().submit(func, *args)
+    except BaseException:
+        _hash_slots.release()
+        raise
+    # Released by the pool future, not the awaiting task: a cancelled request's bcrypt call
+    # keeps running (and holds its slot) until the worker finishes it
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return await asyncio.wrap_future(future)
+
+
+async def hash_password_async(password: str) -> str:
+    """:func:`hash_password` on the bounded bcrypt pool.
+
+    Raises:
+        PasswordHasherBusy: If too many hash/verify calls are already pending
+    """
+    return await _run_bounded(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """:func:`verify_password` on the bounded bcrypt pool.
+
+    Raises:
+        PasswordHasherBusy: If too many hash/verify calls are already pending
+    """
+    return await _run_bounded(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(payload: Dict[str, Any], expires_minutes: int = ACCESS_TOKEN_EXPIRES_MINUTES) -> str:
     to_encode = payload.copy()
     expire = datetime.utcnow() + timedelta(minutes=expires_minutes)
@@ -19,20 +19,20 @@ load_dotenv()
 
 def start_worker():
     """
-    Inicia un worker RQ que escucha la cola 'ingestion_queue'.
+    Inicia un worker RQ que escucha la cola 'ingestion' (la misma que usa la API).
     """
     # Conectar a Redis
     redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
     redis_conn = Redis.from_url(redis_url)
     
     # Crear cola
-    queue = Queue("ingestion_queue", connection=redis_conn)
+    queue = Queue("ingestion", connection=redis_conn)
     
     print("=" * 60)
     print("🚀 WORKER DE INGESTA - ANCLORA RAG")
     print("=" * 60)
     print(f"📡 Conectado a Redis: {redis_url}")
-    print(f"📋 Escuchando cola: ingestion_queue")
+    print(f"📋 Escuchando cola: ingestion")
     print(f"⏳ Esperando tareas...")
     print("=" * 60)
     
@@ -22,6 +22,7 @@ os.environ["QDRANT_URL"] = "http://localhost:6333"
 os.environ["OLLAMA_URL"] = "http://localhost:11434"
 os.environ["OLLAMA_MODEL"] = "llama3.2:1b"
 os.environ["USE_ASYNC_INGESTION"] = "false"  # Disable async ingestion for tests (no Redis required)
+os.environ["RATE_LIMIT_ENABLED"] = "false"  # Tests share one client IP; rate limits are covered in test_rate_limit.py
 
 
 @pytest.fixture
@@ -119,7 +120,7 @@ This is useful for testing the RAG pipeline and query functionality.
 @pytest.fixture
 def mock_process_single_document():
     """Mock the process_single_document worker function."""
-    def mock_side_effect(file_path: str, filename: str, content_type: str):
+    def mock_side_effect(file_path: str, filename: str, content_type: str, tags=None, mode="append", document_key=None):
         """Return a dynamic mock response based on the input filename."""
         return {
             "filename": filename,
@@ -0,0 +1,60 @@
+"""Tests for the shared async Postgres pool (database/async_postgres.py)."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+
+@pytest.mark.unit
+def test_acquire_timeout_raises_pool_timeout_error():
+    """Test that a saturated pool fails fast with PoolTimeoutError and counts the timeout."""
+    from database import async_postgres
+
+    pool = MagicMock()
+    pool.acquire = AsyncMock(side_effect=asyncio.TimeoutError)
+    timeouts = async_postgres._metrics.timeouts
+
+    async def query():
+        async with async_postgres.acquire():
+            pass
+
+    with patch.object(async_postgres, "get_pool", AsyncMock(return_value=pool)):
+        with pytest.raises(async_postgres.PoolTimeoutError):
+            asyncio.run(query())
+
+    assert pool.acquire.call_args.kwargs["timeout"] == async_postgres.PG_POOL_ACQUIRE_TIMEOUT
+    assert async_postgres._metrics.timeouts == timeouts + 1
+    assert async_postgres._metrics.waiting == 0
+    pool.release.assert_not_called()
+
+
+@pytest.mark.unit
+def test_pool_stats_reports_saturation_and_releases_connections():
+    """Test that connections go back to the pool and stats reflect in-use connections."""
+    from database import async_postgres
+
+    pool = MagicMock()
+    pool.acquire = AsyncMock(return_value="conn")
+    pool.release = AsyncMock()
+    pool.get_size.return_value = async_postgres.PG_POOL_MAX_SIZE
+    pool.get_idle_size.return_value = 0
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        created = loop.create_future()
+        created.set_result(pool)
+        async_postgres._pools[loop] = created
+        try:
+            async with async_postgres.acquire() as conn:
+                assert conn == "conn"
+            return async_postgres.pool_stats()
+        finally:
+            async_postgres._pools.pop(loop, None)
+
+    stats = asyncio.run(run())
+
+    pool.release.assert_awaited_once_with("conn")
+    assert stats["pools"] == 1
+    assert stats["in_use"] == async_postgres.PG_POOL_MAX_SIZE and stats["saturation"] == 1.0
+    assert stats["acquisitions"] >= 1
@@ -0,0 +1,82 @@
+"""Tests for authentication caches (services/auth_cache.py)."""
+
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _empty_caches():
+    from services import auth_cache
+
+    auth_cache.clear()
+    yield
+    auth_cache.clear()
+
+
+def _record(user_id, is_active=True):
+    return {
+        "id": user_id,
+        "email": "ana@anclora.dev",
+        "first_name": "Ana",
+        "last_name": "Prueba",
+        "role": "viewer",
+        "is_active": is_active,
+        "created_at": datetime(2026, 1, 1),
+        "updated_at": None,
+    }
+
+
+@pytest.mark.unit
+def test_verified_token_is_decoded_once_until_it_expires():
+    """Test that a hot token skips signature checks and an expired entry is verified again."""
+    from services import auth_cache
+
+    payload = {"sub": str(uuid.uuid4()), "exp": time.time() + 60}
+    with patch.object(auth_cache, "decode_token", return_value=payload) as decode:
+        assert auth_cache.decode_token_cached("token-a") == payload
+        assert auth_cache.decode_token_cached("token-a") == payload
+        assert decode.call_count == 1
+
+        decode.return_value = {"sub": payload["sub"], "exp": time.time() - 1}
+        auth_cache.decode_token_cached("token-b")
+        auth_cache.decode_token_cached("token-b")
+        assert decode.call_count == 3
+
+
+@pytest.mark.unit
+def test_get_user_reads_database_once_per_ttl():
+    """Test that repeated lookups of the same user are served from the cache."""
+    from services import auth_service
+
+    user_id = uuid.uuid4()
+    get_by_id = AsyncMock(return_value=_record(user_id))
+
+    with patch.object(auth_service.user_repository, "get_user_by_id", get_by_id):
+        users = [asyncio.run(auth_service.AuthService.get_user(user_id)) for _ in range(3)]
+
+    assert get_by_id.await_count == 1
+    assert all(user.id == user_id for user in users)
+
+
+@pytest.mark.unit
+def test_deactivation_invalidates_cached_user():
+    """Test that updating a user drops the cached copy so the next request sees the change."""
+    from services import auth_service
+
+    user_id = uuid.uuid4()
+    get_by_id = AsyncMock(side_effect=[_record(user_id), _record(user_id, is_active=False)])
+    update = AsyncMock(return_value=_record(user_id, is_active=False))
+
+    with patch.object(auth_service.user_repository, "get_user_by_id", get_by_id), \
+            patch.object(auth_service.user_repository, "update_user", update):
+        assert asyncio.run(auth_service.AuthService.get_user(user_id)).is_active
+        asyncio.run(auth_service.AuthService.update_user(user_id, is_active=False))
+        assert not asyncio.run(auth_service.AuthService.get_user(user_id)).is_active
+
+    assert get_by_id.await_count == 2
+    assert update.call_args.kwargs["is_active"] is False
@@ -0,0 +1,191 @@
+"""Tests for batch progress accounting (database/batch_manager.py)."""
+
+import asyncio
+import uuid
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+
+def _patch_db(**functions):
+    """Replace the async_postgres query helpers used by BatchManager."""
+    from database import batch_manager
+
+    mocks = {name: AsyncMock(return_value=value) for name, value in functions.items()}
+    return patch.multiple(batch_manager.async_postgres, **mocks), mocks
+
+
+@pytest.mark.unit
+def test_update_progress_many_is_one_statement_per_call():
+    """Test that many documents are sent as arrays in a single statement, last update per document winning."""
+    from database.batch_manager import PROGRESS_UPDATE_QUERY, BatchManager
+
+    state = {"status": "partial", "processed_files": 1, "failed_files": 0, "total_files": 2}
+    patcher, mocks = _patch_db(fetchrow=state)
+    batch_id, first, second = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    with patcher:
+        status = asyncio.run(BatchManager().update_progress_many(batch_id, [
+            {"doc_id": first, "status": "failed", "error": "timeout"},
+            {"doc_id": second, "status": "completed", "chunks_count": 12},
+            {"doc_id": first, "status": "completed", "chunks_count": 3},
+        ]))
+
+    assert status == state
+    mocks["fetchrow"].assert_awaited_once()
+    query, *params = mocks["fetchrow"].call_args.args
+    assert query is PROGRESS_UPDATE_QUERY
+    assert params[0] == batch_id
+    assert params[1] == [first, second]
+    assert params[2] == ["completed", "completed"]
+    assert params[3] == [3, 12]
+    assert params[4] == [None, None]
+
+
+@pytest.mark.unit
+def test_update_progress_never_recounts_the_batch():
+    """Test that a single update uses the incremental statement instead of a COUNT over the batch."""
+    from database.batch_manager import PROGRESS_UPDATE_QUERY, BatchManager
+
+    patcher, mocks = _patch_db(
+        fetchrow={"status": "processing", "processed_files": 1, "failed_files": 0, "total_files": 5}
+    )
+
+    with patcher:
+        status = asyncio.run(BatchManager().update_progress(uuid.uuid4(), uuid.uuid4(), "completed", 4))
+
+    assert status["status"] == "processing"
+    assert mocks["fetchrow"].await_count == 1
+    assert "COUNT(" not in PROGRESS_UPDATE_QUERY
+    assert mocks["fetchrow"].call_args.args[4] == [4]
+
+
+@pytest.mark.unit
+def test_add_files_to_batch_registers_all_files_in_one_statement():
+    """Test that bulk registration inserts every row and updates the totals with one statement."""
+    from database.batch_manager import REGISTER_FILES_QUERY, BatchManager
+
+    patcher, mocks = _patch_db(execute="UPDATE 1")
+    files = [
+        {"filename": f"doc-{i}.pdf", "source_type": "file_upload", "file_size": 100 + i, "mime_type": "application/pdf"}
+        for i in range(1000)
+    ]
+
+    with patcher:
+        doc_ids = asyncio.run(BatchManager().add_files_to_batch(uuid.uuid4(), files))
+
+    mocks["execute"].assert_awaited_once()
+    query, _, _, ids, filenames, _, file_sizes, _ = mocks["execute"].call_args.args
+    assert query is REGISTER_FILES_QUERY
+    assert ids == doc_ids
+    assert filenames[999] == "doc-999.pdf" and file_sizes[0] == 100
+
+
+@pytest.mark.unit
+def test_batch_statistics_and_keyset_page():
+    """Test that statistics come from one GROUP BY and pages return a cursor that resumes after the last row."""
+    from datetime import datetime
+
+    from database.batch_manager import BatchManager
+    from database.document_catalog import decode_cursor
+
+    batch_id = uuid.uuid4()
+    rows = [
+        {"id": uuid.uuid4(), "batch_id": batch_id, "filename": f"doc-{i}.pdf", "status": "completed",
+         "chunks_count": 3, "created_at": datetime(2026, 1, 1, 12, 0, i)}
+        for i in range(3)
+    ]
+    patcher, mocks = _patch_db(fetch=None)
+    mocks["fetch"].side_effect = [
+        [{"status": "completed", "count": 7}, {"status": "failed", "count": 2}],
+        rows,
+    ]
+    manager = BatchManager()
+
+    with patcher:
+        stats = asyncio.run(manager.get_batch_statistics(batch_id))
+        documents, next_cursor = asyncio.run(manager.get_batch_documents(batch_id, limit=2, status="completed"))
+
+    assert stats == {"pending": 0, "processing": 0, "chunked": 0, "completed": 7, "failed": 2, "total": 9}
+    assert [doc["id"] for doc in documents] == [rows[0]["id"], rows[1]["id"]]
+    assert decode_cursor(next_cursor) == (rows[1]["created_at"], str(rows[1]["id"]))
+    page_query, *params = mocks["fetch"].call_args.args
+    assert "GROUP BY" not in page_query and params == [batch_id, "completed", 3]
+
+
+@pytest.mark.unit
+def test_upload_marks_documents_failed_when_enqueue_fails(tmp_path):
+    """Test that registered documents are failed and their temp files removed when the jobs cannot be queued."""
+    from unittest.mock import MagicMock
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from deps import require_admin
+    from routes import batch as batch_routes
+
+    batch_id = uuid.uuid4()
+    doc_ids = [uuid.uuid4(), uuid.uuid4()]
+    manager = MagicMock()
+    manager.get_batch = AsyncMock(return_value={"id": batch_id, "qdrant_collection": "documents"})
+    manager.add_files_to_batch = AsyncMock(return_value=doc_ids)
+    manager.update_progress_many = AsyncMock()
+
+    app = FastAPI()
+    app.include_router(batch_routes.router)
+    app.dependency_overrides[require_admin] = lambda: None
+    files = [("files", ("a.txt", b"uno", "text/plain")), ("files", ("b.txt", b"dos", "text/plain"))]
+
+    with patch.object(batch_routes, "BatchManager", return_value=manager), patch.object(
+        batch_routes, "USE_ASYNC_INGESTION", True
+    ), patch.object(batch_routes, "enqueue_many", side_effect=ConnectionError("redis down")), patch(
+        "tempfile.gettempdir", return_value=str(tmp_path)
+    ):
+        response = TestClient(app).post(f"/batch/{batch_id}/upload", files=files)
+
+    assert response.status_code == 500
+    updates = manager.update_progress_many.await_args.args[1]
+    assert [update["doc_id"] for update in updates] == [str(doc_id) for doc_id in doc_ids]
+    assert all(update["status"] == "failed" and "redis down" in update["error"] for update in updates)
+    assert not any((tmp_path / "anclora_rag" / str(batch_id)).iterdir())
+
+
+@pytest.mark.unit
+def test_upload_streams_files_to_disk_and_registers_their_size(tmp_path):
+    """Test that uploads are copied to temp files, registered with the bytes written and queued with their paths."""
+    from unittest.mock import MagicMock
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from deps import require_admin
+    from routes import batch as batch_routes
+
+    batch_id = uuid.uuid4()
+    doc_ids = [uuid.uuid4(), uuid.uuid4()]
+    manager = MagicMock()
+    manager.get_batch = AsyncMock(return_value={"id": batch_id, "qdrant_collection": "documents"})
+    manager.add_files_to_batch = AsyncMock(return_value=doc_ids)
+
+    app = FastAPI()
+    app.include_router(batch_routes.router)
+    app.dependency_overrides[require_admin] = lambda: None
+    content = b"x" * 200_000
+    files = [("files", ("a.txt", content, "text/plain")), ("files", ("a.txt", b"dos", "text/plain"))]
+
+    with patch.object(batch_routes, "BatchManager", return_value=manager), patch.object(
+        batch_routes, "USE_ASYNC_INGESTION", True
+    ), patch.object(batch_routes, "enqueue_many", return_value=[MagicMock(id="job-1")]) as mock_enqueue, patch(
+        "tempfile.gettempdir", return_value=str(tmp_path)
+    ), patch("starlette.datastructures.UploadFile.read", side_effect=AssertionError("upload read into memory")):
+        response = TestClient(app).post(f"/batch/{batch_id}/upload", files=files)
+
+    assert response.status_code == 200
+    registered = manager.add_files_to_batch.await_args.args[1]
+    assert [item["file_size"] for item in registered] == [len(content), 3]
+    documents = mock_enqueue.call_args.args[1][0]["documents"]
+    assert [doc["doc_id"] for doc in documents] == [str(doc_id) for doc_id in doc_ids]
+    paths = [Path(doc["file_path"]) for doc in documents]
+    assert paths[0] != paths[1]
+    assert [path.read_bytes() for path in paths] == [content, b"dos"]
@@ -0,0 +1,223 @@
+"""Tests for the batch ingestion engine (workers/batch_worker.py)."""
+
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+
+def _write_documents(tmp_path, contents):
+    documents = []
+    for name, text in contents.items():
+        path = tmp_path / name
+        path.write_bytes(text.encode("utf-8"))
+        documents.append(
+            {"doc_id": str(uuid.uuid4()), "filename": name, "file_path": str(path), "mime_type": "text/plain"}
+        )
+    return documents
+
+
+def _run_batch(
+    documents,
+    embed_size=256,
+    embed_side_effect=None,
+    collection_name="batch-test",
+    ensure_side_effect=None,
+    raises=None,
+    **task_kwargs,
+):
+    from workers import batch_worker
+
+    manager = MagicMock()
+    manager.start_batch = AsyncMock()
+    manager.update_progress_many = AsyncMock(return_value=None)
+    manager.record_throughput = AsyncMock()
+    embed_model = MagicMock()
+    embed_model.get_text_embedding_batch.side_effect = embed_side_effect or (
+        lambda texts: [[0.1, 0.2, 0.3] for _ in texts]
+    )
+    vector_store = MagicMock()
+
+    with patch.object(batch_worker, "BATCH_PARSE_WORKERS", 1), \
+            patch.object(batch_worker, "BATCH_EMBED_SIZE", embed_size), \
+            patch.object(batch_worker, "BatchManager", return_value=manager), \
+            patch.object(batch_worker, "get_qdrant_client"), \
+            patch.object(batch_worker, "ensure_collection", side_effect=ensure_side_effect), \
+            patch.object(batch_worker, "CompactQdrantVectorStore", return_value=vector_store), \
+            patch("rag.pipeline.EMBED_MODEL", embed_model), \
+            patch.object(batch_worker, "update_catalog"), \
+            patch.object(batch_worker, "notify_job_progress"), \
+            patch.object(batch_worker, "get_current_job", return_value=None):
+        def run():
+            return batch_worker.process_batch_task(
+                str(uuid.uuid4()), documents, collection_name=collection_name, **task_kwargs
+            )
+
+        if raises:
+            with pytest.raises(raises):
+                run()
+            result = None
+        else:
+            result = run()
+
+    statuses = {
+        update["doc_id"]: (update["status"], update.get("chunks_count"))
+        for call in manager.update_progress_many.call_args_list
+        for update in call.args[1]
+    }
+    return result, statuses, embed_model, vector_store, manager
+
+
+@pytest.mark.unit
+def test_batch_pools_chunks_across_documents(tmp_path):
+    """Test that small documents share one embedding call and one progress update."""
+    documents = _write_documents(tmp_path, {f"doc{i}.txt": f"Documento número {i} del lote." for i in range(5)})
+
+    result, statuses, embed_model, vector_store, manager = _run_batch(documents)
+
+    assert embed_model.get_text_embedding_batch.call_count == 1
+    assert len(embed_model.get_text_embedding_batch.call_args.args[0]) == 5
+    assert vector_store.add.call_count == 1
+    assert result["completed"] == 5 and result["failed"] == 0 and result["chunks"] == 5
+    assert result["docs_per_minute"] > 0
+    assert all(status == ("completed", 1) for status in statuses.values())
+    assert manager.update_progress_many.await_count == 1
+    manager.record_throughput.assert_awaited_once()
+    assert not any((tmp_path / doc["filename"]).exists() for doc in documents)
+
+
+@pytest.mark.unit
+def test_batch_flushes_at_embed_size_and_isolates_parse_failures(tmp_path):
+    """Test that full buffers are flushed early and an unparseable file only fails itself."""
+    documents = _write_documents(tmp_path, {f"doc{i}.txt": f"Contenido {i}." for i in range(3)})
+    documents.append(
+        {"doc_id": str(uuid.uuid4()), "filename": "image.png", "file_path": str(tmp_path / "image.png"),
+         "mime_type": "image/png"}
+    )
+    (tmp_path / "image.png").write_bytes(b"\x89PNG")
+
+    result, statuses, embed_model, _, _ = _run_batch(documents, embed_size=2)
+
+    assert [len(call.args[0]) for call in embed_model.get_text_embedding_batch.call_args_list] == [2, 1]
+    assert result["completed"] == 3 and result["failed"] == 1
+    assert statuses[documents[-1]["doc_id"]][0] == "failed"
+
+
+@pytest.mark.unit
+def test_batch_embedding_failure_marks_owners_failed(tmp_path):
+    """Test that a failed embedding call fails only the documents in that flush and drops their points."""
+    documents = _write_documents(tmp_path, {f"doc{i}.txt": f"Texto {i}." for i in range(2)})
+
+    result, statuses, _, _, _ = _run_batch(documents, embed_side_effect=RuntimeError("model crashed"))
+
+    assert result["completed"] == 0 and result["failed"] == 2
+    assert all(status == "failed" for status, _ in statuses.values())
+
+
+@pytest.mark.unit
+def test_batch_skips_duplicates_in_the_main_collection(tmp_path):
+    """Test that batches apply the single-upload duplicate checks: exact copies and rejected near duplicates."""
+    from workers import batch_worker
+
+    documents = _write_documents(tmp_path, {
+        "a.txt": "Contrato de arrendamiento.",
+        "a-copy.txt": "Contrato de arrendamiento.",
+        "indexed.txt": "Informe ya indexado.",
+        "revised.txt": "Informe revisado.",
+    })
+    indexed = {batch_worker.calculate_content_hash(b"Informe ya indexado."): {"original_filename": "informe-0"}}
+    # Signatures are the texts themselves, so the near-duplicate lookup can key on them
+    near = {"Informe revisado.": ("informe-1", 0.93)}
+
+    with patch.object(batch_worker, "check_duplicate_document", side_effect=indexed.get), patch(
+        "rag.dedup.minhash_signature", side_effect=lambda text: text
+    ), patch.object(
+        batch_worker, "lookup_near_duplicate", side_effect=lambda signature: near.get(signature)
+    ), patch.object(batch_worker, "register_signature") as mock_register:
+        result, statuses, _, _, manager = _run_batch(
+            documents, collection_name=batch_worker.COLLECTION_NAME, near_duplicates="reject"
+        )
+
+    errors = {
+        update["doc_id"]: update.get("error")
+        for call in manager.update_progress_many.call_args_list
+        for update in call.args[1]
+    }
+    by_name = {doc["filename"]: doc["doc_id"] for doc in documents}
+    assert result["completed"] == 1 and result["skipped"] == 3 and result["chunks"] == 1
+    assert statuses[by_name["a.txt"]] == ("completed", 1)
+    assert all(statuses[by_name[name]] == ("completed", 0) for name in ("a-copy.txt", "indexed.txt", "revised.txt"))
+    assert errors[by_name["a-copy.txt"]].startswith("Duplicate of 'a-")
+    assert errors[by_name["indexed.txt"]] == "Duplicate of 'informe-0'"
+    assert errors[by_name["revised.txt"]] == "Near duplicate: 93% similar to 'informe-1'"
+    mock_register.assert_called_once()
+
+
+@pytest.mark.unit
+def test_batch_detects_near_duplicates_within_the_job(tmp_path):
+    """Test that a file nearly identical to one accepted earlier in the same job is a near duplicate."""
+    from workers import batch_worker
+
+    words = " ".join(f"cláusula{i}" for i in range(200))
+    documents = _write_documents(tmp_path, {"original.txt": f"{words} final.", "revised.txt": f"{words} revisada."})
+
+    with patch.object(batch_worker, "check_duplicate_document", return_value=None), patch.object(
+        batch_worker, "lookup_near_duplicate", return_value=None
+    ), patch.object(batch_worker, "register_signature"):
+        result, statuses, _, _, manager = _run_batch(
+            documents, collection_name=batch_worker.COLLECTION_NAME, near_duplicates="reject"
+        )
+
+    errors = {
+        update["doc_id"]: update.get("error")
+        for call in manager.update_progress_many.call_args_list
+        for update in call.args[1]
+    }
+    revised = documents[1]["doc_id"]
+    assert result["completed"] == 1 and result["skipped"] == 1
+    assert statuses[revised] == ("completed", 0)
+    assert errors[revised].startswith("Near duplicate: ")
+    assert "similar to 'original-" in errors[revised]
+
+
+@pytest.mark.unit
+def test_batch_setup_failure_marks_pending_documents_failed(tmp_path):
+    """Test that a job-level error fails every document still pending in one progress update."""
+    documents = _write_documents(tmp_path, {f"doc{i}.txt": f"Texto {i}." for i in range(3)})
+
+    _, statuses, _, _, manager = _run_batch(
+        documents, ensure_side_effect=RuntimeError("Qdrant unavailable"), raises=RuntimeError
+    )
+
+    assert manager.update_progress_many.await_count == 1
+    updates = manager.update_progress_many.call_args.args[1]
+    assert {update["doc_id"] for update in updates} == {doc["doc_id"] for doc in documents}
+    assert all(update["error"] == "Batch failed: Qdrant unavailable" for update in updates)
+    assert all(status == "failed" for status, _ in statuses.values())
+    manager.record_throughput.assert_not_awaited()
+
+
+@pytest.mark.unit
+def test_batch_chunking_failure_only_fails_that_document(tmp_path):
+    """Test that a file whose splitting raises is marked failed and the rest of the batch goes on."""
+    from rag import pipeline
+    from workers import batch_worker
+
+    documents = _write_documents(tmp_path, {"good.txt": "Texto correcto.", "bad.txt": "Texto problemático."})
+
+    def split(document_id, text, metadata):
+        if document_id.startswith("bad-"):
+            raise ValueError("splitter crashed")
+        return pipeline.split_document(document_id, text, metadata)
+
+    with patch.object(batch_worker, "split_document", side_effect=split):
+        result, statuses, _, _, manager = _run_batch(documents)
+
+    errors = {
+        update["doc_id"]: update.get("error")
+        for call in manager.update_progress_many.call_args_list
+        for update in call.args[1]
+    }
+    assert result["completed"] == 1 and result["failed"] == 1
+    assert statuses[documents[0]["doc_id"]] == ("completed", 1)
+    assert errors[documents[1]["doc_id"]] == "Chunking failed: splitter crashed"
@@ -0,0 +1,101 @@
+"""Tests for context packing (rag/context.py)."""
+
+import pytest
+from llama_index.core.schema import NodeWithScore, TextNode
+
+
+def _node(text: str, doc_id: str, index: int, score: float) -> NodeWithScore:
+    node = TextNode(text=text, metadata={"document_id": doc_id, "chunk_index": index, "uploaded_at": "2025-01-01"})
+    return NodeWithScore(node=node, score=score)
+
+
+def _word_tokenizer(text: str):
+    return text.split()
+
+
+@pytest.mark.unit
+def test_overlap_length_detects_shared_span():
+    """Test that the overlap between consecutive chunks is found."""
+    from rag.context import overlap_length
+
+    assert overlap_length("alpha beta gamma delta", "gamma delta epsilon") == len("gamma delta")
+    assert overlap_length("alpha beta", "gamma delta") == 0
+    assert overlap_length("", "gamma") == 0
+
+
+@pytest.mark.unit
+def test_merge_adjacent_chunks_removes_overlap():
+    """Test that neighbouring chunks of a document are merged without repeated text."""
+    from rag.context import merge_adjacent_chunks
+
+    nodes = [
+        _node("gamma delta epsilon zeta", "doc-a", 1, 0.7),
+        _node("alpha beta gamma delta", "doc-a", 0, 0.9),
+        _node("unrelated text", "doc-b", 0, 0.5),
+    ]
+
+    merged = merge_adjacent_chunks(nodes)
+
+    assert len(merged) == 2
+    doc_a = next(item for item in merged if item.node.metadata["document_id"] == "doc-a")
+    assert doc_a.node.get_content() == "alpha beta gamma delta epsilon zeta"
+    assert doc_a.score == 0.9
+    assert doc_a.node.metadata["chunk_index"] == 0
+    assert doc_a.node.metadata["chunk_end_index"] == 1
+
+
+@pytest.mark.unit
+def test_merge_adjacent_chunks_keeps_gaps_separate():
+    """Test that non-consecutive chunks of a document stay separate."""
+    from rag.context import merge_adjacent_chunks
+
+    nodes = [_node("first chunk", "doc-a", 0, 0.9), _node("third chunk", "doc-a", 2, 0.8)]
+
+    assert len(merge_adjacent_chunks(nodes)) == 2
+
+
+@pytest.mark.unit
+def test_pack_context_respects_budget_by_score():
+    """Test that blocks are packed greedily by score within the token budget."""
+    from rag.context import pack_context
+
+    nodes = [
+        _node("one two three four five", "doc-a", 0, 0.4),
+        _node("six seven eight", "doc-b", 0, 0.9),
+        _node("nine ten", "doc-c", 0, 0.8),
+    ]
+
+    packed, tokens = pack_context(nodes, token_budget=6, tokenizer=_word_tokenizer)
+
+    # Only document_id is rendered as metadata: "document_id: doc-x" + blank line + text
+    assert [item.node.metadata["document_id"] for item in packed] == ["doc-b"]
+    assert tokens <= 6
+
+
+@pytest.mark.unit
+def test_pack_context_truncates_single_oversized_block():
+    """Test that the best block is kept and truncated when it alone exceeds the budget."""
+    from rag.context import pack_context
+
+    nodes = [_node(" ".join(["word"] * 100), "doc-a", 0, 0.9)]
+
+    packed, tokens = pack_context(nodes, token_budget=20, tokenizer=_word_tokenizer)
+
+    assert len(packed) == 1
+    assert tokens <= 20
+
+
+@pytest.mark.unit
+def test_pack_context_leaves_input_nodes_untouched():
+    """Test that packing (including truncation) works on copies, so the caller's source nodes stay intact."""
+    from rag.context import pack_context
+
+    text = " ".join(["word"] * 100)
+    nodes = [_node(text, "doc-a", 0, 0.9), _node("short text", "doc-b", 0, 0.5)]
+
+    packed, _ = pack_context(nodes, token_budget=20, tokenizer=_word_tokenizer)
+
+    assert len(packed[0].node.get_content()) < len(text)
+    assert nodes[0].node.get_content() == text
+    assert all(item.node.excluded_llm_metadata_keys == [] for item in nodes)
+    assert nodes[0].node.metadata == {"document_id": "doc-a", "chunk_index": 0, "uploaded_at": "2025-01-01"}
@@ -0,0 +1,67 @@
+"""Tests for the pure ASGI correlation-ID middleware (middleware/correlation_id.py)."""
+
+import pytest
+from fastapi import FastAPI, WebSocket
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+
+def _app():
+    from middleware.correlation_id import CorrelationIdMiddleware
+    from utils.logging_config import correlation_id_var
+
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id, "correlation_id": correlation_id_var.get()}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for index in range(3):
+                yield f"chunk-{index}\n"
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.websocket("/ws")
+    async def websocket(ws: WebSocket):
+        await ws.accept()
+        await ws.send_json({"correlation_id": correlation_id_var.get()})
+        await ws.close()
+
+    app.add_middleware(CorrelationIdMiddleware)
+    return TestClient(app)
+
+
+@pytest.mark.unit
+def test_correlation_id_header_and_route_latency():
+    """Test that the incoming ID is reused, a new one is generated otherwise, and latency is keyed by template."""
+    from middleware.latency import route_latency
+
+    route_latency.reset()
+    client = _app()
+
+    given = client.get("/items/1", headers={"X-Request-ID": "req-123"})
+    generated = client.get("/items/2")
+    client.get("/missing")
+
+    assert given.headers["X-Correlation-ID"] == "req-123" and given.json()["correlation_id"] == "req-123"
+    assert generated.headers["X-Correlation-ID"] == generated.json()["correlation_id"] != "req-123"
+    rows = {(row["method"], row["route"]): row for row in route_latency.snapshot()}
+    assert rows[("GET", "/items/{item_id}")]["count"] == 2
+    assert rows[("GET", "unmatched")]["count"] == 1
+
+
+@pytest.mark.unit
+def test_streaming_responses_and_websockets_pass_through():
+    """Test that streamed bodies arrive intact and WebSockets see the correlation ID."""
+    client = _app()
+
+    response = client.get("/stream", headers={"X-Correlation-ID": "stream-1"})
+    with client.websocket_connect("/ws", headers={"X-Correlation-ID": "ws-1"}) as ws:
+        message = ws.receive_json()
+
+    assert response.text == "chunk-0\nchunk-1\nchunk-2\n"
+    assert response.headers["X-Correlation-ID"] == "stream-1"
+    assert message == {"correlation_id": "ws-1"}
@@ -0,0 +1,90 @@
+"""Tests for near-duplicate detection (rag/dedup.py)."""
+
+import random
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _text(seed: int, words: int = 3000) -> str:
+    rng = random.Random(seed)
+    vocabulary = [f"palabra{i}" for i in range(2000)]
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+
+@pytest.mark.unit
+def test_minhash_similarity_separates_near_duplicates():
+    """Test that a re-export with new dates and a few edits scores high and unrelated text scores low."""
+    from rag.dedup import NEAR_DUPLICATE_THRESHOLD, minhash_signature, signature_similarity
+
+    original = "Exportado el 2024-01-10 a las 10:15. " + _text(1)
+    words = original.split()
+    for position in range(0, len(words), 300):
+        words[position] = "editado"
+    reexport = "Exportado el 2025-03-02 a las 18:40. " + " ".join(words[6:])
+
+    signature = minhash_signature(original)
+    assert signature_similarity(signature, minhash_signature(reexport)) >= NEAR_DUPLICATE_THRESHOLD
+    assert signature_similarity(signature, minhash_signature(_text(2))) < 0.2
+
+
+@pytest.mark.unit
+def test_simhash_matches_boilerplate_with_different_numbers():
+    """Test that boilerplate differing only in numbers shares a SimHash band."""
+    from rag.dedup import SIMHASH_MAX_DISTANCE, _simhash_band_keys, hamming_distance, simhash
+
+    footer = "Documento confidencial dirigido exclusivamente a su destinatario. Página {} de {}"
+    first, second = simhash(footer.format(3, 10)), simhash(footer.format(7, 12))
+    other = simhash(_text(3, words=60))
+
+    assert hamming_distance(first, second) <= SIMHASH_MAX_DISTANCE
+    assert set(_simhash_band_keys(first)) & set(_simhash_band_keys(second))
+    assert hamming_distance(first, other) > SIMHASH_MAX_DISTANCE
+
+
+@pytest.mark.unit
+def test_find_near_duplicate_confirms_candidates_with_signatures():
+    """Test that bucket candidates are confirmed with the stored signature in two round trips."""
+    from rag.dedup import LSH_BANDS, find_near_duplicate, minhash_signature
+
+    signature = minhash_signature(_text(4))
+    conn = MagicMock()
+    conn.pipeline.return_value.execute.return_value = [{b"doc-a", b"doc-b"}] + [set()] * (LSH_BANDS - 1)
+    stored = {"dedup:sig:doc-a": signature.tobytes(), "dedup:sig:doc-b": minhash_signature(_text(5)).tobytes()}
+    conn.mget.side_effect = lambda keys: [stored[key] for key in keys]
+
+    with patch("rag.dedup._redis", return_value=conn):
+        match = find_near_duplicate(signature)
+        excluded = find_near_duplicate(signature, exclude="doc-a")
+
+    assert match == ("doc-a", 1.0)
+    assert excluded is None
+    conn.mget.assert_called_with(["dedup:sig:doc-b"])
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("action, indexed", [("warn", True), ("reject", False)])
+def test_near_duplicate_upload_is_indexed_with_warning_or_rejected(tmp_path, action, indexed):
+    """Test that a near-duplicate upload is indexed and reported by default, and skipped when rejected."""
+    from workers import ingestion_worker
+
+    path = tmp_path / "report-v2.txt"
+    path.write_text(_text(6), encoding="utf-8")
+
+    with patch.object(ingestion_worker, "get_current_job", return_value=None), patch.object(
+        ingestion_worker, "check_duplicate_document", return_value=None
+    ), patch("rag.dedup.find_near_duplicate", return_value=("report-v1", 0.94)), patch(
+        "rag.dedup.register_document"
+    ), patch.object(ingestion_worker, "update_catalog"), patch.object(
+        ingestion_worker, "index_text", return_value=4
+    ) as mock_index:
+        result = ingestion_worker.process_single_document(
+            str(path), "report-v2.txt", "text/plain", near_duplicates=action
+        )
+
+    assert mock_index.called is indexed
+    if indexed:
+        assert result["status"] == "completed" and result["chunks"] == 4
+        assert result["near_duplicate_of"] == "report-v1" and result["similarity"] == 0.94
+    else:
+        assert result["status"] == "duplicate" and result["duplicate_of"] == "report-v1"
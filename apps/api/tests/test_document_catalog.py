@@ -0,0 +1,96 @@
+"""Tests for the Postgres document catalog and the /ingest/history endpoint."""
+
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.mark.unit
+def test_cursor_round_trip():
+    """Test that keyset cursors decode to the values they were built from."""
+    from database.document_catalog import decode_cursor, encode_cursor
+
+    uploaded_at = datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    cursor = encode_cursor(uploaded_at, "report-abc|123")
+
+    assert decode_cursor(cursor) == (uploaded_at, "report-abc|123")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+@pytest.mark.unit
+def test_list_documents_uses_keyset_condition():
+    """Test that a cursor becomes a row-comparison condition and the next cursor is emitted."""
+    from database import document_catalog
+
+    uploaded_at = datetime(2025, 1, 2, tzinfo=timezone.utc)
+    rows = [
+        {"document_id": f"doc-{i}", "uploaded_at": uploaded_at, "chunk_count": 1} for i in range(3)
+    ]
+    cursor = document_catalog.encode_cursor(uploaded_at, "doc-9")
+
+    with patch("database.document_catalog.execute_query", return_value=rows) as mock_query:
+        page, next_cursor = document_catalog.list_documents(2, cursor=cursor)
+
+    sql, params = mock_query.call_args.args
+    assert "(uploaded_at, document_id) < (%s, %s)" in sql
+    assert "OFFSET" not in sql
+    assert params == (uploaded_at, "doc-9", 3)
+    assert [row["document_id"] for row in page] == ["doc-0", "doc-1"]
+    assert document_catalog.decode_cursor(next_cursor) == (uploaded_at, "doc-1")
+
+
+@pytest.mark.unit
+def test_ingestion_history_reads_catalog(client: TestClient):
+    """Test that /ingest/history is served from the catalog with a next cursor."""
+    rows = [
+        {
+            "document_id": "report-1",
+            "filename": "report.pdf",
+            "chunk_count": 12,
+            "uploaded_at": datetime(2025, 1, 2, tzinfo=timezone.utc),
+            "status": "indexed",
+            "content_type": "application/pdf",
+            "content_hash": "abc",
+            "size_bytes": 2048,
+        }
+    ]
+    with patch("routes.ingest.document_catalog.list_documents", return_value=(rows, "next")) as mock_list, patch(
+        "routes.ingest.document_catalog.count_documents", return_value=41
+    ):
+        response = client.get("/ingest/history?limit=1")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["documents"][0]["id"] == "report-1"
+    assert data["documents"][0]["filename"] == "report.pdf"
+    assert data["documents"][0]["chunks"] == 12
+    assert data["total"] == 41
+    assert data["next_cursor"] == "next"
+    mock_list.assert_called_once_with(1, None, None)
+
+
+@pytest.mark.unit
+def test_ingestion_history_rejects_invalid_cursor(client: TestClient):
+    """Test that a malformed cursor is reported as a client error."""
+    response = client.get("/ingest/history?cursor=%%%")
+
+    assert response.status_code == 400
+
+
+@pytest.mark.unit
+def test_replace_key_resolves_previous_upload_of_the_filename():
+    """Test that replace targets the catalogued id of an append-mode upload, falling back to the stem."""
+    from workers.ingestion_worker import _resolve_replace_id
+
+    with patch("database.document_catalog.fetch_one", return_value={"document_id": "report-3f2a"}) as mock_fetch:
+        assert _resolve_replace_id("report.pdf", None) == "report-3f2a"
+    assert mock_fetch.call_args.args[1] == ("report.pdf", "failed")
+
+    with patch("database.document_catalog.fetch_one", return_value=None):
+        assert _resolve_replace_id("report.pdf", None) == "report"
+    with patch("database.document_catalog.fetch_one", side_effect=ConnectionError("postgres down")):
+        assert _resolve_replace_id("report.pdf", None) == "report"
+    assert _resolve_replace_id("report.pdf", "contract-2025") == "contract-2025"
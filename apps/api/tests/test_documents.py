@@ -0,0 +1,135 @@
+"""Tests for the /documents endpoints."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+def _chunk_point(chunk_index: int):
+    payload = {
+        "document_id": "report-1",
+        "chunk_index": chunk_index,
+        "_node_content": json.dumps({"text": f"chunk {chunk_index}"}),
+    }
+    return MagicMock(id=f"point-{chunk_index}", payload=payload)
+
+
+def _mock_async_client(points):
+    mock_client = MagicMock()
+    mock_client.collection_exists = AsyncMock(return_value=True)
+    mock_client.scroll = AsyncMock(return_value=(points, None))
+    mock_client.count = AsyncMock(return_value=MagicMock(count=250))
+    return mock_client
+
+
+@pytest.mark.unit
+def test_document_details_pages_by_chunk_index(client: TestClient):
+    """Test that chunk pages use a chunk_index range filter and return a keyset cursor."""
+    mock_client = _mock_async_client([_chunk_point(10), _chunk_point(11)])
+
+    with patch("rag.pipeline.get_async_qdrant_client", return_value=mock_client), patch(
+        "routes.documents.document_catalog.get_document", return_value=None
+    ):
+        response = client.get("/documents/report-1?after=9&limit=2")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [chunk["chunk_index"] for chunk in data["chunks"]] == [10, 11]
+    assert data["chunks"][0]["text"] == "chunk 10"
+    assert data["chunk_count"] == 250
+    assert data["next_cursor"] == 11
+
+    scroll_kwargs = mock_client.scroll.call_args.kwargs
+    range_condition = next(c for c in scroll_kwargs["scroll_filter"].must if c.key == "chunk_index")
+    assert range_condition.range.gte == 10
+    assert scroll_kwargs["order_by"].key == "chunk_index"
+    assert scroll_kwargs["limit"] == 2
+
+
+@pytest.mark.unit
+def test_document_details_without_text_skips_node_content(client: TestClient):
+    """Test that text-free pages only request chunk position fields."""
+    mock_client = _mock_async_client([_chunk_point(0)])
+
+    with patch("rag.pipeline.get_async_qdrant_client", return_value=mock_client), patch(
+        "routes.documents.document_catalog.get_document",
+        return_value={"status": "indexed", "chunk_count": 1},
+    ):
+        response = client.get("/documents/report-1?include_text=false&from_index=0&to_index=0")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert "text" not in data["chunks"][0]
+    assert data["chunk_count"] == 1
+    assert data["next_cursor"] is None
+    assert mock_client.scroll.call_args.kwargs["with_payload"] == ["chunk_index", "page"]
+
+
+@pytest.mark.unit
+def test_document_details_not_found(client: TestClient):
+    """Test that an unknown document returns 404."""
+    mock_client = _mock_async_client([])
+    mock_client.count = AsyncMock(return_value=MagicMock(count=0))
+
+    with patch("rag.pipeline.get_async_qdrant_client", return_value=mock_client):
+        response = client.get("/documents/missing-doc")
+
+    assert response.status_code == 404
+
+
+@pytest.mark.unit
+def test_delete_document_starts_background_job(client: TestClient):
+    """Test that deleting a document returns a job id instead of blocking on Qdrant."""
+    mock_client = _mock_async_client([])
+    mock_client.count = AsyncMock(return_value=MagicMock(count=42))
+
+    with patch("rag.pipeline.get_async_qdrant_client", return_value=mock_client), patch(
+        "routes.documents.delete_documents_task"
+    ) as mock_task:
+        response = client.delete("/documents/report-1")
+
+    assert response.status_code == 202
+    data = response.json()
+    assert data["job_id"]
+    assert data["chunks"] == 42
+    mock_task.assert_called_once_with(document_ids=["report-1"], job_id=data["job_id"])
+
+
+@pytest.mark.unit
+def test_delete_many_documents_deduplicates_ids(client: TestClient):
+    """Test that bulk deletion accepts a list of ids and runs a single job."""
+    with patch("routes.documents.delete_documents_task") as mock_task:
+        response = client.post("/documents/delete", json={"document_ids": ["b", "a", "b"]})
+
+    assert response.status_code == 202
+    assert mock_task.call_args.kwargs["document_ids"] == ["a", "b"]
+
+
+@pytest.mark.unit
+def test_deletion_task_deletes_in_batches_without_waiting():
+    """Test that the deletion worker deletes by point id batches with wait=False."""
+    from workers import deletion_worker
+
+    mock_client = MagicMock()
+    mock_client.collection_exists.return_value = True
+    mock_client.count.return_value = MagicMock(count=3)
+    mock_client.scroll.side_effect = [
+        ([MagicMock(id=1), MagicMock(id=2)], "next"),
+        ([MagicMock(id=3)], None),
+    ]
+
+    with patch.object(deletion_worker, "get_qdrant_client", return_value=mock_client), patch.object(
+        deletion_worker, "document_catalog"
+    ) as mock_catalog, patch.object(deletion_worker, "notify_job_progress") as mock_notify, patch.object(
+        deletion_worker, "DELETE_BATCH_SIZE", 2
+    ):
+        result = deletion_worker.delete_documents_task(["report-1"], job_id="job-1")
+
+    assert result["deleted"] == 3
+    assert mock_client.delete.call_count == 2
+    assert all(call.kwargs["wait"] is False for call in mock_client.delete.call_args_list)
+    assert mock_client.delete.call_args_list[0].kwargs["points_selector"].points == [1, 2]
+    mock_catalog.delete_documents.assert_called_once_with(["report-1"])
+    assert mock_notify.call_args.args[1] == "completed"
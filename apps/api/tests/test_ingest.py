@@ -167,3 +167,40 @@ def test_ingest_normalizes_filename_with_accents(client: TestClient, sample_text
         assert response.status_code == 200
         data = response.json()
         assert data["file"] == filename
+
+
+@pytest.mark.unit
+def test_ingest_replace_mode_reports_reused_chunks(client: TestClient, sample_text_content: str):
+    """Test that replace mode forwards the document key and returns the reuse statistics."""
+    files = {"file": ("contrato.txt", io.BytesIO(sample_text_content.encode()), "text/plain")}
+
+    with patch("routes.ingest.process_single_document") as mock:
+        mock.return_value = {
+            "filename": "contrato.txt",
+            "chunks": 10,
+            "status": "completed",
+            "document_id": "contrato-2025",
+            "mode": "replace",
+            "reused_chunks": 8,
+            "embedded_chunks": 2,
+            "deleted_chunks": 1,
+        }
+        response = client.post("/ingest", files=files, data={"mode": "replace", "document_key": "contrato-2025"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["reused_chunks"] == 8
+    assert data["document_id"] == "contrato-2025"
+    assert mock.call_args.kwargs["mode"] == "replace"
+    assert mock.call_args.kwargs["document_key"] == "contrato-2025"
+
+
+@pytest.mark.unit
+def test_ingest_rejects_unknown_mode(client: TestClient, sample_text_content: str):
+    """Test that an unsupported ingest mode is rejected."""
+    files = {"file": ("test.txt", io.BytesIO(sample_text_content.encode()), "text/plain")}
+
+    response = client.post("/ingest", files=files, data={"mode": "merge"})
+
+    assert response.status_code == 400
+    assert "Invalid mode" in response.json()["detail"]
@@ -0,0 +1,81 @@
+"""Tests for queued, sampled logging (utils/logging_config.py)."""
+
+import json
+import logging
+import queue
+
+import pytest
+
+
+@pytest.fixture
+def restore_logging():
+    from utils import logging_config
+
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    logging_config._stats.reset()
+    yield logging_config
+    logging_config.shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+@pytest.mark.unit
+def test_records_are_written_by_the_listener_thread(restore_logging, capsys):
+    """Test that queued records keep message args, correlation ID and traceback in JSON output."""
+    logging_config = restore_logging
+    logging_config.setup_logging(level="INFO", use_json=True)
+    logging_config.set_correlation_id("req-42")
+    logger = logging.getLogger("tests.queued")
+
+    logger.info("processed %d chunks", 7)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.error("failed", exc_info=True)
+    logging_config.clear_correlation_id()
+    logging_config.shutdown_logging()
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if "tests.queued" in line]
+    assert lines[0]["message"] == "processed 7 chunks" and lines[0]["correlation_id"] == "req-42"
+    assert "ValueError: boom" in lines[1]["exception"]
+    stats = logging_config.get_logging_stats()
+    assert stats["emitted"]["INFO"] >= 1 and stats["emitted"]["ERROR"] == 1 and stats["dropped"] == 0
+
+
+@pytest.mark.unit
+def test_sampling_keeps_whole_requests_and_all_warnings(restore_logging):
+    """Test that sampling decides per correlation ID and never drops WARNING or other loggers."""
+    logging_config = restore_logging
+    sampler = logging_config.SamplingFilter(0.5, ["middleware.correlation_id"])
+
+    def record(name, level, correlation_id):
+        logging_config.set_correlation_id(correlation_id)
+        return logging.LogRecord(name, level, __file__, 1, "line", None, None)
+
+    decisions = []
+    for index in range(200):
+        incoming = sampler.filter(record("middleware.correlation_id", logging.INFO, f"req-{index}"))
+        completed = sampler.filter(record("middleware.correlation_id", logging.INFO, f"req-{index}"))
+        assert incoming == completed
+        decisions.append(incoming)
+    logging_config.clear_correlation_id()
+
+    assert 50 < sum(decisions) < 150
+    assert logging_config.get_logging_stats()["sampled_out"] == 2 * decisions.count(False)
+    assert sampler.filter(record("middleware.correlation_id", logging.WARNING, "req-x"))
+    assert sampler.filter(record("routes.query", logging.INFO, "req-x"))
+
+
+@pytest.mark.unit
+def test_full_queue_drops_and_counts_records(restore_logging):
+    """Test that a full queue never blocks the caller and the drop is counted."""
+    logging_config = restore_logging
+    handler = logging_config.NonBlockingQueueHandler(queue.Queue(maxsize=2))
+
+    for index in range(5):
+        handler.handle(logging.LogRecord("tests.full", logging.INFO, __file__, 1, "line %d", (index,), None))
+
+    assert handler.queue.qsize() == 2
+    assert handler.queue.get_nowait().getMessage() == "line 0"
+    assert logging_config.get_logging_stats()["dropped"] == 3
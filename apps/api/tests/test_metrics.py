@@ -0,0 +1,125 @@
+"""Tests for Prometheus metrics (utils/metrics.py and GET /metrics)."""
+
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+API_DIR = Path(__file__).parent.parent
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.unit
+def test_metrics_endpoint_exposes_pipeline_and_queue_metrics():
+    """Test that parse time, WebSocket connections and RQ queue depth show up in /metrics."""
+    import asyncio
+
+    from clients.websocket_manager import ConnectionManager
+    from routes.metrics import router
+    from workers.ingestion_worker import _parse
+
+    def parse_fake_bytes(payload: bytes) -> str:
+        return payload.decode()
+
+    parsed_before = _sample("rag_parse_seconds_count", parser="fake")
+    connections_before = _sample("rag_websocket_connections")
+
+    assert _parse(parse_fake_bytes, b"hello") == "hello"
+    manager = ConnectionManager()
+    manager.start_listener = MagicMock()
+    websocket = AsyncMock()
+    asyncio.run(manager.connect(websocket, "job-1"))
+    connections_open = _sample("rag_websocket_connections")
+    manager.disconnect(websocket, "job-1")
+    manager.disconnect(websocket, "job-1")
+
+    queue = MagicMock(count=7)
+    queue.name = "ingestion"
+    queue.started_job_registry.count = 2
+    app = FastAPI()
+    app.include_router(router)
+    with patch("clients.redis_queue.get_ingestion_queue", return_value=queue):
+        response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert _sample("rag_parse_seconds_count", parser="fake") == parsed_before + 1
+    assert connections_open == connections_before + 1
+    assert _sample("rag_websocket_connections") == connections_before
+    assert 'rag_rq_queue_depth{queue="ingestion",state="queued"} 7.0' in response.text
+    assert 'rag_rq_queue_depth{queue="ingestion",state="started"} 2.0' in response.text
+
+
+@pytest.mark.unit
+def test_llm_events_record_latency_and_tokens():
+    """Test that LLM calls are timed and tokens come from usage metadata, or are estimated without it."""
+    from llama_index.core.base.llms.types import ChatMessage, ChatResponse
+    from llama_index.core.instrumentation.events.llm import LLMChatEndEvent, LLMChatStartEvent
+
+    from utils.metrics import LLMMetricsHandler
+
+    handler = LLMMetricsHandler()
+    calls_before = _sample("rag_llm_seconds_count")
+    prompt_before = _sample("rag_llm_tokens_total", kind="prompt")
+    completion_before = _sample("rag_llm_tokens_total", kind="completion")
+    messages = [ChatMessage(role="user", content="What is the refund policy?")]
+
+    reported = ChatResponse(
+        message=ChatMessage(role="assistant", content="Thirty days."),
+        raw={"usage_metadata": {"prompt_token_count": 120, "candidates_token_count": 8}},
+    )
+    handler.handle(LLMChatStartEvent(messages=messages, additional_kwargs={}, model_dict={}, span_id="span-1"))
+    handler.handle(LLMChatEndEvent(messages=messages, response=reported, span_id="span-1"))
+    estimated = ChatResponse(message=ChatMessage(role="assistant", content="Thirty days."))
+    handler.handle(LLMChatEndEvent(messages=messages, response=estimated, span_id="span-2"))
+
+    assert _sample("rag_llm_seconds_count") == calls_before + 1
+    prompt_tokens = _sample("rag_llm_tokens_total", kind="prompt") - prompt_before
+    completion_tokens = _sample("rag_llm_tokens_total", kind="completion") - completion_before
+    assert 120 < prompt_tokens < 140
+    assert 8 < completion_tokens < 16
+
+
+@pytest.mark.unit
+def test_multiprocess_mode_aggregates_every_process(tmp_path, monkeypatch):
+    """Test that samples written by separate processes are summed in one scrape."""
+    script = (
+        "import os\n"
+        "from utils.metrics import DOCUMENTS_INGESTED, WEBSOCKET_CONNECTIONS\n"
+        "DOCUMENTS_INGESTED.labels('completed').inc(3)\n"
+        "WEBSOCKET_CONNECTIONS.inc()\n"
+        "print(os.getpid())\n"
+    )
+    pids = [
+        int(subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=API_DIR,
+            env={"PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PATH": ""},
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout)
+        for _ in range(2)
+    ]
+
+    from utils import metrics
+
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    with patch("clients.redis_queue.get_ingestion_queue", side_effect=ConnectionError("redis down")):
+        before_exit = metrics.render_metrics()[0].decode()
+        metrics.mark_process_dead(pids[0])
+        after_exit = metrics.render_metrics()[0].decode()
+
+    assert 'rag_documents_ingested_total{status="completed"} 6.0' in before_exit
+    assert "rag_websocket_connections 2.0" in before_exit
+    # Counters keep the samples of exited processes; live gauges drop them
+    assert 'rag_documents_ingested_total{status="completed"} 6.0' in after_exit
+    assert "rag_websocket_connections 1.0" in after_exit
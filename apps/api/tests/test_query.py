@@ -1,6 +1,6 @@
 """Tests for the /query endpoint."""
 
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
@@ -278,3 +278,118 @@ def test_query_consolidates_llm_metadata(client: TestClient):
         data = response.json()
         assert data["metadata"]["custom_key"] == "custom_value"
         assert data["metadata"]["tokens"] == 150
+
+
+@pytest.mark.unit
+def test_query_mmr_option_is_passed_to_engine(client: TestClient):
+    """Test that the MMR option selects the diversified retrieval mode."""
+    with patch("routes.query.get_query_engine") as mock_engine:
+        mock_response = MagicMock()
+        mock_response.response = "Test"
+        mock_response.source_nodes = []
+        mock_response.metadata = {}
+
+        mock_query_engine = MagicMock()
+        mock_query_engine.query.return_value = mock_response
+        mock_engine.return_value = mock_query_engine
+
+        payload = {"query": "test", "top_k": 4, "mmr": True, "mmr_lambda": 0.3}
+        response = client.post("/query", json=payload)
+
+        assert response.status_code == 200
+        mock_engine.assert_called_once_with(4, "es", mmr_lambda=0.3)
+        assert response.json()["metadata"]["retrieval_mode"] == "mmr"
+
+
+@pytest.mark.unit
+def test_query_filters_are_passed_to_engine(client: TestClient):
+    """Test that metadata filters are translated into a Qdrant filter for the engine."""
+    with patch("routes.query.get_query_engine") as mock_engine:
+        mock_response = MagicMock()
+        mock_response.response = "Test"
+        mock_response.source_nodes = []
+        mock_response.metadata = {}
+
+        mock_query_engine = MagicMock()
+        mock_query_engine.query.return_value = mock_response
+        mock_engine.return_value = mock_query_engine
+
+        payload = {"query": "test", "filters": {"document_ids": ["doc-1"], "tags": ["legal"]}}
+        response = client.post("/query", json=payload)
+
+        assert response.status_code == 200
+        qdrant_filter = mock_engine.call_args.kwargs["qdrant_filter"]
+        assert {condition.key for condition in qdrant_filter.must} == {"document_id", "tags"}
+        assert response.json()["metadata"]["filtered"] is True
+
+
+@pytest.mark.unit
+def test_query_batch_retrieval_only_streams_ndjson(client: TestClient):
+    """Test that a retrieval-only batch embeds once and streams one line per query."""
+    import json
+
+    from llama_index.core.schema import TextNode
+
+    mock_store = MagicMock()
+    mock_store.client.query_batch_points.return_value = [MagicMock(points=["hit-a"]), MagicMock(points=["hit-b"])]
+    mock_store.parse_to_query_result.side_effect = lambda points: MagicMock(
+        nodes=[TextNode(text=f"text for {points[0]}", metadata={"document_id": points[0]})],
+        similarities=[0.8],
+    )
+
+    with patch("routes.query.embed_queries", return_value=[[0.1], [0.2]]) as mock_embed, patch(
+        "routes.query.get_qdrant_client"
+    ), patch("routes.query.CompactQdrantVectorStore", return_value=mock_store), patch(
+        "routes.query.get_llm"
+    ) as mock_llm:
+        payload = {"queries": ["first", "second"], "top_k": 3, "retrieval_only": True}
+        response = client.post("/query/batch", json=payload)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+
+        assert [line["index"] for line in lines] == [0, 1]
+        assert lines[1]["query"] == "second"
+        assert lines[1]["sources"][0]["metadata"]["document_id"] == "hit-b"
+        mock_embed.assert_called_once_with(["first", "second"])
+        requests = mock_store.client.query_batch_points.call_args.kwargs["requests"]
+        assert [(request.query, request.limit) for request in requests] == [([0.1], 3), ([0.2], 3)]
+        mock_llm.assert_not_called()
+
+
+@pytest.mark.unit
+def test_query_batch_reports_failed_answers_by_index(client: TestClient):
+    """Test that an LLM failure for one query is streamed with its index and does not stop the others."""
+    import json
+
+    from llama_index.core.schema import TextNode
+
+    mock_store = MagicMock()
+    mock_store.client.query_batch_points.return_value = [MagicMock(points=["hit-a"]), MagicMock(points=["hit-b"])]
+    mock_store.parse_to_query_result.side_effect = lambda points: MagicMock(
+        nodes=[TextNode(text=f"text for {points[0]}", metadata={"document_id": points[0]})],
+        similarities=[0.8],
+    )
+
+    async def synthesize(query, nodes):
+        if query == "second":
+            raise RuntimeError("quota exceeded")
+        return "first answer"
+
+    synthesizer = MagicMock()
+    synthesizer.asynthesize = AsyncMock(side_effect=synthesize)
+
+    with patch("routes.query.embed_queries", return_value=[[0.1], [0.2]]), patch(
+        "routes.query.get_qdrant_client"
+    ), patch("routes.query.CompactQdrantVectorStore", return_value=mock_store), patch(
+        "routes.query.get_llm"
+    ), patch("routes.query.get_response_synthesizer", return_value=synthesizer):
+        response = client.post("/query/batch", json={"queries": ["first", "second"]})
+
+        assert response.status_code == 200
+        lines = {line["index"]: line for line in map(json.loads, response.text.splitlines())}
+
+        assert lines[0]["answer"] == "first answer"
+        assert lines[1]["query"] == "second"
+        assert "quota exceeded" in lines[1]["error"]
@@ -64,7 +64,7 @@ def test_index_text_creates_document():
     with (
         patch("rag.pipeline.get_qdrant_client") as mock_get_client,
         patch("rag.pipeline.ensure_collection") as mock_ensure,
-        patch("rag.pipeline.QdrantVectorStore") as mock_vector_store_class,
+        patch("rag.pipeline.CompactQdrantVectorStore") as mock_vector_store_class,
         patch("rag.pipeline.NODE_PARSER") as mock_parser,
         patch("rag.pipeline.EMBED_MODEL") as mock_embed,
     ):
@@ -101,7 +101,7 @@ def test_index_text_handles_empty_text():
     with (
         patch("rag.pipeline.get_qdrant_client") as mock_get_client,
         patch("rag.pipeline.ensure_collection"),
-        patch("rag.pipeline.QdrantVectorStore") as mock_vector_store_class,
+        patch("rag.pipeline.CompactQdrantVectorStore") as mock_vector_store_class,
         patch("rag.pipeline.NODE_PARSER") as mock_parser,
         patch("rag.pipeline.EMBED_MODEL") as mock_embed,
     ):
@@ -129,7 +129,7 @@ def test_index_text_generates_embeddings():
     with (
         patch("rag.pipeline.get_qdrant_client") as mock_get_client,
         patch("rag.pipeline.ensure_collection"),
-        patch("rag.pipeline.QdrantVectorStore") as mock_vector_store_class,
+        patch("rag.pipeline.CompactQdrantVectorStore") as mock_vector_store_class,
         patch("rag.pipeline.NODE_PARSER") as mock_parser,
         patch("rag.pipeline.EMBED_MODEL") as mock_embed,
     ):
@@ -214,3 +214,105 @@ def test_collection_name_constant():
     from rag.pipeline import COLLECTION_NAME
 
     assert COLLECTION_NAME == "documents"
+
+
+@pytest.mark.unit
+def test_ensure_collection_creates_versioned_collection_behind_alias(mock_qdrant_client):
+    """Test that the main collection is created as documents_v1 behind the documents alias."""
+    from rag.pipeline import COLLECTION_NAME, ensure_collection
+
+    mock_qdrant_client.get_collections.return_value = MagicMock(collections=[])
+    mock_qdrant_client.get_aliases.return_value = MagicMock(aliases=[])
+
+    ensure_collection(mock_qdrant_client, COLLECTION_NAME)
+
+    assert mock_qdrant_client.create_collection.call_args.kwargs["collection_name"] == "documents_v1"
+    operations = mock_qdrant_client.update_collection_aliases.call_args.kwargs["change_aliases_operations"]
+    assert len(operations) == 1
+    assert operations[0].create_alias.alias_name == COLLECTION_NAME
+    assert operations[0].create_alias.collection_name == "documents_v1"
+
+
+@pytest.mark.unit
+def test_switch_collection_alias_is_a_single_update(mock_qdrant_client):
+    """Test that switching an existing alias deletes and recreates it in one request."""
+    from rag.pipeline import switch_collection_alias
+
+    current = MagicMock(alias_name="documents", collection_name="documents_v1")
+    mock_qdrant_client.get_aliases.return_value = MagicMock(aliases=[current])
+
+    switch_collection_alias(mock_qdrant_client, "documents_v2")
+
+    mock_qdrant_client.update_collection_aliases.assert_called_once()
+    operations = mock_qdrant_client.update_collection_aliases.call_args.kwargs["change_aliases_operations"]
+    assert operations[0].delete_alias.alias_name == "documents"
+    assert operations[1].create_alias.collection_name == "documents_v2"
+
+
+@pytest.mark.unit
+def test_replace_document_text_embeds_only_changed_chunks():
+    """Test that replacing a document reuses unchanged chunks and deletes vanished ones."""
+    from llama_index.core.schema import TextNode
+    from qdrant_client import QdrantClient
+    from qdrant_client.http.models import Distance, VectorParams
+
+    from rag.pipeline import index_text, replace_document_text
+
+    client = QdrantClient(location=":memory:")
+    client.create_collection("test", vectors_config=VectorParams(size=2, distance=Distance.COSINE))
+
+    def split(chunks):
+        return lambda documents: [TextNode(text=chunk, metadata=dict(documents[0].metadata)) for chunk in chunks]
+
+    with (
+        patch("rag.pipeline.get_qdrant_client", return_value=client),
+        patch("rag.pipeline.ensure_collection"),
+        patch("rag.pipeline.NODE_PARSER") as mock_parser,
+        patch("rag.pipeline.EMBED_MODEL") as mock_embed,
+    ):
+        mock_embed.get_text_embedding_batch.side_effect = lambda texts: [[1.0, 0.5]] * len(texts)
+
+        mock_parser.get_nodes_from_documents.side_effect = split(["intro", "clause one", "clause two"])
+        index_text("contract", "v1", "hash-v1", collection_name="test")
+
+        mock_parser.get_nodes_from_documents.side_effect = split(["intro", "clause one edited", "clause two"])
+        stats = replace_document_text("contract", "v2", "hash-v2", collection_name="test")
+
+    assert stats == {"chunks": 3, "reused": 2, "embedded": 1, "deleted": 1}
+    assert len(mock_embed.get_text_embedding_batch.call_args[0][0]) == 1
+
+    points, _ = client.scroll("test", with_payload=True, limit=10)
+    chunks = sorted((point.payload["chunk_index"], point.payload["text"]) for point in points)
+    assert chunks == [(0, "intro"), (1, "clause one edited"), (2, "clause two")]
+    assert {point.payload["content_hash"] for point in points} == {"hash-v2"}
+
+
+@pytest.mark.unit
+def test_replace_document_text_reembeds_when_tags_change():
+    """Test that chunks embedded with other tags are not reused, since tags are part of the embedded text."""
+    from llama_index.core.schema import TextNode
+    from qdrant_client import QdrantClient
+    from qdrant_client.http.models import Distance, VectorParams
+
+    from rag.pipeline import index_text, replace_document_text
+
+    client = QdrantClient(location=":memory:")
+    client.create_collection("test", vectors_config=VectorParams(size=2, distance=Distance.COSINE))
+
+    with (
+        patch("rag.pipeline.get_qdrant_client", return_value=client),
+        patch("rag.pipeline.ensure_collection"),
+        patch("rag.pipeline.NODE_PARSER") as mock_parser,
+        patch("rag.pipeline.EMBED_MODEL") as mock_embed,
+    ):
+        mock_embed.get_text_embedding_batch.side_effect = lambda texts: [[1.0, 0.5]] * len(texts)
+        mock_parser.get_nodes_from_documents.side_effect = lambda documents: [
+            TextNode(text=chunk, metadata=dict(documents[0].metadata)) for chunk in ["intro", "clause one"]
+        ]
+
+        index_text("contract", "v1", "hash-v1", tags=["draft"], collection_name="test")
+        stats = replace_document_text("contract", "v1", "hash-v1", tags=["signed"], collection_name="test")
+
+    assert stats == {"chunks": 2, "reused": 0, "embedded": 2, "deleted": 2}
+    points, _ = client.scroll("test", with_payload=True, limit=10)
+    assert [point.payload["tags"] for point in points] == [["signed"], ["signed"]]
@@ -0,0 +1,80 @@
+"""Tests for the cost-weighted rate limiter (middleware/rate_limit.py)."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+def _client(capacity=25, rate=0.001):
+    from middleware import rate_limit
+
+    app = FastAPI()
+
+    @app.post("/query")
+    async def query():
+        return {"ok": True}
+
+    @app.post("/search")
+    async def search():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    app.add_middleware(rate_limit.RateLimitMiddleware, capacity=capacity, rate=rate)
+    return TestClient(app)
+
+
+@pytest.mark.unit
+def test_route_costs_use_longest_prefix():
+    """Test that expensive routes cost more and health checks are free."""
+    from middleware.rate_limit import DEFAULT_COST, route_cost
+
+    assert route_cost("/query/batch") == 20
+    assert route_cost("/query") == 10
+    assert route_cost("/search") == 2
+    assert route_cost("/health/db") == 0
+    assert route_cost("/queryx") == DEFAULT_COST
+
+
+@pytest.mark.unit
+def test_bucket_charges_route_cost_and_returns_headers():
+    """Test that queries drain the bucket faster than searches and a 429 carries Retry-After."""
+    from middleware import rate_limit
+
+    with patch.object(rate_limit, "RATE_LIMIT_ENABLED", True), patch.object(rate_limit, "RATE_LIMIT_STORAGE", "memory"):
+        client = _client(capacity=25)
+        first = client.post("/query")
+        second = client.post("/query")
+        limited = client.post("/query")
+        search = client.post("/search")
+        health = [client.get("/health") for _ in range(50)]
+
+    assert first.status_code == 200 and first.headers["RateLimit-Remaining"] == "15"
+    assert first.headers["RateLimit-Limit"] == "25"
+    assert second.headers["RateLimit-Remaining"] == "5"
+    assert limited.status_code == 429 and int(limited.headers["Retry-After"]) >= 1
+    assert search.status_code == 200 and search.headers["RateLimit-Remaining"] == "3"
+    assert all(response.status_code == 200 for response in health)
+    assert "RateLimit-Limit" not in health[0].headers
+
+
+@pytest.mark.unit
+def test_redis_failure_falls_back_to_local_bucket():
+    """Test that a Redis outage keeps limiting in-process and backs off before retrying Redis."""
+    from middleware import rate_limit
+
+    redis_bucket = MagicMock()
+    redis_bucket.take = AsyncMock(side_effect=ConnectionError("redis down"))
+
+    with patch.object(rate_limit, "RATE_LIMIT_ENABLED", True), \
+            patch.object(rate_limit, "RedisTokenBucket", return_value=redis_bucket), \
+            patch.object(rate_limit, "RATE_LIMIT_STORAGE", "redis"):
+        client = _client(capacity=25)
+        responses = [client.post("/query") for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert redis_bucket.take.await_count == 1
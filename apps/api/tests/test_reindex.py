@@ -0,0 +1,102 @@
+"""Tests for the zero-downtime reindex worker (workers/reindex_worker.py)."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _collections(*names):
+    collections = []
+    for name in names:
+        collection = MagicMock()
+        collection.name = name
+        collections.append(collection)
+    return MagicMock(collections=collections)
+
+
+@pytest.mark.unit
+def test_load_document_rebuilds_text_without_overlap():
+    """Test that stored chunks are joined in order with the splitter overlap removed."""
+    from workers.reindex_worker import _load_document
+
+    def point(index, text):
+        payload = {"document_id": "doc-a", "chunk_index": index, "_node_content": json.dumps({"text": text})}
+        return MagicMock(payload=payload)
+
+    mock_client = MagicMock()
+    mock_client.scroll.return_value = ([point(0, "alpha beta gamma"), point(1, "beta gamma delta")], None)
+
+    document = _load_document(mock_client, "documents_v1", "doc-a")
+
+    assert document["text"] == "alpha beta gamma delta"
+    assert document["document_id"] == "doc-a"
+
+
+@pytest.mark.unit
+def test_rollback_restores_previous_version():
+    """Test that rollback points the alias at the newest older collection."""
+    from workers import reindex_worker
+
+    mock_client = MagicMock()
+    mock_client.get_collections.return_value = _collections("documents_v1", "documents_v2", "documents_v3")
+
+    with patch.object(reindex_worker, "get_qdrant_client", return_value=mock_client), patch.object(
+        reindex_worker, "resolve_collection_alias", return_value="documents_v3"
+    ), patch.object(reindex_worker, "switch_collection_alias") as mock_switch:
+        result = reindex_worker.rollback_collection()
+
+    mock_switch.assert_called_once_with(mock_client, "documents_v2")
+    assert result == {"previous": "documents_v3", "collection": "documents_v2"}
+
+
+@pytest.mark.unit
+def test_rollback_without_previous_version_fails():
+    """Test that rollback is rejected when no older collection is kept."""
+    from workers import reindex_worker
+
+    mock_client = MagicMock()
+    mock_client.get_collections.return_value = _collections("documents_v1")
+
+    with patch.object(reindex_worker, "get_qdrant_client", return_value=mock_client), patch.object(
+        reindex_worker, "resolve_collection_alias", return_value="documents_v1"
+    ):
+        with pytest.raises(ValueError):
+            reindex_worker.rollback_collection()
+
+
+@pytest.mark.unit
+def test_reindex_recopies_documents_replaced_during_the_copy():
+    """Test that the catch-up pass copies again a document whose chunks changed after it was copied."""
+    from workers import reindex_worker
+
+    live = {"doc-a": (2, ("t1", "h1")), "doc-b": (1, ("t1", "h2"))}
+
+    def list_versions(client, collection_name, document_id=None):
+        return {key: value for key, value in live.items() if document_id in (None, key)}
+
+    def load_document(client, collection_name, document_id):
+        if document_id == "doc-b":
+            # doc-a is replaced in place (new upload time) while doc-b is being copied
+            live["doc-a"] = (3, ("t2", "h3"))
+        return {"text": f"text of {document_id}", "document_id": document_id}
+
+    mock_client = MagicMock()
+    mock_client.get_collections.return_value = _collections("documents_v1")
+
+    with patch.object(reindex_worker, "get_qdrant_client", return_value=mock_client), patch.object(
+        reindex_worker, "resolve_collection_alias", return_value="documents_v1"
+    ), patch.object(reindex_worker, "get_current_job", return_value=None), patch.object(
+        reindex_worker, "create_collection"
+    ), patch.object(reindex_worker, "EMBED_MODEL"), patch.object(
+        reindex_worker, "_list_document_versions", side_effect=list_versions
+    ), patch.object(reindex_worker, "_load_document", side_effect=load_document), patch.object(
+        reindex_worker, "index_text", return_value=1
+    ) as mock_index, patch.object(reindex_worker, "switch_collection_alias"):
+        result = reindex_worker.reindex_collection_task(max_chunks_per_second=0)
+
+    assert [call.args[0] for call in mock_index.call_args_list] == ["doc-a", "doc-b", "doc-a"]
+    deleted = mock_client.delete.call_args.kwargs
+    assert deleted["collection_name"] == "documents_v2"
+    assert deleted["points_selector"].must[0].match.value == "doc-a"
+    assert result["documents"] == 2
@@ -0,0 +1,142 @@
+"""Tests for custom retrieval strategies (rag/retrieval.py)."""
+
+import time
+
+import numpy as np
+import pytest
+
+
+@pytest.mark.unit
+def test_mmr_select_prefers_diverse_candidates():
+    """Test that MMR skips a near-duplicate of an already selected candidate."""
+    from rag.retrieval import mmr_select
+
+    query = np.array([1.0, 0.0, 0.0])
+    candidates = np.array(
+        [
+            [0.95, 0.05, 0.0],  # most relevant
+            [0.94, 0.06, 0.0],  # near-duplicate of the first
+            [0.6, 0.0, 0.8],  # less relevant but different
+        ]
+    )
+
+    assert mmr_select(query, candidates, top_k=2, lambda_mult=0.5) == [0, 2]
+
+
+@pytest.mark.unit
+def test_mmr_select_lambda_one_is_pure_relevance():
+    """Test that lambda=1.0 reduces MMR to plain similarity ranking."""
+    from rag.retrieval import mmr_select
+
+    rng = np.random.default_rng(0)
+    query = rng.normal(size=16)
+    candidates = rng.normal(size=(20, 16))
+
+    normalized = candidates / np.linalg.norm(candidates, axis=1, keepdims=True)
+    expected = list(np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5])
+
+    assert mmr_select(query, candidates, top_k=5, lambda_mult=1.0) == expected
+
+
+@pytest.mark.unit
+def test_mmr_select_handles_small_candidate_sets():
+    """Test that MMR never returns more candidates than available."""
+    from rag.retrieval import mmr_select
+
+    assert mmr_select(np.ones(4), np.ones((2, 4)), top_k=5) == [0, 1]
+    assert mmr_select(np.ones(4), np.empty((0, 4)), top_k=5) == []
+
+
+@pytest.mark.unit
+def test_mmr_select_is_fast_for_100_candidates():
+    """Test that diversifying 100 candidates of 768 dims stays within a few milliseconds."""
+    from rag.retrieval import mmr_select
+
+    rng = np.random.default_rng(1)
+    query = rng.normal(size=768)
+    candidates = rng.normal(size=(100, 768))
+    mmr_select(query, candidates, top_k=10)  # warm-up
+
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        mmr_select(query, candidates, top_k=10)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    assert min(timings) < 5
+
+
+@pytest.mark.unit
+def test_mmr_retriever_uses_query_points_and_drops_vectors():
+    """Test that MMR candidates come from query_points (no deprecated search call) and lose their vectors."""
+    import warnings
+    from unittest.mock import MagicMock
+
+    from llama_index.core.schema import QueryBundle, TextNode
+    from qdrant_client import QdrantClient
+    from qdrant_client.http.models import Distance, VectorParams
+
+    from rag.retrieval import MMRRetriever
+    from rag.vector_store import CompactQdrantVectorStore
+
+    client = QdrantClient(location=":memory:")
+    client.create_collection("test", vectors_config=VectorParams(size=2, distance=Distance.COSINE))
+    store = CompactQdrantVectorStore(client=client, collection_name="test")
+    vectors = {"near": [1.0, 0.0], "near-copy": [0.99, 0.01], "other": [0.6, 0.8]}
+    store.add([TextNode(text=text, embedding=vector, metadata={"document_id": text}) for text, vector in vectors.items()])
+
+    retriever = MMRRetriever(store, MagicMock(), similarity_top_k=2, lambda_mult=0.3)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        nodes = retriever.retrieve(QueryBundle(query_str="q", embedding=[1.0, 0.0]))
+
+    assert [item.node.metadata["document_id"] for item in nodes] == ["near", "other"]
+    assert all(item.node.embedding is None for item in nodes)
+
+
+@pytest.mark.unit
+def test_build_qdrant_filter_translates_all_fields():
+    """Test that query filters become Qdrant payload conditions."""
+    from datetime import datetime, timezone
+
+    from rag.filters import QueryFilters, build_qdrant_filter
+
+    filters = QueryFilters(
+        document_ids=["doc-1", "doc-2"],
+        uploaded_after=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        content_types=["application/pdf"],
+        tags=["legal"],
+    )
+
+    qdrant_filter = build_qdrant_filter(filters)
+
+    keys = {condition.key for condition in qdrant_filter.must}
+    assert keys == {"document_id", "content_type", "tags", "uploaded_at"}
+    assert build_qdrant_filter(QueryFilters()) is None
+    assert build_qdrant_filter(None) is None
+
+
+@pytest.mark.unit
+def test_query_filters_cache_key_is_canonical():
+    """Test that equivalent filters share the same cache key."""
+    from rag.filters import QueryFilters
+
+    first = QueryFilters(document_ids=["b", "a"], tags=["x"])
+    second = QueryFilters(document_ids=["a", "b", "a"], tags=["x"])
+
+    assert first.cache_key() == second.cache_key()
+    assert QueryFilters().cache_key() == ""
+    assert first.cache_key() != QueryFilters(document_ids=["a"]).cache_key()
+
+
+@pytest.mark.unit
+def test_query_filters_reject_inverted_date_range():
+    """Test that an empty date range is rejected."""
+    from datetime import datetime
+
+    from pydantic import ValidationError
+
+    from rag.filters import QueryFilters
+
+    with pytest.raises(ValidationError):
+        QueryFilters(uploaded_after=datetime(2025, 2, 1), uploaded_before=datetime(2025, 1, 1))
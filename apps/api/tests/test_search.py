@@ -0,0 +1,75 @@
+"""Tests for the /search endpoint."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+def _point(point_id: int, score: float, document_id: str, chunk_index: int):
+    payload = {
+        "document_id": document_id,
+        "chunk_index": chunk_index,
+        "page": 2,
+        "_node_content": json.dumps({"text": f"text of chunk {chunk_index}"}),
+        "_node_type": "TextNode",
+    }
+    return MagicMock(id=point_id, score=score, payload=payload)
+
+
+@pytest.mark.unit
+def test_search_returns_ranked_chunks_without_llm(client: TestClient):
+    """Test that /search returns scored chunks with text, page and payload metadata."""
+    mock_qdrant = MagicMock()
+    mock_qdrant.query_points = AsyncMock(
+        return_value=MagicMock(points=[_point(1, 0.9, "a.pdf", 3), _point(2, 0.7, "b.pdf", 0)])
+    )
+
+    with patch("routes.search.embed_query", return_value=[0.1] * 768), patch(
+        "routes.search.get_async_qdrant_client", return_value=mock_qdrant
+    ), patch("routes.query.get_llm") as mock_llm:
+        response = client.post("/search", json={"query": "contract terms", "top_k": 2})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [result["document_id"] for result in data["results"]] == ["a.pdf", "b.pdf"]
+        assert data["results"][0]["text"] == "text of chunk 3"
+        assert data["results"][0]["page"] == 2
+        assert "_node_content" not in data["results"][0]["metadata"]
+        assert data["next_offset"] == 2
+        mock_llm.assert_not_called()
+
+
+@pytest.mark.unit
+def test_search_passes_offset_and_can_omit_text(client: TestClient):
+    """Test pagination with offset and the text-free result option."""
+    mock_qdrant = MagicMock()
+    mock_qdrant.query_points = AsyncMock(return_value=MagicMock(points=[_point(5, 0.5, "a.pdf", 7)]))
+
+    with patch("routes.search.embed_query", return_value=[0.1] * 768), patch(
+        "routes.search.get_async_qdrant_client", return_value=mock_qdrant
+    ):
+        payload = {"query": "contract terms", "top_k": 5, "offset": 10, "include_text": False}
+        response = client.post("/search", json=payload)
+
+        assert response.status_code == 200
+        assert mock_qdrant.query_points.call_args.kwargs["offset"] == 10
+        data = response.json()
+        assert data["results"][0]["text"] is None
+        assert data["next_offset"] is None
+
+
+@pytest.mark.unit
+def test_search_handles_qdrant_errors(client: TestClient):
+    """Test that search failures are reported as 500 errors."""
+    mock_qdrant = MagicMock()
+    mock_qdrant.query_points = AsyncMock(side_effect=RuntimeError("Qdrant unavailable"))
+
+    with patch("routes.search.embed_query", return_value=[0.1] * 768), patch(
+        "routes.search.get_async_qdrant_client", return_value=mock_qdrant
+    ):
+        response = client.post("/search", json={"query": "contract terms"})
+
+        assert response.status_code == 500
+        assert "Qdrant unavailable" in response.json()["detail"]
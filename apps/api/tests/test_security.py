@@ -0,0 +1,99 @@
+"""Tests for password hashing off the event loop (services/security.py)."""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.mark.unit
+def test_password_verification_runs_off_the_event_loop():
+    """Test that bcrypt runs on the hashing pool while the event loop keeps serving other tasks."""
+    from services import security
+
+    loop_threads = []
+
+    def slow_verify(plain, hashed):
+        loop_threads.append(threading.current_thread().name)
+        threading.Event().wait(0.2)
+        return plain == hashed
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        result = await security.verify_password_async("secret", "secret")
+        task.cancel()
+        return result, ticks
+
+    with patch.object(security, "verify_password", slow_verify):
+        result, ticks = asyncio.run(run())
+
+    assert result is True
+    assert loop_threads[0].startswith("bcrypt")
+    assert ticks >= 10
+
+
+@pytest.mark.unit
+def test_saturated_hashing_pool_rejects_immediately():
+    """Test that calls beyond the pending limit fail fast with PasswordHasherBusy and free their slot."""
+    from services import security
+
+    release = threading.Event()
+
+    def blocked_hash(password):
+        release.wait(5)
+        return "hashed"
+
+    async def run():
+        first = asyncio.create_task(security.hash_password_async("one"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(security.PasswordHasherBusy):
+            await security.hash_password_async("two")
+        release.set()
+        return await first, await security.hash_password_async("three")
+
+    with patch.object(security, "hash_password", blocked_hash), \
+            patch.object(security, "_hash_slots", threading.BoundedSemaphore(1)):
+        assert asyncio.run(run()) == ("hashed", "hashed")
+
+
+@pytest.mark.unit
+def test_cancelled_call_keeps_its_slot_until_the_worker_finishes():
+    """Test that cancelling a pending hash does not free its slot while bcrypt is still running."""
+    from services import security
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocked_hash(password):
+        started.set()
+        release.wait(5)
+        return "hashed"
+
+    async def run():
+        pending = asyncio.create_task(security.hash_password_async("one"))
+        await asyncio.to_thread(started.wait, 5)
+        pending.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+        with pytest.raises(security.PasswordHasherBusy):
+            await security.hash_password_async("two")
+        release.set()
+        # The slot comes back from the pool thread once the cancelled call has finished
+        for _ in range(100):
+            try:
+                return await security.hash_password_async("three")
+            except security.PasswordHasherBusy:
+                await asyncio.sleep(0.01)
+
+    with patch.object(security, "hash_password", blocked_hash), \
+            patch.object(security, "_hash_slots", threading.BoundedSemaphore(1)):
+        assert asyncio.run(run()) == "hashed"
@@ -0,0 +1,73 @@
+"""Tests for the external chunk text store (rag/text_store.py)."""
+
+from unittest.mock import patch
+
+import pytest
+from llama_index.core.schema import TextNode
+
+
+@pytest.fixture
+def text_store(tmp_path, monkeypatch):
+    """Enable external chunk texts backed by a temporary SQLite file."""
+    import rag.text_store as module
+
+    store = module.ChunkTextStore(str(tmp_path / "chunk_texts.sqlite3"))
+    monkeypatch.setattr(module, "CHUNK_TEXT_STORE", "sqlite")
+    monkeypatch.setattr(module, "_store", store)
+    return store
+
+
+@pytest.mark.unit
+def test_put_many_deduplicates_and_get_many_skips_unknown(text_store):
+    """Test that identical texts share one row and unknown hashes are omitted."""
+    hashes = text_store.put_many(["alpha", "beta", "alpha"])
+
+    assert hashes[0] == hashes[2]
+    assert text_store.get_many(hashes + ["0" * 64]) == {hashes[0]: "alpha", hashes[1]: "beta"}
+
+    count = text_store._connection().execute("SELECT COUNT(*) FROM chunk_texts").fetchone()[0]
+    assert count == 2
+
+
+@pytest.mark.unit
+def test_vector_store_keeps_only_hash_and_hydrates_in_one_read(text_store):
+    """Test that Qdrant payloads carry text_hash and results are hydrated with one batched read."""
+    from qdrant_client import QdrantClient
+    from qdrant_client.http.models import Distance, VectorParams
+
+    from rag.vector_store import CompactQdrantVectorStore
+
+    client = QdrantClient(location=":memory:")
+    client.create_collection("test", vectors_config=VectorParams(size=2, distance=Distance.COSINE))
+    store = CompactQdrantVectorStore(client=client, collection_name="test")
+    nodes = [
+        TextNode(text=f"chunk {i}", metadata={"document_id": "doc-a", "chunk_index": i}, embedding=[1.0, float(i)])
+        for i in range(3)
+    ]
+    store.add(nodes)
+
+    points, _ = client.scroll("test", with_payload=True)
+    assert all("text" not in point.payload and point.payload["text_hash"] for point in points)
+
+    with patch.object(text_store, "get_many", wraps=text_store.get_many) as get_many:
+        result = store.parse_to_query_result(client.search("test", query_vector=[1.0, 0.0], limit=3))
+
+    assert get_many.call_count == 1
+    assert sorted(node.get_content() for node in result.nodes) == ["chunk 0", "chunk 1", "chunk 2"]
+    assert "text_hash" not in result.nodes[0].metadata
+
+
+@pytest.mark.unit
+def test_delete_except_keeps_live_and_recent_texts(text_store):
+    """Test that pruning only removes unreferenced texts written before the cutoff."""
+    import time
+
+    live, stale = text_store.put_many(["live text", "stale text"])
+    cutoff = time.time() + 1
+    recent = text_store.put_many(["written during the scan"])[0]
+    text_store._connection().execute("UPDATE chunk_texts SET created_at = created_at + 10 WHERE hash = ?", (recent,))
+
+    removed = text_store.delete_except([live], created_before=cutoff)
+
+    assert removed == 1
+    assert set(text_store.get_many([live, stale, recent])) == {live, recent}
@@ -0,0 +1,112 @@
+"""Tests for OpenTelemetry spans and trace propagation through RQ (utils/tracing.py)."""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import SpanKind
+
+_exporter = InMemorySpanExporter()
+
+
+@pytest.fixture
+def spans():
+    # The global provider can only be set once per process
+    if not isinstance(trace.get_tracer_provider(), TracerProvider):
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(_exporter))
+        trace.set_tracer_provider(provider)
+    _exporter.clear()
+    yield _exporter
+    _exporter.clear()
+
+
+def _by_name(exporter):
+    return {span.name: span for span in exporter.get_finished_spans()}
+
+
+@pytest.mark.unit
+def test_enqueue_carries_trace_context_and_correlation_id(spans):
+    """Test that enqueuing opens a producer span and stores its context and the correlation ID in job.meta."""
+    from clients import redis_queue
+    from utils.logging_config import clear_correlation_id, set_correlation_id
+
+    def process_single_document():
+        pass
+
+    queue = MagicMock()
+    queue.name = "ingestion"
+    set_correlation_id("req-7")
+    with patch.object(redis_queue, "get_ingestion_queue", return_value=queue):
+        redis_queue.enqueue(process_single_document, job_timeout=600, filename="a.pdf")
+    clear_correlation_id()
+
+    meta = queue.enqueue.call_args.kwargs["meta"]
+    producer = _by_name(spans)["rq.enqueue process_single_document"]
+    assert producer.kind == SpanKind.PRODUCER
+    assert meta["correlation_id"] == "req-7"
+    assert meta["otel"]["traceparent"].split("-")[2] == format(producer.context.span_id, "016x")
+    assert queue.enqueue.call_args.kwargs["filename"] == "a.pdf"
+
+
+@pytest.mark.unit
+def test_job_span_continues_the_enqueuing_trace(spans):
+    """Test that the worker span is a child of the enqueuing span and restores the correlation ID."""
+    from utils.logging_config import correlation_id_var, set_correlation_id
+    from utils.tracing import job_meta, job_span, tracer
+
+    with tracer.start_as_current_span("POST /ingest"):
+        set_correlation_id("req-9")
+        meta = job_meta()
+    set_correlation_id("worker-local")
+
+    job = SimpleNamespace(id="job-1", meta=meta)
+    with job_span("ingest.process_document", job, {"document.filename": "a.pdf"}):
+        seen_correlation_id = correlation_id_var.get()
+        with tracer.start_as_current_span("ingest.parse"):
+            pass
+
+    finished = _by_name(spans)
+    request, consumer, parse = finished["POST /ingest"], finished["ingest.process_document"], finished["ingest.parse"]
+    assert seen_correlation_id == "req-9" and correlation_id_var.get() is None
+    assert consumer.kind == SpanKind.CONSUMER
+    assert consumer.parent.span_id == request.context.span_id
+    assert parse.parent.span_id == consumer.context.span_id
+    assert parse.context.trace_id == request.context.trace_id
+    assert consumer.attributes["messaging.message.id"] == "job-1"
+
+
+@pytest.mark.unit
+def test_middleware_server_span_uses_route_template_and_incoming_traceparent(spans):
+    """Test that each request gets a server span named by route template, continuing an incoming trace."""
+    from middleware.correlation_id import CorrelationIdMiddleware
+    from utils.tracing import tracer
+
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        with tracer.start_as_current_span("work"):
+            return {"id": item_id}
+
+    app.add_middleware(CorrelationIdMiddleware)
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    TestClient(app).get(
+        "/items/3",
+        headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01", "X-Correlation-ID": "req-1"},
+    )
+
+    finished = _by_name(spans)
+    server, work = finished["GET /items/{item_id}"], finished["work"]
+    assert server.kind == SpanKind.SERVER
+    assert format(server.context.trace_id, "032x") == trace_id
+    assert format(server.parent.span_id, "016x") == "00f067aa0ba902b7"
+    assert work.parent.span_id == server.context.span_id
+    assert server.attributes["http.response.status_code"] == 200
+    assert server.attributes["correlation_id"] == "req-1"
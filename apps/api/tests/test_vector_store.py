@@ -0,0 +1,79 @@
+"""Tests for compact chunk payloads (rag/vector_store.py)."""
+
+from types import SimpleNamespace
+
+import pytest
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
+
+
+def _metadata() -> dict:
+    return {
+        "document_id": "doc-a",
+        "chunk_index": 3,
+        "uploaded_at": "2025-01-01T00:00:00+00:00",
+        "content_hash": "abc123",
+        "tags": ["legal"],
+        "source": "upload",
+    }
+
+
+@pytest.mark.unit
+def test_build_chunk_payload_keeps_typed_fields_top_level():
+    """Test that known fields stay filterable and the rest goes under meta."""
+    from rag.vector_store import build_chunk_payload, payload_to_node
+
+    payload = build_chunk_payload("chunk text", {**_metadata(), "page": None})
+
+    assert payload["text"] == "chunk text"
+    assert payload["document_id"] == "doc-a"
+    assert payload["chunk_index"] == 3
+    assert payload["meta"] == {"source": "upload"}
+    assert "page" not in payload
+    assert "_node_content" not in payload
+
+    node = payload_to_node("point-1", payload)
+    assert node.node_id == "point-1"
+    assert node.text == "chunk text"
+    assert node.metadata == _metadata()
+
+
+@pytest.mark.unit
+def test_compact_payload_converts_legacy_layout():
+    """Test that a LlamaIndex _node_content payload is rewritten without loss."""
+    from rag.vector_store import compact_payload, get_payload_text, is_legacy_payload
+
+    legacy = node_to_metadata_dict(TextNode(text="legacy text", metadata=_metadata()))
+    assert is_legacy_payload(legacy)
+    assert get_payload_text(legacy) == "legacy text"
+
+    compact = compact_payload(legacy)
+
+    assert not is_legacy_payload(compact)
+    assert compact["text"] == "legacy text"
+    assert compact["document_id"] == "doc-a"
+    assert compact["meta"] == {"source": "upload"}
+    assert not any(key in compact for key in ("_node_type", "doc_id", "ref_doc_id"))
+    assert compact_payload(compact) is compact
+
+
+@pytest.mark.unit
+def test_parse_to_query_result_reads_both_layouts():
+    """Test that search results mixing compact and legacy points are decoded."""
+    from qdrant_client import QdrantClient
+
+    from rag.vector_store import CompactQdrantVectorStore, build_chunk_payload
+
+    store = CompactQdrantVectorStore(client=QdrantClient(location=":memory:"), collection_name="test")
+    legacy_node = TextNode(text="old chunk", metadata=_metadata())
+    points = [
+        SimpleNamespace(id="p1", payload=build_chunk_payload("new chunk", _metadata()), vector=None, score=0.9),
+        SimpleNamespace(id="p2", payload=node_to_metadata_dict(legacy_node), vector=None, score=0.0),
+    ]
+
+    result = store.parse_to_query_result(points)
+
+    assert [node.get_content() for node in result.nodes] == ["new chunk", "old chunk"]
+    assert result.nodes[1].metadata["document_id"] == "doc-a"
+    assert result.ids == ["p1", "p2"]
+    assert result.similarities == [0.9, 0.0]
@@ -3,8 +3,17 @@
 from .logging_config import (
     get_correlation_id,
     get_logger,
+    get_logging_stats,
     get_structured_logger,
     setup_logging,
+    shutdown_logging,
 )
 
-__all__ = ["setup_logging", "get_logger", "get_structured_logger", "get_correlation_id"]
+__all__ = [
+    "setup_logging",
+    "shutdown_logging",
+    "get_logger",
+    "get_logging_stats",
+    "get_structured_logger",
+    "get_correlation_id",
+]
@@ -1,15 +1,68 @@
-"""Structured logging configuration with correlation IDs for request tracing."""
-
+"""
+Structured logging configuration with correlation IDs for request tracing.
+
+Records are handed to a bounded in-memory queue and written by a
+``QueueListener`` thread, so formatting and stdout I/O stay off the request
+path. When the queue is full new records are dropped (and counted) rather
+than blocking the caller. High-volume INFO loggers (the per-request lines by
+default) can be sampled per request with ``LOG_SAMPLE_RATE``.
+"""
+
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
+import random
 import sys
+import threading
+import time
 import uuid
+import zlib
 from contextvars import ContextVar
-from datetime import datetime
-from typing import Any, Dict, Optional
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterable, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
 
 # Context variable to store correlation ID for the current request
 correlation_id_var: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
 
+# Records buffered for the writer thread before new ones are dropped
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Fraction of requests whose INFO lines from LOG_SAMPLED_LOGGERS are kept (1.0 = all)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+LOG_SAMPLED_LOGGERS = tuple(
+    name.strip()
+    for name in os.getenv("LOG_SAMPLED_LOGGERS", "middleware.correlation_id").split(",")
+    if name.strip()
+)
+
+
+class _LogStats:
+    """Counters for log volume; plain integer updates, read without locking."""
+
+    def __init__(self) -> None:
+        self.emitted: Dict[str, int] = {}
+        self.sampled_out = 0
+        self.dropped = 0
+        self.sample_rate = 1.0
+
+    def reset(self) -> None:
+        self.emitted = {}
+        self.sampled_out = 0
+        self.dropped = 0
+
+
+_stats = _LogStats()
+_listener: Optional["QueueListener"] = None
+_queue: Optional["queue.Queue[logging.LogRecord]"] = None
+_listener_lock = threading.Lock()
+
 
 class CorrelationIdFilter(logging.Filter):
     """Add correlation ID to log records."""
@@ -20,13 +73,41 @@ class CorrelationIdFilter(logging.Filter):
         return True
 
 
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fraction of INFO-and-below records from high-volume loggers.
+
+    The decision is derived from the correlation ID, so both lines of a
+    sampled request are kept together; WARNING and above always pass.
+    """
+
+    def __init__(self, rate: float, logger_names: Iterable[str]) -> None:
+        super().__init__()
+        self.rate = rate
+        self.logger_names = tuple(logger_names)
+        self._threshold = int(rate * 0xFFFFFFFF)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1.0 or record.levelno > logging.INFO or not record.name.startswith(self.logger_names):
+            return True
+        correlation_id = correlation_id_var.get()
+        if correlation_id:
+            keep = zlib.crc32(correlation_id.encode("utf-8")) <= self._threshold
+        else:
+            keep = random.random() < self.rate
+        if not keep:
+            _stats.sampled_out += 1
+        return keep
+
+
 class StructuredFormatter(logging.Formatter):
     """Format log records as structured JSON for easier parsing."""
 
     def format(self, record: logging.LogRecord) -> str:
         """Format log record as JSON string."""
         log_data: Dict[str, Any] = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -36,43 +117,86 @@ class StructuredFormatter(logging.Formatter):
             "line": record.lineno,
         }
 
-        # Add exception info if present
+        # Add exception info if present (already rendered to exc_text when queued)
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_data["exception"] = record.exc_text
 
         # Add extra fields if present
         if hasattr(record, "extra_fields"):
             log_data.update(record.extra_fields)
 
         # Format as single-line JSON (compact)
-        import json
+        if orjson is not None:
+            return orjson.dumps(log_data, default=str).decode("utf-8")
+        return json.dumps(log_data, ensure_ascii=False, default=str)
+
 
-        return json.dumps(log_data, ensure_ascii=False)
+class NonBlockingQueueHandler(QueueHandler):
+    """``QueueHandler`` that counts records and drops them when the queue is full."""
 
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]") -> None:
+        super().__init__(log_queue)
+        self._exception_formatter = logging.Formatter()
 
-def setup_logging(level: str = "INFO", use_json: bool = False) -> None:
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args and render tracebacks now (they may not survive the thread hop),
+        # but leave the final formatting to the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _stats.dropped += 1
+            return
+        _stats.emitted[record.levelname] = _stats.emitted.get(record.levelname, 0) + 1
+
+
+class _BlockingSentinelListener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Wait for room instead of failing when shutdown finds the queue full
+        self.queue.put(self._sentinel)
+
+
+def setup_logging(
+    level: str = "INFO",
+    use_json: bool = False,
+    queue_size: int = LOG_QUEUE_SIZE,
+    sample_rate: float = LOG_SAMPLE_RATE,
+    sampled_loggers: Iterable[str] = LOG_SAMPLED_LOGGERS,
+) -> None:
     """
     Configure application-wide logging.
 
     Args:
         level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         use_json: If True, use structured JSON logging; if False, use human-readable format
+        queue_size: Records buffered for the writer thread; beyond it records are dropped
+        sample_rate: Fraction of requests whose INFO lines from ``sampled_loggers`` are kept
+        sampled_loggers: Logger name prefixes subject to sampling
     """
+    global _listener, _queue
+
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, level.upper()))
 
-    # Remove existing handlers
+    # Remove existing handlers (and stop a previous writer thread)
+    shutdown_logging()
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
 
-    # Create console handler
+    # Create console handler (runs on the listener thread)
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(getattr(logging, level.upper()))
 
-    # Add correlation ID filter
-    correlation_filter = CorrelationIdFilter()
-    console_handler.addFilter(correlation_filter)
-
     # Choose formatter
     if use_json:
         formatter = StructuredFormatter()
@@ -84,7 +208,18 @@ def setup_logging(level: str = "INFO", use_json: bool = False) -> None:
         )
 
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+
+    # Callers only enqueue; correlation ID and sampling must run in the caller's context
+    _queue = queue.Queue(maxsize=queue_size)
+    _stats.sample_rate = sample_rate
+    queue_handler = NonBlockingQueueHandler(_queue)
+    queue_handler.addFilter(CorrelationIdFilter())
+    queue_handler.addFilter(SamplingFilter(sample_rate, sampled_loggers))
+    root_logger.addHandler(queue_handler)
+
+    with _listener_lock:
+        _listener = _BlockingSentinelListener(_queue, console_handler, respect_handler_level=True)
+        _listener.start()
 
     # Suppress noisy third-party loggers
     logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -93,6 +228,45 @@ def setup_logging(level: str = "INFO", use_json: bool = False) -> None:
     logging.getLogger("fsspec").setLevel(logging.WARNING)
 
 
+def shutdown_logging() -> None:
+    """
+    Flush queued records and stop the writer thread (idempotent).
+
+    Records logged afterwards (e.g. by the server while exiting) are written
+    directly by the same handlers instead of piling up in the queue.
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        root_logger = logging.getLogger()
+        for handler in root_logger.handlers[:]:
+            if isinstance(handler, NonBlockingQueueHandler):
+                root_logger.removeHandler(handler)
+                for target in _listener.handlers:
+                    for log_filter in handler.filters:
+                        target.addFilter(log_filter)
+                    root_logger.addHandler(target)
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logging_stats() -> Dict[str, Any]:
+    """Records written per level, sampled out and dropped, plus current queue depth."""
+    return {
+        "emitted": dict(_stats.emitted),
+        "emitted_total": sum(_stats.emitted.values()),
+        "sampled_out": _stats.sampled_out,
+        "dropped": _stats.dropped,
+        "queue_depth": _queue.qsize() if _queue is not None else 0,
+        "queue_capacity": _queue.maxsize if _queue is not None else 0,
+        "sample_rate": _stats.sample_rate,
+    }
+
+
 def get_correlation_id() -> str:
     """Get the current correlation ID, or generate a new one if none exists."""
     correlation_id = correlation_id_var.get()
@@ -0,0 +1,229 @@
+"""
+Prometheus metrics for every stage of the RAG pipeline.
+
+Metrics are module-level ``prometheus_client`` objects, instrumented where the
+work happens (parsers, embedding calls, Qdrant reads and writes, LLM calls,
+caches, WebSockets) and exposed by ``GET /metrics``.
+
+Multi-process deployments (``uvicorn --workers N``, gunicorn, RQ workers) must
+set ``PROMETHEUS_MULTIPROC_DIR`` to an empty, writable directory shared by the
+API and the workers before they start: every process then writes its samples
+to files there and ``/metrics`` aggregates them, whichever process serves the
+scrape. Without it each process only reports its own samples.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from llama_index.core.instrumentation import get_dispatcher
+from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+from llama_index.core.instrumentation.events import BaseEvent
+from llama_index.core.instrumentation.events.llm import (
+    LLMChatEndEvent,
+    LLMChatStartEvent,
+    LLMCompletionEndEvent,
+    LLMCompletionStartEvent,
+)
+from llama_index.core.utils import get_tokenizer
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from pydantic import PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+# Seconds; from a cached Qdrant lookup to a slow LLM answer or a large PDF
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+CHUNK_BUCKETS: Tuple[float, ...] = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+BATCH_SIZE_BUCKETS: Tuple[float, ...] = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "rag_http_request_duration_seconds",
+    "HTTP request duration by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+PARSE_SECONDS = Histogram(
+    "rag_parse_seconds", "Time to extract text from an uploaded file", ["parser"], buckets=LATENCY_BUCKETS
+)
+DOCUMENT_CHUNKS = Histogram("rag_document_chunks", "Chunks per indexed document", buckets=CHUNK_BUCKETS)
+DOCUMENTS_INGESTED = Counter("rag_documents_ingested_total", "Ingested documents by outcome", ["status"])
+EMBEDDING_BATCH_SIZE = Histogram(
+    "rag_embedding_batch_size", "Texts per embedding call", ["kind"], buckets=BATCH_SIZE_BUCKETS
+)
+EMBEDDING_SECONDS = Histogram("rag_embedding_seconds", "Embedding call duration", ["kind"], buckets=LATENCY_BUCKETS)
+QDRANT_SECONDS = Histogram("rag_qdrant_seconds", "Qdrant request duration", ["operation"], buckets=LATENCY_BUCKETS)
+QUERY_SECONDS = Histogram(
+    "rag_query_seconds",
+    "End-to-end /query answer time (retrieval and LLM)",
+    ["retrieval", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_SECONDS = Histogram("rag_llm_seconds", "LLM call duration", buckets=LATENCY_BUCKETS)
+LLM_TOKENS = Counter("rag_llm_tokens_total", "LLM tokens by direction (prompt or completion)", ["kind"])
+CACHE_REQUESTS = Counter("rag_cache_requests_total", "Cache lookups by cache and result", ["cache", "result"])
+WEBSOCKET_CONNECTIONS = Gauge(
+    "rag_websocket_connections", "Open WebSocket connections", multiprocess_mode="livesum"
+)
+
+
+def parser_label(parser: Any) -> str:
+    """``parse_pdf_bytes`` -> ``pdf``."""
+    name = getattr(parser, "__name__", "unknown")
+    return name.removeprefix("parse_").removesuffix("_bytes")
+
+
+def record_cache(cache: str, hits: int, misses: int) -> None:
+    """Count a batch of lookups against ``cache``."""
+    if hits:
+        CACHE_REQUESTS.labels(cache, "hit").inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels(cache, "miss").inc(misses)
+
+
+class QueueDepthCollector(Collector):
+    """Report RQ queue and registry sizes from Redis at scrape time."""
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        gauge = GaugeMetricFamily("rag_rq_queue_depth", "RQ jobs by queue and state", labels=["queue", "state"])
+        try:
+            from clients.redis_queue import get_ingestion_queue
+
+            queue = get_ingestion_queue()
+            gauge.add_metric([queue.name, "queued"], queue.count)
+            gauge.add_metric([queue.name, "started"], queue.started_job_registry.count)
+            gauge.add_metric([queue.name, "deferred"], queue.deferred_job_registry.count)
+            gauge.add_metric([queue.name, "failed"], queue.failed_job_registry.count)
+        except Exception as exc:
+            logger.warning("Could not read RQ queue depth: %s", exc)
+        yield gauge
+
+
+_queue_depth = QueueDepthCollector()
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+
+if not multiprocess_enabled():
+    REGISTRY.register(_queue_depth)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Serialize all metrics in the Prometheus text format.
+
+    In multi-process mode the samples of every process are merged from
+    ``PROMETHEUS_MULTIPROC_DIR``; the queue depth is read live either way.
+
+    Returns:
+        The body and its content type
+    """
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_queue_depth)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: Optional[int] = None) -> None:
+    """
+    Drop a finished process's live gauges (WebSocket connections) in multi-process mode.
+
+    Called from the API lifespan on shutdown; process managers that kill
+    workers (gunicorn ``child_exit``) should call it with the worker's pid.
+    """
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+def _usage(raw: Any) -> Tuple[Optional[int], Optional[int]]:
+    """Prompt and completion token counts reported by the provider, if any."""
+    if raw is None:
+        return None, None
+    if not isinstance(raw, dict):
+        raw = raw.model_dump() if hasattr(raw, "model_dump") else getattr(raw, "__dict__", {})
+    usage = raw.get("usage_metadata") or raw.get("usage") or {}
+    if not isinstance(usage, dict):
+        usage = usage.model_dump() if hasattr(usage, "model_dump") else getattr(usage, "__dict__", {})
+    prompt = usage.get("prompt_token_count", usage.get("prompt_tokens"))
+    completion = usage.get("candidates_token_count", usage.get("completion_tokens"))
+    return prompt, completion
+
+
+class LLMMetricsHandler(BaseEventHandler):
+    """
+    Time LLM calls and count their tokens from LlamaIndex instrumentation events.
+
+    Covers every call made through LlamaIndex (query engines and response
+    synthesizers) without wrapping the LLM. Token counts come from the
+    provider's usage metadata when the response carries it and are otherwise
+    estimated with the tokenizer used for context packing.
+    """
+
+    _started: Dict[str, float] = PrivateAttr(default_factory=dict)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "LLMMetricsHandler"
+
+    def handle(self, event: BaseEvent, **kwargs: Any) -> None:
+        if isinstance(event, (LLMChatStartEvent, LLMCompletionStartEvent)):
+            if event.span_id:
+                if len(self._started) > 10000:  # calls that failed never send their end event
+                    self._started.clear()
+                self._started[event.span_id] = time.perf_counter()
+            return
+        if not isinstance(event, (LLMChatEndEvent, LLMCompletionEndEvent)):
+            return
+
+        started = self._started.pop(event.span_id, None) if event.span_id else None
+        if started is not None:
+            LLM_SECONDS.observe(time.perf_counter() - started)
+
+        response = event.response
+        prompt_tokens, completion_tokens = _usage(getattr(response, "raw", None))
+        if prompt_tokens is None or completion_tokens is None:
+            tokenizer = get_tokenizer()
+            if isinstance(event, LLMChatEndEvent):
+                prompt_text = "\n".join(str(message.content or "") for message in event.messages)
+                completion_text = str(response.message.content or "") if response is not None else ""
+            else:
+                prompt_text = event.prompt
+                completion_text = response.text if response is not None else ""
+            if prompt_tokens is None:
+                prompt_tokens = len(tokenizer(prompt_text))
+            if completion_tokens is None:
+                completion_tokens = len(tokenizer(completion_text))
+        LLM_TOKENS.labels("prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels("completion").inc(completion_tokens)
+
+
+_llm_handler: Optional[LLMMetricsHandler] = None
+_llm_handler_lock = threading.Lock()
+
+
+def instrument_llm() -> None:
+    """Attach :class:`LLMMetricsHandler` to the LlamaIndex root dispatcher (idempotent)."""
+    global _llm_handler
+    with _llm_handler_lock:
+        if _llm_handler is None:
+            _llm_handler = LLMMetricsHandler()
+            get_dispatcher().add_event_handler(_llm_handler)
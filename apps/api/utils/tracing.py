@@ -0,0 +1,152 @@
+"""
+OpenTelemetry tracing across the API, the Redis queue and the RQ workers.
+
+Spans are created with the module-level ``tracer``; until :func:`setup_tracing`
+installs an SDK provider they are no-ops, so instrumented code costs next to
+nothing when tracing is off.
+
+``OTEL_TRACES_EXPORTER`` selects the exporter: ``none`` (default), ``console``
+or ``otlp`` (OTLP over HTTP, endpoint from ``OTEL_EXPORTER_OTLP_ENDPOINT``,
+``http://localhost:4318`` by default). ``OTEL_SERVICE_NAME`` overrides the
+service name.
+
+The trace context crosses Redis in the job's ``meta`` (W3C ``traceparent``),
+together with the request's correlation ID: :func:`job_meta` builds it when
+enqueuing and :func:`job_span` continues the trace inside the worker, so one
+trace covers the upload request, the enqueue and every stage of the job.
+"""
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from opentelemetry import propagate, trace
+from opentelemetry.trace import Span, SpanKind
+
+from utils.logging_config import clear_correlation_id, correlation_id_var, set_correlation_id
+
+logger = logging.getLogger(__name__)
+
+API_SERVICE_NAME = "anclora-rag-api"
+WORKER_SERVICE_NAME = "anclora-rag-worker"
+
+# Keys in RQ job.meta
+TRACE_META_KEY = "otel"
+CORRELATION_META_KEY = "correlation_id"
+
+tracer = trace.get_tracer("anclora.rag")
+
+_configured = False
+_setup_lock = threading.Lock()
+
+
+def setup_tracing(service_name: str = API_SERVICE_NAME) -> None:
+    """
+    Install the tracer provider and exporter chosen by ``OTEL_TRACES_EXPORTER`` (idempotent).
+
+    Args:
+        service_name: ``service.name`` resource attribute unless ``OTEL_SERVICE_NAME`` is set
+    """
+    global _configured
+    with _setup_lock:
+        if _configured:
+            return
+        _configured = True
+
+        exporter_name = os.getenv("OTEL_TRACES_EXPORTER", "none").strip().lower()
+        if exporter_name in ("", "none"):
+            return
+
+        from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+        if exporter_name == "console":
+            exporter = ConsoleSpanExporter()
+        elif exporter_name == "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+            exporter = OTLPSpanExporter()
+        else:
+            logger.warning("Unknown OTEL_TRACES_EXPORTER '%s'; tracing disabled", exporter_name)
+            return
+
+        resource = Resource.create({SERVICE_NAME: os.getenv("OTEL_SERVICE_NAME", service_name)})
+        provider = TracerProvider(resource=resource)
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        trace.set_tracer_provider(provider)
+        logger.info("Tracing enabled: exporter=%s service=%s", exporter_name, resource.attributes[SERVICE_NAME])
+
+
+def flush_tracing() -> None:
+    """Export buffered spans now (RQ work horses exit without running atexit hooks)."""
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "force_flush"):
+        provider.force_flush()
+
+
+def shutdown_tracing() -> None:
+    """Flush and stop the exporter (no-op when tracing is off)."""
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+
+
+def job_meta() -> Dict[str, Any]:
+    """``job.meta`` entries carrying the current trace context and correlation ID to the worker."""
+    meta: Dict[str, Any] = {}
+    carrier: Dict[str, str] = {}
+    propagate.inject(carrier)
+    if carrier:
+        meta[TRACE_META_KEY] = carrier
+    correlation_id = correlation_id_var.get()
+    if correlation_id:
+        meta[CORRELATION_META_KEY] = correlation_id
+    return meta
+
+
+def enqueue_span(queue_name: str, job_name: str, count: int = 1):
+    """Producer span around an RQ enqueue; call :func:`job_meta` inside it so jobs become its children."""
+    return tracer.start_as_current_span(
+        f"rq.enqueue {job_name}",
+        kind=SpanKind.PRODUCER,
+        attributes={
+            "messaging.system": "rq",
+            "messaging.destination.name": queue_name,
+            "messaging.batch.message_count": count,
+        },
+    )
+
+
+@contextmanager
+def job_span(name: str, job: Any, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Span]:
+    """
+    Span for a job function, continuing the trace of the request that enqueued it.
+
+    Under RQ (``job`` given) the parent context and correlation ID come from
+    ``job.meta`` and spans are flushed when the job ends. Called directly
+    (synchronous ingestion, ``job`` is None) it is a child of the current span.
+    """
+    if job is None:
+        with tracer.start_as_current_span(name, attributes=attributes) as span:
+            yield span
+        return
+
+    setup_tracing(WORKER_SERVICE_NAME)
+    meta = job.meta or {}
+    if meta.get(CORRELATION_META_KEY):
+        set_correlation_id(meta[CORRELATION_META_KEY])
+    context = propagate.extract(meta.get(TRACE_META_KEY) or {})
+    try:
+        with tracer.start_as_current_span(
+            name,
+            context=context,
+            kind=SpanKind.CONSUMER,
+            attributes={"messaging.system": "rq", "messaging.message.id": job.id, **(attributes or {})},
+        ) as span:
+            yield span
+    finally:
+        clear_correlation_id()
+        flush_tracing()
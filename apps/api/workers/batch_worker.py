@@ -0,0 +1,432 @@
+"""Batch ingestion engine: parallel parsing and cross-document embedding batches."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from llama_index.core.schema import BaseNode
+from qdrant_client.http.models import FieldCondition, Filter, MatchAny
+from rq import get_current_job
+
+from database import async_postgres, document_catalog
+from database.batch_manager import BatchManager
+from models.document import DocumentStatus
+from rag import dedup
+from rag.pipeline import (
+    COLLECTION_NAME,
+    check_duplicate_document,
+    document_metadata,
+    drop_boilerplate,
+    embed_chunks,
+    ensure_collection,
+    get_qdrant_client,
+    split_document,
+)
+from rag.vector_store import CompactQdrantVectorStore
+from utils.metrics import DOCUMENT_CHUNKS, DOCUMENTS_INGESTED, PARSE_SECONDS, parser_label
+from utils.tracing import job_span
+from workers.ingestion_worker import (
+    calculate_content_hash,
+    lookup_near_duplicate,
+    notify_job_progress,
+    register_signature,
+    resolve_parser,
+    update_catalog,
+)
+
+logger = logging.getLogger(__name__)
+
+# Processes parsing files concurrently (parsers are CPU-bound pure Python)
+BATCH_PARSE_WORKERS = int(os.getenv("BATCH_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Chunks per embedding call; chunks of several documents are pooled to fill it
+BATCH_EMBED_SIZE = int(os.getenv("BATCH_EMBED_SIZE", "256"))
+
+
+@dataclass
+class _BatchDocument:
+    doc_id: str
+    filename: str
+    file_path: str
+    mime_type: str
+    document_id: str = ""
+    content_hash: str = ""
+    size_bytes: int = 0
+    pending_chunks: int = 0
+    chunk_count: int = 0
+    failed: bool = False
+    signature: Optional[object] = None
+    # Shown as the document's message in the batch (e.g. the near duplicate it resembles)
+    note: Optional[str] = None
+
+
+def _parse_file(file_path: str, filename: str, mime_type: str) -> Dict[str, object]:
+    """Read and parse one file (runs in a worker process)."""
+    payload = Path(file_path).read_bytes()
+    if not payload:
+        raise ValueError("Empty file uploaded")
+    parser = resolve_parser(filename, mime_type)
+    started = time.perf_counter()
+    text = parser(payload)
+    # Observed by the parent: samples recorded in a pool process would be lost without multiprocess mode
+    parse_seconds = time.perf_counter() - started
+    if not text.strip():
+        raise ValueError("Parsed document is empty")
+    return {
+        "text": text,
+        "content_hash": calculate_content_hash(payload),
+        "size_bytes": len(payload),
+        "parser": parser_label(parser),
+        "parse_seconds": parse_seconds,
+        # MinHash is CPU-bound too, so it is computed here rather than in the parent
+        "signature": dedup.minhash_signature(text) if dedup.DEDUP_NEAR_DUPLICATES else None,
+    }
+
+
+def _parse_executor() -> Executor:
+    if BATCH_PARSE_WORKERS > 1:
+        return ProcessPoolExecutor(max_workers=BATCH_PARSE_WORKERS)
+    return ThreadPoolExecutor(max_workers=1)
+
+
+def process_batch_task(
+    batch_id: str,
+    documents: List[Dict[str, str]],
+    collection_name: str = COLLECTION_NAME,
+    job_id: Optional[str] = None,
+    near_duplicates: Optional[str] = None,
+) -> Dict[str, object]:
+    """
+    Ingest the files of a batch into ``collection_name``.
+
+    Files are parsed in a process pool; as each one finishes its chunks join a
+    shared buffer that is embedded ``BATCH_EMBED_SIZE`` chunks at a time, so
+    small documents do not leave the embedding model under-used. A document
+    is marked completed in the batch once its last chunk has been upserted.
+    Failures are per document: a file that cannot be parsed, or whose chunks
+    fail to embed or upsert, is marked failed and the rest of the batch goes on.
+    If the job itself fails, every document still without a status is marked
+    failed and its chunks are removed before the error is re-raised.
+
+    Into the main collection, duplicates are handled as in single uploads:
+    exact duplicates are skipped and near duplicates are indexed with a note
+    or skipped, per ``near_duplicates``; both also within the job. Skipped files
+    count as completed with no chunks and the reason as their message.
+
+    Args:
+        batch_id: Batch UUID
+        documents: One ``{"doc_id", "filename", "file_path", "mime_type"}`` per file
+        collection_name: Target Qdrant collection (the batch's ``qdrant_collection``)
+        job_id: Job id used for notifications when not running under RQ
+        near_duplicates: ``"warn"`` or ``"reject"`` (default ``NEAR_DUPLICATE_ACTION``)
+
+    Returns:
+        Summary with completed/failed counts, chunks and throughput in docs/min
+    """
+    job = get_current_job()
+    attributes = {"batch.id": batch_id, "batch.documents": len(documents)}
+    with job_span("ingest.process_batch", job, attributes):
+        return _process_batch(job, batch_id, documents, collection_name, job_id, near_duplicates)
+
+
+def _process_batch(
+    job,
+    batch_id: str,
+    documents: List[Dict[str, str]],
+    collection_name: str,
+    job_id: Optional[str],
+    near_duplicates: Optional[str],
+) -> Dict[str, object]:
+    job_id = job.id if job else job_id
+    check_duplicates = collection_name == COLLECTION_NAME
+    reject_near_duplicates = dedup.near_duplicate_action(near_duplicates) == dedup.NEAR_DUPLICATE_REJECT
+    started = time.perf_counter()
+    started_at = time.time()
+
+    def notify(status: str, data: Dict) -> None:
+        if job_id:
+            notify_job_progress(job_id, status, {"operation": "batch", "batch_id": batch_id, **data})
+
+    # One event loop per job: every database call of the job shares its connection pool
+    loop = asyncio.new_event_loop()
+    manager = BatchManager()
+    batch_uuid = UUID(batch_id)
+    docs = [
+        _BatchDocument(
+            doc_id=item["doc_id"],
+            filename=item["filename"],
+            file_path=item["file_path"],
+            mime_type=item.get("mime_type") or "application/octet-stream",
+        )
+        for item in documents
+    ]
+    completed: List[_BatchDocument] = []
+    failed: List[_BatchDocument] = []
+    skipped: List[_BatchDocument] = []
+    # Content hash -> document id and document id -> MinHash signature of the files accepted by
+    # this job: signatures only reach the shared index once a file is indexed, so duplicates
+    # within the batch are checked here
+    accepted_hashes: Dict[str, str] = {}
+    accepted_signatures: Dict[str, object] = {}
+    total_chunks = 0
+
+    def record(updates: List[Dict]) -> None:
+        batch_state = loop.run_until_complete(manager.update_progress_many(batch_uuid, updates))
+        notify(
+            "processing",
+            {"completed": len(completed), "failed": len(failed), "skipped": len(skipped), "total": len(docs)},
+        )
+        if batch_state:
+            _notify_batch_progress(batch_id, batch_state)
+
+    def skip(doc: _BatchDocument, outcome: str, reason: str) -> None:
+        """Record a file left out as a duplicate."""
+        skipped.append(doc)
+        DOCUMENTS_INGESTED.labels(outcome).inc()
+        logger.info("Batch %s: %s skipped: %s", batch_id, doc.filename, reason)
+        record([{"doc_id": doc.doc_id, "status": DocumentStatus.COMPLETED.value, "chunks_count": 0, "error": reason}])
+
+    def duplicate_reason(doc: _BatchDocument) -> Optional[Tuple[str, str]]:
+        """``(outcome, reason)`` when the file must be skipped; notes a tolerated near duplicate on ``doc``."""
+        duplicate_of = accepted_hashes.get(doc.content_hash)
+        if duplicate_of is None:
+            existing = check_duplicate_document(doc.content_hash)
+            duplicate_of = existing["original_filename"] if existing else None
+        if duplicate_of:
+            return "duplicate", f"Duplicate of '{duplicate_of}'"
+        near_duplicate = None
+        if doc.signature is not None:
+            matches = [lookup_near_duplicate(doc.signature), _closest_signature(doc.signature, accepted_signatures)]
+            near_duplicate = max((match for match in matches if match), key=lambda match: match[1], default=None)
+        if near_duplicate:
+            similar_to, similarity = near_duplicate
+            message = f"{similarity:.0%} similar to '{similar_to}'"
+            if reject_near_duplicates:
+                return "near_duplicate", f"Near duplicate: {message}"
+            doc.note = f"Indexed near duplicate: {message}"
+        return None
+
+    def finish(finished: List[_BatchDocument], error: Optional[str] = None) -> None:
+        """Record documents that finished together with a single progress update."""
+        if not finished:
+            return
+        updates = []
+        for doc in finished:
+            if error:
+                doc.failed = True
+                failed.append(doc)
+                if accepted_hashes.get(doc.content_hash) == doc.document_id:
+                    del accepted_hashes[doc.content_hash]
+                accepted_signatures.pop(doc.document_id, None)
+                DOCUMENTS_INGESTED.labels("failed").inc()
+                logger.warning("Batch %s: %s failed: %s", batch_id, doc.filename, error)
+                updates.append({"doc_id": doc.doc_id, "status": DocumentStatus.FAILED.value, "error": error})
+                continue
+            completed.append(doc)
+            DOCUMENTS_INGESTED.labels("completed").inc()
+            DOCUMENT_CHUNKS.observe(doc.chunk_count)
+            updates.append({
+                "doc_id": doc.doc_id,
+                "status": DocumentStatus.COMPLETED.value,
+                "chunks_count": doc.chunk_count,
+                "error": doc.note,
+            })
+            if collection_name == COLLECTION_NAME:
+                register_signature(doc.document_id, doc.signature)
+                update_catalog(
+                    document_catalog.upsert_document,
+                    document_id=doc.document_id,
+                    filename=doc.filename,
+                    content_hash=doc.content_hash,
+                    content_type=doc.mime_type,
+                    size_bytes=doc.size_bytes,
+                    status=document_catalog.STATUS_INDEXED,
+                    chunk_count=doc.chunk_count,
+                )
+        record(updates)
+
+    client = None
+    try:
+        loop.run_until_complete(manager.start_batch(batch_uuid))
+        client = get_qdrant_client()
+        ensure_collection(client, collection_name)
+        vector_store = CompactQdrantVectorStore(
+            client=client,
+            collection_name=collection_name,
+            force_disable_check_same_thread=True,
+        )
+        notify("processing", {"completed": 0, "failed": 0, "total": len(docs)})
+
+        # (node, text to embed, owner) of chunks waiting for an embedding call
+        buffer: List[Tuple[BaseNode, str, _BatchDocument]] = []
+
+        def flush(count: int) -> None:
+            nonlocal total_chunks
+            pending = [item for item in buffer[:count] if not item[2].failed]
+            del buffer[:count]
+            if not pending:
+                return
+            owners = list({id(doc): doc for _, _, doc in pending}.values())
+            try:
+                embeddings = embed_chunks([text for _, text, _ in pending])
+                for (node, _, _), embedding in zip(pending, embeddings):
+                    node.embedding = embedding
+                vector_store.add([node for node, _, _ in pending])
+            except Exception as exc:
+                logger.error("Batch %s: embedding flush of %d chunks failed: %s", batch_id, len(pending), exc)
+                _discard_documents(client, collection_name, [doc.document_id for doc in owners])
+                finish(owners, error=f"Embedding failed: {exc}")
+                return
+
+            total_chunks += len(pending)
+            for _, _, doc in pending:
+                doc.pending_chunks -= 1
+            finish([doc for doc in owners if doc.pending_chunks == 0])
+
+        with _parse_executor() as executor:
+            futures = {
+                executor.submit(_parse_file, doc.file_path, doc.filename, doc.mime_type): doc for doc in docs
+            }
+            for future in as_completed(futures):
+                doc = futures[future]
+                _remove_file(doc.file_path)
+                try:
+                    parsed = future.result()
+                except Exception as exc:
+                    finish([doc], error=str(exc))
+                    continue
+
+                PARSE_SECONDS.labels(parsed["parser"]).observe(parsed["parse_seconds"])
+                doc.document_id = f"{Path(doc.filename).stem}-{UUID(doc.doc_id).hex}"
+                doc.content_hash = parsed["content_hash"]
+                doc.size_bytes = parsed["size_bytes"]
+                doc.signature = parsed["signature"]
+                if check_duplicates:
+                    duplicate = duplicate_reason(doc)
+                    if duplicate:
+                        skip(doc, *duplicate)
+                        continue
+                    accepted_hashes[doc.content_hash] = doc.document_id
+                    if doc.signature is not None:
+                        accepted_signatures[doc.document_id] = doc.signature
+                try:
+                    metadata = document_metadata(
+                        doc.document_id,
+                        datetime.now(timezone.utc).isoformat(),
+                        doc.content_hash,
+                        doc.mime_type,
+                        None,
+                    )
+                    nodes, embed_texts = split_document(doc.document_id, parsed["text"], metadata)
+                    nodes, embed_texts = drop_boilerplate(doc.document_id, nodes, embed_texts)
+                except Exception as exc:
+                    finish([doc], error=f"Chunking failed: {exc}")
+                    continue
+                if not nodes:
+                    finish([doc], error="Parsed document produced no chunks")
+                    continue
+
+                doc.pending_chunks = doc.chunk_count = len(nodes)
+                buffer.extend((node, text, doc) for node, text in zip(nodes, embed_texts))
+                while len(buffer) >= BATCH_EMBED_SIZE:
+                    flush(BATCH_EMBED_SIZE)
+
+        flush(len(buffer))
+
+        elapsed = time.perf_counter() - started
+        docs_per_minute = len(completed) / elapsed * 60 if elapsed > 0 else 0.0
+        result = {
+            "status": "completed",
+            "batch_id": batch_id,
+            "job_id": job_id,
+            "completed": len(completed),
+            "failed": len(failed),
+            "skipped": len(skipped),
+            "chunks": total_chunks,
+            "seconds": round(elapsed, 1),
+            "docs_per_minute": round(docs_per_minute, 1),
+            "started_at": started_at,
+            "finished_at": time.time(),
+        }
+        loop.run_until_complete(manager.record_throughput(batch_uuid, result))
+        notify("completed", result)
+        logger.info(
+            "Batch %s finished: %d completed, %d failed, %d skipped, %d chunks in %.1fs (%.1f docs/min)",
+            batch_id,
+            len(completed),
+            len(failed),
+            len(skipped),
+            total_chunks,
+            elapsed,
+            docs_per_minute,
+        )
+        return result
+
+    except Exception as exc:
+        logger.error("Batch %s failed: %s", batch_id, exc, exc_info=True)
+        # Documents without a final status would otherwise stay pending forever
+        recorded = {id(doc) for doc in completed + failed + skipped}
+        unrecorded = [doc for doc in docs if id(doc) not in recorded]
+        if client is not None:
+            _discard_documents(client, collection_name, [doc.document_id for doc in unrecorded if doc.document_id])
+        try:
+            finish(unrecorded, error=f"Batch failed: {exc}")
+        except Exception as record_exc:
+            logger.error("Batch %s: could not mark %d documents failed: %s", batch_id, len(unrecorded), record_exc)
+        notify("failed", {"error": str(exc)})
+        raise
+    finally:
+        for doc in docs:
+            _remove_file(doc.file_path)
+        loop.run_until_complete(async_postgres.close_pool())
+        loop.close()
+
+
+def _notify_batch_progress(batch_id: str, state: Dict[str, object]) -> None:
+    """Publish the batch counters on ``batch:{id}`` for ``/batch/{batch_id}/ws`` subscribers."""
+    try:
+        from clients.redis_queue import get_redis_connection
+
+        message = {"type": "batch_update", "batch_id": batch_id, **state}
+        get_redis_connection().publish(f"batch:{batch_id}", json.dumps(message))
+    except Exception as exc:
+        logger.warning("Failed to publish batch notification for %s: %s", batch_id, exc)
+
+
+def _closest_signature(signature, accepted: Dict[str, object]) -> Optional[Tuple[str, float]]:
+    """``(document_id, similarity)`` of the most similar signature in ``accepted`` above the threshold, or None."""
+    best: Optional[Tuple[str, float]] = None
+    for document_id, other in accepted.items():
+        similarity = dedup.signature_similarity(signature, other)
+        if similarity >= dedup.NEAR_DUPLICATE_THRESHOLD and (best is None or similarity > best[1]):
+            best = (document_id, similarity)
+    return best
+
+
+def _discard_documents(client, collection_name: str, document_ids: List[str]) -> None:
+    """Best-effort removal of chunks already upserted for documents that failed mid-batch."""
+    if not document_ids:
+        return
+    try:
+        client.delete(
+            collection_name=collection_name,
+            points_selector=Filter(must=[FieldCondition(key="document_id", match=MatchAny(any=document_ids))]),
+        )
+    except Exception as exc:
+        logger.warning("Failed to remove partial chunks of %s: %s", document_ids, exc)
+
+
+def _remove_file(file_path: str) -> None:
+    try:
+        Path(file_path).unlink(missing_ok=True)
+    except Exception as exc:  # pragma: no cover - best effort cleanup
+        logger.warning("Failed to remove temporary file %s: %s", file_path, exc)
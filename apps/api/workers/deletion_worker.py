@@ -0,0 +1,109 @@
+"""Background deletion of documents from the vector store, with progress notifications."""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import Dict, List, Optional
+
+from qdrant_client.http.models import FieldCondition, Filter, MatchAny, PointIdsList
+from rq import get_current_job
+
+from database import document_catalog
+from rag import dedup
+from rag.pipeline import COLLECTION_NAME, get_qdrant_client
+from workers.ingestion_worker import notify_job_progress
+
+logger = logging.getLogger(__name__)
+
+# Point ids deleted per Qdrant request
+DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", "1000"))
+
+
+def delete_documents_task(
+    document_ids: Optional[List[str]] = None,
+    job_id: Optional[str] = None,
+) -> Dict[str, object]:
+    """
+    Delete the chunks of the given documents (or of every document) in batches.
+
+    Point ids are collected with an indexed ``document_id`` filter and deleted
+    ``DELETE_BATCH_SIZE`` at a time with ``wait=False``, so Qdrant applies the
+    deletes in the background and the collection stays available for queries.
+    Progress is published on the job's WebSocket channel after every batch.
+
+    Args:
+        document_ids: Documents to delete, or None to delete all documents
+        job_id: Job id used for notifications when not running under RQ
+
+    Returns:
+        Summary with the number of deleted chunks
+    """
+    job = get_current_job()
+    job_id = job.id if job else job_id
+    target = "all" if document_ids is None else f"{len(document_ids)} documents"
+
+    def notify(status: str, data: Dict) -> None:
+        if job_id:
+            notify_job_progress(job_id, status, {"operation": "delete", **data})
+
+    try:
+        client = get_qdrant_client()
+        if not client.collection_exists(COLLECTION_NAME):
+            notify("completed", {"deleted": 0, "total": 0})
+            return {"status": "completed", "deleted": 0}
+
+        point_filter = None
+        if document_ids is not None:
+            point_filter = Filter(must=[FieldCondition(key="document_id", match=MatchAny(any=document_ids))])
+
+        total = client.count(collection_name=COLLECTION_NAME, count_filter=point_filter, exact=True).count
+        logger.info("Deleting %s: %d chunks", target, total)
+        notify("processing", {"deleted": 0, "total": total})
+
+        deleted = 0
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=COLLECTION_NAME,
+                scroll_filter=point_filter,
+                limit=DELETE_BATCH_SIZE,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False,
+            )
+            if points:
+                client.delete(
+                    collection_name=COLLECTION_NAME,
+                    points_selector=PointIdsList(points=[point.id for point in points]),
+                    wait=False,
+                )
+                deleted += len(points)
+                notify("processing", {"deleted": deleted, "total": total})
+            if offset is None:
+                break
+
+        try:
+            if document_ids is None:
+                document_catalog.delete_all_documents()
+            else:
+                document_catalog.delete_documents(document_ids)
+        except Exception as exc:
+            logger.error("Failed to update document catalog after deletion: %s", exc)
+
+        try:
+            if document_ids is None:
+                dedup.clear_index()
+            else:
+                dedup.remove_documents(document_ids)
+        except Exception as exc:
+            logger.error("Failed to update near-duplicate index after deletion: %s", exc)
+
+        notify("completed", {"deleted": deleted, "total": total, "document_ids": document_ids})
+        logger.info("Deleted %s: %d chunks", target, deleted)
+        return {"status": "completed", "deleted": deleted, "document_ids": document_ids}
+
+    except Exception as exc:
+        logger.error("Deletion of %s failed: %s", target, exc, exc_info=True)
+        notify("failed", {"error": str(exc)})
+        raise
@@ -7,20 +7,29 @@ import json
 import logging
 import uuid
 from pathlib import Path
-from typing import Callable, Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
+from database import document_catalog
 from packages.parsers.docx_parser import parse_docx_bytes
 from packages.parsers.markdown import parse_markdown_bytes
 from packages.parsers.pdf import parse_pdf_bytes
 from packages.parsers.text import parse_text_bytes
-from rag.pipeline import index_text, check_duplicate_document
+from rag import dedup
+from rag.pipeline import COLLECTION_NAME, index_text, check_duplicate_document, replace_document_text
 from rq import get_current_job
+from utils.metrics import DOCUMENTS_INGESTED, PARSE_SECONDS, parser_label
+from utils.tracing import job_span, tracer
 
 logger = logging.getLogger(__name__)
 
 
 Parser = Callable[[bytes], str]
 
+# "append" indexes every upload as a new document; "replace" updates the document with the same key
+INGEST_MODE_APPEND = "append"
+INGEST_MODE_REPLACE = "replace"
+INGEST_MODES = (INGEST_MODE_APPEND, INGEST_MODE_REPLACE)
+
 CONTENT_TYPE_PARSERS: Dict[str, Parser] = {
     "application/pdf": parse_pdf_bytes,
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document": parse_docx_bytes,
@@ -38,7 +47,13 @@ EXTENSION_PARSERS: Dict[str, Parser] = {
 }
 
 
-def _resolve_parser(filename: str, content_type: str) -> Parser:
+def resolve_parser(filename: str, content_type: str) -> Parser:
+    """
+    Return the parser for a file, by content type first and then by extension.
+
+    Raises:
+        ValueError: If neither the content type nor the extension is supported
+    """
     parser = CONTENT_TYPE_PARSERS.get(content_type)
     if parser:
         return parser
@@ -52,7 +67,15 @@ def _resolve_parser(filename: str, content_type: str) -> Parser:
     raise ValueError(f"Unsupported content type '{content_type}' for file '{filename}'")
 
 
-def _calculate_content_hash(payload: bytes) -> str:
+def _parse(parser: Parser, payload: bytes) -> str:
+    """Run ``parser`` on the file bytes, recording its duration per parser."""
+    label = parser_label(parser)
+    attributes = {"parser": label, "document.size_bytes": len(payload)}
+    with tracer.start_as_current_span("ingest.parse", attributes=attributes), PARSE_SECONDS.labels(label).time():
+        return parser(payload)
+
+
+def calculate_content_hash(payload: bytes) -> str:
     """
     Calculate SHA-256 hash of file content for duplicate detection.
 
@@ -65,7 +88,7 @@ def _calculate_content_hash(payload: bytes) -> str:
     return hashlib.sha256(payload).hexdigest()
 
 
-def _notify_job_progress(job_id: str, status: str, data: Dict = None):
+def notify_job_progress(job_id: str, status: str, data: Dict = None):
     """
     Publish job progress to Redis pub/sub for WebSocket notifications.
 
@@ -89,33 +112,146 @@ def _notify_job_progress(job_id: str, status: str, data: Dict = None):
         logger.warning(f"Failed to publish job notification for {job_id}: {str(exc)}")
 
 
-def process_single_document(file_path: str, filename: str, content_type: str) -> Dict[str, object]:
-    """Parse and index a single document, returning a summary payload."""
-    # Get current job ID for notifications
+def update_catalog(action: Callable[..., object], *args, **kwargs) -> None:
+    """
+    Apply one catalog write, logging instead of failing the job.
+
+    Qdrant remains the source of truth for retrieval; a catalog outage must not
+    lose an otherwise successful ingestion.
+    """
+    try:
+        action(*args, **kwargs)
+    except Exception as exc:
+        logger.error("Failed to update document catalog (%s): %s", action.__name__, exc)
+
+
+def _resolve_replace_id(filename: str, document_key: Optional[str]) -> str:
+    """
+    Document id updated by a ``replace`` upload.
+
+    Without an explicit ``document_key`` this is the latest catalogued document
+    with the same filename, so files first ingested in append mode (stored as
+    ``stem-<uuid>``) are replaced instead of duplicated; the filename stem is
+    used for files never seen before or when the catalog is unavailable.
+    """
+    if document_key:
+        return document_key
+    try:
+        existing = document_catalog.find_document_by_filename(filename)
+    except Exception as exc:
+        logger.warning("Could not look up %s in the document catalog: %s", filename, exc)
+        existing = None
+    return existing or Path(filename).stem
+
+
+def _find_near_duplicate(text: str, lookup: bool = True):
+    """
+    Compute the parsed text's MinHash signature and look up near duplicates in the LSH index.
+
+    Returns ``(signature, match)`` where match is ``(document_id, similarity)``
+    or None. Index failures are logged and treated as "no duplicate".
+    """
+    if not dedup.DEDUP_NEAR_DUPLICATES:
+        return None, None
+    signature = dedup.minhash_signature(text)
+    return signature, lookup_near_duplicate(signature) if lookup else None
+
+
+def lookup_near_duplicate(signature) -> Optional[Tuple[str, float]]:
+    """``(document_id, similarity)`` of the closest indexed near duplicate, or None (also on index failures)."""
+    try:
+        return dedup.find_near_duplicate(signature)
+    except Exception as exc:
+        logger.warning("Near-duplicate lookup failed: %s", exc)
+        return None
+
+
+def register_signature(document_id: str, signature) -> None:
+    """Add an indexed document to the near-duplicate index (best effort)."""
+    if signature is None:
+        return
+    try:
+        dedup.register_document(document_id, signature)
+    except Exception as exc:
+        logger.warning("Failed to register %s in the near-duplicate index: %s", document_id, exc)
+
+
+def process_single_document(
+    file_path: str,
+    filename: str,
+    content_type: str,
+    tags: Optional[List[str]] = None,
+    mode: str = INGEST_MODE_APPEND,
+    document_key: Optional[str] = None,
+    near_duplicates: Optional[str] = None,
+) -> Dict[str, object]:
+    """
+    Parse and index a single document, returning a summary payload.
+
+    In ``replace`` mode the document is stored under ``document_key`` (by
+    default the previous upload of the same filename, see
+    :func:`_resolve_replace_id`) and only chunks that changed since the stored
+    version are embedded; the summary reports how many chunks were reused.
+
+    A near duplicate of an indexed document is indexed and reported
+    (``near_duplicate_of``) with ``near_duplicates="warn"`` and skipped with
+    ``"reject"``; the default is ``NEAR_DUPLICATE_ACTION``.
+
+    Under RQ the work runs in a span that continues the trace of the upload
+    request (see :func:`utils.tracing.job_span`).
+    """
     job = get_current_job()
+    attributes = {"document.filename": filename, "document.content_type": content_type, "ingest.mode": mode}
+    with job_span("ingest.process_document", job, attributes) as span:
+        result = _process_single_document(
+            job, file_path, filename, content_type, tags, mode, document_key, near_duplicates
+        )
+        span.set_attribute("ingest.status", str(result["status"]))
+        span.set_attribute("document.chunks", int(result["chunks"]))
+        return result
+
+
+def _process_single_document(
+    job,
+    file_path: str,
+    filename: str,
+    content_type: str,
+    tags: Optional[List[str]],
+    mode: str,
+    document_key: Optional[str],
+    near_duplicates: Optional[str],
+) -> Dict[str, object]:
+    # Get current job ID for notifications
     job_id = job.id if job else None
+    document_id: Optional[str] = None
 
     try:
         # Notify: Starting processing
         if job_id:
-            _notify_job_progress(job_id, "processing", {"filename": filename})
+            notify_job_progress(job_id, "processing", {"filename": filename})
 
         path = Path(file_path)
         if not path.exists():
             raise FileNotFoundError(f"Temporary file not found: {file_path}")
 
-        parser = _resolve_parser(filename, content_type)
+        parser = resolve_parser(filename, content_type)
 
         payload = path.read_bytes()
         if not payload:
             raise ValueError("Empty file uploaded")
 
         # Calculate content hash for duplicate detection
-        content_hash = _calculate_content_hash(payload)
+        content_hash = calculate_content_hash(payload)
         logger.debug(f"Content hash for {filename}: {content_hash}")
 
+        replace_id = _resolve_replace_id(filename, document_key) if mode == INGEST_MODE_REPLACE else None
+
         # Check for duplicates
-        duplicate_info = check_duplicate_document(content_hash)
+        with tracer.start_as_current_span("ingest.duplicate_check"):
+            duplicate_info = check_duplicate_document(content_hash)
+        if duplicate_info and replace_id and duplicate_info["original_filename"] != replace_id:
+            # Replacing a document with content another document already has is still a replace
+            duplicate_info = None
         if duplicate_info:
             # Cleanup temp file
             try:
@@ -135,38 +271,81 @@ def process_single_document(file_path: str, filename: str, content_type: str) ->
 
             # Notify: Duplicate detected
             if job_id:
-                _notify_job_progress(job_id, "completed", {
+                notify_job_progress(job_id, "completed", {
                     "filename": filename,
                     "chunks": duplicate_info["chunks"],
                     "status": "duplicate",
                     "message": result["message"]
                 })
 
+            DOCUMENTS_INGESTED.labels("duplicate").inc()
             logger.info("Duplicate document detected: %s (hash: %s)", filename, content_hash[:16])
             return result
 
         # Notify: Parsing document
         if job_id:
-            _notify_job_progress(job_id, "processing", {
+            notify_job_progress(job_id, "processing", {
                 "filename": filename,
                 "step": "parsing"
             })
 
-        text = parser(payload)
+        text = _parse(parser, payload)
         if not text.strip():
             raise ValueError("Parsed document is empty")
 
-        document_id = f"{Path(filename).stem}-{uuid.uuid4().hex}"
-        logger.info("Indexing document %s", document_id)
+        # Near duplicates (re-exported PDFs, minor edits) are caught on the parsed text, before embedding.
+        # A replace is an intentional new version, so it is only registered, never looked up.
+        with tracer.start_as_current_span("ingest.near_duplicate_check"):
+            signature, near_duplicate = _find_near_duplicate(text, lookup=replace_id is None)
+        if near_duplicate and dedup.near_duplicate_action(near_duplicates) == dedup.NEAR_DUPLICATE_REJECT:
+            duplicate_of, similarity = near_duplicate
+            try:
+                path.unlink()
+            except Exception as exc:
+                logger.warning("Failed to remove temporary file %s: %s", file_path, exc)
+
+            result = {
+                "filename": filename,
+                "chunks": 0,
+                "status": "duplicate",
+                "duplicate_of": duplicate_of,
+                "similarity": round(similarity, 3),
+                "message": f"This document is {similarity:.0%} similar to '{duplicate_of}', already indexed",
+            }
+            if job_id:
+                notify_job_progress(job_id, "completed", dict(result))
+
+            DOCUMENTS_INGESTED.labels("near_duplicate").inc()
+            logger.info("Near-duplicate document detected: %s ~ %s (%.2f)", filename, duplicate_of, similarity)
+            return result
+
+        document_id = replace_id or f"{Path(filename).stem}-{uuid.uuid4().hex}"
+        logger.info("Indexing document %s (mode=%s)", document_id, mode)
+        update_catalog(
+            document_catalog.upsert_document,
+            document_id=document_id,
+            filename=filename,
+            content_hash=content_hash,
+            content_type=content_type,
+            size_bytes=len(payload),
+        )
 
         # Notify: Indexing
         if job_id:
-            _notify_job_progress(job_id, "processing", {
+            notify_job_progress(job_id, "processing", {
                 "filename": filename,
                 "step": "indexing"
             })
 
-        chunk_count = index_text(document_id, text, content_hash)
+        stats: Dict[str, int] = {}
+        with tracer.start_as_current_span("ingest.index", attributes={"document.id": document_id}):
+            if replace_id:
+                stats = replace_document_text(document_id, text, content_hash, content_type=content_type, tags=tags)
+                chunk_count = stats["chunks"]
+            else:
+                chunk_count = index_text(document_id, text, content_hash, content_type=content_type, tags=tags)
+        update_catalog(document_catalog.mark_document_indexed, document_id, chunk_count)
+        register_signature(document_id, signature)
 
         try:
             path.unlink()
@@ -174,28 +353,70 @@ def process_single_document(file_path: str, filename: str, content_type: str) ->
             logger.warning("Failed to remove temporary file %s: %s", file_path, exc)
 
         result = {"filename": filename, "chunks": chunk_count, "status": "completed"}
+        if near_duplicate:
+            duplicate_of, similarity = near_duplicate
+            result.update({
+                "near_duplicate_of": duplicate_of,
+                "similarity": round(similarity, 3),
+                "message": f"Indexed, but this document is {similarity:.0%} similar to '{duplicate_of}'",
+            })
+            logger.info("Indexed near duplicate %s ~ %s (%.2f)", filename, duplicate_of, similarity)
+        if replace_id:
+            result.update({
+                "document_id": document_id,
+                "mode": mode,
+                "reused_chunks": stats["reused"],
+                "embedded_chunks": stats["embedded"],
+                "deleted_chunks": stats["deleted"],
+            })
 
         # Notify: Completed
         if job_id:
-            _notify_job_progress(job_id, "completed", {
-                "filename": filename,
-                "chunks": chunk_count
+            notify_job_progress(job_id, "completed", {
+                key: value for key, value in result.items() if key != "status"
             })
 
+        DOCUMENTS_INGESTED.labels("completed").inc()
         logger.info("Completed ingestion for %s with %s chunks", filename, chunk_count)
         return result
 
     except Exception as exc:
+        DOCUMENTS_INGESTED.labels("failed").inc()
+        if document_id:
+            update_catalog(document_catalog.mark_document_failed, document_id, str(exc))
+
         # Notify: Failed
         if job_id:
-            _notify_job_progress(job_id, "failed", {
+            notify_job_progress(job_id, "failed", {
                 "filename": filename,
                 "error": str(exc)
             })
         raise
 
 
-def process_document_task(*_args, **_kwargs) -> None:
-    """Placeholder for batch ingestion tasks."""
-    # TODO: Integrate with batch ingestion pipeline once available.
-    pass
+def process_document_task(
+    doc_id: str,
+    batch_id: str,
+    file_path: str,
+    mime_type: Optional[str] = None,
+    collection_name: str = COLLECTION_NAME,
+    filename: Optional[str] = None,
+) -> Dict[str, object]:
+    """
+    Ingest a single batch document.
+
+    Kept for jobs enqueued one file at a time; runs a one-document batch
+    through :func:`workers.batch_worker.process_batch_task`.
+    """
+    from workers.batch_worker import process_batch_task
+
+    return process_batch_task(
+        batch_id=batch_id,
+        documents=[{
+            "doc_id": doc_id,
+            "filename": filename or Path(file_path).name,
+            "file_path": file_path,
+            "mime_type": mime_type,
+        }],
+        collection_name=collection_name,
+    )
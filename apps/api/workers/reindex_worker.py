@@ -0,0 +1,295 @@
+"""Zero-downtime full reindex into a new versioned collection behind the ``documents`` alias."""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from llama_index.core.node_parser import SentenceSplitter
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Direction, FieldCondition, Filter, MatchValue, OrderBy, Range
+from rq import get_current_job
+
+from rag.context import overlap_length
+from rag.text_store import hydrate_payloads
+from rag.pipeline import (
+    COLLECTION_NAME,
+    EMBED_MODEL,
+    NODE_PARSER,
+    collection_version,
+    create_collection,
+    get_payload_text,
+    get_qdrant_client,
+    index_text,
+    resolve_collection_alias,
+    switch_collection_alias,
+    versioned_collection_name,
+)
+from workers.ingestion_worker import notify_job_progress
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on chunks written per second, so the reindex does not compete with queries
+REINDEX_MAX_CHUNKS_PER_SECOND = float(os.getenv("REINDEX_MAX_CHUNKS_PER_SECOND", "200"))
+# Previous collection versions kept for rollback after a switch
+REINDEX_KEEP_VERSIONS = int(os.getenv("REINDEX_KEEP_VERSIONS", "1"))
+
+SCROLL_PAGE_SIZE = 256
+DOCUMENT_FIELDS = ["document_id", "content_hash", "content_type", "tags", "uploaded_at"]
+
+# (chunk count, latest (uploaded_at, content_hash)): changes when a document is replaced or extended
+DocumentVersion = Tuple[int, Tuple[str, str]]
+
+
+def list_collection_versions(client: QdrantClient) -> List[str]:
+    """Return the versioned physical collections, oldest first."""
+    names = [col.name for col in client.get_collections().collections or []]
+    versioned = [name for name in names if collection_version(name) is not None]
+    return sorted(versioned, key=collection_version)
+
+
+def _version_key(payload: Dict[str, Any]) -> Tuple[str, str]:
+    return payload.get("uploaded_at") or "", payload.get("content_hash") or ""
+
+
+def _list_document_versions(
+    client: QdrantClient,
+    collection_name: str,
+    document_id: Optional[str] = None,
+) -> Dict[str, DocumentVersion]:
+    """Return the :data:`DocumentVersion` of every document in the collection (or only of ``document_id``)."""
+    versions: Dict[str, DocumentVersion] = {}
+    scroll_filter = None
+    if document_id is not None:
+        scroll_filter = Filter(must=[FieldCondition(key="document_id", match=MatchValue(value=document_id))])
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            scroll_filter=scroll_filter,
+            limit=SCROLL_PAGE_SIZE,
+            offset=offset,
+            with_payload=["document_id", "uploaded_at", "content_hash"],
+            with_vectors=False,
+        )
+        for point in points:
+            payload = point.payload or {}
+            point_document_id = payload.get("document_id")
+            if not point_document_id:
+                continue
+            count, latest = versions.get(point_document_id, (0, ("", "")))
+            versions[point_document_id] = (count + 1, max(latest, _version_key(payload)))
+        if offset is None:
+            return versions
+
+
+def _delete_document(client: QdrantClient, collection_name: str, document_id: str) -> None:
+    client.delete(
+        collection_name=collection_name,
+        points_selector=Filter(must=[FieldCondition(key="document_id", match=MatchValue(value=document_id))]),
+    )
+
+
+def _load_document(client: QdrantClient, collection_name: str, document_id: str) -> Optional[Dict[str, object]]:
+    """
+    Rebuild a document's text from its stored chunks, in chunk_index order.
+
+    Consecutive chunks share the splitter overlap, which is removed so the
+    reconstructed text can be split again with different settings.
+    """
+    text = ""
+    metadata: Dict[str, object] = {}
+    lower_bound = 0
+    document_filter = FieldCondition(key="document_id", match=MatchValue(value=document_id))
+    while True:
+        page_filter = Filter(must=[document_filter, FieldCondition(key="chunk_index", range=Range(gte=lower_bound))])
+        points, _ = client.scroll(
+            collection_name=collection_name,
+            scroll_filter=page_filter,
+            limit=SCROLL_PAGE_SIZE,
+            order_by=OrderBy(key="chunk_index", direction=Direction.ASC),
+            with_payload=True,
+            with_vectors=False,
+        )
+        hydrate_payloads(point.payload for point in points if point.payload)
+        for point in points:
+            payload = point.payload or {}
+            if not metadata:
+                metadata = {key: payload.get(key) for key in DOCUMENT_FIELDS}
+            chunk_text = get_payload_text(payload)
+            overlap = overlap_length(text, chunk_text) if text else 0
+            text += chunk_text[overlap:] if overlap else ("\n" if text else "") + chunk_text
+        if len(points) < SCROLL_PAGE_SIZE:
+            break
+        lower_bound = points[-1].payload["chunk_index"] + 1
+
+    if not metadata:
+        return None
+    return {"text": text, **metadata}
+
+
+def reindex_collection_task(
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    max_chunks_per_second: float = REINDEX_MAX_CHUNKS_PER_SECOND,
+    job_id: Optional[str] = None,
+) -> Dict[str, object]:
+    """
+    Rebuild the whole corpus into a new versioned collection and switch the alias to it.
+
+    Documents are reconstructed from the chunk text stored in the live
+    collection, split with the requested settings, embedded with the current
+    model and written to ``documents_v{N+1}`` at no more than
+    ``max_chunks_per_second``. Documents ingested, replaced or extended while
+    the reindex runs are (re)copied by a catch-up pass that compares each
+    document's version with the one copied, documents deleted meanwhile are
+    dropped, then the alias is switched atomically. The previous collection is kept
+    (see ``REINDEX_KEEP_VERSIONS``) so :func:`rollback_collection` can restore it.
+
+    Args:
+        chunk_size: New splitter chunk size (defaults to the current one)
+        chunk_overlap: New splitter overlap (defaults to the current one)
+        max_chunks_per_second: Write throttle (<= 0 disables throttling)
+        job_id: Job id used for notifications when not running under RQ
+
+    Returns:
+        Summary with the new collection name and counts
+    """
+    job = get_current_job()
+    job_id = job.id if job else job_id
+
+    def notify(status: str, data: Dict) -> None:
+        if job_id:
+            notify_job_progress(job_id, status, {"operation": "reindex", **data})
+
+    try:
+        client = get_qdrant_client()
+        source = resolve_collection_alias(client) or COLLECTION_NAME
+        versions = [collection_version(name) for name in list_collection_versions(client)]
+        target = versioned_collection_name(max(versions, default=0) + 1)
+
+        node_parser = SentenceSplitter(
+            chunk_size=chunk_size or NODE_PARSER.chunk_size,
+            chunk_overlap=chunk_overlap if chunk_overlap is not None else NODE_PARSER.chunk_overlap,
+        )
+        dimension = len(EMBED_MODEL.get_text_embedding("dimension probe"))
+        create_collection(client, target, dimension=dimension)
+        logger.info("Reindexing '%s' into '%s' (chunk_size=%d)", source, target, node_parser.chunk_size)
+
+        # Version of each document taken just before it was read for the copy (None: already gone)
+        copied: Dict[str, Optional[DocumentVersion]] = {}
+        chunks_written = 0
+        started = time.perf_counter()
+
+        current = _list_document_versions(client, source)
+        pending: Set[str] = set(current)
+        total = len(pending)
+        notify("processing", {"source": source, "target": target, "documents": 0, "total": total})
+
+        while pending:
+            for document_id in sorted(pending):
+                if document_id in copied:
+                    # Changed since it was copied: drop the stale chunks before copying it again
+                    _delete_document(client, target, document_id)
+                # Snapshot before reading: a change made during the read shows up as a newer version
+                copied[document_id] = _list_document_versions(client, source, document_id).get(document_id)
+                document = _load_document(client, source, document_id)
+                if document is None:
+                    continue
+
+                chunks_written += index_text(
+                    document_id,
+                    document["text"],
+                    document.get("content_hash"),
+                    content_type=document.get("content_type"),
+                    tags=document.get("tags"),
+                    collection_name=target,
+                    uploaded_at=document.get("uploaded_at"),
+                    node_parser=node_parser,
+                )
+
+                if max_chunks_per_second > 0:
+                    # Sleep until the write rate is back under the limit
+                    ahead = chunks_written / max_chunks_per_second - (time.perf_counter() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+
+                notify("processing", {"target": target, "documents": len(copied), "total": total})
+
+            # Catch-up pass: documents ingested, replaced or extended in the live collection meanwhile
+            current = _list_document_versions(client, source)
+            pending = {document_id for document_id, version in current.items() if copied.get(document_id) != version}
+            total = len(copied) + len(pending - copied.keys())
+
+        # Documents deleted from the live collection while we were copying
+        removed = copied.keys() - current.keys()
+        for document_id in removed:
+            _delete_document(client, target, document_id)
+
+        if resolve_collection_alias(client) is None and source == COLLECTION_NAME:
+            # Legacy deployment with a physical "documents" collection: the name must be
+            # freed before it can become an alias, so there is a brief gap and no rollback.
+            logger.warning("Replacing legacy physical collection '%s' with an alias", COLLECTION_NAME)
+            client.delete_collection(COLLECTION_NAME)
+        switch_collection_alias(client, target)
+
+        retired = _prune_old_versions(client, keep=REINDEX_KEEP_VERSIONS, current=target)
+
+        result = {
+            "status": "completed",
+            "source": source,
+            "collection": target,
+            "documents": len(copied) - len(removed),
+            "chunks": chunks_written,
+            "retired": retired,
+            "seconds": round(time.perf_counter() - started, 1),
+        }
+        notify("completed", result)
+        logger.info("Reindex completed: %s", result)
+        return result
+
+    except Exception as exc:
+        logger.error("Reindex failed: %s", exc, exc_info=True)
+        notify("failed", {"error": str(exc)})
+        raise
+
+
+def _prune_old_versions(client: QdrantClient, keep: int, current: str) -> List[str]:
+    """Delete versioned collections older than the ``keep`` most recent previous ones."""
+    previous = [name for name in list_collection_versions(client) if name != current]
+    retired = previous[:-keep] if keep > 0 else previous
+    for name in retired:
+        logger.info("Deleting retired collection '%s'", name)
+        client.delete_collection(name)
+    return retired
+
+
+def rollback_collection(target: Optional[str] = None) -> Dict[str, object]:
+    """
+    Point the alias back at a previous collection version.
+
+    Args:
+        target: Collection to restore (defaults to the newest version older than the current one)
+
+    Returns:
+        The previous and restored collection names
+
+    Raises:
+        ValueError: If there is no collection to roll back to
+    """
+    client = get_qdrant_client()
+    current = resolve_collection_alias(client)
+    versions = list_collection_versions(client)
+
+    if target is None:
+        older = [name for name in versions if current and collection_version(name) < collection_version(current)]
+        if not older:
+            raise ValueError("No previous collection version available for rollback")
+        target = older[-1]
+    elif target not in versions:
+        raise ValueError(f"Collection '{target}' does not exist")
+
+    switch_collection_alias(client, target)
+    return {"previous": current, "collection": target}
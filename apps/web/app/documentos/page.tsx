@@ -94,10 +94,8 @@ const COPY = {
     en: "Are you ABSOLUTELY sure you want to delete ALL documents from the RAG? This action CANNOT BE UNDONE and will permanently erase your entire knowledge base.",
   },
   deleteAllSuccess: {
-    es: (count: number) =>
-      `Se eliminaron exitosamente ${count} chunks de la base de conocimiento`,
-    en: (count: number) =>
-      `Successfully deleted ${count} chunks from the knowledge base`,
+    es: "Eliminación de la base de conocimiento iniciada en segundo plano",
+    en: "Knowledge base deletion started in the background",
   },
   deleteAllError: {
     es: "Error al eliminar todos los documentos",
@@ -224,11 +222,9 @@ export default function DocumentosPage() {
         throw new Error("Failed to delete all documents");
       }
 
-      const data = await response.json();
-
       setNotification({
         type: "success",
-        message: COPY.deleteAllSuccess[language](data.deleted_count || 0),
+        message: COPY.deleteAllSuccess[language],
       });
 
       // Reload the document list
@@ -15,6 +15,7 @@ interface DocumentDetails {
   filename: string;
   chunk_count: number;
   chunks: Chunk[];
+  next_cursor?: number | null;
 }
 
 interface DocumentViewerModalProps {
@@ -60,6 +61,10 @@ const COPY = {
     es: "Copiado",
     en: "Copied",
   },
+  loadMore: {
+    es: "Cargar más fragmentos",
+    en: "Load more chunks",
+  },
 };
 
 export default function DocumentViewerModal({
@@ -72,6 +77,7 @@ export default function DocumentViewerModal({
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [copiedChunkId, setCopiedChunkId] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
 
   useEffect(() => {
     if (!isOpen || !documentId) {
@@ -105,6 +111,32 @@ export default function DocumentViewerModal({
     fetchDocument();
   }, [isOpen, documentId]);
 
+  const handleLoadMore = async () => {
+    if (!document || document.next_cursor == null || !documentId) return;
+
+    setIsLoadingMore(true);
+    try {
+      const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+      const encodedId = encodeURIComponent(documentId);
+      const response = await fetch(`${apiUrl}/documents/${encodedId}?after=${document.next_cursor}`);
+
+      if (!response.ok) {
+        throw new Error("Failed to fetch document");
+      }
+
+      const data: DocumentDetails = await response.json();
+      setDocument({
+        ...document,
+        chunks: [...document.chunks, ...data.chunks],
+        next_cursor: data.next_cursor,
+      });
+    } catch (err) {
+      setError(err instanceof Error ? err.message : "Unknown error");
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   const handleCopyChunk = async (text: string, chunkId: string) => {
     try {
       await navigator.clipboard.writeText(text);
@@ -208,6 +240,17 @@ export default function DocumentViewerModal({
                   </p>
                 </div>
               ))}
+              {document.next_cursor != null && (
+                <div className="flex justify-center">
+                  <button
+                    onClick={handleLoadMore}
+                    disabled={isLoadingMore}
+                    className="rounded-lg border border-gray-300 px-4 py-2 text-sm font-medium text-gray-700 transition-colors hover:bg-gray-100 disabled:opacity-50 dark:border-slate-600 dark:text-slate-300 dark:hover:bg-slate-800"
+                  >
+                    {isLoadingMore ? COPY.loading[language] : COPY.loadMore[language]}
+                  </button>
+                </div>
+              )}
             </div>
           )}
         </div>
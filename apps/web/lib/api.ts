@@ -69,11 +69,14 @@ export interface DocumentHistoryItem {
   chunks: number;
   created_at?: string | null;
   uploaded_at?: string | null;
+  status?: 'processing' | 'indexed' | 'failed';
+  size_bytes?: number | null;
 }
 
 export interface DocumentHistoryResponse {
   documents: DocumentHistoryItem[];
   total: number;
+  next_cursor?: string | null;
 }
 
 export const getDocumentHistory = async (limit: number = 50): Promise<DocumentHistoryResponse> => {